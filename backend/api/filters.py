@@ -5,6 +5,7 @@ import django_filters
 from django_filters import rest_framework as filters
 from django.db import models
 from pipelines.models import Pipeline, Record, Field
+from pipelines.record_counts import active_record_count_subquery
 from relationships.models import Relationship
 
 
@@ -38,15 +39,15 @@ class PipelineFilter(filters.FilterSet):
     
     def filter_record_count_min(self, queryset, name, value):
         """Filter by minimum record count"""
-        return queryset.annotate(
-            record_count=models.Count('records', filter=models.Q(records__is_deleted=False))
-        ).filter(record_count__gte=value)
+        return queryset.alias(
+            live_record_count=active_record_count_subquery()
+        ).filter(live_record_count__gte=value)
     
     def filter_record_count_max(self, queryset, name, value):
         """Filter by maximum record count"""
-        return queryset.annotate(
-            record_count=models.Count('records', filter=models.Q(records__is_deleted=False))
-        ).filter(record_count__lte=value)
+        return queryset.alias(
+            live_record_count=active_record_count_subquery()
+        ).filter(live_record_count__lte=value)
 
 
 class DynamicRecordFilter(filters.FilterSet):
@@ -189,18 +190,8 @@ class DynamicRecordFilter(filters.FilterSet):
         if not value:
             return queryset
         
-        # Use PostgreSQL full-text search if available
-        try:
-            from django.contrib.postgres.search import SearchQuery, SearchRank
-            search_query = SearchQuery(value)
-            return queryset.filter(
-                search_vector=search_query
-            ).annotate(
-                rank=SearchRank('search_vector', search_query)
-            ).order_by('-rank')
-        except:
-            # Fallback to JSON field search
-            return queryset.filter(data__icontains=value)
+        from pipelines.search import search_records
+        return search_records(queryset, value)
     
     def filter_choice_in(self, queryset, name, value):
         """Filter for multiple choice values"""
@@ -300,11 +291,9 @@ class GlobalSearchFilter(filters.FilterSet):
         if not value:
             return queryset
         
-        # Search in title and data fields
-        return queryset.filter(
-            models.Q(title__icontains=value) |
-            models.Q(data__icontains=value)
-        )
+        # Ranked full-text search over the weighted search vector
+        from pipelines.search import search_records
+        return search_records(queryset, value)
     
     def filter_pipeline_ids(self, queryset, name, value):
         """Filter by multiple pipeline IDs"""
@@ -5,6 +5,9 @@ from rest_framework import serializers
 from rest_framework.fields import empty
 from django.contrib.auth import get_user_model
 from pipelines.models import Pipeline, Field, Record, FieldGroup
+from pipelines.record_counts import live_record_count
+from pipelines.relation_hydration import RelationHydratingListSerializer, get_relation_values
+from pipelines.title_templates import TITLE_RELATIONS_ATTR
 from relationships.models import RelationshipType, Relationship
 from authentication.models import UserType
 from authentication.permissions import SyncPermissionManager
@@ -192,7 +195,7 @@ class PipelineSerializer(serializers.ModelSerializer):
     """Pipeline serializer with related data"""
     fields = FieldSerializer(many=True, read_only=True)
     field_groups = serializers.SerializerMethodField()
-    record_count = serializers.IntegerField(read_only=True)
+    record_count = serializers.SerializerMethodField()
     created_by = UserSerializer(read_only=True)
     
     def get_field_groups(self, obj):
@@ -212,6 +215,9 @@ class PipelineSerializer(serializers.ModelSerializer):
             for fg in field_groups
         ]
     
+    def get_record_count(self, obj):
+        return live_record_count(obj)
+    
     class Meta:
         model = Pipeline
         fields = [
@@ -228,7 +234,7 @@ class PipelineSerializer(serializers.ModelSerializer):
 
 class PipelineListSerializer(serializers.ModelSerializer):
     """Lightweight pipeline serializer for list views"""
-    record_count = serializers.IntegerField(read_only=True)
+    record_count = serializers.SerializerMethodField()
     field_count = serializers.SerializerMethodField()
     
     class Meta:
@@ -239,6 +245,9 @@ class PipelineListSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
     
+    def get_record_count(self, obj):
+        return live_record_count(obj)
+    
     def get_field_count(self, obj):
         return obj.fields.count()
 
@@ -256,11 +265,11 @@ class RecordSerializer(serializers.ModelSerializer):
             'created_by', 'updated_by', 'created_at', 'updated_at'
         ]
         read_only_fields = ['title']
+        list_serializer_class = RelationHydratingListSerializer
     
     def to_representation(self, instance):
         """Override to dynamically generate title using current pipeline template"""
         from pipelines.record_operations import RecordUtils
-        from pipelines.relation_field_handler import RelationFieldHandler
 
         data = super().to_representation(instance)
 
@@ -269,7 +278,8 @@ class RecordSerializer(serializers.ModelSerializer):
         generated_title = RecordUtils.generate_title(
             instance.data,
             instance.pipeline.name,
-            instance.pipeline
+            instance.pipeline,
+            relation_display=getattr(instance, TITLE_RELATIONS_ATTR, None)
         )
         data['title'] = generated_title
         # Also add display_name for frontend compatibility
@@ -279,15 +289,12 @@ class RecordSerializer(serializers.ModelSerializer):
         data['pipeline_name'] = instance.pipeline.name
 
         # Add relation field data from Relationship table with display values (including bidirectional)
-        relation_fields = instance.pipeline.fields.filter(field_type='relation', is_deleted=False)
-        for field in relation_fields:
-            handler = RelationFieldHandler(field)
-            # Use the new bidirectional-aware method that handles display values automatically
-            related_value = handler.get_related_records_with_display(instance)
-
+        # List serializers hydrate the whole page up front, see pipelines.relation_hydration
+        relation_values = get_relation_values(instance)
+        if relation_values:
             if data.get('data') is None:
                 data['data'] = {}
-            data['data'][field.slug] = related_value
+            data['data'].update(relation_values)
 
         return data
     
@@ -414,11 +421,11 @@ class DynamicRecordSerializer(serializers.ModelSerializer):
             'created_by', 'updated_by', 'created_at', 'updated_at'
         ]
         read_only_fields = ['title', 'pipeline']
+        list_serializer_class = RelationHydratingListSerializer
     
     def to_representation(self, instance):
         """Override to dynamically generate title using current pipeline template"""
         from pipelines.record_operations import RecordUtils
-        from pipelines.relation_field_handler import RelationFieldHandler
 
         data = super().to_representation(instance)
 
@@ -436,21 +443,19 @@ class DynamicRecordSerializer(serializers.ModelSerializer):
                     processed_data[key] = value
 
         # Add relation field data from Relationship table with display values (including bidirectional)
-        relation_fields = instance.pipeline.fields.filter(field_type='relation', is_deleted=False)
-        for field in relation_fields:
-            handler = RelationFieldHandler(field)
-            # Use the new bidirectional-aware method that handles display values automatically
-            related_value = handler.get_related_records_with_display(instance)
-
+        # List serializers hydrate the whole page up front, see pipelines.relation_hydration
+        relation_values = get_relation_values(instance)
+        if relation_values:
             if data.get('data') is None:
                 data['data'] = {}
-            data['data'][field.slug] = related_value
+            data['data'].update(relation_values)
 
         # Generate title dynamically using processed field values
         generated_title = RecordUtils.generate_title(
             processed_data,
             instance.pipeline.name,
-            instance.pipeline
+            instance.pipeline,
+            relation_display=getattr(instance, TITLE_RELATIONS_ATTR, None)
         )
         data['title'] = generated_title
         # Also add display_name for frontend compatibility
@@ -850,36 +855,15 @@ class BulkRecordSerializer(serializers.Serializer):
     )
     
     def validate_records(self, value):
-        """Validate each record in the bulk operation"""
+        """
+        Check the request shape only. Rows are validated against the pipeline
+        schema in one batch by BulkRecordWriter, which reports per-row errors.
+        """
         pipeline = self.context.get('pipeline')
         if not pipeline:
             raise serializers.ValidationError("Pipeline context required")
         
-        validated_records = []
-        errors = []
-        
-        for i, record_data in enumerate(value):
-            try:
-                validation_result = pipeline.validate_record_data(record_data)
-                if validation_result['is_valid']:
-                    validated_records.append(validation_result['cleaned_data'])
-                else:
-                    errors.append({
-                        'index': i,
-                        'errors': validation_result['errors']
-                    })
-            except Exception as e:
-                errors.append({
-                    'index': i,
-                    'errors': {'general': [str(e)]}
-                })
-        
-        if errors:
-            raise serializers.ValidationError({
-                'validation_errors': errors
-            })
-        
-        return validated_records
+        return value
 
 
 # AI Serializers for comprehensive AI integration
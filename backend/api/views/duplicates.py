@@ -173,21 +173,16 @@ class DuplicateRuleViewSet(viewsets.ModelViewSet):
             input_data = serializer.validated_data['record1_data']
             exclude_record_id = serializer.validated_data.get('record2_data', {}).get('exclude_record_id')
             
-            # Get all records from the pipeline
-            from pipelines.models import Record
-            records = Record.objects.filter(
-                pipeline=rule.pipeline
-            )
-            
-            if exclude_record_id:
-                records = records.exclude(id=exclude_record_id)
-            
             # Initialize logic engine
             # In multi-tenant architecture, tenant context is managed by schema
             tenant_id = getattr(request, 'tenant', None)
             tenant_id = getattr(tenant_id, 'id', None) if tenant_id else None
             engine = DuplicateLogicEngine(tenant_id)
             
+            # Get candidate records sharing a blocking key with the input data
+            from duplicates.signals import get_candidate_records
+            records = get_candidate_records(rule, input_data, exclude_record_id, engine)
+            
             potential_duplicates = []
             
             # Check against each record
@@ -15,6 +15,7 @@ import io
 import json
 
 from pipelines.models import Pipeline, Field, Record, FieldGroup
+from pipelines.record_counts import active_record_count_subquery, get_record_counts
 from api.serializers import (
     PipelineSerializer, PipelineListSerializer, FieldSerializer,
     RecordSerializer, DynamicRecordSerializer, FieldGroupSerializer
@@ -42,7 +43,7 @@ class PipelineViewSet(viewsets.ModelViewSet):
         """Get filtered queryset based on user permissions"""
         user = self.request.user
         queryset = Pipeline.objects.filter(is_active=True).annotate(
-            active_record_count=Count('records', filter=models.Q(records__is_deleted=False))
+            active_record_count=active_record_count_subquery()
         ).select_related('created_by').prefetch_related('fields')
         
         # Apply permission filtering
@@ -120,8 +121,9 @@ class PipelineViewSet(viewsets.ModelViewSet):
         
         # Calculate analytics
         today = timezone.now().date()
+        record_counts = get_record_counts([pipeline.id])[pipeline.id]
         analytics_data = {
-            'record_count': pipeline.record_count,
+            'record_count': record_counts.active,
             'records_created_today': pipeline.records.filter(
                 created_at__date=today,
                 is_deleted=False
@@ -137,7 +139,7 @@ class PipelineViewSet(viewsets.ModelViewSet):
             ),
             'active_users': self._get_active_users_count(pipeline),
             'recent_activity': self._get_recent_activity(pipeline),
-            'status_distribution': self._get_status_distribution(pipeline),
+            'status_distribution': self._get_status_distribution(record_counts),
             'creation_trends': self._get_creation_trends(pipeline)
         }
         
@@ -309,17 +311,10 @@ class PipelineViewSet(viewsets.ModelViewSet):
         
         return activity
     
-    def _get_status_distribution(self, pipeline):
-        """Get distribution of record statuses"""
-        from django.db.models import Count
-        
-        distribution = pipeline.records.filter(
-            is_deleted=False
-        ).values('status').annotate(
-            count=Count('id')
-        ).order_by('status')
-        
-        return {item['status']: item['count'] for item in distribution}
+    def _get_status_distribution(self, record_counts):
+        """Get distribution of record statuses from the maintained counts"""
+        by_status = record_counts.by_status
+        return {status: by_status[status] for status in sorted(by_status)}
     
     def _get_creation_trends(self, pipeline):
         """Get record creation trends over the last 30 days"""
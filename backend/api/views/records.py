@@ -4,6 +4,7 @@ Record API views with dynamic schema adaptation
 from rest_framework import viewsets, status, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound, PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from django.db.models import Q
@@ -15,6 +16,7 @@ from django.utils.decorators import method_decorator
 import asyncio
 
 from pipelines.models import Pipeline, Record
+from pipelines.bulk_operations import BulkRecordWriter
 from api.serializers import (
     RecordSerializer, DynamicRecordSerializer, RecordRelationshipSerializer,
     BulkRecordSerializer
@@ -176,163 +178,56 @@ class RecordViewSet(viewsets.ModelViewSet):
         # Handle search parameter first (most important for contact resolution)
         search_query = self.request.query_params.get('search')
         if search_query:
-            from django.db.models import Q
-            queryset = queryset.filter(
-                Q(title__icontains=search_query) |
-                Q(data__icontains=search_query)
-            )
-            print(f"🔍 Applied search filter for '{search_query}', resulting queryset count: {queryset.count()}")
+            # Ranked full-text search over the weighted search vector
+            from pipelines.search import search_records
+            queryset = search_records(queryset, search_query)
+
+        # Saved filter views: the boolean query is compiled to a single SQL condition
+        saved_filter_id = self.request.query_params.get('saved_filter')
+        if saved_filter_id:
+            from pipelines.models import SavedFilter
+            from django.core.exceptions import ValidationError as DjangoValidationError
+            try:
+                saved_filter = SavedFilter.objects.select_related('pipeline', 'created_by').get(
+                    id=saved_filter_id,
+                    pipeline_id=self.kwargs.get('pipeline_pk')
+                )
+            except (SavedFilter.DoesNotExist, DjangoValidationError):
+                raise NotFound('Saved filter not found')
+            if not saved_filter.can_user_access(self.request.user):
+                raise PermissionDenied('You do not have access to this saved filter')
+            queryset = saved_filter.filter_records(queryset)
 
-        # Handle custom JSONB field filtering directly for ALL field types
+        # JSONB field filters (data__<slug>[__<op>]) are planned against the pipeline's field types
+        ordering = self.request.query_params.get('ordering')
+        has_data_filters = any(param.startswith('data__') for param in self.request.query_params)
+        pipeline = self._get_filter_pipeline() if has_data_filters or ordering else None
+        if has_data_filters:
+            from pipelines.query_planner import get_filter_plan
+            self._filter_plan = get_filter_plan(pipeline, self.request.query_params.keys())
+            queryset = self._filter_plan.apply(queryset, self.request.query_params)
+
+        # Ordering by columns or field values; field sorts use the indexed expression
+        sorted_slugs = []
+        if ordering:
+            from pipelines.query_planner import RecordQueryPlanner
+            order_by, sorted_slugs = RecordQueryPlanner(pipeline).ordering(ordering, columns=self.ordering_fields)
+            if order_by:
+                queryset = queryset.order_by(*order_by)
+
+        # Range filters and sorts feed the expression-index advisor
+        if pipeline is not None:
+            from pipelines.index_advisor import record_field_usage
+            record_field_usage(pipeline.id, getattr(self, '_filter_plan', None), sorted_slugs)
+
+        # Column filters
         for param_name, param_value in self.request.query_params.items():
             if not param_value:  # Skip empty parameters
                 continue
-            
-            # Skip search parameter as we handled it above
-            if param_name == 'search':
-                continue
-                
+
             try:
-                # User field filtering: data__sales_agent__user_id
-                if param_name.endswith('__user_id'):
-                    field_slug = param_name.replace('data__', '').replace('__user_id', '')
-                    queryset = queryset.extra(
-                        where=["data->%s @> %s::jsonb"],
-                        params=[field_slug, f'[{{"user_id": {int(param_value)}}}]']
-                    )
-                
-                # User role filtering: data__sales_agent__user_role
-                elif param_name.endswith('__user_role'):
-                    field_slug = param_name.replace('data__', '').replace('__user_role', '')
-                    queryset = queryset.extra(
-                        where=["data->%s @> %s::jsonb"],
-                        params=[field_slug, f'[{{"role": "{param_value}"}}]']
-                    )
-                
-                # Tags field filtering: data__company_tags__icontains
-                elif '__icontains' in param_name and param_name.startswith('data__') and 'tags' in param_name:
-                    field_slug = param_name.replace('data__', '').replace('__icontains', '')
-                    # Handle JSONB array contains for tags
-                    queryset = queryset.extra(
-                        where=["data->%s ? %s"],
-                        params=[field_slug, param_value]
-                    )
-                
-                # Relationship field filtering: data__relationship_field__contains
-                elif '__contains' in param_name and param_name.startswith('data__') and not 'tags' in param_name:
-                    field_slug = param_name.replace('data__', '').replace('__contains', '')
-                    # Handle both single values and arrays for relationship fields
-                    queryset = queryset.extra(
-                        where=["(data->%s @> %s OR (data->%s)::text = %s)"],
-                        params=[field_slug, f'[{int(param_value)}]', field_slug, str(int(param_value))]
-                    )
-                
-                # Text field filtering: data__field_name__icontains (not tags)
-                elif param_name.startswith('data__') and '__icontains' in param_name and 'tags' not in param_name:
-                    field_slug = param_name.replace('data__', '').replace('__icontains', '')
-                    # Handle JSONB text field with proper casting
-                    queryset = queryset.extra(
-                        where=["(data->>%s) ILIKE %s"],
-                        params=[field_slug, f'%{param_value}%']
-                    )
-                
-                # Exact text field filtering: data__field_name__exact
-                elif param_name.startswith('data__') and '__exact' in param_name:
-                    field_slug = param_name.replace('data__', '').replace('__exact', '')
-                    queryset = queryset.extra(
-                        where=["(data->>%s) = %s"],
-                        params=[field_slug, param_value]
-                    )
-                
-                # Number field filtering: data__field_name__gte, __lte, __gt, __lt
-                elif param_name.startswith('data__') and ('__gte' in param_name or '__lte' in param_name or '__gt' in param_name or '__lt' in param_name):
-                    if '__gte' in param_name:
-                        field_slug = param_name.replace('data__', '').replace('__gte', '')
-                        operator = '>='
-                    elif '__lte' in param_name:
-                        field_slug = param_name.replace('data__', '').replace('__lte', '')
-                        operator = '<='
-                    elif '__gt' in param_name:
-                        field_slug = param_name.replace('data__', '').replace('__gt', '')
-                        operator = '>'
-                    elif '__lt' in param_name:
-                        field_slug = param_name.replace('data__', '').replace('__lt', '')
-                        operator = '<'
-                    
-                    # Handle number/decimal fields stored as JSONB
-                    queryset = queryset.extra(
-                        where=[f"CAST(data->>%s AS NUMERIC) {operator} %s"],
-                        params=[field_slug, float(param_value)]
-                    )
-                
-                # Basic number field filtering: data__field_name (exact match)
-                elif param_name.startswith('data__') and param_name.count('__') == 1:
-                    field_slug = param_name.replace('data__', '')
-                    # Try numeric first, fallback to text
-                    try:
-                        numeric_value = float(param_value)
-                        queryset = queryset.extra(
-                            where=["CAST(data->>%s AS NUMERIC) = %s"],
-                            params=[field_slug, numeric_value]
-                        )
-                    except ValueError:
-                        # Not a number, treat as text
-                        queryset = queryset.extra(
-                            where=["(data->>%s) = %s"],
-                            params=[field_slug, param_value]
-                        )
-                
-                # Boolean field filtering: data__field_name (true/false)
-                elif param_name.startswith('data__') and param_value.lower() in ['true', 'false']:
-                    field_slug = param_name.replace('data__', '')
-                    bool_value = param_value.lower() == 'true'
-                    queryset = queryset.extra(
-                        where=["CAST(data->>%s AS BOOLEAN) = %s"],
-                        params=[field_slug, bool_value]
-                    )
-                
-                # Date field filtering: data__field_name__date, __gte, __lte
-                elif param_name.startswith('data__') and ('__date' in param_name):
-                    field_slug = param_name.replace('data__', '').replace('__date', '')
-                    queryset = queryset.extra(
-                        where=["DATE(CAST(data->>%s AS TIMESTAMP)) = %s"],
-                        params=[field_slug, param_value]
-                    )
-                
-                # Select/Choice field filtering: data__field_name__in
-                elif param_name.startswith('data__') and '__in' in param_name:
-                    field_slug = param_name.replace('data__', '').replace('__in', '')
-                    values = [v.strip() for v in param_value.split(',')]
-                    # Create multiple OR conditions for each value
-                    where_conditions = []
-                    params = []
-                    for value in values:
-                        where_conditions.append("(data->>%s) = %s")
-                        params.extend([field_slug, value])
-                    
-                    if where_conditions:
-                        queryset = queryset.extra(
-                            where=[f"({' OR '.join(where_conditions)})"],
-                            params=params
-                        )
-                
-                # Null/empty field filtering: data__field_name__isnull
-                elif param_name.startswith('data__') and '__isnull' in param_name:
-                    field_slug = param_name.replace('data__', '').replace('__isnull', '')
-                    is_null = param_value.lower() == 'true'
-                    if is_null:
-                        queryset = queryset.extra(
-                            where=["(data->>%s IS NULL OR data->>%s = '')"],
-                            params=[field_slug, field_slug]
-                        )
-                    else:
-                        queryset = queryset.extra(
-                            where=["(data->>%s IS NOT NULL AND data->>%s != '')"],
-                            params=[field_slug, field_slug]
-                        )
-                
                 # Standard field filtering (status, created_by, etc.)
-                elif param_name in ['status', 'created_by', 'updated_by', 'created_at', 'updated_at']:
+                if param_name in ['status', 'created_by', 'updated_by', 'created_at', 'updated_at']:
                     filter_dict = {param_name: param_value}
                     queryset = queryset.filter(**filter_dict)
                 
@@ -354,6 +249,48 @@ class RecordViewSet(viewsets.ModelViewSet):
                 logger.warning(f"Invalid filter parameter '{param_name}={param_value}': {e}")
         
         return queryset
+
+    def _get_filter_pipeline(self):
+        """Pipeline whose schema types the data__ filters, None for cross-pipeline lists"""
+        pipeline_pk = self.kwargs.get('pipeline_pk')
+        if not pipeline_pk:
+            return None
+        try:
+            return Pipeline.objects.only('id', 'field_schema').get(id=pipeline_pk)
+        except (Pipeline.DoesNotExist, ValueError):
+            return None
+
+    def list(self, request, *args, **kwargs):
+        """List records; staff can pass ?explain=1 to see the planned SQL instead"""
+        if request.query_params.get('explain') in ('1', 'true') and request.user.is_staff:
+            return self._explain_response(self.filter_queryset(self.get_queryset()))
+        return super().list(request, *args, **kwargs)
+
+    def _explain_response(self, queryset):
+        """Generated SQL, the filter plan and Postgres' cost estimate for a queryset"""
+        import json
+
+        sql, params = queryset.query.sql_with_params()
+        estimate = {}
+        try:
+            explained = json.loads(queryset.explain(format='json'))
+            plan_root = explained[0]['Plan']
+            estimate = {
+                'total_cost': plan_root.get('Total Cost'),
+                'startup_cost': plan_root.get('Startup Cost'),
+                'rows': plan_root.get('Plan Rows'),
+                'node_type': plan_root.get('Node Type'),
+                'plan': explained[0],
+            }
+        except Exception as e:
+            estimate = {'error': str(e)}
+
+        return Response({
+            'sql': sql,
+            'params': [str(param) for param in params],
+            'filters': self._filter_plan.describe() if getattr(self, '_filter_plan', None) else [],
+            'estimate': estimate,
+        })
     
     
     def update(self, request, *args, **kwargs):
@@ -424,26 +361,24 @@ class RecordViewSet(viewsets.ModelViewSet):
         )
         
         if serializer.is_valid():
-            validated_records = serializer.validated_data['records']
+            # Validate and write in batches instead of one RecordOperationManager pass per row
+            writer = BulkRecordWriter(pipeline, request.user)
+            result = writer.create(serializer.validated_data['records'])
             
-            # Create records
-            created_records = []
-            for record_data in validated_records:
-                record = Record.objects.create(
-                    pipeline=pipeline,
-                    data=record_data,
-                    created_by=request.user,
-                    updated_by=request.user
-                )
-                created_records.append(record)
+            if not result.records:
+                return Response({
+                    'validation_errors': result.errors
+                }, status=status.HTTP_400_BAD_REQUEST)
             
             # Serialize created records
-            response_serializer = self.get_serializer(created_records, many=True)
+            response_serializer = self.get_serializer(result.records, many=True)
             
             return Response({
                 'created': response_serializer.data,
-                'created_count': len(created_records),
-                'success': True
+                'created_count': len(result.records),
+                'errors': result.errors,
+                'error_count': len(result.errors),
+                'success': result.success
             }, status=status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -579,49 +514,17 @@ class RecordViewSet(viewsets.ModelViewSet):
     def bulk_update(self, request, pipeline_pk=None):
         """Bulk update multiple records"""
         updates = request.data.get('updates', [])
-        pipeline = Pipeline.objects.get(id=pipeline_pk) if pipeline_pk else None
-        
-        updated_records = []
-        errors = []
+        if not isinstance(updates, list):
+            return Response(
+                {'error': 'updates must be a list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        pipeline = get_object_or_404(Pipeline, id=pipeline_pk)
         
-        for update_data in updates:
-            record_id = update_data.get('id')
-            new_data = update_data.get('data', {})
-            
-            try:
-                record = Record.objects.get(
-                    id=record_id,
-                    pipeline=pipeline,
-                    is_deleted=False
-                )
-                
-                # Validate new data if pipeline specified
-                if pipeline:
-                    validation_result = pipeline.validate_record_data(new_data)
-                    if not validation_result['is_valid']:
-                        errors.append({
-                            'record_id': record_id,
-                            'errors': validation_result['errors']
-                        })
-                        continue
-                    new_data = validation_result['cleaned_data']
-                
-                # Update record
-                record.data.update(new_data)
-                record.updated_by = request.user
-                record.save()
-                updated_records.append(record)
-                
-            except Record.DoesNotExist:
-                errors.append({
-                    'record_id': record_id,
-                    'errors': {'general': ['Record not found']}
-                })
-            except Exception as e:
-                errors.append({
-                    'record_id': record_id,
-                    'errors': {'general': [str(e)]}
-                })
+        writer = BulkRecordWriter(pipeline, request.user)
+        result = writer.update(updates)
+        updated_records = result.records
+        errors = result.errors
         
         # Serialize updated records
         response_serializer = self.get_serializer(updated_records, many=True)
@@ -1404,27 +1307,9 @@ class GlobalSearchViewSet(viewsets.ReadOnlyModelViewSet):
     )
     def list(self, request, *args, **kwargs):
         """Enhanced list with search ranking"""
+        # The q filter (GlobalSearchFilter) already applies ranked full-text search
         queryset = self.filter_queryset(self.get_queryset())
         
-        # Apply search query with ranking if available
-        search_query = request.query_params.get('q')
-        if search_query:
-            try:
-                # Use PostgreSQL full-text search if available
-                from django.contrib.postgres.search import SearchQuery, SearchRank
-                search_q = SearchQuery(search_query)
-                queryset = queryset.filter(
-                    search_vector=search_q
-                ).annotate(
-                    rank=SearchRank('search_vector', search_q)
-                ).order_by('-rank')
-            except:
-                # Fallback to simple text search
-                queryset = queryset.filter(
-                    Q(title__icontains=search_query) |
-                    Q(data__icontains=search_query)
-                )
-        
         # Apply limit
         limit = request.query_params.get('limit')
         if limit:
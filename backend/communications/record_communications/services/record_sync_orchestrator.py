@@ -5,11 +5,13 @@ This is the main service that coordinates all the components to sync
 communications for a specific record.
 """
 import logging
-from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
-from django.db import transaction
+from django.db import connection as db_connection, transaction
 from django.utils import timezone
+from django_tenants.utils import schema_context
 
 from pipelines.models import Record
 from communications.models import UserChannelConnection, Channel
@@ -29,6 +31,7 @@ from ..storage import (
 )
 from ..utils import get_sync_config, ProviderIdBuilder
 from .identifier_extractor import RecordIdentifierExtractor
+from .sync_concurrency import sync_concurrency_budget
 from communications.services.field_manager import field_manager
 
 logger = logging.getLogger(__name__)
@@ -165,6 +168,7 @@ class RecordSyncOrchestrator:
                     # Skip the expensive API sync and go straight to domain linking below
                 else:
                     # Step 3: Sync each channel
+                    channel_syncs = []
                     for connection in connections:
                         channel_type = connection.channel_type
                         
@@ -187,31 +191,10 @@ class RecordSyncOrchestrator:
                                 'auth_status': 'authenticated'
                             }
                         )
-                        
-                        # Sync this channel
-                        logger.info(f"Syncing {channel_type} for record {record_id}")
-                        
-                        if channel_type in ['email', 'gmail']:
-                            result = self._sync_email_channel(
-                            identifiers.get('email', []),
-                            record,
-                            channel,
-                            connection,
-                            sync_job,
-                            identifiers
-                        )
-                        else:
-                            # Use messaging sync for WhatsApp/LinkedIn
-                            result = self._sync_messaging_channel(
-                            identifiers,
-                            record,
-                            channel,
-                            connection,
-                            channel_type,
-                            sync_job
-                        )
-                        
-                        channel_results[channel_type] = result
+                        channel_syncs.append((connection, channel))
+                    
+                    for connection, result in self._sync_connections(channel_syncs, record, identifiers, sync_job):
+                        channel_results[connection.channel_type] = result
                         total_conversations += result.get('conversations', 0)
                         total_messages += result.get('messages', 0)
                 
@@ -298,6 +281,138 @@ class RecordSyncOrchestrator:
                 'error': str(e)
             }
     
+    def _sync_connections(
+        self,
+        channel_syncs: List[Tuple[UserChannelConnection, Channel]],
+        record: Record,
+        identifiers: Dict[str, List[str]],
+        sync_job: RecordSyncJob
+    ) -> List[Tuple[UserChannelConnection, Dict[str, int]]]:
+        """
+        Sync each channel connection and report progress as each one finishes
+        
+        Connections are synced concurrently on worker threads unless the
+        sequential sync mode is configured. Each connection stores its
+        conversations and messages as soon as its own fetch completes.
+        
+        Args:
+            channel_syncs: (connection, channel) pairs to sync
+            record: Record instance
+            identifiers: Record identifiers
+            sync_job: RecordSyncJob instance
+            
+        Returns:
+            (connection, result) pairs in the order of channel_syncs
+        """
+        results = {}
+        total = len(channel_syncs)
+        limits = self.sync_config.get_concurrency_limits()
+        
+        if not self.sync_config.is_concurrent_sync() or total <= 1 or limits['connections'] == 1:
+            for index, (connection, channel) in enumerate(channel_syncs):
+                results[index] = self._sync_connection(connection, channel, record, identifiers, sync_job)
+                self._report_connection_synced(sync_job, results, total)
+        else:
+            # Tenant schema is per thread; carry this one over to the workers
+            tenant_schema = db_connection.schema_name
+            logger.info(
+                f"Syncing {total} connections for record {record.id} "
+                f"with up to {limits['connections']} at a time"
+            )
+            
+            with ThreadPoolExecutor(max_workers=min(total, limits['connections'])) as executor:
+                futures = {
+                    executor.submit(
+                        self._sync_connection_in_tenant,
+                        tenant_schema,
+                        limits,
+                        connection,
+                        channel,
+                        record,
+                        identifiers,
+                        sync_job
+                    ): index
+                    for index, (connection, channel) in enumerate(channel_syncs)
+                }
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+                    self._report_connection_synced(sync_job, results, total)
+        
+        return [(connection, results[index]) for index, (connection, _) in enumerate(channel_syncs)]
+    
+    def _sync_connection_in_tenant(
+        self,
+        tenant_schema: str,
+        limits: Dict[str, int],
+        connection: UserChannelConnection,
+        channel: Channel,
+        record: Record,
+        identifiers: Dict[str, List[str]],
+        sync_job: RecordSyncJob
+    ) -> Dict[str, int]:
+        """Sync one connection on a worker thread within the tenant and account budgets"""
+        try:
+            with schema_context(tenant_schema):
+                with sync_concurrency_budget.acquire(
+                    tenant_schema,
+                    connection.unipile_account_id,
+                    per_tenant=limits['per_tenant'],
+                    per_account=limits['per_account']
+                ):
+                    return self._sync_connection(connection, channel, record, identifiers, sync_job)
+        finally:
+            # Worker threads get their own database connection; don't leave it open
+            db_connection.close()
+    
+    def _sync_connection(
+        self,
+        connection: UserChannelConnection,
+        channel: Channel,
+        record: Record,
+        identifiers: Dict[str, List[str]],
+        sync_job: RecordSyncJob
+    ) -> Dict[str, int]:
+        """Sync one channel connection for a record"""
+        channel_type = connection.channel_type
+        logger.info(f"Syncing {channel_type} for record {record.id}")
+        
+        if channel_type in ['email', 'gmail']:
+            return self._sync_email_channel(
+                identifiers.get('email', []),
+                record,
+                channel,
+                connection,
+                sync_job,
+                identifiers
+            )
+        
+        # Use messaging sync for WhatsApp/LinkedIn
+        return self._sync_messaging_channel(
+            identifiers,
+            record,
+            channel,
+            connection,
+            channel_type,
+            sync_job
+        )
+    
+    def _report_connection_synced(
+        self,
+        sync_job: RecordSyncJob,
+        results: Dict[int, Dict[str, int]],
+        total: int
+    ):
+        """Update the sync job's counts and progress after a connection finishes"""
+        sync_job.conversations_found = sum(r.get('conversations', 0) for r in results.values())
+        sync_job.messages_found = sum(r.get('messages', 0) for r in results.values())
+        sync_job.save(update_fields=['messages_found', 'conversations_found'])
+        
+        field_manager.update_sync_job_progress(
+            sync_job,
+            accounts_synced=len(results),
+            total_accounts=total
+        )
+    
     def _sync_email_channel(
         self,
         email_addresses: List[str],
@@ -0,0 +1,50 @@
+"""
+Sync Concurrency - Concurrency budgets for record sync
+
+Record syncs fan out across a tenant's channel connections. These budgets
+are shared by every sync running in the worker process, so concurrent
+syncs of the same tenant, or of records that hit the same UniPile account,
+never exceed their limits together.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+
+class SyncConcurrencyBudget:
+    """Process-wide semaphores per tenant schema and per UniPile account"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Keyed by (key, limit): a changed limit takes effect on the next
+        # acquire, while syncs holding a slot of the old limit finish under it
+        self._tenant_semaphores: Dict[Tuple[str, int], threading.BoundedSemaphore] = {}
+        self._account_semaphores: Dict[Tuple[str, int], threading.BoundedSemaphore] = {}
+
+    def _semaphore(self, semaphores: Dict[Tuple[str, int], threading.BoundedSemaphore], key: str, limit: int):
+        with self._lock:
+            if (key, limit) not in semaphores:
+                semaphores[(key, limit)] = threading.BoundedSemaphore(limit)
+            return semaphores[(key, limit)]
+
+    @contextmanager
+    def acquire(self, tenant_schema: str, account_id: str, per_tenant: int, per_account: int):
+        """
+        Hold one slot of the tenant's and of the account's budget
+
+        Args:
+            tenant_schema: Schema of the tenant the sync runs in
+            account_id: UniPile account ID of the connection being synced
+            per_tenant: Concurrent connection syncs allowed per tenant
+            per_account: Concurrent connection syncs allowed per account
+        """
+        tenant_slot = self._semaphore(self._tenant_semaphores, tenant_schema or '', per_tenant)
+        account_slot = self._semaphore(self._account_semaphores, account_id or '', per_account)
+
+        # Always tenant first, then account, so two syncs can't deadlock
+        with tenant_slot, account_slot:
+            yield
+
+
+# Global instance
+sync_concurrency_budget = SyncConcurrencyBudget()
@@ -10,6 +10,7 @@ from django.utils import timezone
 from django.db import transaction
 
 from pipelines.models import Record
+from pipelines.record_snapshot import get_record_snapshot
 from duplicates.models import DuplicateRule
 from .models import RecordCommunicationProfile, RecordSyncJob
 from .services import RecordIdentifierExtractor
@@ -158,15 +159,9 @@ def capture_record_identifiers_before_save(sender, instance, **kwargs):
     Capture record's identifier field values before save for change detection.
     This works alongside the existing capture_record_state_before_save signal.
     """
-    if instance.pk:
-        try:
-            original = Record.objects.get(pk=instance.pk)
-            # Store original data for identifier comparison
-            instance._original_identifier_data = original.data.copy()
-        except Record.DoesNotExist:
-            instance._original_identifier_data = {}
-    else:
-        instance._original_identifier_data = {}
+    # Store original data for identifier comparison (shared pre-image, no extra query)
+    snapshot = get_record_snapshot(instance)
+    instance._original_identifier_data = snapshot.data.copy() if snapshot else {}
 
 
 @receiver(post_save, sender=Record)
@@ -0,0 +1 @@
+# Record communication tests
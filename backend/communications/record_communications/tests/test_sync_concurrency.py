@@ -0,0 +1,126 @@
+"""
+Test the concurrent fan-out of a record sync across channel connections
+"""
+import threading
+import time
+from contextlib import nullcontext
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from communications.record_communications.services.record_sync_orchestrator import RecordSyncOrchestrator
+from communications.record_communications.services.sync_concurrency import SyncConcurrencyBudget
+from communications.record_communications.utils.sync_config import SyncConfig
+
+ORCHESTRATOR = 'communications.record_communications.services.record_sync_orchestrator'
+
+
+def channel_syncs(*account_ids):
+    return [
+        (SimpleNamespace(id=index, unipile_account_id=account_id, channel_type='email'), SimpleNamespace())
+        for index, account_id in enumerate(account_ids)
+    ]
+
+
+class SyncConnectionsTest(SimpleTestCase):
+    """RecordSyncOrchestrator._sync_connections"""
+
+    def setUp(self):
+        self.orchestrator = RecordSyncOrchestrator()
+        self.record = SimpleNamespace(id=1)
+        self.progress = []
+        self.threads = set()
+
+        self.orchestrator._report_connection_synced = (
+            lambda sync_job, results, total: self.progress.append((len(results), total))
+        )
+        for target, value in (
+            ('schema_context', lambda schema: nullcontext()),
+            ('db_connection', SimpleNamespace(schema_name='tenant', close=lambda: None)),
+            ('sync_concurrency_budget', SyncConcurrencyBudget()),
+        ):
+            patcher = patch(f'{ORCHESTRATOR}.{target}', value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def configure(self, **config):
+        self.orchestrator.sync_config = SyncConfig(config)
+
+    def sync(self, syncs, sync_connection):
+        with patch.object(self.orchestrator, '_sync_connection', side_effect=sync_connection):
+            return self.orchestrator._sync_connections(syncs, self.record, {}, sync_job=None)
+
+    def test_results_keep_connection_order(self):
+        self.configure(sync_mode='concurrent', max_concurrent_connections=3)
+        syncs = channel_syncs('a', 'b', 'c')
+
+        # Later connections finish first
+        def sync_connection(connection, channel, record, identifiers, sync_job):
+            time.sleep(0.03 * (3 - connection.id))
+            return {'messages': connection.id, 'conversations': 1}
+
+        results = self.sync(syncs, sync_connection)
+        self.assertEqual([connection.id for connection, _ in results], [0, 1, 2])
+        self.assertEqual([result['messages'] for _, result in results], [0, 1, 2])
+
+    def test_sequential_mode_syncs_on_the_calling_thread(self):
+        self.configure(sync_mode='sequential', max_concurrent_connections=4)
+
+        def sync_connection(connection, channel, record, identifiers, sync_job):
+            self.threads.add(threading.current_thread())
+            return {'messages': 1, 'conversations': 1}
+
+        with patch.object(self.orchestrator, '_sync_connection_in_tenant') as in_tenant:
+            results = self.sync(channel_syncs('a', 'b', 'c'), sync_connection)
+
+        in_tenant.assert_not_called()
+        self.assertEqual(self.threads, {threading.current_thread()})
+        self.assertEqual(len(results), 3)
+
+    def test_per_account_limit_caps_concurrency(self):
+        self.configure(
+            sync_mode='concurrent', max_concurrent_connections=4,
+            max_concurrent_per_tenant=4, max_concurrent_per_account=2
+        )
+        lock = threading.Lock()
+        running = {'now': 0, 'max': 0}
+
+        def sync_connection(connection, channel, record, identifiers, sync_job):
+            with lock:
+                running['now'] += 1
+                running['max'] = max(running['max'], running['now'])
+            time.sleep(0.05)
+            with lock:
+                running['now'] -= 1
+            return {'messages': 1, 'conversations': 1}
+
+        self.sync(channel_syncs('a', 'a', 'a', 'a'), sync_connection)
+        self.assertEqual(running['max'], 2)
+
+    def test_progress_is_reported_once_per_finished_connection(self):
+        self.configure(sync_mode='concurrent', max_concurrent_connections=2)
+
+        def sync_connection(connection, channel, record, identifiers, sync_job):
+            return {'messages': 2, 'conversations': 1}
+
+        self.sync(channel_syncs('a', 'b', 'c', 'd'), sync_connection)
+        self.assertEqual(self.progress, [(1, 4), (2, 4), (3, 4), (4, 4)])
+
+
+class SyncConcurrencyBudgetTest(SimpleTestCase):
+
+    def test_changed_limit_takes_effect(self):
+        budget = SyncConcurrencyBudget()
+        with budget.acquire('tenant', 'a', per_tenant=1, per_account=1):
+            # A slot under the old limit does not block the new one
+            acquired = threading.Event()
+
+            def sync():
+                with budget.acquire('tenant', 'a', per_tenant=2, per_account=2):
+                    acquired.set()
+
+            worker = threading.Thread(target=sync)
+            worker.start()
+            worker.join(timeout=1)
+        self.assertTrue(acquired.is_set())
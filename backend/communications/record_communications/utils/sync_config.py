@@ -16,6 +16,12 @@ class SyncConfig:
     DEFAULT_MAX_CONVERSATIONS_PER_RECORD = 0  # 0 = no limit, fetch all conversations
     DEFAULT_BATCH_SIZE = 100  # Larger batch size for better performance
     
+    # Connection fan-out defaults
+    DEFAULT_SYNC_MODE = 'concurrent'  # 'concurrent' or 'sequential'
+    DEFAULT_MAX_CONCURRENT_CONNECTIONS = 4  # Connections synced at once per record
+    DEFAULT_MAX_CONCURRENT_PER_TENANT = 8  # Across all syncs of a tenant in a worker
+    DEFAULT_MAX_CONCURRENT_PER_ACCOUNT = 2  # Across all syncs hitting one UniPile account
+    
     # Channel-specific defaults - NO LIMITS
     CHANNEL_DEFAULTS = {
         'email': {
@@ -91,6 +97,22 @@ class SyncConfig:
                 'batch_size',
                 self.DEFAULT_BATCH_SIZE
             ),
+            'sync_mode': from_settings.get(
+                'sync_mode',
+                self.DEFAULT_SYNC_MODE
+            ),
+            'max_concurrent_connections': from_settings.get(
+                'max_concurrent_connections',
+                self.DEFAULT_MAX_CONCURRENT_CONNECTIONS
+            ),
+            'max_concurrent_per_tenant': from_settings.get(
+                'max_concurrent_per_tenant',
+                self.DEFAULT_MAX_CONCURRENT_PER_TENANT
+            ),
+            'max_concurrent_per_account': from_settings.get(
+                'max_concurrent_per_account',
+                self.DEFAULT_MAX_CONCURRENT_PER_ACCOUNT
+            ),
             'channels': {}
         }
         
@@ -202,6 +224,28 @@ class SyncConfig:
             )
         
         return self.config['batch_size']
+    
+    def is_concurrent_sync(self) -> bool:
+        """
+        Check if a record's channel connections are synced concurrently
+        
+        Returns:
+            False when the sequential fallback is configured
+        """
+        return self.config['sync_mode'] != 'sequential'
+    
+    def get_concurrency_limits(self) -> Dict[str, int]:
+        """
+        Get the concurrency budget for connection syncs
+        
+        Returns:
+            Dict with per-record, per-tenant and per-account limits
+        """
+        return {
+            'connections': max(1, self.config['max_concurrent_connections']),
+            'per_tenant': max(1, self.config['max_concurrent_per_tenant']),
+            'per_account': max(1, self.config['max_concurrent_per_account'])
+        }
 
 
 # Global instance
@@ -0,0 +1,281 @@
+"""
+Candidate-blocking index for duplicate detection
+
+Every DuplicateRule gets an inverted index of normalized blocking keys
+(DuplicateBlockKey rows). Two records can only be duplicates under a rule if
+they share at least one key, so detection evaluates the rule against the few
+records in the same blocks instead of scanning the whole pipeline.
+
+Key derivation follows the rule's AND/OR logic:
+- AND node: every field must match, so one field is enough to block on.
+  The most selective field is used (equality-style match types before fuzzy).
+- OR node: any branch may match, so the keys of every branch are combined.
+
+Equality-style match types use the FieldMatcher normalizers, so values that
+match_field considers equal always produce the same key. Fuzzy fields use
+character trigrams and require a minimum overlap to become candidates.
+"""
+import hashlib
+import logging
+import math
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from pipelines.models import Record
+from .logic_engine import DuplicateLogicEngine
+from .models import DuplicateBlockKey, DuplicateRule
+
+logger = logging.getLogger(__name__)
+
+# Match types ordered from most to least selective when choosing an AND blocking field
+BLOCKING_PRIORITY = {
+    'email_normalized': 0,
+    'phone_normalized': 0,
+    'url_normalized': 0,
+    'exact': 1,
+    'case_insensitive': 1,
+    'numeric': 2,
+    'fuzzy': 3,
+}
+
+# Fraction of a fuzzy value's trigrams another record must share to become a candidate.
+# At 0.2 fewer than 0.5% of pairs with SequenceMatcher ratio >= 0.8 fall outside a block.
+FUZZY_MIN_GRAM_OVERLAP = 0.2
+
+
+class DuplicateBlockingIndex:
+    """Maintains and queries the blocking keys of a single duplicate rule"""
+
+    def __init__(self, rule: DuplicateRule, engine: Optional[DuplicateLogicEngine] = None):
+        self.rule = rule
+        self.engine = engine or DuplicateLogicEngine(tenant_id=rule.tenant_id)
+        self._plan = None
+
+    @property
+    def plan(self) -> List[Dict[str, Any]]:
+        """Blocking fields derived from the rule logic"""
+        if self._plan is None:
+            self._plan = self._build_plan(self.rule.logic or {})
+        return self._plan
+
+    def _build_plan(self, logic_node: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Recursively pick the blocking fields for a logic node"""
+        operator = logic_node.get('operator', 'AND').upper()
+
+        if operator == 'OR':
+            plan = []
+            for condition in logic_node.get('conditions', []):
+                for entry in self._build_plan(condition):
+                    if entry not in plan:
+                        plan.append(entry)
+            return plan
+
+        if operator == 'AND':
+            fields = [f for f in logic_node.get('fields', []) if f.get('field')]
+            if not fields:
+                return []
+            best = min(fields, key=lambda f: BLOCKING_PRIORITY.get(f.get('match_type', 'exact'), 1))
+            return [{
+                'field': best['field'],
+                'match_type': best.get('match_type', 'exact'),
+                'url_extraction_rules': best.get('url_extraction_rules'),
+            }]
+
+        logger.error(f"Unknown operator in duplicate rule {self.rule.name}: {operator}")
+        return []
+
+    def uses_url_extraction_rule(self, url_rule_id: int) -> bool:
+        """Whether the keys of this rule depend on the given URLExtractionRule"""
+        for entry in self.plan:
+            if entry['match_type'] != 'url_normalized':
+                continue
+            selected = entry['url_extraction_rules']
+            # None, "all" and invalid formats all fall back to every tenant rule
+            if not isinstance(selected, list) or url_rule_id in selected:
+                return True
+        return False
+
+    def build_keys(self, data: Dict[str, Any]) -> Tuple[Set[str], Dict[str, Set[str]]]:
+        """
+        Compute blocking keys for record data
+
+        Returns:
+            tuple: (exact keys, {field name: fuzzy gram keys})
+        """
+        exact_keys = set()
+        gram_keys = defaultdict(set)
+        data = data or {}
+
+        for entry in self.plan:
+            field_name = entry['field']
+            match_type = entry['match_type']
+            value = data.get(field_name)
+            if not value:
+                continue
+
+            field = self.engine.resolve_field(self.rule.pipeline, field_name)
+
+            if match_type == 'fuzzy':
+                for gram in self.engine.field_matcher.fuzzy_grams(value):
+                    gram_keys[field_name].add(self._hash_key(field_name, 'fuzzy', gram))
+            else:
+                normalized = self.engine.field_matcher.normalize_for_blocking(
+                    field, value, match_type, entry['url_extraction_rules']
+                )
+                if normalized is not None:
+                    exact_keys.add(self._hash_key(field_name, match_type, normalized))
+
+        return exact_keys, dict(gram_keys)
+
+    @staticmethod
+    def _hash_key(field_name: str, match_type: str, normalized: str) -> str:
+        """Fixed-width key so arbitrary values fit the indexed column"""
+        return hashlib.sha1(f"{field_name}\x1f{match_type}\x1f{normalized}".encode('utf-8')).hexdigest()
+
+    def candidate_ids(self, data: Dict[str, Any], exclude_record_id: Optional[int] = None) -> List[int]:
+        """Return IDs of records sharing a block with the given data"""
+        exact_keys, gram_keys = self.build_keys(data)
+        candidates = set()
+
+        if exact_keys:
+            queryset = DuplicateBlockKey.objects.filter(
+                rule=self.rule, key_type='exact', key__in=exact_keys
+            )
+            if exclude_record_id:
+                queryset = queryset.exclude(record_id=exclude_record_id)
+            candidates.update(queryset.values_list('record_id', flat=True).distinct())
+
+        for grams in gram_keys.values():
+            min_shared = max(1, math.ceil(len(grams) * FUZZY_MIN_GRAM_OVERLAP))
+            queryset = DuplicateBlockKey.objects.filter(
+                rule=self.rule, key_type='gram', key__in=grams
+            )
+            if exclude_record_id:
+                queryset = queryset.exclude(record_id=exclude_record_id)
+            candidates.update(
+                queryset.values('record_id')
+                .annotate(shared=Count('id'))
+                .filter(shared__gte=min_shared)
+                .values_list('record_id', flat=True)
+            )
+
+        return sorted(candidates)
+
+    def candidate_records(self, data: Dict[str, Any], exclude_record_id: Optional[int] = None):
+        """Queryset of records sharing a block with the given data"""
+        return Record.objects.filter(
+            pipeline_id=self.rule.pipeline_id,
+            id__in=self.candidate_ids(data, exclude_record_id)
+        )
+
+    def _key_rows(self, record_id: int, data: Dict[str, Any]) -> List[DuplicateBlockKey]:
+        exact_keys, gram_keys = self.build_keys(data)
+        rows = [
+            DuplicateBlockKey(rule_id=self.rule.id, record_id=record_id, key=key, key_type='exact')
+            for key in exact_keys
+        ]
+        for grams in gram_keys.values():
+            rows.extend(
+                DuplicateBlockKey(rule_id=self.rule.id, record_id=record_id, key=key, key_type='gram')
+                for key in grams
+            )
+        return rows
+
+    def index_record(self, record: Record) -> int:
+        """Replace the blocking keys of a single record"""
+        rows = self._key_rows(record.id, record.data)
+        with transaction.atomic():
+            DuplicateBlockKey.objects.filter(rule=self.rule, record_id=record.id).delete()
+            DuplicateBlockKey.objects.bulk_create(rows, ignore_conflicts=True)
+        return len(rows)
+
+    def index_records(self, records: Iterable[Record]) -> int:
+        """Replace the blocking keys of many records with one delete and one insert"""
+        records = list(records)
+        rows = []
+        for record in records:
+            rows.extend(self._key_rows(record.id, record.data))
+        with transaction.atomic():
+            DuplicateBlockKey.objects.filter(
+                rule=self.rule, record_id__in=[record.id for record in records]
+            ).delete()
+            DuplicateBlockKey.objects.bulk_create(rows, batch_size=5000, ignore_conflicts=True)
+        return len(rows)
+
+    def rebuild(self, batch_size: int = 1000) -> Dict[str, int]:
+        """
+        Rebuild the whole index for this rule using keyset-paginated batches
+
+        Record saves keep writing keys while the rebuild runs. Records
+        changed after the rebuild started are indexed again at the end, so
+        a batch read before a concurrent save committed cannot leave stale keys.
+
+        The rule is marked unbuilt while its keys are missing, so candidate
+        lookups fall back to the full scan, and marked built again at the end.
+        """
+        started_at = timezone.now()
+        # update() rather than save(): no post_save, so no invalidation round trip
+        DuplicateRule.objects.filter(id=self.rule.id).update(blocking_index_built_at=None)
+        self.rule.blocking_index_built_at = None
+        DuplicateBlockKey.objects.filter(rule=self.rule).delete()
+
+        records_indexed = 0
+        keys_written = 0
+        last_id = 0
+
+        while True:
+            batch = list(
+                Record.objects.filter(pipeline_id=self.rule.pipeline_id, id__gt=last_id)
+                .order_by('id')
+                .values_list('id', 'data')[:batch_size]
+            )
+            if not batch:
+                break
+
+            rows = []
+            for record_id, data in batch:
+                rows.extend(self._key_rows(record_id, data))
+            DuplicateBlockKey.objects.bulk_create(rows, batch_size=5000, ignore_conflicts=True)
+
+            records_indexed += len(batch)
+            keys_written += len(rows)
+            last_id = batch[-1][0]
+
+        changed = list(
+            Record.objects.filter(pipeline_id=self.rule.pipeline_id, updated_at__gte=started_at)
+            .only('id', 'data')
+        )
+        if changed:
+            self.index_records(changed)
+
+        built_at = timezone.now()
+        DuplicateRule.objects.filter(id=self.rule.id).update(blocking_index_built_at=built_at)
+        self.rule.blocking_index_built_at = built_at
+
+        logger.info(
+            f"Rebuilt blocking index for rule '{self.rule.name}': {records_indexed} records, {keys_written} keys, "
+            f"{len(changed)} records changed during the rebuild re-indexed"
+        )
+        return {'records_indexed': records_indexed, 'keys_written': keys_written, 'records_reindexed': len(changed)}
+
+
+def get_blocking_indexes(rules: Iterable[DuplicateRule], engine: Optional[DuplicateLogicEngine] = None) -> List[DuplicateBlockingIndex]:
+    """Build blocking indexes that share one engine (and its field/URL rule caches)"""
+    rules = list(rules)
+    if not rules:
+        return []
+    engine = engine or DuplicateLogicEngine(tenant_id=rules[0].tenant_id)
+    return [DuplicateBlockingIndex(rule, engine) for rule in rules]
+
+
+def index_record_for_rules(record: Record, rules: Iterable[DuplicateRule]) -> None:
+    """Refresh a record's blocking keys for every given rule"""
+    for index in get_blocking_indexes(rules):
+        try:
+            index.index_record(record)
+        except Exception as e:
+            logger.error(f"Error indexing record {record.id} for rule {index.rule.name}: {e}", exc_info=True)
@@ -3,7 +3,7 @@ Boolean logic evaluation engine for duplicate detection with AND/OR conditions
 """
 import re
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set
 from urllib.parse import urlparse
 from pipelines.field_types import FieldType
 from pipelines.models import Field
@@ -67,18 +67,66 @@ class FieldMatcher:
             logger.error(f"Error matching field {field.name}: {e}", exc_info=True)
             return False
     
-    def _match_email_normalized(self, value1: Any, value2: Any, field_config: Dict) -> bool:
-        """Email matching with normalization based on EmailFieldConfig"""
-        email1, email2 = str(value1), str(value2)
+    def normalize_for_blocking(self, field: Field, value: Any, match_type: str, url_extraction_rules: Optional[List[int]] = None) -> Optional[str]:
+        """
+        Reduce a value to the canonical form used by match_field for equality-style match types.
+        Two values that match_field considers equal always normalize to the same string.
+        
+        Returns:
+            Normalized string, or None if the value cannot produce a match
+        """
+        if not value:
+            return None
+        
+        try:
+            if match_type == 'case_insensitive':
+                return str(value).lower()
+            
+            elif match_type == 'email_normalized':
+                return self._normalize_email(value, field.field_config)
+            
+            elif match_type == 'phone_normalized':
+                return self._extract_and_normalize_phone(value) or None
+            
+            elif match_type == 'url_normalized':
+                return self._normalize_url(str(value), field.field_config, url_extraction_rules) or None
+            
+            elif match_type == 'numeric':
+                return repr(self._parse_numeric(value, field.field_config))
+            
+            else:
+                # 'exact' and unknown match types both compare str() values
+                return str(value)
+                
+        except (ValueError, TypeError):
+            return None
+        except Exception as e:
+            logger.error(f"Error normalizing field {field.name} for blocking: {e}", exc_info=True)
+            return None
+    
+    def fuzzy_grams(self, value: Any, size: int = 3) -> Set[str]:
+        """Character n-grams of the lowercased value, used as blocking keys for fuzzy matching"""
+        if not value:
+            return set()
+        
+        text = f"  {str(value).lower().strip()} "
+        return {text[i:i + size] for i in range(len(text) - size + 1)}
+    
+    def _normalize_email(self, value: Any, field_config: Dict) -> str:
+        """Normalize an email address based on EmailFieldConfig"""
+        email = str(value)
         
-        # Use existing EmailFieldConfig settings
         if field_config.get('auto_lowercase', True):
-            email1, email2 = email1.lower(), email2.lower()
+            email = email.lower()
         
         if field_config.get('trim_whitespace', True):
-            email1, email2 = email1.strip(), email2.strip()
+            email = email.strip()
         
-        return email1 == email2
+        return email
+    
+    def _match_email_normalized(self, value1: Any, value2: Any, field_config: Dict) -> bool:
+        """Email matching with normalization based on EmailFieldConfig"""
+        return self._normalize_email(value1, field_config) == self._normalize_email(value2, field_config)
     
     def _match_phone_normalized(self, value1: Any, value2: Any, field_config: Dict) -> bool:
         """Phone matching with normalization"""
@@ -234,25 +282,24 @@ class FieldMatcher:
     def _match_numeric(self, value1: Any, value2: Any, field_config: Dict) -> bool:
         """Numeric matching with type-specific handling"""
         try:
-            # Handle different number formats from NumberFieldConfig
-            format_type = field_config.get('format', 'integer')
-            
-            if format_type == 'currency':
-                # Remove currency symbols and compare numeric value
-                num1 = float(re.sub(r'[^\d.]', '', str(value1)))
-                num2 = float(re.sub(r'[^\d.]', '', str(value2)))
-                return num1 == num2
-            elif format_type == 'percentage':
-                # Handle percentage formats
-                num1 = float(str(value1).replace('%', ''))
-                num2 = float(str(value2).replace('%', ''))
-                return num1 == num2
-            else:
-                # Standard numeric comparison
-                return float(value1) == float(value2)
+            return self._parse_numeric(value1, field_config) == self._parse_numeric(value2, field_config)
         except (ValueError, TypeError):
             return False
     
+    def _parse_numeric(self, value: Any, field_config: Dict) -> float:
+        """Parse a numeric value according to the NumberFieldConfig format"""
+        format_type = field_config.get('format', 'integer')
+        
+        if format_type == 'currency':
+            # Remove currency symbols before parsing
+            return float(re.sub(r'[^\d.]', '', str(value)))
+        elif format_type == 'percentage':
+            # Handle percentage formats
+            return float(str(value).replace('%', ''))
+        else:
+            # Standard numeric parsing
+            return float(value)
+    
     def _strip_subdomains(self, domain: str) -> str:
         """Strip subdomains to keep only the main domain"""
         if not domain:
@@ -286,6 +333,34 @@ class DuplicateLogicEngine:
     def __init__(self, tenant_id: Optional[int] = None):
         self.tenant_id = tenant_id
         self.field_matcher = FieldMatcher(tenant_id)
+        self._field_cache = {}
+    
+    def resolve_field(self, pipeline: Any, field_name: str) -> Field:
+        """
+        Resolve a rule field reference to a pipeline Field, cached per engine instance.
+        Tries slug first (most duplicate rules use slug), then falls back to name.
+        """
+        cache_key = (pipeline.id, field_name)
+        if cache_key in self._field_cache:
+            return self._field_cache[cache_key]
+        
+        try:
+            field = pipeline.fields.get(slug=field_name)
+        except Exception:
+            try:
+                field = pipeline.fields.get(name=field_name)
+            except Exception as field_error:
+                logger.error(f"Field '{field_name}' not found in pipeline '{pipeline.name}' (ID: {pipeline.id}): {field_error}")
+                # Create a minimal field object for basic matching
+                field = Field(
+                    name=field_name,
+                    field_type='text',
+                    field_config={},
+                    pipeline=pipeline
+                )
+        
+        self._field_cache[cache_key] = field
+        return field
     
     def evaluate_rule(
         self, 
@@ -345,23 +420,7 @@ class DuplicateLogicEngine:
             url_extraction_rules = field_config.get('url_extraction_rules')
             
             try:
-                # Get field object - handle case where field doesn't exist
-                # Try by slug first (most duplicate rules use slug), then fall back to name
-                try:
-                    field = pipeline.fields.get(slug=field_name)
-                except Exception:
-                    try:
-                        field = pipeline.fields.get(name=field_name)
-                    except Exception as field_error:
-                        logger.error(f"Field '{field_name}' not found in pipeline '{pipeline.name}' (ID: {pipeline.id}): {field_error}")
-                        # Create a minimal field object for basic matching
-                        from pipelines.models import Field
-                        field = Field(
-                            name=field_name,
-                            field_type='text',
-                            field_config={},
-                            pipeline=pipeline
-                        )
+                field = self.resolve_field(pipeline, field_name)
                 
                 # Get field values
                 value1 = record1_data.get(field_name)
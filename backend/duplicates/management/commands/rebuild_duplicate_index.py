@@ -0,0 +1,62 @@
+"""
+Management command to rebuild the candidate-blocking index of duplicate rules
+"""
+from django.core.management.base import BaseCommand
+from django_tenants.utils import schema_context
+from tenants.models import Tenant
+from duplicates.blocking import DuplicateBlockingIndex
+from duplicates.models import DuplicateRule
+
+
+class Command(BaseCommand):
+    help = 'Rebuild duplicate detection blocking indexes for active rules'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant-name',
+            type=str,
+            help='Rebuild indexes for specific tenant only'
+        )
+        parser.add_argument(
+            '--rule-id',
+            type=int,
+            help='Rebuild the index of a single rule'
+        )
+        parser.add_argument(
+            '--stale-only',
+            action='store_true',
+            help='Only rebuild rules whose index has never been built or was invalidated'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Records loaded per batch (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        tenant_name = options.get('tenant_name')
+
+        if tenant_name:
+            try:
+                tenants = [Tenant.objects.get(name=tenant_name)]
+            except Tenant.DoesNotExist:
+                self.stdout.write(self.style.ERROR(f"Tenant '{tenant_name}' not found"))
+                return
+        else:
+            tenants = Tenant.objects.exclude(schema_name='public')
+
+        for tenant in tenants:
+            with schema_context(tenant.schema_name):
+                rules = DuplicateRule.objects.filter(is_active=True).select_related('pipeline')
+                if options.get('rule_id'):
+                    rules = rules.filter(id=options['rule_id'])
+                if options.get('stale_only'):
+                    rules = rules.filter(blocking_index_built_at__isnull=True)
+
+                for rule in rules:
+                    self.stdout.write(f"[{tenant.schema_name}] Rebuilding index for rule '{rule.name}'...")
+                    result = DuplicateBlockingIndex(rule).rebuild(batch_size=options['batch_size'])
+                    self.stdout.write(self.style.SUCCESS(
+                        f"  {result['records_indexed']} records, {result['keys_written']} keys"
+                    ))
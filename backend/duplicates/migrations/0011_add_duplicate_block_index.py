@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-16 18:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('duplicates', '0010_alter_duplicateresolution_action_taken'),
+        ('pipelines', '0021_add_bidirectional_relation_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='duplicaterule',
+            name='blocking_index_built_at',
+            field=models.DateTimeField(blank=True, help_text='When the blocking index was last fully rebuilt; null while it is stale', null=True),
+        ),
+        migrations.CreateModel(
+            name='DuplicateBlockKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Hash of field, match type and normalized value', max_length=64)),
+                ('key_type', models.CharField(choices=[('exact', 'Normalized Value'), ('gram', 'Fuzzy N-gram')], default='exact', max_length=10)),
+                ('record', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_block_keys', to='pipelines.record')),
+                ('rule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='block_keys', to='duplicates.duplicaterule')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['rule', 'key_type', 'key'], name='duplicates__rule_id_5c1b9a_idx'), models.Index(fields=['record'], name='duplicates__record__ac9552_idx')],
+                'unique_together': {('rule', 'record', 'key')},
+            },
+        ),
+    ]
@@ -100,6 +100,13 @@ class DuplicateRule(models.Model):
         help_text="Action to take when duplicates are detected"
     )
     
+    # Candidate-blocking index state (see duplicates.blocking)
+    blocking_index_built_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the blocking index was last fully rebuilt; null while it is stale"
+    )
+    
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -117,6 +124,30 @@ class DuplicateRule(models.Model):
         return f"{self.tenant.name} - {self.name} ({self.pipeline.name})"
 
 
+class DuplicateBlockKey(models.Model):
+    """Normalized blocking key narrowing duplicate candidates for a rule"""
+    
+    KEY_TYPE_CHOICES = [
+        ('exact', 'Normalized Value'),
+        ('gram', 'Fuzzy N-gram'),
+    ]
+    
+    rule = models.ForeignKey(DuplicateRule, on_delete=models.CASCADE, related_name='block_keys')
+    record = models.ForeignKey(Record, on_delete=models.CASCADE, related_name='duplicate_block_keys')
+    key = models.CharField(max_length=64, help_text="Hash of field, match type and normalized value")
+    key_type = models.CharField(max_length=10, choices=KEY_TYPE_CHOICES, default='exact')
+    
+    class Meta:
+        unique_together = ['rule', 'record', 'key']
+        indexes = [
+            models.Index(fields=['rule', 'key_type', 'key']),
+            models.Index(fields=['record']),
+        ]
+    
+    def __str__(self):
+        return f"{self.rule_id}:{self.key_type}:{self.key[:12]} -> {self.record_id}"
+
+
 class DuplicateRuleTest(models.Model):
     """Test cases for duplicate rules"""
     
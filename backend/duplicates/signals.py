@@ -2,15 +2,17 @@
 Django signals for duplicate detection integration
 """
 import logging
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.core.exceptions import ValidationError
-from django.db import transaction
+from django.db import connection, transaction
 from django.utils import timezone
 
+from pipelines.bulk_operations import records_bulk_written
 from pipelines.models import Record
-from .models import DuplicateRule, DuplicateDetectionResult
+from .models import DuplicateRule, DuplicateDetectionResult, URLExtractionRule
 from .logic_engine import DuplicateLogicEngine
+from .blocking import DuplicateBlockingIndex, get_blocking_indexes, index_record_for_rules
 from .models import DuplicateMatch
 
 logger = logging.getLogger(__name__)
@@ -37,74 +39,91 @@ def check_duplicates_on_record_save(sender, instance, **kwargs):
         logger.info(f"   ⏸️  Skipping duplicate check: _skip_duplicate_check is True")
         return
     
-    # Get the pipeline
-    pipeline = instance.pipeline
+    tenant = get_detection_tenant()
+    if tenant is None:
+        return
+    
+    # Get all active duplicate rules for this pipeline that are set to detect
+    rules = get_detection_rules(tenant, instance.pipeline)
+    
+    logger.info(f"🔍 DUPLICATE SIGNAL: Found {rules.count()} active rules for pipeline {instance.pipeline.name}")
     
-    # Get tenant from request (multi-tenant architecture)
+    if not rules:
+        logger.info(f"   ⏸️  No duplicate rules found for pipeline {instance.pipeline.name} in tenant {tenant.name}, exiting early")
+        return
+    
+    # Initialize the logic engine
+    engine = DuplicateLogicEngine(tenant_id=tenant.id)
+    
+    detected_duplicates = detect_duplicates(instance.data, instance.id, rules, engine)
+    
+    # Store detected duplicates for post-save processing
+    if detected_duplicates:
+        instance._detected_duplicates = detected_duplicates
+
+
+def get_detection_tenant():
+    """
+    The Tenant of the current schema, or None outside a tenant context.
+    Duplicate detection does not run on the public schema.
+    """
     try:
-        from django.db import connection
         from tenants.models import Tenant
         
         # Check if we're in a tenant context
         if not hasattr(connection, 'tenant') or not connection.tenant:
-            logger.debug("No tenant context found, skipping duplicate checking")
-            return
+            logger.debug("No tenant context found, skipping duplicate detection")
+            return None
         
         tenant_schema = connection.tenant.schema_name
         
         # Skip duplicate checking on public schema
         if tenant_schema == 'public':
-            return
+            return None
         
         # Get the actual Tenant model instance (not the FakeTenant from connection)
         try:
-            tenant = Tenant.objects.get(schema_name=tenant_schema)
+            return Tenant.objects.get(schema_name=tenant_schema)
         except Tenant.DoesNotExist:
             logger.error(f"Tenant model not found for schema {tenant_schema}")
-            return
+            return None
             
     except Exception as e:
         logger.error(f"Error getting tenant context: {str(e)}")
-        return
-    
-    # Get all active duplicate rules for this pipeline that are set to detect
-    rules = DuplicateRule.objects.filter(
+        return None
+
+
+def get_detection_rules(tenant, pipeline):
+    """Active rules of a pipeline that are set to detect duplicates"""
+    return DuplicateRule.objects.filter(
         tenant=tenant,
         pipeline=pipeline,
         is_active=True,
         action_on_duplicate='detect_only'  # Only process rules that are set to detect
     ).prefetch_related('duplicate_test_cases')
-    
-    logger.info(f"🔍 DUPLICATE SIGNAL: Found {rules.count()} active rules for pipeline {pipeline.name}")
-    
-    if not rules:
-        logger.info(f"   ⏸️  No duplicate rules found for pipeline {pipeline.name} in tenant {tenant.name}, exiting early")
-        return
-    
-    # Initialize the logic engine
-    engine = DuplicateLogicEngine(tenant_id=tenant.id)
-    
-    # Check against existing records (excluding the current record if it's an update)
-    existing_records = Record.objects.filter(
-        pipeline=pipeline
-    )
-    
-    # Exclude the current record if it's an update (has an ID)
-    if instance.id:
-        existing_records = existing_records.exclude(id=instance.id)
-    
+
+
+def detect_duplicates(data, record_id, rules, engine, exclude_record_ids=()):
+    """
+    Evaluate every rule against the records sharing a blocking key with the data.
+    Returns a list of duplicate info dicts for store_duplicate_matches.
+    """
     detected_duplicates = []
     
     # Check each rule
     for rule in rules:
         logger.debug(f"Checking rule: {rule.name}")
         
-        # Check against existing records
+        # Only evaluate records sharing a blocking key with this record
+        existing_records = get_candidate_records(rule, data, record_id, engine)
+        if exclude_record_ids:
+            existing_records = existing_records.exclude(id__in=exclude_record_ids)
+        
         for existing_record in existing_records:
             try:
                 is_duplicate = engine.evaluate_rule(
                     rule=rule,
-                    record1_data=instance.data,
+                    record1_data=data,
                     record2_data=existing_record.data
                 )
                 
@@ -113,28 +132,107 @@ def check_duplicates_on_record_save(sender, instance, **kwargs):
                         'rule': rule,
                         'existing_record': existing_record,
                         'confidence': 0.95,  # Could be calculated based on rule complexity
-                        'matched_fields': engine.get_matched_fields(rule, instance.data, existing_record.data)
+                        'matched_fields': engine.get_matched_fields(rule, data, existing_record.data)
                     }
                     detected_duplicates.append(duplicate_info)
                     logger.info(f"Duplicate detected: Record matches existing record {existing_record.id} via rule '{rule.name}'")
-                    
-                    # Handle based on rule action - no blocking, just detection
-                    if rule.action_on_duplicate == 'detect_only':
-                        # Store the duplicate for post-save processing
-                        instance._detected_duplicates = detected_duplicates
-                        logger.info(f"Duplicate detected for later processing: Rule '{rule.name}', confidence {duplicate_info['confidence_score']}")
-                    elif rule.action_on_duplicate == 'disabled':
-                        # Skip this rule entirely
-                        logger.debug(f"Skipping disabled duplicate rule: '{rule.name}'")
-                        continue
                         
             except Exception as e:
                 logger.error(f"Error evaluating rule {rule.name}: {str(e)}")
                 continue
     
-    # Store detected duplicates for post-save processing
-    if detected_duplicates:
-        instance._detected_duplicates = detected_duplicates
+    return detected_duplicates
+
+
+def get_candidate_records(rule, data, exclude_record_id=None, engine=None):
+    """
+    Get the records a rule should be evaluated against.
+    Uses the rule's blocking index when it is built, otherwise falls back to the full pipeline.
+    """
+    if rule.blocking_index_built_at:
+        return DuplicateBlockingIndex(rule, engine).candidate_records(data, exclude_record_id)
+    
+    logger.warning(f"Blocking index for rule '{rule.name}' is not built, scanning full pipeline")
+    existing_records = Record.objects.filter(pipeline=rule.pipeline)
+    if exclude_record_id:
+        existing_records = existing_records.exclude(id=exclude_record_id)
+    return existing_records
+
+
+@receiver(post_save, sender=Record)
+def update_duplicate_block_index_on_record_save(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Keep the blocking indexes of the record's pipeline rules in sync with its data.
+    Keys are written for stale indexes too: a rebuild may be running, and its
+    scan may already have passed this record.
+    Record deletion is handled by the cascade on DuplicateBlockKey.record.
+    """
+    if update_fields is not None and 'data' not in update_fields:
+        return
+    
+    if getattr(connection, 'schema_name', 'public') == 'public':
+        return
+    
+    rules = DuplicateRule.objects.filter(
+        pipeline_id=instance.pipeline_id,
+        is_active=True
+    ).select_related('pipeline')
+    
+    index_record_for_rules(instance, rules)
+
+
+@receiver(records_bulk_written, sender=Record)
+def update_duplicate_block_index_on_bulk_write(sender, pipeline, record_ids, **kwargs):
+    """Index records written by the bulk write path, which bypasses post_save"""
+    if getattr(connection, 'schema_name', 'public') == 'public':
+        return
+    
+    rules = DuplicateRule.objects.filter(
+        pipeline_id=pipeline.id,
+        is_active=True
+    ).select_related('pipeline')
+    indexes = get_blocking_indexes(rules)
+    if not indexes:
+        return
+    
+    records = list(Record.objects.filter(id__in=record_ids).only('id', 'data'))
+    for index in indexes:
+        try:
+            index.index_records(records)
+        except Exception as e:
+            logger.error(f"Error indexing bulk-written records for rule {index.rule.name}: {e}", exc_info=True)
+
+
+@receiver(records_bulk_written, sender=Record)
+def detect_duplicates_on_bulk_write(sender, pipeline, record_ids, created, **kwargs):
+    """
+    Run duplicate detection for records written by the bulk write path, which bypasses
+    pre_save/post_save. Connected after update_duplicate_block_index_on_bulk_write, so the
+    batch is already indexed. Created records are only compared with records created
+    before them, as consecutive saves would.
+    """
+    tenant = get_detection_tenant()
+    if tenant is None:
+        return
+    
+    rules = list(get_detection_rules(tenant, pipeline))
+    if not rules:
+        return
+    
+    engine = DuplicateLogicEngine(tenant_id=tenant.id)
+    records = list(Record.objects.filter(id__in=record_ids).select_related('pipeline').order_by('id'))
+    batch_ids = [record.id for record in records]
+    
+    for position, record in enumerate(records):
+        try:
+            detected_duplicates = detect_duplicates(
+                record.data, record.id, rules, engine,
+                exclude_record_ids=batch_ids[position + 1:] if created else ()
+            )
+            if detected_duplicates:
+                store_duplicate_matches(tenant, record, detected_duplicates, created)
+        except Exception as e:
+            logger.error(f"Error detecting duplicates for bulk-written record {record.id}: {e}", exc_info=True)
 
 
 @receiver(post_save, sender=Record)
@@ -151,40 +249,24 @@ def handle_duplicates_after_record_save(sender, instance, created, **kwargs):
         logger.info(f"   ⏸️  No duplicates detected, exiting")
         return
     
-    detected_duplicates = instance._detected_duplicates
-    
-    # Get tenant using the same approach as pre_save signal
-    try:
-        from django.db import connection
-        from tenants.models import Tenant
-        
-        # Check if we're in a tenant context
-        if not hasattr(connection, 'tenant') or not connection.tenant:
-            logger.debug("No tenant context found, skipping duplicate match creation")
-            return
-        
-        tenant_schema = connection.tenant.schema_name
-        
-        # Skip processing on public schema
-        if tenant_schema == 'public':
-            return
-        
-        # Get the actual Tenant model instance (not the FakeTenant from connection)
-        try:
-            tenant = Tenant.objects.get(schema_name=tenant_schema)
-        except Tenant.DoesNotExist:
-            logger.error(f"Tenant model not found for schema {tenant_schema} in post_save")
-            return
-            
-    except Exception as e:
-        logger.error(f"Error getting tenant context in post_save: {str(e)}")
-        return
+    tenant = get_detection_tenant()
+    if tenant is not None:
+        store_duplicate_matches(tenant, instance, instance._detected_duplicates, created)
     
+    # Clean up the temporary attribute
+    delattr(instance, '_detected_duplicates')
+
+
+def store_duplicate_matches(tenant, record, detected_duplicates, created):
+    """
+    Create the DuplicateDetectionResult and the pending DuplicateMatch entries
+    for duplicates detected for a saved record.
+    """
     # Create DuplicateDetectionResult entry
     detection_result = DuplicateDetectionResult.objects.create(
         tenant=tenant,
-        pipeline=instance.pipeline,
-        record=instance,
+        pipeline=record.pipeline,
+        record=record,
         total_duplicates_found=len(detected_duplicates),
         detection_summary={
             'rules_triggered': [dup['rule'].name for dup in detected_duplicates],
@@ -200,7 +282,7 @@ def handle_duplicates_after_record_save(sender, instance, created, **kwargs):
             # Check if this duplicate match already exists
             existing_match = DuplicateMatch.objects.filter(
                 tenant=tenant,
-                record1=instance,
+                record1=record,
                 record2=duplicate_info['existing_record'],
                 status='pending'
             ).first()
@@ -210,7 +292,7 @@ def handle_duplicates_after_record_save(sender, instance, created, **kwargs):
                 duplicate_match = DuplicateMatch.objects.create(
                     tenant=tenant,
                     rule=duplicate_info['rule'],  # Use ForeignKey relationship
-                    record1=instance,
+                    record1=record,
                     record2=duplicate_info['existing_record'],
                     confidence_score=duplicate_info['confidence'],
                     matched_fields=duplicate_info['matched_fields'],
@@ -233,19 +315,61 @@ def handle_duplicates_after_record_save(sender, instance, created, **kwargs):
         except Exception as e:
             logger.error(f"Error creating duplicate match: {str(e)}")
     
-    # Clean up the temporary attribute
-    delattr(instance, '_detected_duplicates')
+    logger.info(f"Duplicate detection completed for record {record.id}. Found {len(detected_duplicates)} duplicates.")
+
+
+def invalidate_blocking_index(rule):
+    """
+    Mark a rule's blocking index stale and queue its rebuild.
+    Until the rebuild finishes, detection falls back to scanning the pipeline.
+    """
+    DuplicateRule.objects.filter(id=rule.id).update(blocking_index_built_at=None)
+    rule.blocking_index_built_at = None
     
-    logger.info(f"Duplicate detection completed for record {instance.id}. Found {len(detected_duplicates)} duplicates.")
+    if not rule.is_active:
+        return
+    
+    tenant_schema = getattr(connection, 'schema_name', None)
+    if not tenant_schema or tenant_schema == 'public':
+        return
+    
+    def queue_rebuild():
+        from .tasks import rebuild_duplicate_block_index
+        try:
+            rebuild_duplicate_block_index.delay(tenant_schema, rule.id)
+        except Exception as e:
+            logger.error(f"Failed to queue blocking index rebuild for rule {rule.name}: {e}")
+    
+    transaction.on_commit(queue_rebuild)
+    logger.info(f"Blocking index rebuild queued for duplicate rule {rule.name}")
 
 
 @receiver(post_save, sender=DuplicateRule)
-def invalidate_duplicate_cache_on_rule_change(sender, instance, **kwargs):
+def invalidate_duplicate_cache_on_rule_change(sender, instance, update_fields=None, **kwargs):
+    """Invalidate the rule's blocking index when it is modified and queue a rebuild"""
+    if update_fields is not None and set(update_fields) <= {'blocking_index_built_at'}:
+        return
+    
+    logger.info(f"Duplicate rule {instance.name} was modified.")
+    invalidate_blocking_index(instance)
+
+
+@receiver(post_save, sender=URLExtractionRule)
+@receiver(post_delete, sender=URLExtractionRule)
+def invalidate_blocking_indexes_on_url_rule_change(sender, instance, **kwargs):
     """
-    Invalidate any duplicate detection caches when rules are modified.
+    URL extraction rules feed the url_normalized blocking keys of every rule
+    in the tenant, so rebuild the indexes of the rules that use them.
     """
-    # TODO: Implement cache invalidation if we add caching later
-    logger.info(f"Duplicate rule {instance.name} was modified. Cache invalidation would occur here.")
+    rules = DuplicateRule.objects.filter(
+        tenant_id=instance.tenant_id,
+        is_active=True
+    ).select_related('pipeline')
+    
+    for index in get_blocking_indexes(rules):
+        if index.uses_url_extraction_rule(instance.id):
+            logger.info(f"URL extraction rule {instance.name} changed, rule {index.rule.name} depends on it.")
+            invalidate_blocking_index(index.rule)
 
 
 def run_bulk_duplicate_detection(pipeline, tenant=None, dry_run=False):
@@ -294,14 +418,28 @@ def run_bulk_duplicate_detection(pipeline, tenant=None, dry_run=False):
         'dry_run': dry_run
     }
     
-    # Compare each record against all subsequent records
+    # Compare each record against subsequent records, restricted to shared blocks when indexed
     records_list = list(records)
+    record_positions = {record.id: i for i, record in enumerate(records_list)}
+    blocking_indexes = {
+        rule.id: DuplicateBlockingIndex(rule, engine)
+        for rule in rules if rule.blocking_index_built_at
+    }
+    
     for i, record1 in enumerate(records_list):
-        for record2 in records_list[i+1:]:
-            total_comparisons += 1
+        for rule in rules:
+            if rule.id in blocking_indexes:
+                candidate_positions = sorted(
+                    record_positions[record_id]
+                    for record_id in blocking_indexes[rule.id].candidate_ids(record1.data, record1.id)
+                    if record_positions.get(record_id, -1) > i
+                )
+                candidates = [records_list[position] for position in candidate_positions]
+            else:
+                candidates = records_list[i+1:]
             
-            # Check each rule
-            for rule in rules:
+            for record2 in candidates:
+                total_comparisons += 1
                 try:
                     is_duplicate = engine.evaluate_rule(
                         rule=rule,
@@ -0,0 +1,41 @@
+"""
+Celery tasks for duplicate detection maintenance
+"""
+import logging
+
+from celery import shared_task
+from django_tenants.utils import schema_context
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, name='duplicates.tasks.rebuild_duplicate_block_index')
+def rebuild_duplicate_block_index(self, tenant_schema, rule_id, batch_size=1000):
+    """
+    Rebuild the candidate-blocking index of a duplicate rule.
+    Queued whenever a rule is created or its logic changes.
+
+    Args:
+        tenant_schema: Schema of the tenant owning the rule
+        rule_id: ID of the DuplicateRule to index
+        batch_size: Records loaded per batch
+    """
+    from .blocking import DuplicateBlockingIndex
+    from .models import DuplicateRule
+
+    try:
+        with schema_context(tenant_schema):
+            try:
+                rule = DuplicateRule.objects.select_related('pipeline').get(id=rule_id)
+            except DuplicateRule.DoesNotExist:
+                logger.warning(f"Duplicate rule {rule_id} no longer exists in {tenant_schema}, skipping index rebuild")
+                return {'success': False, 'error': 'Rule not found'}
+
+            result = DuplicateBlockingIndex(rule).rebuild(batch_size=batch_size)
+
+
+            return {'success': True, 'rule_id': rule_id, **result}
+
+    except Exception as e:
+        logger.error(f"Failed to rebuild blocking index for rule {rule_id} in {tenant_schema}: {e}", exc_info=True)
+        raise
@@ -36,6 +36,18 @@ app.conf.beat_schedule = {
         'schedule': 60.0,  # Run every 60 seconds
     },
     
+    # Fire durable wait timers whose own task was lost
+    'fire-overdue-workflow-timers': {
+        'task': 'workflows.fire_overdue_workflow_timers',
+        'schedule': 60.0 * 5,  # Every 5 minutes
+    },
+    
+    # Rebuild the schedule trigger index from the workflows daily
+    'rebuild-schedule-index': {
+        'task': 'workflows.rebuild_schedule_index',
+        'schedule': 60 * 60 * 24,  # Daily
+    },
+    
     # Clean up old workflow schedules daily
     'cleanup-old-schedules': {
         'task': 'workflows.cleanup_old_schedules',
@@ -48,6 +60,24 @@ app.conf.beat_schedule = {
         'schedule': 60 * 60 * 24 * 7,  # Weekly
     },
     
+    # Build expression indexes for hot record fields, drop stale ones
+    'apply-record-index-advice': {
+        'task': 'pipelines.tasks.apply_record_index_advice',
+        'schedule': 60 * 60 * 24,  # Daily
+    },
+    
+    # Fold record count deltas and refresh cached pipeline record counts
+    'fold-record-counts': {
+        'task': 'pipelines.tasks.fold_record_counts',
+        'schedule': 60.0,  # Every minute
+    },
+    
+    # Recount records to correct record count drift
+    'reconcile-record-counts': {
+        'task': 'pipelines.tasks.reconcile_record_counts',
+        'schedule': 60 * 60 * 24,  # Daily
+    },
+    
     # Communication system periodic sync (backup to webhooks)
     # DISABLED: These tasks are placeholders and cause unnecessary load
     # 'communications-periodic-sync': {
@@ -855,4 +855,11 @@ WORKFLOW_CONFIG = {
     'APPROVAL_TIMEOUT_HOURS': 24,
     'SCHEDULE_CHECK_INTERVAL': 60,  # seconds
     'CLEANUP_RETENTION_DAYS': 30,
+    'MAX_PARALLEL_NODES': 8,  # Concurrent nodes within one execution
+    'MAX_PARALLEL_NODES_PER_TENANT': 32,  # Concurrent nodes across a tenant's executions per worker
+    'EXECUTION_LOG_FLUSH_SIZE': 50,  # Node logs per bulk insert
+    'EXECUTION_LOG_FLUSH_INTERVAL': 5,  # seconds
+    'EVENT_BUS_PARTITIONS': 16,  # Trigger event streams, shared among the trigger event workers
+    'EVENT_BUS_CONCURRENCY': 32,  # Trigger events in flight per worker
+    'DURABLE_WAIT_MIN_SECONDS': 30,  # Longer waits pause the execution on a durable timer
 }
\ No newline at end of file
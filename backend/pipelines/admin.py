@@ -89,8 +89,11 @@ class FieldAdmin(admin.ModelAdmin):
         'create_index', 'is_searchable', 'scheduled_for_hard_delete'
     ]
     search_fields = ['name', 'pipeline__name']
-    readonly_fields = ['slug', 'deleted_at', 'deleted_by']
-    actions = ['soft_delete_fields', 'restore_fields', 'analyze_field_impact']
+    readonly_fields = ['slug', 'deleted_at', 'deleted_by', 'expression_index']
+    actions = [
+        'soft_delete_fields', 'restore_fields', 'analyze_field_impact',
+        'pin_expression_indexes', 'unpin_expression_indexes'
+    ]
     
     fieldsets = (
         ('Basic Information', {
@@ -107,7 +110,7 @@ class FieldAdmin(admin.ModelAdmin):
             )
         }),
         ('Storage & Behavior', {
-            'fields': ('enforce_uniqueness', 'create_index', 'is_searchable')
+            'fields': ('enforce_uniqueness', 'create_index', 'is_searchable', 'expression_index')
         }),
         ('AI Configuration', {
             'fields': ('is_ai_field', 'ai_config'),
@@ -218,6 +221,67 @@ class FieldAdmin(admin.ModelAdmin):
         )
     analyze_field_impact.short_description = "Analyze impact of selected fields"
 
+    def expression_index(self, obj):
+        """Usage of the field in record filters and sorts, and its expression index"""
+        from .index_advisor import INDEXABLE_TYPES, field_usage, index_name, managed_indexes
+
+        if obj.pk is None or obj.field_type not in INDEXABLE_TYPES:
+            return '-'
+        usage = field_usage(obj.pipeline_id).get(obj.slug, {})
+        try:
+            indexed = any(index.slug == obj.slug and index.valid for index in managed_indexes(obj.pipeline_id))
+        except Exception:
+            indexed = False
+        return format_html(
+            '{}<br><small>Filters: {} | Sorts: {} | Index: {}</small>',
+            '✅ Indexed' if indexed else 'Not indexed',
+            usage.get('filter', 0),
+            usage.get('sort', 0),
+            index_name(obj.pipeline_id, obj.slug)
+        )
+    expression_index.short_description = 'Expression Index'
+
+    def _set_create_index(self, request, queryset, create_index):
+        from django.db import connection, transaction
+        from .index_advisor import INDEXABLE_TYPES
+        from .tasks import apply_record_index_advice
+
+        fields = queryset.filter(is_deleted=False, field_type__in=INDEXABLE_TYPES)
+        pipeline_ids = set(fields.values_list('pipeline_id', flat=True))
+        updated = fields.update(create_index=create_index)
+
+        # The advisor reads pinned fields from the cached field schema
+        for pipeline in Pipeline.objects.filter(id__in=pipeline_ids):
+            pipeline._update_field_schema()
+            pipeline.save(update_fields=['field_schema'])
+
+        tenant_schema = connection.schema_name
+        for pipeline_id in pipeline_ids:
+            transaction.on_commit(
+                lambda pipeline_id=pipeline_id: apply_record_index_advice.delay(tenant_schema, pipeline_id)
+            )
+        return updated
+
+    def pin_expression_indexes(self, request, queryset):
+        """Always index the selected fields"""
+        updated = self._set_create_index(request, queryset, True)
+        self.message_user(
+            request,
+            f"Queued expression index builds for {updated} field(s)",
+            level='success' if updated else 'warning'
+        )
+    pin_expression_indexes.short_description = "Build expression indexes for selected fields"
+
+    def unpin_expression_indexes(self, request, queryset):
+        """Leave the selected fields to usage-based advice"""
+        updated = self._set_create_index(request, queryset, False)
+        self.message_user(
+            request,
+            f"{updated} field(s) are now indexed only while hot",
+            level='success' if updated else 'warning'
+        )
+    unpin_expression_indexes.short_description = "Unpin expression indexes of selected fields"
+
 
 @admin.register(Record)
 class RecordAdmin(admin.ModelAdmin):
@@ -0,0 +1,458 @@
+"""
+Bulk record write path
+
+RecordOperationManager processes one record per save: validation, relation
+sync, a search vector UPDATE, a pipeline stats UPDATE and a broadcast each
+run once per row. BulkRecordWriter handles imports and bulk API calls batch
+by batch instead:
+
+- field definitions are loaded once and every row is validated against them
+- rows are written with bulk_create / bulk_update
+- relation fields are synced with set-based inserts and updates into
+  relationships_relationship
+- search vectors are rebuilt with one UPDATE per batch
+- one realtime event per batch is written to the realtime outbox in the
+  batch transaction, and one audit log entry is created per batch
+
+Per-row side effects of Record.save (pre/post_save receivers) do not run
+for bulk writes. Apps that react to record writes connect to the
+records_bulk_written signal instead, which is sent once per committed batch:
+workflow record_created / record_updated triggers (workflows.signals) and
+duplicate indexing and detection (duplicates.signals) run there. AI field
+triggers do not run for bulk writes.
+"""
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Pipeline, Record
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+DEFAULT_BATCH_SIZE = 500
+
+# Sent after each committed batch
+# kwargs: pipeline, record_ids, created (bool), user
+records_bulk_written = Signal()
+
+
+class BulkWriteResult:
+    """Outcome of a bulk write: the written records plus per-row errors"""
+
+    def __init__(self):
+        self.records: List[Record] = []
+        self.errors: List[Dict[str, Any]] = []
+        self.batches = 0
+
+    @property
+    def success(self) -> bool:
+        return not self.errors
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'success': self.success,
+            'record_ids': [record.id for record in self.records],
+            'written_count': len(self.records),
+            'errors': self.errors,
+            'error_count': len(self.errors),
+            'batches': self.batches
+        }
+
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _changed_fields(old_data: Dict[str, Any], new_data: Dict[str, Any]) -> Set[str]:
+    """Top-level keys whose values differ (RecordUtils.get_changed_fields without per-field logging)"""
+    old_data = old_data or {}
+    new_data = new_data or {}
+    return {key for key in set(old_data) | set(new_data) if old_data.get(key) != new_data.get(key)}
+
+
+def _batch_changed_fields(records: List[Record], original_data: Dict[int, Dict[str, Any]]) -> Set[str]:
+    changed_fields = set()
+    for record in records:
+        changed_fields.update(_changed_fields(original_data.get(record.id, {}), record.data))
+    return changed_fields
+
+
+def _normalize_relation_ids(value: Any, allow_multiple: bool) -> List[int]:
+    """Same normalization as RelationFieldHandler.set_relationships"""
+    if value is None or value == '':
+        return []
+    if not isinstance(value, list):
+        value = [value]
+    ids = [int(v) for v in value if v is not None and str(v).isdigit()]
+    if not allow_multiple and len(ids) > 1:
+        ids = ids[:1]
+    return ids
+
+
+class BulkRecordWriter:
+    """
+    Validates and writes records of a single pipeline in batches
+
+    Usage:
+        writer = BulkRecordWriter(pipeline, user)
+        result = writer.create([{'name': 'Acme'}, ...])
+        result = writer.update([{'id': 12, 'data': {'stage': 'won'}}, ...])
+    """
+
+    def __init__(self, pipeline: Pipeline, user: User, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.pipeline = pipeline
+        self.user = user
+        self.batch_size = max(1, batch_size)
+
+        from .validation import RecordValidator
+        self.validator = RecordValidator(pipeline)
+
+        self._search_vector = None
+        self._relation_handlers = None
+
+    # =========================================================================
+    # PUBLIC API
+    # =========================================================================
+
+    def create(self, rows: List[Dict[str, Any]]) -> BulkWriteResult:
+        """
+        Create records from a list of data dictionaries
+
+        Errors are reported as {'index': position in rows, 'errors': {...}};
+        invalid rows are skipped and the rest of the batch is still written.
+        """
+        result = BulkWriteResult()
+
+        for offset in range(0, len(rows), self.batch_size):
+            batch = rows[offset:offset + self.batch_size]
+            validations = self.validator.validate_record_batch(
+                [row if isinstance(row, dict) else {} for row in batch],
+                'business_rules'
+            )
+
+            now = timezone.now()
+            to_create = []
+            for position, (row, validation) in enumerate(zip(batch, validations)):
+                index = offset + position
+                if not isinstance(row, dict):
+                    result.errors.append({'index': index, 'errors': {'general': ['Record data must be an object']}})
+                    continue
+                if not validation['is_valid']:
+                    result.errors.append({'index': index, 'errors': validation['errors']})
+                    continue
+
+                to_create.append(Record(
+                    pipeline=self.pipeline,
+                    data=validation['cleaned_data'],
+                    title='',  # Titles are generated dynamically
+                    created_by=self.user,
+                    updated_by=self.user,
+                    created_at=now,
+                    updated_at=now
+                ))
+
+            if not to_create:
+                continue
+
+            with transaction.atomic():
+                created = Record.objects.bulk_create(to_create)
+                self._sync_relations(created)
+                self._update_search_vectors(created)
+                # record_count is kept by the record count triggers
+                Pipeline.objects.filter(id=self.pipeline.id).update(last_record_created=now)
+                self._enqueue_realtime_event(created, is_new=True, changed_fields=set())
+
+            result.records.extend(created)
+            result.batches += 1
+            self._emit_batch_events(created, is_new=True, changed_fields=set())
+
+        return result
+
+    def update(self, updates: List[Dict[str, Any]]) -> BulkWriteResult:
+        """
+        Merge partial data into existing records
+
+        Each update is {'id': record id, 'data': {...}}. Errors are reported as
+        {'record_id': id, 'errors': {...}}.
+        """
+        result = BulkWriteResult()
+
+        for batch in _chunks(updates, self.batch_size):
+            record_ids = [u.get('id') for u in batch if isinstance(u, dict)]
+            existing = {
+                record.id: record
+                for record in Record.objects.filter(
+                    pipeline=self.pipeline,
+                    id__in=[rid for rid in record_ids if str(rid).isdigit()],
+                    is_deleted=False
+                )
+            }
+
+            # Merge updates onto in-memory records; repeated IDs apply in order
+            original_data = {}
+            pending = {}
+            for update in batch:
+                record_id = update.get('id') if isinstance(update, dict) else None
+                record = existing.get(int(record_id)) if str(record_id).isdigit() else None
+                if record is None:
+                    result.errors.append({'record_id': record_id, 'errors': {'general': ['Record not found']}})
+                    continue
+
+                new_data = update.get('data') or {}
+                if not isinstance(new_data, dict):
+                    result.errors.append({'record_id': record_id, 'errors': {'general': ['Record data must be an object']}})
+                    continue
+
+                original_data.setdefault(record.id, dict(record.data or {}))
+                merged = dict(record.data or {})
+                merged.update(new_data)
+                record.data = merged
+                pending[record.id] = record
+
+            if not pending:
+                continue
+
+            # Same context selection as RecordChangeManager: small partial updates use storage rules
+            by_context = defaultdict(list)
+            for record in pending.values():
+                changed = _changed_fields(original_data[record.id], record.data)
+                context = 'storage' if 0 < len(changed) <= 3 else 'business_rules'
+                by_context[context].append(record)
+
+            now = timezone.now()
+            to_update = []
+            for context, records in by_context.items():
+                validations = self.validator.validate_record_batch([r.data for r in records], context)
+                for record, validation in zip(records, validations):
+                    if not validation['is_valid']:
+                        record.data = original_data[record.id]
+                        result.errors.append({'record_id': record.id, 'errors': validation['errors']})
+                        continue
+
+                    merged = dict(original_data[record.id])
+                    merged.update(validation['cleaned_data'])
+                    record.data = merged
+                    if merged != original_data[record.id]:
+                        record.version += 1
+                    record.updated_by = self.user
+                    record.updated_at = now
+                    to_update.append(record)
+
+            if not to_update:
+                continue
+
+            changed_fields = _batch_changed_fields(to_update, original_data)
+            with transaction.atomic():
+                Record.objects.bulk_update(to_update, ['data', 'version', 'updated_by', 'updated_at'])
+                self._sync_relations(to_update)
+                self._update_search_vectors(to_update)
+                self._enqueue_realtime_event(to_update, is_new=False, changed_fields=changed_fields)
+
+            result.records.extend(to_update)
+            result.batches += 1
+            self._emit_batch_events(to_update, is_new=False, changed_fields=changed_fields)
+
+        return result
+
+    # =========================================================================
+    # RELATION FIELDS
+    # =========================================================================
+
+    @property
+    def relation_handlers(self):
+        """RelationFieldHandler per relation field, built once per writer"""
+        if self._relation_handlers is None:
+            from .relation_field_handler import RelationFieldHandler
+            self._relation_handlers = [
+                RelationFieldHandler(field)
+                for field in self.pipeline.fields.filter(field_type='relation')
+            ]
+        return self._relation_handlers
+
+    def _sync_relations(self, records: List[Record]):
+        """Sync every relation field of the batch with set-based writes"""
+        for handler in self.relation_handlers:
+            desired = {
+                record.id: _normalize_relation_ids(record.data.get(handler.field.slug), handler.allow_multiple)
+                for record in records
+                if record.data and handler.field.slug in record.data
+            }
+            if desired:
+                try:
+                    self._sync_relation_field(handler, desired)
+                except Exception as e:
+                    # Match RecordOperationManager: relation sync failures don't fail the write
+                    logger.error(f"Bulk sync of relation field {handler.field.slug} failed: {e}", exc_info=True)
+
+    def _sync_relation_field(self, handler, desired: Dict[int, List[int]]) -> Dict[str, int]:
+        """
+        Reconcile the Relationship rows of one relation field for many records
+
+        Args:
+            handler: RelationFieldHandler of the field
+            desired: {record id: target record ids the field should point to}
+        """
+        from relationships.models import Relationship
+
+        pipeline_id = self.pipeline.id
+        target_pipeline_id = handler.target_pipeline_id
+        relationship_type_id = handler.relationship_type.id
+        record_ids = list(desired.keys())
+
+        # Current relationships in both directions, including soft-deleted ones for resurrection
+        current = defaultdict(dict)  # record id -> {other record id: (relationship id, is_deleted)}
+        rows = Relationship.all_objects.filter(
+            relationship_type_id=relationship_type_id
+        ).filter(
+            Q(source_pipeline_id=pipeline_id, source_record_id__in=record_ids) |
+            Q(target_pipeline_id=pipeline_id, target_record_id__in=record_ids)
+        ).values_list('id', 'source_pipeline_id', 'source_record_id', 'target_pipeline_id', 'target_record_id', 'is_deleted')
+
+        for rel_id, src_pipeline, src_id, tgt_pipeline, tgt_id, is_deleted in rows:
+            if src_pipeline == pipeline_id and src_id in desired:
+                current[src_id][tgt_id] = (rel_id, is_deleted)
+            if tgt_pipeline == pipeline_id and tgt_id in desired:
+                current[tgt_id][src_id] = (rel_id, is_deleted)
+
+        # Only link to live records of the target pipeline
+        requested = set()
+        for target_ids in desired.values():
+            requested.update(target_ids)
+        valid_targets = set(
+            Record.objects.filter(
+                id__in=requested, pipeline_id=target_pipeline_id, is_deleted=False
+            ).values_list('id', flat=True)
+        ) if requested else set()
+
+        to_soft_delete: Set[int] = set()
+        to_resurrect: Set[int] = set()
+        to_create: Set[Tuple[int, int, int, int]] = set()
+
+        for record_id, target_ids in desired.items():
+            existing = current.get(record_id, {})
+            wanted = set(target_ids)
+
+            for other_id, (rel_id, is_deleted) in existing.items():
+                if other_id not in wanted and not is_deleted:
+                    to_soft_delete.add(rel_id)
+                elif other_id in wanted and is_deleted:
+                    to_resurrect.add(rel_id)
+
+            for target_id in wanted - set(existing.keys()):
+                if target_id not in valid_targets:
+                    continue
+                # Lower record ID is always the source, as in RelationFieldHandler
+                if record_id < target_id:
+                    to_create.add((pipeline_id, record_id, target_pipeline_id, target_id))
+                else:
+                    to_create.add((target_pipeline_id, target_id, pipeline_id, record_id))
+
+        # A relationship kept by one record of the batch must not be removed for another
+        to_soft_delete -= to_resurrect
+
+        now = timezone.now()
+        if to_soft_delete:
+            Relationship.all_objects.filter(id__in=to_soft_delete).update(
+                is_deleted=True, deleted_by=self.user, deleted_at=now, updated_at=now
+            )
+        if to_resurrect:
+            Relationship.all_objects.filter(id__in=to_resurrect).update(
+                is_deleted=False, deleted_by=None, deleted_at=None, updated_at=now
+            )
+        if to_create:
+            Relationship.objects.bulk_create([
+                Relationship(
+                    relationship_type_id=relationship_type_id,
+                    source_pipeline_id=src_pipeline,
+                    source_record_id=src_id,
+                    target_pipeline_id=tgt_pipeline,
+                    target_record_id=tgt_id,
+                    created_by=self.user,
+                    strength=1.0,
+                    is_deleted=False
+                )
+                for src_pipeline, src_id, tgt_pipeline, tgt_id in to_create
+            ], ignore_conflicts=True)
+
+        return {
+            'created': len(to_create) + len(to_resurrect),
+            'removed': len(to_soft_delete)
+        }
+
+    # =========================================================================
+    # SEARCH VECTORS
+    # =========================================================================
+
+    @property
+    def search_vector(self):
+        """Weighted vector expression of this pipeline, see pipelines.search"""
+        if self._search_vector is None:
+            from .search import search_vector_expression
+            self._search_vector = search_vector_expression(self.pipeline)
+        return self._search_vector
+
+    def _update_search_vectors(self, records: List[Record]):
+        """Rebuild the search vectors of the whole batch with a single UPDATE"""
+        Record.objects.filter(id__in=[record.id for record in records]).update(
+            search_vector=self.search_vector
+        )
+
+    # =========================================================================
+    # AGGREGATED EVENTS
+    # =========================================================================
+
+    def _enqueue_realtime_event(self, records: List[Record], is_new: bool, changed_fields: Set[str]):
+        """One realtime outbox event for a batch, in the batch transaction"""
+        from realtime.outbox import enqueue_records_bulk_written
+
+        enqueue_records_bulk_written(
+            self.pipeline.id,
+            [record.id for record in records],
+            created=is_new,
+            changed_fields=sorted(changed_fields),
+            user=self.user
+        )
+
+    def _emit_batch_events(self, records: List[Record], is_new: bool, changed_fields: Set[str]):
+        """One audit log entry and one records_bulk_written signal per committed batch"""
+        record_ids = [record.id for record in records]
+        action = 'bulk_created' if is_new else 'bulk_updated'
+
+        try:
+            from core.models import AuditLog
+            AuditLog.objects.create(
+                user=self.user,
+                action=action,
+                model_name='Record',
+                object_id=str(self.pipeline.id),
+                changes={
+                    'pipeline_name': self.pipeline.name,
+                    'pipeline_id': str(self.pipeline.id),
+                    'record_ids': record_ids,
+                    'total_records': len(record_ids),
+                    'changed_fields': sorted(changed_fields),
+                    'action_type': 'bulk_operation'
+                }
+            )
+        except Exception as e:
+            logger.error(f"Failed to create audit log for {action} in pipeline {self.pipeline.id}: {e}")
+
+        try:
+            records_bulk_written.send(
+                sender=Record,
+                pipeline=self.pipeline,
+                record_ids=record_ids,
+                created=is_new,
+                user=self.user
+            )
+        except Exception as e:
+            logger.error(f"records_bulk_written receivers failed for pipeline {self.pipeline.id}: {e}", exc_info=True)
+
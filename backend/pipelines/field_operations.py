@@ -612,64 +612,25 @@ class FieldOperationManager:
         start_time = time.time()
         
         try:
-            # Get all active records in the pipeline
-            records = self.pipeline.records.filter(is_deleted=False)
-            total_records = records.count()
-            
-            if total_records == 0:
-                return MigrationResult(
-                    success=True,
-                    records_processed=0,
-                    records_migrated=0,
-                    processing_time_seconds=0.0,
-                    metadata={'operation_id': operation_id}
-                )
+            from .field_backfill import FieldBackfill
             
             # Determine default value for the new field
             default_value = self._get_field_default_value(field, field_config)
             
-            logger.info(f"[{operation_id}] Adding field '{field.slug}' with default value '{default_value}' to {total_records} records")
-            
-            # Migrate records in batches for performance
-            batch_size = 100
-            migrated_count = 0
-            failed_count = 0
-            errors = []
+            logger.info(f"[{operation_id}] Adding field '{field.slug}' with default value '{default_value}' to existing records")
             
-            for batch_start in range(0, total_records, batch_size):
-                batch_records = records[batch_start:batch_start + batch_size]
-                
-                for record in batch_records:
-                    try:
-                        # Only add field if it doesn't already exist
-                        if field.slug not in (record.data or {}):
-                            # Add new field with default value
-                            if record.data is None:
-                                record.data = {}
-                            
-                            record.data[field.slug] = default_value
-                            record._skip_broadcast = True  # Prevent real-time broadcasts during migration
-                            record._migration_context = True  # Use migration validation context
-                            record.save(update_fields=['data'])
-                            migrated_count += 1
-                        
-                    except Exception as record_error:
-                        failed_count += 1
-                        errors.append(f"Record {record.id}: {str(record_error)}")
-                        logger.error(f"[{operation_id}] Failed to migrate record {record.id}: {record_error}")
+            # One jsonb_set UPDATE per batch instead of a save() per record
+            batch_size = 1000
+            result = FieldBackfill(self.pipeline, batch_size=batch_size).add_default(field.slug, default_value)
             
             processing_time = time.time() - start_time
             
-            success = failed_count == 0
-            
-            logger.info(f"[{operation_id}] Field migration completed: {migrated_count} migrated, {failed_count} failed")
+            logger.info(f"[{operation_id}] Field migration completed: {result.records_updated} migrated")
             
             return MigrationResult(
-                success=success,
-                records_processed=total_records,
-                records_migrated=migrated_count,
-                records_failed=failed_count,
-                errors=errors[:10],  # Limit errors to prevent memory issues
+                success=True,
+                records_processed=result.records_matched,
+                records_migrated=result.records_updated,
                 processing_time_seconds=processing_time,
                 metadata={
                     'operation_id': operation_id,
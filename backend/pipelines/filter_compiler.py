@@ -0,0 +1,454 @@
+"""
+SavedFilter boolean query compiler
+
+Turns a SavedFilter.filter_config (the frontend BooleanQuery structure) into
+one parameterized WHERE clause over Record.data, so filtered views are
+evaluated and paginated by PostgreSQL instead of scanning rows in Python.
+
+    {
+        "groupLogic": "AND",
+        "groups": [
+            {"logic": "OR", "filters": [
+                {"field": "stage", "operator": "equals", "value": "won"},
+                {"field": "amount", "operator": "gte", "value": "1000"}
+            ]}
+        ]
+    }
+
+The compiled SQL follows record_matches_filter_config() (the original Python
+evaluator, kept as the reference implementation) operator by operator:
+
+- text operators compare lower(str(value)): strings, numbers and booleans
+  through data->>'field', lists and objects through their JSON text with
+  Python repr quoting, missing/null values as ''
+- contains on a list with a {"user_id": ...} filter value uses JSONB
+  containment, so it can use a GIN index on data
+- numeric operators only match values float() accepts (numbers, numeric
+  strings, booleans); numeric strings are compared as exact decimals
+
+Each condition is split into a scalar branch, a container branch and a
+missing/null branch. Whether missing values match does not depend on the row,
+so it is decided at compile time and the branch is dropped when they don't;
+scalar comparisons stay in the plain lower(data->>'field') form that
+expression indexes can serve.
+
+Known differences from the Python evaluator: floats Python prints in
+exponent form (1e-05), quote characters inside list items, dict key order
+inside JSON text and numeric strings with underscores (1_000); lower() for
+non-ASCII text follows the database collation.
+"""
+import json
+import math
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+TEXT_OPERATORS = {
+    'contains', 'not_contains', 'equals', 'not_equals',
+    'starts_with', 'ends_with', 'is_empty', 'is_not_empty',
+}
+
+NUMERIC_OPERATORS = {
+    'gt': '>', 'greater_than': '>',
+    'gte': '>=', 'greater_than_or_equal': '>=',
+    'lt': '<', 'less_than': '<',
+    'lte': '<=', 'less_than_or_equal': '<=',
+}
+
+SUPPORTED_OPERATORS = TEXT_OPERATORS | set(NUMERIC_OPERATORS)
+
+# Strings float() and ::numeric both accept (finite values only)
+_NUMERIC_TEXT_PATTERN = r'^\s*[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?\s*$'
+_POSITIVE_INFINITY_PATTERN = r'^\s*\+?inf(inity)?\s*$'
+_NEGATIVE_INFINITY_PATTERN = r'^\s*-inf(inity)?\s*$'
+
+# A compiled node is either a constant (known for every row) or SQL with params
+Compiled = Union[bool, Tuple[str, List[Any]]]
+
+
+# =============================================================================
+# REFERENCE EVALUATOR - previously PublicFilterAccessViewSet._record_matches_filter
+# =============================================================================
+
+def record_matches_filter_config(record_data: Dict[str, Any], filter_config: Dict[str, Any]) -> bool:
+    """
+    Check in Python whether record data matches a filter config.
+
+    Args:
+        record_data: Record.data of the record to check
+        filter_config: SavedFilter.filter_config
+
+    Returns:
+        bool: True if record matches filter criteria, False otherwise
+    """
+    # If no filter config, all records match
+    if not filter_config:
+        return True
+
+    groups = filter_config.get('groups', [])
+    group_logic = filter_config.get('groupLogic', 'AND')
+
+    # If no groups, all records match
+    if not groups:
+        return True
+
+    group_results = []
+
+    for group in groups:
+        filters = group.get('filters', [])
+        logic = group.get('logic', 'AND')
+
+        if not filters:
+            # Empty group matches all records
+            group_results.append(True)
+            continue
+
+        filter_results = []
+
+        for filter_item in filters:
+            record_value = record_data.get(filter_item.get('field'))
+            filter_results.append(
+                evaluate_filter_condition(record_value, filter_item.get('operator'), filter_item.get('value'))
+            )
+
+        # Apply group logic (AND/OR)
+        if logic.upper() == 'AND':
+            group_results.append(all(filter_results))
+        else:  # OR
+            group_results.append(any(filter_results))
+
+    # Apply group logic (AND/OR)
+    if group_logic.upper() == 'AND':
+        return all(group_results)
+    else:  # OR
+        return any(group_results)
+
+
+def evaluate_filter_condition(record_value, operator, filter_value) -> bool:
+    """
+    Evaluate a single filter condition in Python.
+
+    Args:
+        record_value: The value from the record
+        operator: The filter operator (e.g., 'contains', 'equals', 'gt')
+        filter_value: The value to compare against
+
+    Returns:
+        bool: True if condition matches, False otherwise
+    """
+    # Handle null/empty values
+    if record_value is None:
+        record_value = ""
+
+    try:
+        if operator in NUMERIC_OPERATORS:
+            # Only values float() accepts can match; anything else fails closed
+            try:
+                left, right = float(record_value), float(filter_value)
+            except (ValueError, TypeError):
+                return False
+            return {
+                '>': left > right, '>=': left >= right,
+                '<': left < right, '<=': left <= right,
+            }[NUMERIC_OPERATORS[operator]]
+
+        if operator not in TEXT_OPERATORS:
+            # Unknown operator, default to false for security
+            return False
+
+        if operator == 'contains' and isinstance(record_value, list):
+            # Special handling for user field arrays (JSON objects)
+            mode = _user_contains_mode(filter_value)
+            if mode is None:
+                return False
+            if mode != 'text':
+                target_user_id_int, target_user_id_str = mode
+                # Check if any user in the array has the specified user_id
+                for user in record_value:
+                    if isinstance(user, dict) and 'user_id' in user:
+                        user_id = user['user_id']
+                        if user_id == target_user_id_int or str(user_id) == target_user_id_str:
+                            return True
+                return False
+            # Fall back to string comparison
+
+        return _text_predicate(operator, str(record_value).lower(), _filter_text(filter_value))
+    except Exception:
+        # If any error occurs during comparison, default to false for security
+        return False
+
+
+def _filter_text(filter_value) -> str:
+    return str(filter_value).lower() if filter_value is not None else ""
+
+
+def _text_predicate(operator: str, record_str: str, filter_str: str) -> bool:
+    if operator == 'contains':
+        return filter_str in record_str
+    if operator == 'not_contains':
+        return filter_str not in record_str
+    if operator == 'equals':
+        return record_str == filter_str
+    if operator == 'not_equals':
+        return record_str != filter_str
+    if operator == 'starts_with':
+        return record_str.startswith(filter_str)
+    if operator == 'ends_with':
+        return record_str.endswith(filter_str)
+    if operator == 'is_empty':
+        return record_str == ""
+    if operator == 'is_not_empty':
+        return record_str != ""
+    return False
+
+
+def _user_contains_mode(filter_value):
+    """
+    How 'contains' treats a list value for this filter value.
+
+    Returns:
+        (user id as int, user id as str) to match user field entries,
+        'text' to fall back to string comparison,
+        None if the condition can never match a list
+    """
+    try:
+        filter_obj = json.loads(filter_value)
+        if 'user_id' in filter_obj:
+            target_user_id = filter_obj['user_id']
+            return int(target_user_id), str(target_user_id)
+    except (json.JSONDecodeError, ValueError, KeyError):
+        pass
+    except Exception:
+        return None
+    return 'text'
+
+
+def _parse_number(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+# =============================================================================
+# SQL COMPILER
+# =============================================================================
+
+class FilterCompiler:
+    """Compiles filter configs against the data column of a model (Record by default)"""
+
+    def __init__(self, model=None, column: str = 'data'):
+        if model is None:
+            from .models import Record
+            model = Record
+        quote = connection.ops.quote_name
+        self.column = f"{quote(model._meta.db_table)}.{quote(column)}"
+
+    def compile(self, filter_config: Optional[Dict[str, Any]]) -> Q:
+        """
+        Compile a filter config into a Q object
+
+        Returns:
+            Q() when every record matches, otherwise a Q wrapping one boolean SQL expression
+        """
+        return self._to_q(self.compile_sql(filter_config))
+
+    def compile_sql(self, filter_config: Optional[Dict[str, Any]]) -> Compiled:
+        """Compile a filter config into a constant or an (sql, params) pair"""
+        if not filter_config:
+            return True
+
+        groups = filter_config.get('groups', [])
+        if not groups:
+            return True
+
+        compiled_groups = []
+        for group in groups:
+            filters = group.get('filters', [])
+            if not filters:
+                compiled_groups.append(True)
+                continue
+
+            conditions = [
+                self.compile_condition(f.get('field'), f.get('operator'), f.get('value'))
+                for f in filters
+            ]
+            compiled_groups.append(self._combine(conditions, group.get('logic') or 'AND'))
+
+        return self._combine(compiled_groups, filter_config.get('groupLogic') or 'AND')
+
+    def compile_condition(self, field: Any, operator: str, filter_value: Any) -> Compiled:
+        """Compile one {field, operator, value} condition"""
+        if operator not in SUPPORTED_OPERATORS:
+            return False
+
+        # Missing keys and JSON null evaluate like an empty string, so their outcome is known up front
+        matches_missing = evaluate_filter_condition(None, operator, filter_value)
+        if not isinstance(field, str):
+            return matches_missing
+
+        missing_branch = (
+            f"(({self.column} -> %s) IS NULL OR jsonb_typeof({self.column} -> %s) = 'null')",
+            [field, field]
+        ) if matches_missing else False
+
+        if operator in NUMERIC_OPERATORS:
+            value_branches = self._numeric_branches(field, operator, filter_value)
+        else:
+            value_branches = self._text_branches(field, operator, filter_value)
+
+        return self._combine([missing_branch] + value_branches, 'OR')
+
+    # -------------------------------------------------------------------------
+    # Operator branches
+    # -------------------------------------------------------------------------
+
+    def _text_branches(self, field: str, operator: str, filter_value: Any) -> List[Compiled]:
+        value = f"({self.column} -> %s)"
+        text = f"({self.column} ->> %s)"
+        typeof = f"jsonb_typeof({value})"
+        filter_str = _filter_text(filter_value)
+
+        predicate, predicate_params = self._text_sql(operator, filter_str)
+
+        scalar = (
+            f"({typeof} IN ('string', 'number', 'boolean') AND lower({text}) {predicate})",
+            [field, field] + predicate_params
+        )
+
+        # Lists and objects compare against their JSON text with Python repr quotes
+        container_text = f"lower(translate(({value})::text, '\"', ''''))"
+        container_predicate = f"{container_text} {predicate}"
+        obj = (f"({typeof} = 'object' AND {container_predicate})", [field, field] + predicate_params)
+
+        if operator == 'contains':
+            mode = _user_contains_mode(filter_value)
+            if mode is None:
+                array = False
+            elif mode == 'text':
+                array = (f"({typeof} = 'array' AND {container_predicate})", [field, field] + predicate_params)
+            else:
+                target_user_id_int, target_user_id_str = mode
+                array = (
+                    f"({typeof} = 'array' AND ({value} @> %s::jsonb OR {value} @> %s::jsonb))",
+                    [
+                        field,
+                        field, json.dumps([{'user_id': target_user_id_int}]),
+                        field, json.dumps([{'user_id': target_user_id_str}]),
+                    ]
+                )
+        else:
+            array = (f"({typeof} = 'array' AND {container_predicate})", [field, field] + predicate_params)
+
+        return [scalar, array, obj]
+
+    @staticmethod
+    def _text_sql(operator: str, filter_str: str) -> Tuple[str, List[Any]]:
+        """SQL predicate applied to an already lower-cased text expression"""
+        escaped = filter_str.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        if operator == 'contains':
+            return "LIKE %s", [f"%{escaped}%"]
+        if operator == 'not_contains':
+            return "NOT LIKE %s", [f"%{escaped}%"]
+        if operator == 'equals':
+            return "= %s", [filter_str]
+        if operator == 'not_equals':
+            return "<> %s", [filter_str]
+        if operator == 'starts_with':
+            return "LIKE %s", [f"{escaped}%"]
+        if operator == 'ends_with':
+            return "LIKE %s", [f"%{escaped}"]
+        if operator == 'is_empty':
+            return "= ''", []
+        return "<> ''", []  # is_not_empty
+
+    def _numeric_branches(self, field: str, operator: str, filter_value: Any) -> List[Compiled]:
+        right = _parse_number(filter_value)
+        if right is None or math.isnan(right):
+            return [False]
+
+        sql_operator = NUMERIC_OPERATORS[operator]
+
+        def holds(left: float) -> bool:
+            return evaluate_filter_condition(left, operator, right)
+
+        value = f"({self.column} -> %s)"
+        text = f"({self.column} ->> %s)"
+        typeof = f"jsonb_typeof({value})"
+        branches: List[Compiled] = []
+
+        # Finite numbers and numeric strings
+        if math.isinf(right):
+            finite = holds(0.0)
+            if finite:
+                branches.append((
+                    f"({typeof} IN ('number', 'string') AND {text} ~ %s)",
+                    [field, field, _NUMERIC_TEXT_PATTERN]
+                ))
+        else:
+            branches.append((
+                f"(CASE WHEN {typeof} IN ('number', 'string') AND {text} ~ %s "
+                f"THEN ({text})::numeric END {sql_operator} %s::numeric)",
+                [field, field, _NUMERIC_TEXT_PATTERN, field, repr(right)]
+            ))
+
+        # Infinity spelled as a string
+        for pattern, infinity in ((_POSITIVE_INFINITY_PATTERN, math.inf), (_NEGATIVE_INFINITY_PATTERN, -math.inf)):
+            if holds(infinity):
+                branches.append((
+                    f"({typeof} = 'string' AND {text} ~* %s)",
+                    [field, field, pattern]
+                ))
+
+        # float(True) == 1.0, float(False) == 0.0
+        bool_values = [literal for literal, number in (('true', 1.0), ('false', 0.0)) if holds(number)]
+        if bool_values:
+            branches.append((
+                f"({typeof} = 'boolean' AND {text} IN ({', '.join(['%s'] * len(bool_values))}))",
+                [field, field] + bool_values
+            ))
+
+        return branches or [False]
+
+    # -------------------------------------------------------------------------
+    # Boolean combination with constant folding
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _combine(parts: List[Compiled], logic: str) -> Compiled:
+        is_and = logic.upper() == 'AND'
+        absorbing = not is_and  # False absorbs AND, True absorbs OR
+
+        sql_parts = []
+        for part in parts:
+            if part is absorbing:
+                return absorbing
+            if isinstance(part, tuple):
+                sql_parts.append(part)
+
+        if not sql_parts:
+            return is_and
+        if len(sql_parts) == 1:
+            return sql_parts[0]
+
+        joiner = ' AND ' if is_and else ' OR '
+        params = []
+        for _, part_params in sql_parts:
+            params.extend(part_params)
+        return f"({joiner.join(sql for sql, _ in sql_parts)})", params
+
+    @staticmethod
+    def _to_q(compiled: Compiled) -> Q:
+        if compiled is True:
+            return Q()
+        if compiled is False:
+            return Q(pk__in=[])
+        sql, params = compiled
+        return Q(RawSQL(sql, params, output_field=BooleanField()))
+
+
+def compile_filter_config(filter_config: Optional[Dict[str, Any]], model=None) -> Q:
+    """Compile a SavedFilter.filter_config into a Q object for record querysets"""
+    return FilterCompiler(model).compile(filter_config)
@@ -0,0 +1,366 @@
+"""
+Expression-index advisor for hot JSONB record fields
+
+Record.data only carries a GIN index, which serves containment but not
+range filters or sorting on a single field. The records API reports which
+fields it range-filters and sorts on (record_field_usage); the counts live
+in one Redis hash per pipeline. RecordIndexAdvisor turns them into partial
+expression indexes:
+
+    CREATE INDEX CONCURRENTLY idx_rec_expr_<pipeline>_<slug>
+        ON pipelines_record (pipeline_id, <sort expression>)
+        WHERE pipeline_id = <pipeline> AND is_deleted = false
+
+The indexed expression is the planner's sort_expression_sql, so Postgres
+matches it against both range predicates and ?ordering=. Dates are indexed
+as text (a text-to-date cast is not immutable); ISO strings order the same.
+
+Fields flagged create_index are always indexed; other indexes are dropped
+again once their field's (periodically halved) usage cools down. Managed
+indexes carry a JSON comment naming their field, which lets the advisor
+find and drop indexes of deleted, renamed or retyped fields in the current
+tenant schema.
+Building and dropping run CONCURRENTLY, so they need autocommit: use the
+manage_record_indexes command or the tasks in pipelines.tasks.
+"""
+import json
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.db import connection, transaction
+
+from .query_planner import NUMBER_TYPES, STRING_TYPES, sort_expression_sql
+
+logger = logging.getLogger(__name__)
+
+INDEX_PREFIX = 'idx_rec_expr_'
+INDEXABLE_TYPES = NUMBER_TYPES | STRING_TYPES
+# Planner strategies an expression index can serve
+EXPRESSION_STRATEGIES = {'numeric_expression', 'text_range'}
+
+USAGE_KEY = 'record_field_usage'
+# Usage counters of a pipeline expire after a week without list requests
+USAGE_WINDOW = 60 * 60 * 24 * 7
+
+# Uses (filters + sorts) before a field counts as hot
+MIN_USES = 100
+# Advised (not pinned) indexes per pipeline
+MAX_INDEXES_PER_PIPELINE = 5
+
+
+def _usage_key(pipeline_id: int) -> str:
+    schema = getattr(connection, 'schema_name', None) or 'public'
+    return f"{schema}:{USAGE_KEY}:{pipeline_id}"
+
+
+def record_field_usage(pipeline_id: int, plan=None, sorted_slugs: Iterable[str] = ()):
+    """Count the expression-indexable filters of a plan and the fields sorted on"""
+    counts = Counter()
+    if plan is not None:
+        for planned in plan.filters:
+            if planned.strategy in EXPRESSION_STRATEGIES and planned.field_type in INDEXABLE_TYPES:
+                counts[f'filter:{planned.slug}'] += 1
+    for slug in sorted_slugs:
+        counts[f'sort:{slug}'] += 1
+    if not counts:
+        return
+
+    try:
+        from django_redis import get_redis_connection
+        redis_conn = get_redis_connection("default")
+        key = _usage_key(pipeline_id)
+        pipe = redis_conn.pipeline()
+        for member, amount in counts.items():
+            pipe.hincrby(key, member, amount)
+        pipe.expire(key, USAGE_WINDOW)
+        pipe.execute()
+    except Exception as e:
+        # Usage tracking must never fail a list request
+        logger.debug(f"Could not record field usage for pipeline {pipeline_id}: {e}")
+
+
+def field_usage(pipeline_id: int) -> Dict[str, Dict[str, int]]:
+    """{slug: {'filter': n, 'sort': n}} recorded for a pipeline"""
+    try:
+        from django_redis import get_redis_connection
+        raw = get_redis_connection("default").hgetall(_usage_key(pipeline_id))
+    except Exception as e:
+        logger.warning(f"Could not read field usage for pipeline {pipeline_id}: {e}")
+        return {}
+
+    usage = {}
+    for member, count in raw.items():
+        member = member.decode() if isinstance(member, bytes) else member
+        kind, _, slug = member.partition(':')
+        usage.setdefault(slug, {'filter': 0, 'sort': 0})[kind] = int(count)
+    return usage
+
+
+def decay_field_usage(pipeline_id: int):
+    """Halve a pipeline's usage counts so old traffic fades out"""
+    try:
+        from django_redis import get_redis_connection
+        redis_conn = get_redis_connection("default")
+        key = _usage_key(pipeline_id)
+        halved = {member: int(count) // 2 for member, count in redis_conn.hgetall(key).items()}
+        pipe = redis_conn.pipeline()
+        pipe.delete(key)
+        kept = {member: count for member, count in halved.items() if count}
+        if kept:
+            pipe.hset(key, mapping=kept)
+            pipe.expire(key, USAGE_WINDOW)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not decay field usage for pipeline {pipeline_id}: {e}")
+
+
+def _sql_literal(value: Any) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def index_expression_sql(slug: str, definition: Dict[str, Any]) -> str:
+    """The field's sort expression with its parameters inlined, for DDL"""
+    sql, params = sort_expression_sql(slug, definition)
+    return sql % tuple(_sql_literal(param) for param in params)
+
+
+def index_name(pipeline_id: int, slug: str) -> str:
+    """Deterministic index name, shortened with a hash to Postgres' 63 bytes"""
+    name = f"{INDEX_PREFIX}{pipeline_id}_{slug}"
+    if len(name) <= 63:
+        return name
+    import hashlib
+    digest = hashlib.md5(slug.encode()).hexdigest()[:8]
+    return f"{name[:54]}_{digest}"
+
+
+@dataclass
+class ManagedIndex:
+    """An advisor-built index found in the current schema"""
+    name: str
+    pipeline_id: Optional[int]
+    slug: Optional[str]
+    expression: Optional[str]
+    valid: bool
+
+
+@dataclass
+class IndexProposal:
+    """One indexable field of a pipeline with its usage and index state"""
+    pipeline_id: int
+    slug: str
+    field_type: str
+    expression: str
+    filter_uses: int = 0
+    sort_uses: int = 0
+    pinned: bool = False
+    hot: bool = False
+    exists: bool = False
+
+    @property
+    def name(self) -> str:
+        return index_name(self.pipeline_id, self.slug)
+
+    @property
+    def uses(self) -> int:
+        return self.filter_uses + self.sort_uses
+
+    @property
+    def wanted(self) -> bool:
+        return self.pinned or self.hot
+
+    def create_sql(self) -> str:
+        from .models import Record
+        quote = connection.ops.quote_name
+        return (
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote(self.name)} "
+            f"ON {quote(Record._meta.db_table)} (pipeline_id, {self.expression}) "
+            f"WHERE pipeline_id = {int(self.pipeline_id)} AND is_deleted = false"
+        )
+
+    def comment(self) -> str:
+        return json.dumps({
+            'pipeline_id': self.pipeline_id,
+            'slug': self.slug,
+            'expression': self.expression,
+        })
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'field': self.slug,
+            'field_type': self.field_type,
+            'index': self.name,
+            'filter_uses': self.filter_uses,
+            'sort_uses': self.sort_uses,
+            'pinned': self.pinned,
+            'hot': self.hot,
+            'exists': self.exists,
+        }
+
+
+def _require_autocommit():
+    if not transaction.get_autocommit():
+        raise RuntimeError(
+            "Expression indexes are built and dropped CONCURRENTLY and cannot run inside a transaction"
+        )
+
+
+def managed_indexes(pipeline_id: Optional[int] = None) -> List[ManagedIndex]:
+    """Advisor-built indexes on the record table of the current schema"""
+    from .models import Record
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, obj_description(c.oid, 'pg_class'), i.indisvalid
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            JOIN pg_class t ON t.oid = i.indrelid
+            JOIN pg_namespace n ON n.oid = t.relnamespace
+            WHERE n.nspname = current_schema() AND t.relname = %s AND left(c.relname, %s) = %s
+            """,
+            [Record._meta.db_table, len(INDEX_PREFIX), INDEX_PREFIX]
+        )
+        rows = cursor.fetchall()
+
+    indexes = []
+    for name, comment, valid in rows:
+        try:
+            details = json.loads(comment) if comment else {}
+        except ValueError:
+            details = {}
+        index = ManagedIndex(
+            name=name,
+            pipeline_id=details.get('pipeline_id'),
+            slug=details.get('slug'),
+            expression=details.get('expression'),
+            valid=valid,
+        )
+        if pipeline_id is None or index.pipeline_id == pipeline_id:
+            indexes.append(index)
+    return indexes
+
+
+def create_expression_index(proposal: IndexProposal):
+    """Build one proposed index and label it for the advisor"""
+    _require_autocommit()
+    with connection.cursor() as cursor:
+        cursor.execute(proposal.create_sql())
+        cursor.execute(f"COMMENT ON INDEX {connection.ops.quote_name(proposal.name)} IS %s", [proposal.comment()])
+    logger.info(f"Created expression index {proposal.name} on pipeline {proposal.pipeline_id} field '{proposal.slug}'")
+
+
+def drop_expression_index(name: str):
+    _require_autocommit()
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {connection.ops.quote_name(name)}")
+    logger.info(f"Dropped expression index {name}")
+
+
+def drop_expression_indexes(pipeline_id: int, slug: Optional[str] = None) -> List[str]:
+    """Drop the managed indexes of a pipeline, or of one of its fields"""
+    dropped = []
+    for index in managed_indexes(pipeline_id):
+        if slug is None or index.slug == slug:
+            drop_expression_index(index.name)
+            dropped.append(index.name)
+    return dropped
+
+
+def drop_orphaned_expression_indexes(pipeline_ids: Iterable[int]) -> List[str]:
+    """Drop managed indexes of pipelines that no longer exist"""
+    pipeline_ids = set(pipeline_ids)
+    dropped = []
+    for index in managed_indexes():
+        if index.pipeline_id not in pipeline_ids:
+            drop_expression_index(index.name)
+            dropped.append(index.name)
+    return dropped
+
+
+class RecordIndexAdvisor:
+    """Proposes, creates and retires expression indexes for one pipeline"""
+
+    def __init__(self, pipeline, min_uses: int = MIN_USES, max_indexes: int = MAX_INDEXES_PER_PIPELINE):
+        self.pipeline = pipeline
+        self.min_uses = min_uses
+        self.max_indexes = max_indexes
+
+    def proposals(self, usage: Optional[Dict[str, Dict[str, int]]] = None,
+                  existing: Optional[Iterable[ManagedIndex]] = None) -> List[IndexProposal]:
+        """Every indexable field, most used first, with hot and exists resolved"""
+        if usage is None:
+            usage = field_usage(self.pipeline.id)
+        if existing is None:
+            existing = managed_indexes(self.pipeline.id)
+        built = {index.slug: index for index in existing if index.valid}
+
+        proposals = []
+        for slug, definition in (self.pipeline.field_schema or {}).items():
+            if definition.get('type') not in INDEXABLE_TYPES:
+                continue
+            counts = usage.get(slug, {})
+            expression = index_expression_sql(slug, definition)
+            index = built.get(slug)
+            proposals.append(IndexProposal(
+                pipeline_id=self.pipeline.id,
+                slug=slug,
+                field_type=definition['type'],
+                expression=expression,
+                filter_uses=counts.get('filter', 0),
+                sort_uses=counts.get('sort', 0),
+                pinned=bool(definition.get('create_index')),
+                exists=index is not None and index.expression == expression,
+            ))
+
+        proposals.sort(key=lambda proposal: (-proposal.uses, proposal.slug))
+        hot = [proposal for proposal in proposals if not proposal.pinned and proposal.uses >= self.min_uses]
+        for proposal in hot[:self.max_indexes]:
+            proposal.hot = True
+        return proposals
+
+    def stale(self, proposals: List[IndexProposal], existing: Iterable[ManagedIndex]) -> List[ManagedIndex]:
+        """Indexes whose field is gone, changed type, or that failed to build"""
+        current = {proposal.slug: proposal.expression for proposal in proposals}
+        return [
+            index for index in existing
+            if not index.valid or current.get(index.slug) != index.expression
+        ]
+
+    def cold(self, proposals: List[IndexProposal], existing: Iterable[ManagedIndex]) -> List[ManagedIndex]:
+        """
+        Indexes of unpinned fields whose use dropped below half the threshold
+
+        The gap to min_uses keeps a field near the threshold from being
+        indexed and dropped on alternate runs.
+        """
+        cold_slugs = {
+            proposal.slug for proposal in proposals
+            if not proposal.wanted and proposal.uses < self.min_uses // 2
+        }
+        return [index for index in existing if index.valid and index.slug in cold_slugs]
+
+    def apply(self, create: bool = True, drop_stale: bool = True) -> Dict[str, List[str]]:
+        """Build wanted indexes that are missing, drop stale and cold ones"""
+        existing = managed_indexes(self.pipeline.id)
+        proposals = self.proposals(existing=existing)
+        result = {'created': [], 'dropped': []}
+
+        if drop_stale:
+            stale = self.stale(proposals, existing)
+            for index in stale + [index for index in self.cold(proposals, existing) if index not in stale]:
+                drop_expression_index(index.name)
+                result['dropped'].append(index.name)
+
+        if create:
+            # A stale index that was kept still holds its name
+            taken = {index.name for index in existing} - set(result['dropped'])
+            for proposal in proposals:
+                if proposal.wanted and not proposal.exists and proposal.name not in taken:
+                    create_expression_index(proposal)
+                    result['created'].append(proposal.name)
+        return result
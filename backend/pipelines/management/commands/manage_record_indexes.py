@@ -0,0 +1,119 @@
+"""
+Management command to review and apply expression indexes on hot record fields
+"""
+from django.core.management.base import BaseCommand
+from django_tenants.utils import schema_context
+from tenants.models import Tenant
+from pipelines.models import Pipeline
+from pipelines.index_advisor import (
+    MAX_INDEXES_PER_PIPELINE,
+    MIN_USES,
+    RecordIndexAdvisor,
+    drop_expression_indexes,
+    drop_orphaned_expression_indexes,
+    managed_indexes,
+)
+
+
+class Command(BaseCommand):
+    help = 'Show field usage and advised expression indexes for records; --apply builds them CONCURRENTLY'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant-name',
+            type=str,
+            help='Only manage indexes of this tenant'
+        )
+        parser.add_argument(
+            '--pipeline-id',
+            type=int,
+            help='Only manage indexes of this pipeline'
+        )
+        parser.add_argument(
+            '--apply',
+            action='store_true',
+            help='Create advised indexes and drop stale ones'
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='Drop the managed indexes of the selected pipelines (or --field)'
+        )
+        parser.add_argument(
+            '--field',
+            type=str,
+            help='Field slug for --drop'
+        )
+        parser.add_argument(
+            '--min-uses',
+            type=int,
+            default=MIN_USES,
+            help=f'Filters and sorts before a field is hot (default: {MIN_USES})'
+        )
+        parser.add_argument(
+            '--max-indexes',
+            type=int,
+            default=MAX_INDEXES_PER_PIPELINE,
+            help=f'Advised indexes per pipeline, besides pinned fields (default: {MAX_INDEXES_PER_PIPELINE})'
+        )
+
+    def handle(self, *args, **options):
+        tenant_name = options.get('tenant_name')
+
+        if tenant_name:
+            try:
+                tenants = [Tenant.objects.get(name=tenant_name)]
+            except Tenant.DoesNotExist:
+                self.stdout.write(self.style.ERROR(f"Tenant '{tenant_name}' not found"))
+                return
+        else:
+            tenants = Tenant.objects.exclude(schema_name='public')
+
+        for tenant in tenants:
+            with schema_context(tenant.schema_name):
+                pipelines = Pipeline.objects.all()
+                if options.get('pipeline_id'):
+                    pipelines = pipelines.filter(id=options['pipeline_id'])
+
+                for pipeline in pipelines:
+                    self.stdout.write(f"[{tenant.schema_name}] {pipeline.name} (pipeline {pipeline.id})")
+                    if options['drop']:
+                        for name in drop_expression_indexes(pipeline.id, options.get('field')):
+                            self.stdout.write(self.style.WARNING(f"  dropped {name}"))
+                        continue
+                    self._advise(pipeline, options)
+
+                if options['apply'] and not options.get('pipeline_id'):
+                    for name in drop_orphaned_expression_indexes(Pipeline.objects.values_list('id', flat=True)):
+                        self.stdout.write(self.style.WARNING(f"[{tenant.schema_name}] dropped orphaned {name}"))
+
+    def _advise(self, pipeline, options):
+        advisor = RecordIndexAdvisor(
+            pipeline,
+            min_uses=options['min_uses'],
+            max_indexes=options['max_indexes']
+        )
+        existing = managed_indexes(pipeline.id)
+        proposals = advisor.proposals(existing=existing)
+
+        for proposal in proposals:
+            if proposal.exists:
+                state = 'indexed'
+            elif proposal.wanted:
+                state = 'advised'
+            else:
+                state = '-'
+            reason = 'pinned' if proposal.pinned else ('hot' if proposal.hot else '')
+            self.stdout.write(
+                f"  {proposal.slug:<30} {proposal.field_type:<10} "
+                f"filters={proposal.filter_uses:<6} sorts={proposal.sort_uses:<6} {state} {reason}".rstrip()
+            )
+        for index in advisor.stale(proposals, existing):
+            self.stdout.write(self.style.WARNING(f"  stale index {index.name}"))
+
+        if options['apply']:
+            result = advisor.apply()
+            for name in result['dropped']:
+                self.stdout.write(self.style.WARNING(f"  dropped {name}"))
+            for name in result['created']:
+                self.stdout.write(self.style.SUCCESS(f"  created {name}"))
@@ -0,0 +1,57 @@
+"""
+Management command to rebuild the weighted full-text search vectors of records
+"""
+from django.core.management.base import BaseCommand
+from django_tenants.utils import schema_context
+from tenants.models import Tenant
+from pipelines.models import Pipeline
+from pipelines.search import rebuild_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Rebuild record search vectors in batches, e.g. after changing searchable fields'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant-name',
+            type=str,
+            help='Rebuild search vectors for specific tenant only'
+        )
+        parser.add_argument(
+            '--pipeline-id',
+            type=int,
+            help='Only rebuild search vectors for records in this pipeline'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Records updated per statement (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        tenant_name = options.get('tenant_name')
+
+        if tenant_name:
+            try:
+                tenants = [Tenant.objects.get(name=tenant_name)]
+            except Tenant.DoesNotExist:
+                self.stdout.write(self.style.ERROR(f"Tenant '{tenant_name}' not found"))
+                return
+        else:
+            tenants = Tenant.objects.exclude(schema_name='public')
+
+        for tenant in tenants:
+            with schema_context(tenant.schema_name):
+                pipelines = Pipeline.objects.all()
+                if options.get('pipeline_id'):
+                    pipelines = pipelines.filter(id=options['pipeline_id'])
+
+                for pipeline in pipelines:
+                    self.stdout.write(f"[{tenant.schema_name}] Rebuilding search vectors for '{pipeline.name}'...")
+                    updated = rebuild_search_vectors(
+                        pipeline,
+                        batch_size=options['batch_size'],
+                        progress=lambda count: self.stdout.write(f"  {count} records...")
+                    )
+                    self.stdout.write(self.style.SUCCESS(f"  {updated} records updated"))
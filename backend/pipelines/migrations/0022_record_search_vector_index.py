@@ -0,0 +1,20 @@
+# Generated by Django 5.0 on 2026-10-16 19:12
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipelines', '0021_add_bidirectional_relation_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='record',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='idx_record_search_vector'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.0 on 2026-10-16 19:35
+
+from django.db import migrations, models
+
+
+COUNT_TRIGGERS_SQL = """
+CREATE OR REPLACE FUNCTION pipelines_record_count_delta() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO pipelines_recordcount (pipeline_id, status, is_deleted, delta)
+        SELECT pipeline_id, status, is_deleted, count(*) FROM new_rows GROUP BY 1, 2, 3;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO pipelines_recordcount (pipeline_id, status, is_deleted, delta)
+        SELECT pipeline_id, status, is_deleted, -count(*) FROM old_rows GROUP BY 1, 2, 3;
+    ELSE
+        INSERT INTO pipelines_recordcount (pipeline_id, status, is_deleted, delta)
+        SELECT pipeline_id, status, is_deleted, sum(delta) FROM (
+            SELECT o.pipeline_id, o.status, o.is_deleted, -1 AS delta
+            FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE (o.pipeline_id, o.status, o.is_deleted) IS DISTINCT FROM (n.pipeline_id, n.status, n.is_deleted)
+            UNION ALL
+            SELECT n.pipeline_id, n.status, n.is_deleted, 1 AS delta
+            FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE (o.pipeline_id, o.status, o.is_deleted) IS DISTINCT FROM (n.pipeline_id, n.status, n.is_deleted)
+        ) moved
+        GROUP BY 1, 2, 3
+        HAVING sum(delta) <> 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER pipelines_record_count_insert
+    AFTER INSERT ON pipelines_record REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION pipelines_record_count_delta();
+
+CREATE TRIGGER pipelines_record_count_update
+    AFTER UPDATE ON pipelines_record REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION pipelines_record_count_delta();
+
+CREATE TRIGGER pipelines_record_count_delete
+    AFTER DELETE ON pipelines_record REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION pipelines_record_count_delta();
+
+INSERT INTO pipelines_recordcount (pipeline_id, status, is_deleted, delta)
+SELECT pipeline_id, status, is_deleted, count(*) FROM pipelines_record GROUP BY 1, 2, 3;
+
+UPDATE pipelines_pipeline p SET record_count = (
+    SELECT count(*) FROM pipelines_record r WHERE r.pipeline_id = p.id AND NOT r.is_deleted
+);
+"""
+
+DROP_COUNT_TRIGGERS_SQL = """
+DROP TRIGGER IF EXISTS pipelines_record_count_insert ON pipelines_record;
+DROP TRIGGER IF EXISTS pipelines_record_count_update ON pipelines_record;
+DROP TRIGGER IF EXISTS pipelines_record_count_delete ON pipelines_record;
+DROP FUNCTION IF EXISTS pipelines_record_count_delta();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipelines', '0022_record_search_vector_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecordCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pipeline_id', models.BigIntegerField()),
+                ('status', models.CharField(max_length=100)),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('delta', models.IntegerField()),
+            ],
+            options={
+                'db_table': 'pipelines_recordcount',
+                'indexes': [models.Index(fields=['pipeline_id', 'is_deleted', 'status'], name='idx_record_count_bucket')],
+            },
+        ),
+        migrations.RunSQL(COUNT_TRIGGERS_SQL, DROP_COUNT_TRIGGERS_SQL),
+    ]
@@ -1346,6 +1346,7 @@ class Record(models.Model):
             # JSONB indexes
             GinIndex(fields=['data']),
             GinIndex(fields=['tags']),
+            GinIndex(fields=['search_vector'], name='idx_record_search_vector'),
             # Index for fast user assignment lookups
             GinIndex(fields=['assigned_user_ids'], name='idx_assigned_users'),
         ]
@@ -1431,6 +1432,33 @@ class Record(models.Model):
         return result
 
 
+class RecordCount(models.Model):
+    """
+    Record count deltas per pipeline, status and deletion state
+
+    Rows are written by statement triggers on pipelines_record (inserts,
+    updates moving a record between buckets, deletes), so counts stay exact
+    for bulk and queryset writes too. Each write appends a row instead of
+    updating a shared one; the sum of `delta` is the count, and
+    pipelines.record_counts folds the rows periodically.
+    """
+    # Plain id: the trigger still writes while a pipeline's records are cascade deleted
+    pipeline_id = models.BigIntegerField()
+    status = models.CharField(max_length=100)
+    is_deleted = models.BooleanField(default=False)
+    delta = models.IntegerField()
+
+    class Meta:
+        db_table = 'pipelines_recordcount'
+        indexes = [
+            models.Index(fields=['pipeline_id', 'is_deleted', 'status'], name='idx_record_count_bucket'),
+        ]
+
+    def __str__(self):
+        state = 'deleted' if self.is_deleted else 'active'
+        return f"Pipeline {self.pipeline_id} {self.status} ({state}): {self.delta:+d}"
+
+
 class SavedFilter(models.Model):
     """
     Saved filters for pipelines that can be shared as views.
@@ -1574,6 +1602,19 @@ class SavedFilter(models.Model):
             is_visible_in_shared_list_and_detail_views=True
         ).values_list('slug', flat=True)
     
+    def filter_records(self, queryset=None):
+        """
+        Apply this filter to a record queryset in the database
+        
+        Args:
+            queryset: Records to filter (defaults to the pipeline's non-deleted records)
+        """
+        from .filter_compiler import compile_filter_config
+        
+        if queryset is None:
+            queryset = self.pipeline.records.filter(is_deleted=False)
+        return queryset.filter(compile_filter_config(self.filter_config))
+    
     def can_user_access(self, user):
         """Check if user can access this filter based on access level"""
         from authentication.permissions import SyncPermissionManager
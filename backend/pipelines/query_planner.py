@@ -0,0 +1,412 @@
+"""
+Typed query planner for record list filters
+
+The records list endpoint accepts JSONB field filters as query parameters:
+
+    data__<slug>=<value>            equality
+    data__<slug>__<op>=<value>      op in QUERY_OPERATORS
+
+RecordQueryPlanner resolves every parameter against the pipeline's field
+types once and produces a RecordFilterPlan: one predicate builder per
+parameter, turning the request value into a Q. Predicates are chosen so an
+index can serve them:
+
+- equality, membership and containment on string, tag, relation and user
+  fields use jsonb containment (data @> ...), served by the GIN index on
+  Record.data
+- equality and ranges on number fields compare a type-guarded numeric
+  expression (numeric_expression_sql) that expression indexes can be built
+  on, so numbers stored as strings match too; booleans compare text
+- date filters compare ISO strings as text ranges instead of casting
+- ?ordering= on a data field sorts by the same expression a range filter
+  compares (sort_expression_sql), so one expression index serves both
+
+Plans depend only on the parameter names and the pipeline schema, so they
+are cached in-process per tenant schema and pipeline and rebuilt when the
+field schema changes. Parameters without a matching field (or without a pipeline) are
+planned untyped, with the same predicates the endpoint used before.
+"""
+import copy
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.db import connection
+from django.db.models import BooleanField, DecimalField, Q, TextField
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+QUERY_OPERATORS = (
+    'user_id', 'user_role', 'icontains', 'contains', 'exact',
+    'gte', 'lte', 'gt', 'lt', 'date', 'in', 'isnull',
+)
+RANGE_OPERATORS = {'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+
+# Field types whose stored value is a plain JSON string
+STRING_TYPES = {'text', 'textarea', 'email', 'url', 'select', 'date'}
+# Field types stored as JSON numbers (or {"amount": ...} for currency)
+NUMBER_TYPES = {'number'}
+# Field types stored as JSON arrays of scalars
+ELEMENT_TYPES = {'tags', 'multiselect'}
+
+# Text of a JSON number, or of a number stored as a string (imported data)
+NUMERIC_TEXT_PATTERN = r'^\s*[-+]?(\d+(\.\d*)?|\.\d+)([eE][-+]?\d+)?\s*$'
+
+# Plans kept per pipeline before the oldest parameter sets are dropped
+MAX_PLANS_PER_PIPELINE = 256
+
+_plans: Dict[Tuple[str, Optional[int]], Tuple[Any, Dict[Tuple[str, ...], 'RecordFilterPlan']]] = {}
+_plans_lock = threading.Lock()
+
+
+def numeric_expression_sql(slug: str, key: Optional[str] = None) -> Tuple[str, List[str]]:
+    """
+    Numeric value of a JSON field, NULL for anything that is not a number
+
+    Numbers stored as strings count as numbers, as they did when filters
+    cast data->>slug directly. Range predicates and expression indexes must
+    use this exact expression for Postgres to match them.
+    """
+    text_path, params = ("data->>%s", [slug]) if key is None else ("data->%s->>%s", [slug, key])
+    return (
+        f"(CASE WHEN ({text_path}) ~ '{NUMERIC_TEXT_PATTERN}' THEN ({text_path})::numeric END)",
+        params + params
+    )
+
+
+def sort_expression_sql(slug: str, definition: Optional[Dict[str, Any]] = None) -> Tuple[str, List[str]]:
+    """
+    Expression a field is sorted and range-filtered by
+
+    Numbers use the numeric expression (the amount of currency values),
+    everything else the text value, which orders ISO dates correctly.
+    """
+    field_type = definition.get('type') if definition else None
+    if field_type in NUMBER_TYPES:
+        config = definition.get('config') or {}
+        return numeric_expression_sql(slug, 'amount' if config.get('format') == 'currency' else None)
+    return "(data->>%s)", [slug]
+
+
+def _raw_q(sql: str, params: List[Any]) -> Q:
+    return Q(RawSQL(sql, params, output_field=BooleanField()))
+
+
+def _parse_number(value: str):
+    try:
+        number = Decimal(value.strip())
+    except (InvalidOperation, AttributeError):
+        return None
+    if not number.is_finite():
+        return None
+    return int(number) if number == number.to_integral_value() else float(number)
+
+
+def _parse_bool(value: str):
+    lowered = value.strip().lower()
+    if lowered in ('true', '1', 'yes'):
+        return True
+    if lowered in ('false', '0', 'no'):
+        return False
+    return None
+
+
+@dataclass
+class PlannedFilter:
+    """One query parameter resolved against the pipeline schema"""
+    param: str
+    slug: str
+    operator: Optional[str]
+    field_type: Optional[str]
+    strategy: str
+    build: Callable[[str], Optional[Q]] = field(repr=False)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'param': self.param,
+            'field': self.slug,
+            'operator': self.operator or 'equals',
+            'field_type': self.field_type,
+            'strategy': self.strategy,
+        }
+
+
+@dataclass
+class RecordFilterPlan:
+    """Predicate builders for a set of filter parameters"""
+    filters: List[PlannedFilter]
+
+    def apply(self, queryset, params) -> Any:
+        """Filter a queryset with the request's parameter values"""
+        for planned in self.filters:
+            value = params.get(planned.param)
+            if not value:
+                continue
+            try:
+                condition = planned.build(value)
+            except (ValueError, TypeError, KeyError) as e:
+                condition = None
+                logger.warning(f"Invalid filter parameter '{planned.param}={value}': {e}")
+            if condition is None:
+                logger.warning(f"Ignoring filter parameter '{planned.param}={value}' for {planned.field_type or 'untyped'} field")
+                continue
+            queryset = queryset.filter(condition)
+        return queryset
+
+    def describe(self) -> List[Dict[str, Any]]:
+        return [planned.describe() for planned in self.filters]
+
+
+class RecordQueryPlanner:
+    """Plans data__ filter parameters for one pipeline (or untyped without one)"""
+
+    def __init__(self, pipeline=None):
+        self.pipeline = pipeline
+        self.fields = {}
+        if pipeline is not None:
+            self.fields = {
+                slug: definition for slug, definition in (pipeline.field_schema or {}).items()
+            }
+            if not self.fields:
+                self.fields = {
+                    f.slug: {'type': f.field_type, 'config': f.field_config}
+                    for f in pipeline.fields.all()
+                }
+
+    def parse(self, param: str) -> Optional[Tuple[str, Optional[str]]]:
+        """Split data__<slug>[__<op>] into slug and operator"""
+        if not param.startswith('data__'):
+            return None
+        rest = param[len('data__'):]
+        if not rest:
+            return None
+        if rest in self.fields:
+            return rest, None
+        if '__' in rest:
+            slug, operator = rest.rsplit('__', 1)
+            if operator in QUERY_OPERATORS and slug:
+                return slug, operator
+        return rest, None
+
+    def plan(self, params: Iterable[str]) -> RecordFilterPlan:
+        filters = []
+        for param in params:
+            parsed = self.parse(param)
+            if parsed is None:
+                continue
+            slug, operator = parsed
+            definition = self.fields.get(slug)
+            planned = self._plan_filter(param, slug, operator, definition)
+            if planned is not None:
+                filters.append(planned)
+        return RecordFilterPlan(filters)
+
+    def ordering(self, value: str, columns: Iterable[str] = ()) -> Tuple[List[Any], List[str]]:
+        """
+        order_by() arguments for an ?ordering= value, and the fields sorted on
+
+        Terms name a column from `columns` or a field slug (optionally
+        data__ prefixed), with a leading '-' for descending order. Unknown
+        terms are ignored.
+        """
+        order_by, slugs = [], []
+        for term in value.split(','):
+            term = term.strip()
+            name = term.lstrip('-')
+            if not name:
+                continue
+            if name in columns:
+                order_by.append(term)
+                continue
+            slug = name[len('data__'):] if name.startswith('data__') else name
+            definition = self.fields.get(slug)
+            if definition is None:
+                continue
+            sql, params = sort_expression_sql(slug, definition)
+            expression = RawSQL(sql, params, output_field=(
+                DecimalField() if definition.get('type') in NUMBER_TYPES else TextField()
+            ))
+            order_by.append(expression.desc() if term.startswith('-') else expression.asc())
+            slugs.append(slug)
+        return order_by, slugs
+
+    # =========================================================================
+    # PREDICATES
+    # =========================================================================
+
+    def _plan_filter(self, param: str, slug: str, operator: Optional[str],
+                     definition: Optional[Dict[str, Any]]) -> Optional[PlannedFilter]:
+        field_type = definition.get('type') if definition else None
+        config = (definition.get('config') if definition else None) or {}
+        is_currency = field_type in NUMBER_TYPES and config.get('format') == 'currency'
+
+        def planned(strategy, build):
+            return PlannedFilter(param, slug, operator, field_type, strategy, build)
+
+        if operator == 'user_id':
+            return planned('jsonb_containment', lambda v: Q(data__contains={slug: [{'user_id': int(v)}]}))
+
+        if operator == 'user_role':
+            return planned('jsonb_containment', lambda v: Q(data__contains={slug: [{'role': v}]}))
+
+        if operator == 'isnull':
+            def build_isnull(value):
+                sql = (
+                    "(data->>%s IS NULL OR data->>%s = '')" if value.lower() == 'true'
+                    else "(data->>%s IS NOT NULL AND data->>%s != '')"
+                )
+                return _raw_q(sql, [slug, slug])
+            return planned('text_null_check', build_isnull)
+
+        if operator in RANGE_OPERATORS:
+            sql_operator = RANGE_OPERATORS[operator]
+            if field_type in STRING_TYPES:
+                return planned('text_range', lambda v: _raw_q(f"(data->>%s) {sql_operator} %s", [slug, v]))
+
+            def build_range(value):
+                number = _parse_number(value)
+                if number is None:
+                    return None
+                expression, params = numeric_expression_sql(slug, 'amount' if is_currency else None)
+                return _raw_q(f"{expression} {sql_operator} %s", params + [Decimal(str(number))])
+            return planned('numeric_expression', build_range)
+
+        if operator == 'date':
+            def build_date(value):
+                day = date.fromisoformat(value.strip()[:10])
+                return _raw_q(
+                    "((data->>%s) >= %s AND (data->>%s) < %s)",
+                    [slug, day.isoformat(), slug, (day + timedelta(days=1)).isoformat()]
+                )
+            return planned('text_range', build_date)
+
+        if operator == 'icontains':
+            if field_type in ELEMENT_TYPES:
+                return planned('jsonb_containment', lambda v: self._element_q(slug, v))
+            return planned('text_pattern', lambda v: _raw_q("(data->>%s) ILIKE %s", [slug, f'%{v}%']))
+
+        if operator == 'contains':
+            if field_type in ELEMENT_TYPES:
+                return planned('jsonb_containment', lambda v: self._element_q(slug, v))
+            if field_type == 'user':
+                return planned('jsonb_containment', lambda v: Q(data__contains={slug: [{'user_id': int(v)}]}))
+            if field_type in STRING_TYPES:
+                return planned('text_pattern', lambda v: _raw_q("(data->>%s) LIKE %s", [slug, f'%{v}%']))
+            # Relation ids, stored as a single id or a list of ids
+            return planned('jsonb_containment', lambda v: self._element_q(slug, int(v)))
+
+        equality = self._equality_builder(slug, field_type, is_currency)
+        if operator == 'in':
+            def build_in(value):
+                conditions = [equality[1](item.strip()) for item in value.split(',') if item.strip()]
+                conditions = [condition for condition in conditions if condition is not None]
+                if not conditions:
+                    return None
+                combined = conditions[0]
+                for condition in conditions[1:]:
+                    combined |= condition
+                return combined
+            return planned(equality[0], build_in)
+
+        # exact, or a bare data__<slug>
+        if operator is None and field_type is None:
+            return planned('untyped_equality', lambda v: self._untyped_equality(slug, v))
+        return planned(*equality)
+
+    def _equality_builder(self, slug: str, field_type: Optional[str],
+                          is_currency: bool) -> Tuple[str, Callable[[str], Optional[Q]]]:
+        """Strategy name and builder for value equality on a field"""
+        if field_type == 'boolean':
+            # Text comparison matches JSON booleans and "true"/"false" strings alike
+            def build_bool(value):
+                parsed = _parse_bool(value)
+                if parsed is None:
+                    return None
+                return _raw_q("lower(data->>%s) = %s", [slug, 'true' if parsed else 'false'])
+            return 'text_equality', build_bool
+
+        if field_type in NUMBER_TYPES:
+            # Same expression as range filters, so numeric strings match and
+            # the expression indexes serve equality too
+            expression, params = numeric_expression_sql(slug, 'amount' if is_currency else None)
+
+            def build_number(value):
+                number = _parse_number(value)
+                if number is None:
+                    return None
+                return _raw_q(f"{expression} = %s", params + [Decimal(str(number))])
+            return 'numeric_expression', build_number
+
+        if field_type in ELEMENT_TYPES:
+            return 'jsonb_containment', lambda v: self._element_q(slug, v)
+
+        if field_type == 'relation':
+            return 'jsonb_containment', lambda v: self._element_q(slug, int(v))
+
+        if field_type == 'user':
+            return 'jsonb_containment', lambda v: Q(data__contains={slug: [{'user_id': int(v)}]})
+
+        if field_type in STRING_TYPES:
+            return 'jsonb_containment', lambda v: Q(data__contains={slug: v})
+
+        return 'text_equality', lambda v: _raw_q("(data->>%s) = %s", [slug, v])
+
+    @staticmethod
+    def _element_q(slug: str, value: Any) -> Q:
+        """Value stored either as the field itself or as an element of it"""
+        return Q(data__contains={slug: [value]}) | Q(data__contains={slug: value})
+
+    @staticmethod
+    def _untyped_equality(slug: str, value: str) -> Q:
+        """Field not in the schema: numeric equality for numbers, else text"""
+        number = _parse_number(value)
+        if number is None:
+            return _raw_q("(data->>%s) = %s", [slug, value])
+        expression, params = numeric_expression_sql(slug)
+        return _raw_q(f"{expression} = %s", params + [Decimal(str(number))])
+
+
+def _cache_key(pipeline_id: Optional[int]) -> Tuple[str, Optional[int]]:
+    """Pipeline ids repeat across tenant schemas, so plans are cached per schema"""
+    return getattr(connection, 'schema_name', None) or 'public', pipeline_id
+
+
+def _signature(pipeline) -> Any:
+    return pipeline.field_schema if pipeline is not None else None
+
+
+def get_filter_plan(pipeline, params: Iterable[str]) -> RecordFilterPlan:
+    """Cached plan for the data__ parameters of a request"""
+    key = tuple(sorted(param for param in params if param.startswith('data__')))
+    cache_key = _cache_key(pipeline.id if pipeline is not None else None)
+    signature = _signature(pipeline)
+
+    cached = _plans.get(cache_key)
+    if cached is not None and cached[0] == signature:
+        plan = cached[1].get(key)
+        if plan is not None:
+            return plan
+
+    plan = RecordQueryPlanner(pipeline).plan(key)
+    with _plans_lock:
+        cached = _plans.get(cache_key)
+        if cached is None or cached[0] != signature:
+            cached = (copy.deepcopy(signature), {})
+            _plans[cache_key] = cached
+        if len(cached[1]) >= MAX_PLANS_PER_PIPELINE:
+            cached[1].pop(next(iter(cached[1])))
+        cached[1][key] = plan
+    return plan
+
+
+def invalidate_filter_plans(pipeline_id: Optional[int] = None):
+    """Drop cached plans of one pipeline of the current schema, or of all pipelines"""
+    with _plans_lock:
+        if pipeline_id is None:
+            _plans.clear()
+        else:
+            _plans.pop(_cache_key(pipeline_id), None)
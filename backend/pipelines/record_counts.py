@@ -0,0 +1,174 @@
+"""
+Maintained per-pipeline record counts
+
+Statement triggers on pipelines_record append count deltas to RecordCount
+in the transaction of the write: +n per (pipeline, status, is_deleted)
+bucket on insert, -n on hard delete, and -1/+1 when an update moves a
+record between buckets (soft delete, restore, status change). Concurrent
+writers never update a shared counter row, so record creation does not
+serialize on the pipeline.
+
+Readers sum the deltas (get_record_counts, active_record_count_subquery)
+instead of counting records. A periodic task folds each bucket's rows into
+one and refreshes the cached Pipeline.record_count; reconcile_record_counts
+compares the buckets with the records and appends correcting deltas.
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from django.db import connection, transaction
+from django.db.models import IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RecordCounts:
+    """Counts of one pipeline's records"""
+    active: int = 0
+    deleted: int = 0
+    by_status: Dict[str, int] = field(default_factory=dict)  # Active records only
+
+
+def get_record_counts(pipeline_ids: Iterable[int]) -> Dict[int, RecordCounts]:
+    """Counts of each pipeline, in one query over the count buckets"""
+    from .models import RecordCount
+
+    pipeline_ids = list(pipeline_ids)
+    counts = {pipeline_id: RecordCounts() for pipeline_id in pipeline_ids}
+    if not pipeline_ids:
+        return counts
+
+    buckets = RecordCount.objects.filter(pipeline_id__in=pipeline_ids).values(
+        'pipeline_id', 'status', 'is_deleted'
+    ).annotate(total=Sum('delta'))
+    for bucket in buckets:
+        total = bucket['total'] or 0
+        if not total:
+            continue
+        pipeline_counts = counts[bucket['pipeline_id']]
+        if bucket['is_deleted']:
+            pipeline_counts.deleted += total
+        else:
+            pipeline_counts.active += total
+            pipeline_counts.by_status[bucket['status']] = total
+    return counts
+
+
+def active_record_count(pipeline_id: int) -> int:
+    return get_record_counts([pipeline_id])[pipeline_id].active
+
+
+def active_record_count_subquery(pipeline_ref: str = 'pk'):
+    """Active record count of the pipeline `pipeline_ref`, for annotating Pipeline querysets"""
+    from .models import RecordCount
+
+    total = RecordCount.objects.filter(
+        pipeline_id=OuterRef(pipeline_ref), is_deleted=False
+    ).values('pipeline_id').annotate(total=Sum('delta')).values('total')
+    return Coalesce(Subquery(total, output_field=IntegerField()), Value(0))
+
+
+def live_record_count(pipeline) -> int:
+    """Active count of a pipeline annotated with active_record_count_subquery(), else looked up"""
+    annotated = getattr(pipeline, 'active_record_count', None)
+    if annotated is not None:
+        return annotated
+    return active_record_count(pipeline.id)
+
+
+def _pipeline_filter(pipeline_ids: Optional[Iterable[int]], column: str = 'pipeline_id'):
+    if pipeline_ids is None:
+        return 'TRUE', []
+    return f'{column} = ANY(%s)', [list(pipeline_ids)]
+
+
+def fold_record_counts(pipeline_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Replace the delta rows of every bucket by their sum
+
+    The DELETE only returns rows visible to it, so deltas committed meanwhile
+    are kept as they are. Also refreshes the cached Pipeline.record_count.
+    Returns the number of buckets folded.
+    """
+    condition, params = _pipeline_filter(pipeline_ids)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"""
+            WITH folded AS (
+                DELETE FROM pipelines_recordcount
+                WHERE (pipeline_id, status, is_deleted) IN (
+                    SELECT pipeline_id, status, is_deleted FROM pipelines_recordcount
+                    WHERE {condition}
+                    GROUP BY 1, 2, 3
+                    HAVING count(*) > 1 OR sum(delta) = 0
+                )
+                RETURNING pipeline_id, status, is_deleted, delta
+            )
+            INSERT INTO pipelines_recordcount (pipeline_id, status, is_deleted, delta)
+            SELECT pipeline_id, status, is_deleted, sum(delta) FROM folded
+            GROUP BY 1, 2, 3
+            HAVING sum(delta) <> 0
+        """, params)
+        folded = cursor.rowcount
+
+        # Buckets of deleted pipelines
+        cursor.execute(f"""
+            DELETE FROM pipelines_recordcount c
+            WHERE {condition} AND NOT EXISTS (SELECT 1 FROM pipelines_pipeline p WHERE p.id = c.pipeline_id)
+        """, params)
+
+        condition, params = _pipeline_filter(pipeline_ids, column='p.id')
+        cursor.execute(f"""
+            UPDATE pipelines_pipeline p SET record_count = live.total
+            FROM (
+                SELECT p.id, COALESCE(sum(c.delta), 0) AS total
+                FROM pipelines_pipeline p
+                LEFT JOIN pipelines_recordcount c ON c.pipeline_id = p.id AND NOT c.is_deleted
+                WHERE {condition}
+                GROUP BY p.id
+            ) live
+            WHERE p.id = live.id AND p.record_count IS DISTINCT FROM live.total
+        """, params)
+    return folded
+
+
+def reconcile_record_counts(pipeline_ids: Optional[Iterable[int]] = None) -> List[dict]:
+    """
+    Append deltas correcting buckets that disagree with the records
+
+    Records and buckets are read by one statement, so both see the same
+    snapshot and writes committed meanwhile are counted by neither side.
+    Returns the corrections applied.
+    """
+    record_condition, record_params = _pipeline_filter(pipeline_ids)
+    count_condition, count_params = _pipeline_filter(pipeline_ids)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            INSERT INTO pipelines_recordcount (pipeline_id, status, is_deleted, delta)
+            SELECT pipeline_id, status, is_deleted, actual - counted FROM (
+                SELECT pipeline_id, status, is_deleted,
+                       COALESCE(actual.total, 0) AS actual, COALESCE(counted.total, 0) AS counted
+                FROM (
+                    SELECT pipeline_id, status, is_deleted, count(*) AS total
+                    FROM pipelines_record WHERE {record_condition}
+                    GROUP BY 1, 2, 3
+                ) actual
+                FULL JOIN (
+                    SELECT pipeline_id, status, is_deleted, sum(delta) AS total
+                    FROM pipelines_recordcount WHERE {count_condition}
+                    GROUP BY 1, 2, 3
+                ) counted USING (pipeline_id, status, is_deleted)
+            ) buckets
+            WHERE actual <> counted
+            RETURNING pipeline_id, status, is_deleted, delta
+        """, record_params + count_params)
+        corrections = [
+            {'pipeline_id': pipeline_id, 'status': status, 'is_deleted': is_deleted, 'delta': delta}
+            for pipeline_id, status, is_deleted, delta in cursor.fetchall()
+        ]
+
+    for correction in corrections:
+        logger.warning(f"Corrected record count drift: {correction}")
+    return corrections
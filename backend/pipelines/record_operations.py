@@ -57,46 +57,22 @@ class RecordUtils:
     """Utility operations for records"""
     
     @staticmethod
-    def generate_title(record_data: Dict[str, Any], pipeline_name: str, pipeline=None) -> str:
-        """Generate display title from record data using configurable template"""
-        import re
-        
-        # Get the title template from pipeline settings
-        if pipeline:
-            template = pipeline.get_title_template()
-        else:
-            # Fallback if no pipeline provided (shouldn't happen in normal usage)
-            template = '{name}'
-        
-        # Get field definitions for proper formatting
-        field_definitions = {}
-        if pipeline:
-            for field in pipeline.fields.all():
-                field_definitions[field.slug] = field
-        
-        # Replace {field_name} placeholders with actual values or empty strings
-        title = template
-        for field_name, value in record_data.items():
-            placeholder = f'{{{field_name}}}'
-            if placeholder in title:
-                # Get field definition for proper formatting
-                field_def = field_definitions.get(field_name)
-                field_value = RecordUtils._format_field_value_for_title(value, field_def)
-                title = title.replace(placeholder, field_value)
-        
-        # Clean up any remaining unreplaced placeholders (for fields that don't exist)
-        title = re.sub(r'\{[^}]+\}', '', title)
-        
-        # If title is empty or just whitespace, use pipeline name as fallback
-        title = title.strip()
-        if not title:
-            return f"{pipeline_name} Record"
-        
-        # Truncate to max length
-        return title[:500]
+    def generate_title(record_data: Dict[str, Any], pipeline_name: str, pipeline=None,
+                       relation_display: Optional[Dict[Tuple[str, int], str]] = None) -> str:
+        """
+        Generate display title from record data using configurable template
+
+        The template is compiled once per pipeline and schema version (see
+        title_templates). relation_display holds pre-resolved relation display
+        values, e.g. from attach_title_relations() for a whole page of records.
+        """
+        from .title_templates import get_compiled_title_template
+
+        compiled = get_compiled_title_template(pipeline)
+        return compiled.render(record_data, pipeline_name, relation_display)
     
     @staticmethod
-    def _format_field_value_for_title(value, field_def=None) -> str:
+    def _format_field_value_for_title(value, field_def=None, relation_display=None) -> str:
         """Format a field value for display in record title"""
         if value is None or value == '':
             return ''
@@ -173,10 +149,15 @@ class RecordUtils:
             display_field = 'title'  # Default fallback
             if field_def and field_def.field_config:
                 display_field = field_def.field_config.get('display_field', 'title')
-                print(f"🔍 RELATION DEBUG: field_def.slug='{field_def.slug}', field_config={field_def.field_config}, display_field='{display_field}'")
+                logger.debug(f"🔍 RELATION DEBUG: field_def.slug='{field_def.slug}', field_config={field_def.field_config}, display_field='{display_field}'")
             
             def get_relation_display_value(record_id):
                 """Get display value for a single related record - matches frontend getDisplayValue logic"""
+                if relation_display:
+                    try:
+                        return relation_display[(display_field, int(record_id))]
+                    except (KeyError, TypeError, ValueError):
+                        pass
                 try:
                     from .models import Record
                     related_record = Record.objects.get(id=int(record_id))
@@ -411,10 +392,10 @@ class RecordChangeManager:
         
         if not is_new:
             try:
-                # Import here to avoid circular import
-                from .models import Record
-                original_record = Record.objects.get(pk=record.pk)
-                original_data = original_record.data.copy()
+                # Shared pre-image: loaded once here and reused by every pre_save receiver
+                from .record_snapshot import get_record_snapshot
+                snapshot = get_record_snapshot(record)
+                original_data = snapshot.data.copy() if snapshot else {}
                 print(f"   📊 Original data had {len(original_data)} fields")
                 
                 # 🔍 DEBUG: Enhanced button field debugging
@@ -605,48 +586,6 @@ class RecordAIProcessor:
 class RecordPostProcessor:
     """Handles post-save operations"""
     
-    def update_search_vector(self, record):
-        """Update full-text search vector"""
-        from django.contrib.postgres.search import SearchVector
-        from django.db import models
-        
-        # Get searchable field values
-        searchable_text = []
-        
-        for field in record.pipeline.fields.filter(is_searchable=True):
-            value = record.data.get(field.slug)
-            if value:
-                if isinstance(value, (list, dict)):
-                    searchable_text.append(str(value))
-                else:
-                    searchable_text.append(str(value))
-        
-        # Add title and tags
-        if record.title:
-            searchable_text.append(record.title)
-        if record.tags:
-            searchable_text.extend(record.tags)
-        
-        # Update search vector
-        if searchable_text:
-            search_text = ' '.join(searchable_text)
-            # Import here to avoid circular import
-            from .models import Record
-            Record.objects.filter(id=record.id).update(
-                search_vector=SearchVector('title') + SearchVector(models.Value(search_text))
-            )
-    
-    def update_pipeline_stats(self, record):
-        """Update pipeline statistics for new records"""
-        from django.db import models
-        # Import here to avoid circular import
-        from .models import Pipeline
-        
-        Pipeline.objects.filter(id=record.pipeline_id).update(
-            record_count=models.F('record_count') + 1,
-            last_record_created=timezone.now()
-        )
-    
     def broadcast_changes(self, record, original_data: Dict[str, Any], is_new: bool):
         """Broadcast record changes via real-time system"""
         # Skip broadcasting if requested
@@ -755,6 +694,12 @@ class RecordOperationManager:
                     if key in kwargs:
                         valid_save_kwargs[key] = kwargs[key]
 
+                # Search vector is written in the same statement as the record
+                from .search import search_vector_for_record
+                self.record.search_vector = search_vector_for_record(self.record)
+                if valid_save_kwargs.get('update_fields') is not None:
+                    valid_save_kwargs['update_fields'] = list(valid_save_kwargs['update_fields']) + ['search_vector']
+
                 # Set flag to prevent recursive save
                 self.record._in_operation_manager = True
 
@@ -768,21 +713,23 @@ class RecordOperationManager:
                 finally:
                     # Clear flag after save
                     self.record._in_operation_manager = False
+                    # Leave the stored vector deferred instead of keeping the expression on the instance
+                    self.record.__dict__.pop('search_vector', None)
                 
                 print(f"🟢 DATABASE STEP 3.1: Django save() completed successfully")
                 print(f"   ✅ Database save complete for record {self.record.pk}")
                 print(f"   📦 Final data after save: {self.record.data}")
 
+                # The row now matches the in-memory record; reuse it as the pre-image of the relation sync save
+                from .record_snapshot import RecordSnapshot, set_record_snapshot
+                set_record_snapshot(self.record, RecordSnapshot.from_instance(self.record))
+
                 # Step 6.5: Extract and sync relation fields to Relationship table
                 print(f"   📦 Before sync, _relation_updates has {len(self._relation_updates)} items")
                 self._sync_relation_fields(change_context)
 
-                # Step 7: Post-save operations
-                self.post_processor.update_search_vector(self.record)
-                
-                if change_context.is_new:
-                    self.post_processor.update_pipeline_stats(self.record)
-                
+                # Step 7: Post-save operations (search vector was written with the record,
+                # pipeline statistics are kept by the post_save signal and count triggers)
                 self.post_processor.broadcast_changes(
                     self.record, 
                     change_context.original_data, 
@@ -809,6 +756,9 @@ class RecordOperationManager:
                 operation_id=operation_id,
                 errors=[f"Record save processing failed: {str(e)}"]
             )
+        finally:
+            from .record_snapshot import clear_record_snapshot
+            clear_record_snapshot(self.record)
 
     def _extract_relation_fields(self, record):
         """Extract relation fields from data and store for later sync"""
@@ -0,0 +1,93 @@
+"""
+Shared pre-image of a Record for the duration of a single save
+
+Change detection, audit logging, stage triggers, workflow triggers and
+communication sync all need the row as it was before the save. Instead of
+each of them running its own Record.objects.get(), the pre-image is loaded
+at most once per save and attached to the instance:
+
+- RecordOperationManager loads it before validation (or a pre_save receiver
+  loads it lazily when the record is saved outside the manager)
+- pre_save receivers read it through get_record_snapshot()
+- the post_save receiver in pipelines.signals clears it, so the next save
+  of the same instance loads a fresh one
+
+Receivers must copy what they need during pre_save; the snapshot is gone by
+the time post_save handlers run.
+"""
+import copy
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_ATTR = '_pre_save_snapshot'
+
+# Marker for "already looked up, row does not exist"
+_MISSING = object()
+
+
+@dataclass
+class RecordSnapshot:
+    """Database state of a record before the current save"""
+    data: Dict[str, Any] = field(default_factory=dict)
+    status: Optional[str] = None
+    title: str = ''
+    pipeline_id: Optional[int] = None
+    version: int = 1
+    is_deleted: bool = False
+    updated_at: Optional[datetime] = None
+
+    SNAPSHOT_FIELDS = ('data', 'status', 'title', 'pipeline_id', 'version', 'is_deleted', 'updated_at')
+
+    @classmethod
+    def from_instance(cls, record) -> 'RecordSnapshot':
+        """Snapshot an in-memory record whose state was just written to the database"""
+        return cls(
+            data=copy.deepcopy(record.data) if record.data else {},
+            status=record.status,
+            title=record.title,
+            pipeline_id=record.pipeline_id,
+            version=record.version,
+            is_deleted=record.is_deleted,
+            updated_at=record.updated_at,
+        )
+
+
+def get_record_snapshot(record) -> Optional[RecordSnapshot]:
+    """
+    Get the pre-image of a record, loading it with one SELECT on first access.
+
+    Returns:
+        RecordSnapshot, or None for unsaved records and rows that no longer exist
+    """
+    if record.pk is None:
+        return None
+
+    cached = record.__dict__.get(SNAPSHOT_ATTR)
+    if cached is not None:
+        return None if cached is _MISSING else cached
+
+    from .models import Record
+
+    row = Record.objects.filter(pk=record.pk).values(*RecordSnapshot.SNAPSHOT_FIELDS).first()
+    if row is None:
+        record.__dict__[SNAPSHOT_ATTR] = _MISSING
+        return None
+
+    row['data'] = row['data'] or {}
+    snapshot = RecordSnapshot(**row)
+    record.__dict__[SNAPSHOT_ATTR] = snapshot
+    return snapshot
+
+
+def set_record_snapshot(record, snapshot: Optional[RecordSnapshot]):
+    """Attach a known pre-image, e.g. the state written by a previous save in the same operation"""
+    record.__dict__[SNAPSHOT_ATTR] = _MISSING if snapshot is None else snapshot
+
+
+def clear_record_snapshot(record):
+    """Drop the pre-image once the save has completed"""
+    record.__dict__.pop(SNAPSHOT_ATTR, None)
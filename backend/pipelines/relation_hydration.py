@@ -0,0 +1,257 @@
+"""
+Batched relation field hydration for record serialization
+
+Relation field values live in the Relationship table, not in Record.data.
+Resolving them one record and one field at a time (RelationFieldHandler)
+costs a Relationship query plus one Record query per related record, for
+every relation field of every record on a page.
+
+RelationHydrator resolves a whole page at once:
+
+- relation fields are loaded once for all pipelines on the page
+- one Relationship query covers every record and relation field
+- one Record query fetches the display values of every related record
+
+The values it produces are the same as RelationFieldHandler.get_related_ids()
+and RelationFieldHandler.get_related_records_with_display().
+
+Serializers opt in through RelationHydratingListSerializer, which hydrates
+the page before the child serializer runs and attaches the values to each
+instance (see get_relation_values()). It also resolves the relation
+placeholders of the page's title templates (see title_templates).
+"""
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import Q
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+DISPLAY_VALUES_ATTR = '_relation_display_values'
+RELATED_IDS_ATTR = '_relation_related_ids'
+
+
+def relation_display_value(data: Optional[Dict[str, Any]], title: Optional[str], record_id: int,
+                           display_field: str) -> Any:
+    """Display value of a related record, same fallback chain as RelationFieldHandler"""
+    data = data or {}
+    display_value = data.get(display_field)
+    if not display_value:
+        # Try alternate field name matching (e.g., "Company Name" vs "company_name")
+        display_value = data.get(display_field.lower().replace(' ', '_'))
+    if not display_value:
+        display_value = title or f"Record #{record_id}"
+    return display_value
+
+
+class RelationHydrator:
+    """
+    Resolves relation field values for a batch of records
+
+    A hydrator caches relation fields and their relationship types, so one
+    instance can be reused for several pages of the same pipelines.
+    """
+
+    def __init__(self):
+        self._fields_by_pipeline: Dict[int, list] = {}
+        self._handlers: Dict[int, Any] = {}
+
+    def relation_fields(self, pipeline_id: int) -> list:
+        """Active relation fields of a pipeline"""
+        self._load_fields([pipeline_id])
+        return self._fields_by_pipeline[pipeline_id]
+
+    def hydrate(self, records: Iterable) -> Dict[int, Dict[str, Any]]:
+        """
+        Relation values with display values, keyed by record id then field slug
+
+        Each value is a list of {'id', 'display_value'} dicts for fields that
+        allow multiple relations, otherwise a single dict or None.
+        """
+        records = list(records)
+        links, handlers_by_pipeline = self._collect_links(records)
+
+        target_ids = {
+            other_id
+            for record_links in links.values()
+            for other_id, _ in record_links
+        }
+        targets = {}
+        if target_ids:
+            from pipelines.models import Record
+            targets = {
+                row['id']: row for row in Record.objects.filter(
+                    id__in=target_ids, is_deleted=False
+                ).values('id', 'pipeline_id', 'data', 'title')
+            }
+
+        result = {}
+        for record in records:
+            values = {}
+            for handler in handlers_by_pipeline.get(record.pipeline_id, []):
+                related = []
+                for other_id, other_pipeline_id in links.get(
+                    (record.pipeline_id, record.id, handler.relationship_type.id), []
+                ):
+                    target = targets.get(other_id)
+                    # Skip deleted or missing records
+                    if target is None or target['pipeline_id'] != other_pipeline_id:
+                        continue
+                    related.append({
+                        'id': other_id,
+                        'display_value': relation_display_value(
+                            target['data'], target['title'], other_id, handler.display_field
+                        )
+                    })
+                values[handler.field.slug] = self._by_cardinality(handler, related)
+            result[record.id] = values
+        return result
+
+    def hydrate_ids(self, records: Iterable) -> Dict[int, Dict[str, Any]]:
+        """
+        Related record ids, keyed by record id then field slug
+
+        Each value is a list of ids for fields that allow multiple relations,
+        otherwise a single id or None.
+        """
+        records = list(records)
+        links, handlers_by_pipeline = self._collect_links(records)
+
+        result = {}
+        for record in records:
+            values = {}
+            for handler in handlers_by_pipeline.get(record.pipeline_id, []):
+                related = [
+                    other_id for other_id, _ in links.get(
+                        (record.pipeline_id, record.id, handler.relationship_type.id), []
+                    )
+                ]
+                values[handler.field.slug] = self._by_cardinality(handler, related)
+            result[record.id] = values
+        return result
+
+    @staticmethod
+    def _by_cardinality(handler, related: list) -> Any:
+        if handler.allow_multiple:
+            return related
+        return related[0] if related else None
+
+    def _load_fields(self, pipeline_ids: Iterable[int]):
+        from pipelines.models import Field
+
+        missing = {pid for pid in pipeline_ids if pid not in self._fields_by_pipeline}
+        if not missing:
+            return
+
+        for pipeline_id in missing:
+            self._fields_by_pipeline[pipeline_id] = []
+        fields = Field.objects.filter(
+            pipeline_id__in=missing, field_type='relation', is_deleted=False
+        ).select_related('pipeline').order_by('pipeline_id', 'display_order', 'id')
+        for field in fields:
+            self._fields_by_pipeline[field.pipeline_id].append(field)
+
+    def _handler(self, field):
+        from pipelines.relation_field_handler import RelationFieldHandler
+
+        if field.id not in self._handlers:
+            self._handlers[field.id] = RelationFieldHandler(field)
+        return self._handlers[field.id]
+
+    def _collect_links(self, records: list) -> Tuple[Dict[tuple, List[tuple]], Dict[int, list]]:
+        """
+        Fetch every live relationship touching the records in one query
+
+        Returns links keyed by (pipeline_id, record_id, relationship_type_id)
+        holding (other_record_id, other_pipeline_id) tuples, plus the relation
+        field handlers of each pipeline on the page.
+        """
+        from relationships.models import Relationship
+
+        pipeline_ids = {record.pipeline_id for record in records}
+        self._load_fields(pipeline_ids)
+
+        handlers_by_pipeline = {}
+        type_ids = set()
+        for pipeline_id in pipeline_ids:
+            handlers = [self._handler(field) for field in self._fields_by_pipeline[pipeline_id]]
+            handlers_by_pipeline[pipeline_id] = handlers
+            type_ids.update(handler.relationship_type.id for handler in handlers)
+
+        links = defaultdict(list)
+        if not records or not type_ids:
+            return links, handlers_by_pipeline
+
+        record_keys = {(record.pipeline_id, record.id) for record in records}
+        record_ids = [record.id for record in records]
+        relationships = Relationship.objects.filter(
+            Q(source_record_id__in=record_ids) | Q(target_record_id__in=record_ids),
+            relationship_type_id__in=type_ids
+        ).values_list(
+            'relationship_type_id', 'source_pipeline_id', 'source_record_id',
+            'target_pipeline_id', 'target_record_id'
+        )
+
+        for type_id, source_pipeline_id, source_id, target_pipeline_id, target_id in relationships:
+            # The record on either side sees the record on the other side
+            if (source_pipeline_id, source_id) in record_keys:
+                links[(source_pipeline_id, source_id, type_id)].append((target_id, target_pipeline_id))
+            if source_id != target_id and (target_pipeline_id, target_id) in record_keys:
+                links[(target_pipeline_id, target_id, type_id)].append((source_id, source_pipeline_id))
+
+        return links, handlers_by_pipeline
+
+
+def get_relation_values(instance, related_ids: bool = False) -> Dict[str, Any]:
+    """
+    Relation values of a single record being serialized
+
+    Uses the values attached by RelationHydratingListSerializer when the
+    record is part of a hydrated page, otherwise hydrates the record alone.
+    """
+    attr = RELATED_IDS_ATTR if related_ids else DISPLAY_VALUES_ATTR
+    values = getattr(instance, attr, None)
+    if values is None:
+        hydrator = RelationHydrator()
+        hydrate = hydrator.hydrate_ids if related_ids else hydrator.hydrate
+        values = hydrate([instance]).get(instance.id, {})
+    return values
+
+
+class RelationHydratingListSerializer(serializers.ListSerializer):
+    """
+    List serializer that hydrates relation fields for the whole page
+
+    Set Meta.list_serializer_class to this on record serializers, and set
+    hydrate_related_ids = True on the child serializer when it renders
+    related ids instead of display values.
+    """
+
+    def to_representation(self, data):
+        from django.db.models.manager import BaseManager
+
+        records = list(data.all() if isinstance(data, BaseManager) else data)
+        if records:
+            related_ids = getattr(self.child, 'hydrate_related_ids', False)
+            try:
+                hydrator = RelationHydrator()
+                if related_ids:
+                    values = hydrator.hydrate_ids(records)
+                else:
+                    values = hydrator.hydrate(records)
+            except Exception as e:
+                # Serializers fall back to hydrating each record on their own
+                logger.error(f"Failed to hydrate relation fields for {len(records)} records: {e}")
+            else:
+                attr = RELATED_IDS_ATTR if related_ids else DISPLAY_VALUES_ATTR
+                for record in records:
+                    setattr(record, attr, values.get(record.id, {}))
+
+            try:
+                from .title_templates import attach_title_relations
+                attach_title_relations(records)
+            except Exception as e:
+                logger.error(f"Failed to resolve title relations for {len(records)} records: {e}")
+        return super().to_representation(records)
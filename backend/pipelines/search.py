@@ -0,0 +1,136 @@
+"""
+Weighted full-text search over records
+
+Record.search_vector is built from the pipeline's searchable fields with
+per-field weights:
+
+- A: the record title and fields used in the pipeline's title template
+- B: every other searchable field
+- C: record tags
+
+The vector is written in the same INSERT/UPDATE as the record itself
+(search_vector_for_record), set-based for many records at once
+(search_vector_expression, used by bulk writes and the rebuild_search_vectors
+command), and queried with websearch_to_tsquery plus ranking (search_records).
+"""
+import json
+import logging
+from typing import Any, Iterable, List, Optional, Tuple
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, Value
+from django.db.models.fields.json import KeyTextTransform
+
+logger = logging.getLogger(__name__)
+
+TITLE_WEIGHT = 'A'
+FIELD_WEIGHT = 'B'
+TAGS_WEIGHT = 'C'
+
+
+def searchable_field_weights(pipeline) -> List[Tuple[str, str]]:
+    """(slug, weight) of every searchable field, in display order"""
+    from .title_templates import get_compiled_title_template
+
+    title_slugs = set(get_compiled_title_template(pipeline).field_definitions)
+
+    # The cached field schema avoids a field query on every save
+    schema = pipeline.field_schema or {}
+    if schema:
+        slugs = [
+            slug for slug, definition in sorted(
+                schema.items(), key=lambda item: (item[1].get('display_order') or 0, item[0])
+            )
+            if definition.get('searchable', True)
+        ]
+    else:
+        slugs = list(
+            pipeline.fields.filter(is_searchable=True).order_by('display_order', 'slug').values_list('slug', flat=True)
+        )
+
+    return [(slug, TITLE_WEIGHT if slug in title_slugs else FIELD_WEIGHT) for slug in slugs]
+
+
+def _combine(vectors: List[SearchVector]) -> SearchVector:
+    combined = vectors[0]
+    for vector in vectors[1:]:
+        combined = combined + vector
+    return combined
+
+
+def search_vector_expression(pipeline) -> SearchVector:
+    """Vector computed from the row's own columns, for set-based UPDATEs"""
+    vectors = [SearchVector('title', weight=TITLE_WEIGHT)]
+    vectors.extend(
+        SearchVector(KeyTextTransform(slug, 'data'), weight=weight)
+        for slug, weight in searchable_field_weights(pipeline)
+    )
+    vectors.append(SearchVector('tags', weight=TAGS_WEIGHT))
+    return _combine(vectors)
+
+
+def _search_text(value: Any) -> str:
+    """Text of a JSON value as Postgres' ->> operator renders it"""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def search_vector_for_record(record, field_weights: Optional[Iterable[Tuple[str, str]]] = None) -> SearchVector:
+    """
+    Vector computed from the in-memory record, assignable before save()
+
+    Holds no column references, so it is valid in an INSERT as well as an
+    UPDATE and lands in the same write as the record data.
+    """
+    if field_weights is None:
+        field_weights = searchable_field_weights(record.pipeline)
+
+    data = record.data or {}
+    vectors = [SearchVector(Value(record.title or ''), weight=TITLE_WEIGHT)]
+    vectors.extend(
+        SearchVector(Value(_search_text(data.get(slug))), weight=weight)
+        for slug, weight in field_weights
+    )
+    vectors.append(SearchVector(Value(' '.join(record.tags or [])), weight=TAGS_WEIGHT))
+    return _combine(vectors)
+
+
+def search_records(queryset, query: str, rank_field: str = 'search_rank'):
+    """Filter records matching a websearch-style query, best matches first"""
+    search_query = SearchQuery(query, search_type='websearch')
+    return queryset.filter(
+        search_vector=search_query
+    ).annotate(
+        **{rank_field: SearchRank(F('search_vector'), search_query)}
+    ).order_by(f'-{rank_field}', '-updated_at')
+
+
+def rebuild_search_vectors(pipeline, batch_size: int = 1000, progress=None) -> int:
+    """
+    Recompute the search vectors of every record in a pipeline
+
+    Walks the records in primary-key order and updates one batch per
+    statement, so a large pipeline never holds long row locks.
+    """
+    from .models import Record
+
+    expression = search_vector_expression(pipeline)
+    records = Record.objects.filter(pipeline=pipeline)
+    last_id = 0
+    updated = 0
+
+    while True:
+        batch_ids = list(
+            records.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not batch_ids:
+            break
+        updated += Record.objects.filter(id__in=batch_ids).update(search_vector=expression)
+        last_id = batch_ids[-1]
+        if progress:
+            progress(updated)
+
+    return updated
@@ -4,6 +4,8 @@ Serializers for pipeline system API
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import Pipeline, Field, Record, PipelineTemplate, FieldGroup
+from .relation_hydration import RelationHydratingListSerializer, get_relation_values
+from .title_templates import TITLE_RELATIONS_ATTR
 from .field_types import FieldType, validate_field_config
 from .validation import validate_record_data
 
@@ -319,11 +321,14 @@ class RecordSerializer(serializers.ModelSerializer):
             'id', 'title', 'ai_summary', 'ai_score', 'created_at', 'updated_at',
             'version', 'pipeline_name', 'is_deleted'
         ]
+        list_serializer_class = RelationHydratingListSerializer
+
+    # Relation fields render as related record ids
+    hydrate_related_ids = True
     
     def to_representation(self, instance):
         """Override to dynamically generate title using current pipeline template"""
         from .record_operations import RecordUtils
-        from .relation_field_handler import RelationFieldHandler
 
         data = super().to_representation(instance)
 
@@ -331,18 +336,18 @@ class RecordSerializer(serializers.ModelSerializer):
         data['title'] = RecordUtils.generate_title(
             instance.data,
             instance.pipeline.name,
-            instance.pipeline
+            instance.pipeline,
+            relation_display=getattr(instance, TITLE_RELATIONS_ATTR, None)
         )
 
         # Add relation field data from Relationship table
-        relation_fields = instance.pipeline.fields.filter(field_type='relation')
-        for field in relation_fields:
-            handler = RelationFieldHandler(field)
-            related_ids = handler.get_related_ids(instance)
+        # List serializers hydrate the whole page up front, see relation_hydration
+        relation_values = get_relation_values(instance, related_ids=True)
+        if relation_values:
             # Merge relation data into the data dict
             if data.get('data') is None:
                 data['data'] = {}
-            data['data'][field.slug] = related_ids
+            data['data'].update(relation_values)
 
         return data
     
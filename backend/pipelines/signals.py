@@ -11,6 +11,10 @@ from django.db import models
 import asyncio
 
 from .models import Record, Pipeline, Field
+from .record_snapshot import get_record_snapshot, clear_record_snapshot
+from .title_templates import invalidate_title_template
+from .query_planner import invalidate_filter_plans
+from .index_advisor import INDEXABLE_TYPES
 from core.models import AuditLog
 
 # AI processing now handled by ai/integrations.py
@@ -204,10 +208,9 @@ def handle_record_save(sender, instance, created, **kwargs):
         except Exception as e:
             logger.error(f"AUDIT_LOG_FAILED: Record {instance.id}, User {instance.updated_by.id if instance.updated_by else 'None'}: {e}")
     
-    # Update pipeline statistics
+    # Record counts are maintained by triggers (pipelines.record_counts)
     if created:
         Pipeline.objects.filter(id=instance.pipeline_id).update(
-            record_count=models.F('record_count') + 1,
             last_record_created=timezone.now()
         )
     
@@ -232,11 +235,6 @@ def handle_record_delete(sender, instance, **kwargs):
         )
     except Exception as e:
         logger.error(f"Failed to create audit log for record deletion {instance.id}: {e}")
-    
-    # Update pipeline statistics
-    Pipeline.objects.filter(id=instance.pipeline_id).update(
-        record_count=models.F('record_count') - 1
-    )
 
 
 def _create_reverse_relation_field(original_field, created_by):
@@ -438,6 +436,8 @@ def capture_field_state_before_save(sender, instance, **kwargs):
             original = Field.objects.with_deleted().get(pk=instance.pk)
             # Simple state tracking for audit logs
             instance._was_deleted_before_save = original.is_deleted
+            instance._was_searchable_before_save = original.is_searchable
+            instance._index_key_before_save = (original.slug, original.field_type)
         except Field.DoesNotExist:
             instance._was_deleted_before_save = False
 
@@ -484,14 +484,8 @@ def handle_field_hard_delete(sender, instance, **kwargs):
 @receiver(pre_save, sender=Record)
 def capture_record_state_before_save(sender, instance, **kwargs):
     """Capture the record state before save for change tracking"""
-    if instance.pk:
-        try:
-            original = Record.objects.get(pk=instance.pk)
-            instance._original_data = original.data
-        except Record.DoesNotExist:
-            instance._original_data = {}
-    else:
-        instance._original_data = {}
+    snapshot = get_record_snapshot(instance)
+    instance._original_data = snapshot.data.copy() if snapshot else {}
 
 
 @receiver(post_save, sender=Record)
@@ -517,8 +511,99 @@ def handle_stage_transition_trigger(sender, instance, created, **kwargs):
 def capture_stage_before_save(sender, instance, **kwargs):
     """Capture status before save for transition detection"""
     if instance.pk:
+        snapshot = get_record_snapshot(instance)
+        instance._original_status = snapshot.status if snapshot else None
+
+
+@receiver(post_save, sender=Record)
+def release_record_snapshot(sender, instance, **kwargs):
+    """Drop the shared pre-image so the next save of this instance loads a fresh one"""
+    clear_record_snapshot(instance)
+
+
+@receiver(post_save, sender=Pipeline)
+@receiver(post_delete, sender=Pipeline)
+def invalidate_compiled_title_template(sender, instance, **kwargs):
+    """Drop the compiled title template and filter plans when settings or the schema change"""
+    invalidate_title_template(instance.id)
+    invalidate_filter_plans(instance.id)
+
+
+@receiver(post_save, sender=Field)
+@receiver(post_delete, sender=Field)
+def invalidate_compiled_title_template_for_field(sender, instance, **kwargs):
+    """Field changes alter placeholder formatting, the default title template and filter plans"""
+    invalidate_title_template(instance.pipeline_id)
+    invalidate_filter_plans(instance.pipeline_id)
+
+
+@receiver(post_save, sender=Field)
+def queue_search_vector_rebuild(sender, instance, created, **kwargs):
+    """Existing records need new search vectors when a field enters or leaves search"""
+    if created:
+        return
+
+    was_searched = (
+        getattr(instance, '_was_searchable_before_save', instance.is_searchable)
+        and not getattr(instance, '_was_deleted_before_save', instance.is_deleted)
+    )
+    is_searched = instance.is_searchable and not instance.is_deleted
+    if was_searched == is_searched:
+        return
+
+    from django.db import connection, transaction
+
+    tenant_schema = getattr(connection, 'schema_name', None)
+    if not tenant_schema or tenant_schema == 'public':
+        return
+
+    def queue_rebuild():
+        from .tasks import rebuild_pipeline_search_vectors
+        try:
+            rebuild_pipeline_search_vectors.delay(tenant_schema, instance.pipeline_id)
+        except Exception as e:
+            logger.error(f"Failed to queue search vector rebuild for pipeline {instance.pipeline_id}: {e}")
+
+    transaction.on_commit(queue_rebuild)
+
+
+def _queue_expression_index_drop(pipeline_id, field_slug=None):
+    from django.db import connection, transaction
+
+    tenant_schema = getattr(connection, 'schema_name', None)
+    if not tenant_schema or tenant_schema == 'public':
+        return
+
+    def queue_drop():
+        from .tasks import drop_record_expression_indexes
         try:
-            original = Record.objects.get(pk=instance.pk)
-            instance._original_status = original.status
-        except Record.DoesNotExist:
-            instance._original_status = None
+            drop_record_expression_indexes.delay(tenant_schema, pipeline_id, field_slug)
+        except Exception as e:
+            logger.error(f"Failed to queue expression index drop for pipeline {pipeline_id}: {e}")
+
+    transaction.on_commit(queue_drop)
+
+
+@receiver(post_save, sender=Field)
+def drop_expression_index_of_changed_field(sender, instance, created, **kwargs):
+    """A deleted, renamed or retyped field no longer matches its expression index"""
+    if created or not hasattr(instance, '_index_key_before_save'):
+        return
+
+    old_slug, old_type = instance._index_key_before_save
+    if old_type not in INDEXABLE_TYPES:
+        return
+    newly_deleted = instance.is_deleted and not getattr(instance, '_was_deleted_before_save', False)
+    if newly_deleted or (old_slug, old_type) != (instance.slug, instance.field_type):
+        _queue_expression_index_drop(instance.pipeline_id, old_slug)
+
+
+@receiver(post_delete, sender=Field)
+def drop_expression_index_of_deleted_field(sender, instance, **kwargs):
+    if instance.field_type in INDEXABLE_TYPES:
+        _queue_expression_index_drop(instance.pipeline_id, instance.slug)
+
+
+@receiver(post_delete, sender=Pipeline)
+def drop_expression_indexes_of_deleted_pipeline(sender, instance, **kwargs):
+    _queue_expression_index_drop(instance.id)
@@ -25,8 +25,9 @@ def migrate_field_to_existing_records_task(self, field_id, field_config, operati
         operation_id: Operation ID for tracking
     """
     import time
-    from .models import Field, Record
+    from .models import Field
     from .field_operations import FieldOperationManager
+    from .field_backfill import FieldBackfill
     
     try:
         # Get the field and pipeline
@@ -41,93 +42,38 @@ def migrate_field_to_existing_records_task(self, field_id, field_config, operati
         # Determine default value for the new field
         default_value = manager._get_field_default_value(field, field_config)
         
-        # Get all active records in the pipeline
-        records = Record.objects.filter(pipeline=pipeline, is_deleted=False)
-        total_records = records.count()
+        logger.info(f"[{operation_id}] Adding field '{field.slug}' = '{default_value}' to existing records")
         
-        if total_records == 0:
-            logger.info(f"[{operation_id}] No records to migrate")
-            return {
-                'success': True,
-                'records_processed': 0,
-                'records_migrated': 0
-            }
-        
-        logger.info(f"[{operation_id}] Migrating {total_records} records with field '{field.slug}' = '{default_value}'")
-        
-        # Migrate records in batches for performance
-        batch_size = 100
-        migrated_count = 0
-        failed_count = 0
-        errors = []
-        start_time = time.time()
-        
-        # Use bulk update for better performance
-        records_to_update = []
-        
-        for batch_start in range(0, total_records, batch_size):
-            batch_records = records[batch_start:batch_start + batch_size]
-            
-            for record in batch_records:
-                try:
-                    # Only add field if it doesn't already exist
-                    if field.slug not in (record.data or {}):
-                        if record.data is None:
-                            record.data = {}
-                        
-                        record.data[field.slug] = default_value
-                        record._skip_broadcast = True  # Prevent real-time broadcasts
-                        record._migration_context = True  # Use migration validation context
-                        records_to_update.append(record)
-                        migrated_count += 1
-                        
-                except Exception as record_error:
-                    failed_count += 1
-                    errors.append(f"Record {record.id}: {str(record_error)}")
-                    logger.error(f"[{operation_id}] Failed to prepare record {record.id}: {record_error}")
-            
-            # Bulk update the batch
-            if records_to_update:
-                try:
-                    Record.objects.bulk_update(records_to_update, ['data'], batch_size=batch_size)
-                    records_to_update = []
-                except Exception as bulk_error:
-                    logger.error(f"[{operation_id}] Bulk update failed: {bulk_error}")
-                    # Fall back to individual saves
-                    for record in records_to_update:
-                        try:
-                            record.save(update_fields=['data'])
-                        except Exception as save_error:
-                            failed_count += 1
-                            errors.append(f"Record {record.id}: {str(save_error)}")
-                    records_to_update = []
-            
-            # Update task progress
-            progress = int((batch_start + batch_size) / total_records * 100)
+        def report_progress(done, total):
             self.update_state(
                 state='PROGRESS',
                 meta={
-                    'current': batch_start + batch_size,
-                    'total': total_records,
-                    'percent': progress,
+                    'current': done,
+                    'total': total,
+                    'percent': int(done / total * 100) if total else 100,
                     'field': field.slug
                 }
             )
         
+        # One jsonb_set UPDATE per keyset batch, only for records missing the key
+        start_time = time.time()
+        backfill = FieldBackfill(pipeline, batch_size=1000, progress=report_progress)
+        result = backfill.add_default(field.slug, default_value)
+        
         processing_time = time.time() - start_time
         
-        logger.info(f"[{operation_id}] Migration completed: {migrated_count} migrated, {failed_count} failed in {processing_time:.2f}s")
+        logger.info(f"[{operation_id}] Migration completed: {result.records_updated} records in {result.batches} batches in {processing_time:.2f}s")
         
         # Update pipeline schema cache
         pipeline._update_field_schema()
         pipeline.save(update_fields=['field_schema'])
         
         return {
-            'success': failed_count == 0,
-            'records_processed': total_records,
-            'records_migrated': migrated_count,
-            'records_failed': failed_count,
-            'errors': errors[:10],  # Limit errors
+            'success': True,
+            'records_processed': result.records_matched,
+            'records_migrated': result.records_updated,
+            'records_failed': 0,
+            'errors': [],
             'processing_time_seconds': processing_time,
             'field_slug': field.slug,
             'operation_id': operation_id
@@ -286,6 +232,158 @@ def migrate_field_schema(self, pipeline_id, field_slug, new_config, batch_size=1
         return {'error': error_msg, 'success': False}
 
 
+@shared_task(bind=True, name='pipelines.tasks.rebuild_pipeline_search_vectors')
+def rebuild_pipeline_search_vectors(self, tenant_schema, pipeline_id, batch_size=1000):
+    """
+    Rebuild the search vectors of every record in a pipeline.
+    Queued when the pipeline's searchable fields change.
+
+    Args:
+        tenant_schema: Schema of the tenant owning the pipeline
+        pipeline_id: ID of the pipeline to rebuild
+        batch_size: Records updated per statement
+    """
+    from .models import Pipeline
+    from .search import rebuild_search_vectors
+
+    try:
+        with schema_context(tenant_schema):
+            try:
+                pipeline = Pipeline.objects.get(id=pipeline_id)
+            except Pipeline.DoesNotExist:
+                logger.warning(f"Pipeline {pipeline_id} no longer exists in {tenant_schema}, skipping search vector rebuild")
+                return {'success': False, 'error': 'Pipeline not found'}
+
+            updated = rebuild_search_vectors(pipeline, batch_size=batch_size)
+            return {'success': True, 'pipeline_id': pipeline_id, 'records_updated': updated}
+
+    except Exception as e:
+        logger.error(f"Failed to rebuild search vectors for pipeline {pipeline_id} in {tenant_schema}: {e}", exc_info=True)
+        raise
+
+
+@shared_task(bind=True, name='pipelines.tasks.apply_record_index_advice')
+def apply_record_index_advice(self, tenant_schema=None, pipeline_id=None):
+    """
+    Build expression indexes for hot record fields and drop stale ones.
+    Runs periodically; without a tenant it fans out one task per tenant.
+
+    Args:
+        tenant_schema: Schema of the tenant to advise, None for all tenants
+        pipeline_id: Only advise this pipeline
+    """
+    from tenants.models import Tenant
+    from .index_advisor import RecordIndexAdvisor, decay_field_usage, drop_orphaned_expression_indexes
+    from .models import Pipeline
+
+    if tenant_schema is None:
+        schemas = list(Tenant.objects.exclude(schema_name='public').values_list('schema_name', flat=True))
+        for schema in schemas:
+            apply_record_index_advice.delay(schema)
+        return {'success': True, 'tenants': len(schemas)}
+
+    try:
+        with schema_context(tenant_schema):
+            pipelines = Pipeline.objects.only('id', 'field_schema')
+            if pipeline_id is not None:
+                pipelines = pipelines.filter(id=pipeline_id)
+
+            created, dropped = [], []
+            for pipeline in pipelines:
+                result = RecordIndexAdvisor(pipeline).apply()
+                created.extend(result['created'])
+                dropped.extend(result['dropped'])
+                decay_field_usage(pipeline.id)
+
+            if pipeline_id is None:
+                dropped.extend(drop_orphaned_expression_indexes(Pipeline.objects.values_list('id', flat=True)))
+
+            return {'success': True, 'created': created, 'dropped': dropped}
+
+    except Exception as e:
+        logger.error(f"Failed to apply record index advice in {tenant_schema}: {e}", exc_info=True)
+        raise
+
+
+@shared_task(bind=True, name='pipelines.tasks.drop_record_expression_indexes')
+def drop_record_expression_indexes(self, tenant_schema, pipeline_id, field_slug=None):
+    """
+    Drop the expression indexes of a deleted pipeline or field.
+
+    Args:
+        tenant_schema: Schema of the tenant owning the pipeline
+        pipeline_id: ID of the pipeline
+        field_slug: Only drop the index of this field
+    """
+    from .index_advisor import drop_expression_indexes
+
+    try:
+        with schema_context(tenant_schema):
+            dropped = drop_expression_indexes(pipeline_id, field_slug)
+            return {'success': True, 'dropped': dropped}
+
+    except Exception as e:
+        logger.error(f"Failed to drop expression indexes for pipeline {pipeline_id} in {tenant_schema}: {e}", exc_info=True)
+        raise
+
+
+@shared_task(bind=True, name='pipelines.tasks.fold_record_counts')
+def fold_record_counts(self, tenant_schema=None):
+    """
+    Fold record count deltas and refresh the cached Pipeline.record_count.
+    Runs periodically; without a tenant it fans out one task per tenant.
+    """
+    from tenants.models import Tenant
+    from .record_counts import fold_record_counts as fold
+
+    if tenant_schema is None:
+        schemas = list(Tenant.objects.exclude(schema_name='public').values_list('schema_name', flat=True))
+        for schema in schemas:
+            fold_record_counts.delay(schema)
+        return {'success': True, 'tenants': len(schemas)}
+
+    try:
+        with schema_context(tenant_schema):
+            return {'success': True, 'folded': fold()}
+
+    except Exception as e:
+        logger.error(f"Failed to fold record counts in {tenant_schema}: {e}", exc_info=True)
+        raise
+
+
+@shared_task(bind=True, name='pipelines.tasks.reconcile_record_counts')
+def reconcile_record_counts(self, tenant_schema=None, pipeline_id=None):
+    """
+    Recount records and correct record count buckets that drifted
+    (writes bypassing the triggers, such as TRUNCATE or restores).
+    Runs periodically; without a tenant it fans out one task per tenant.
+
+    Args:
+        tenant_schema: Schema of the tenant to reconcile, None for all tenants
+        pipeline_id: Only reconcile this pipeline
+    """
+    from tenants.models import Tenant
+    from .record_counts import fold_record_counts as fold, reconcile_record_counts as reconcile
+
+    if tenant_schema is None:
+        schemas = list(Tenant.objects.exclude(schema_name='public').values_list('schema_name', flat=True))
+        for schema in schemas:
+            reconcile_record_counts.delay(schema)
+        return {'success': True, 'tenants': len(schemas)}
+
+    try:
+        with schema_context(tenant_schema):
+            pipeline_ids = [pipeline_id] if pipeline_id is not None else None
+            corrections = reconcile(pipeline_ids)
+            if corrections:
+                fold(pipeline_ids)
+            return {'success': True, 'corrections': corrections}
+
+    except Exception as e:
+        logger.error(f"Failed to reconcile record counts in {tenant_schema}: {e}", exc_info=True)
+        raise
+
+
 @shared_task(bind=True, name='pipelines.tasks.execute_scheduled_hard_deletes')
 def execute_scheduled_hard_deletes(self):
     """
@@ -624,10 +722,17 @@ def migrate_tenant_schema_automatically(self, tenant_schema, field_id, changes):
         }
 
 
+def _maintenance_progress(maintenance, action):
+    """Backfill progress callback reporting into the 30-70% range of a maintenance window"""
+    def report(done, total):
+        maintenance.update_progress(30 + int(done / total * 40), f"{action} in {done}/{total} records")
+    return report
+
+
 def migrate_field_rename(field, change_details, maintenance):
     """Handle field rename migration specifically"""
     try:
-        from .models import Record
+        from .field_backfill import FieldBackfill
         
         # Extract old and new names from change details
         old_slug = None
@@ -647,39 +752,16 @@ def migrate_field_rename(field, change_details, maintenance):
         
         logger.info(f"Migrating field rename from '{old_slug}' to '{new_slug}'")
         
-        # Count affected records
-        affected_records = Record.objects.filter(
-            pipeline=field.pipeline,
-            is_deleted=False,
-            data__has_key=old_slug
+        backfill = FieldBackfill(
+            field.pipeline,
+            progress=_maintenance_progress(maintenance, "Renamed field")
         )
-        
-        total_count = affected_records.count()
-        migrated_count = 0
-        batch_size = 100
-        
-        # Process in batches
-        for batch_start in range(0, total_count, batch_size):
-            batch_records = affected_records[batch_start:batch_start + batch_size]
-            
-            for record in batch_records:
-                # Rename field in record data
-                if old_slug in record.data:
-                    record.data[new_slug] = record.data.pop(old_slug)
-                    record._skip_broadcast = True  # Prevent real-time broadcasts during migration
-                    record.save(update_fields=['data'])
-                    migrated_count += 1
-            
-            # Update progress
-            progress = 30 + int((batch_start / total_count) * 40)  # 30-70% range
-            maintenance.progress_percentage = progress
-            maintenance.status_message = f"Renamed field in {migrated_count}/{total_count} records"
-            maintenance.save()
+        result = backfill.rename(old_slug, new_slug)
         
         return {
             'success': True,
-            'records_processed': total_count,
-            'records_migrated': migrated_count,
+            'records_processed': result.records_matched,
+            'records_migrated': result.records_updated,
             'records_failed': 0,
             'migration_type': 'field_rename'
         }
@@ -689,6 +771,7 @@ def migrate_field_rename(field, change_details, maintenance):
         return {
             'success': False,
             'error': str(e),
+            'errors': [str(e)],
             'migration_type': 'field_rename'
         }
 
@@ -696,41 +779,19 @@ def migrate_field_rename(field, change_details, maintenance):
 def migrate_constraint_changes(field, new_config, maintenance):
     """Handle constraint change migrations"""
     try:
-        from .models import Record
+        from .field_backfill import FieldBackfill
         
-        # Get records with data for this field
-        affected_records = Record.objects.filter(
-            pipeline=field.pipeline,
-            is_deleted=False,
-            data__has_key=field.slug
+        backfill = FieldBackfill(
+            field.pipeline,
+            progress=_maintenance_progress(maintenance, "Applied constraints")
         )
-        
-        total_count = affected_records.count()
-        migrated_count = 0
-        failed_count = 0
-        
-        new_constraints = new_config.get('storage_constraints', {})
-        
-        for record in affected_records:
-            try:
-                field_value = record.data.get(field.slug)
-                updated_value = apply_constraint_changes(field_value, new_constraints)
-                
-                if updated_value != field_value:
-                    record.data[field.slug] = updated_value
-                    record._skip_broadcast = True
-                    record.save(update_fields=['data'])
-                    migrated_count += 1
-                
-            except Exception as record_error:
-                logger.warning(f"Failed to migrate constraints for record {record.id}: {record_error}")
-                failed_count += 1
+        result = backfill.apply_constraints(field.slug, new_config.get('storage_constraints') or {})
         
         return {
-            'success': failed_count == 0,
-            'records_processed': total_count,
-            'records_migrated': migrated_count,
-            'records_failed': failed_count,
+            'success': True,
+            'records_processed': result.records_matched,
+            'records_migrated': result.records_updated,
+            'records_failed': 0,
             'migration_type': 'constraint_change'
         }
         
@@ -739,24 +800,11 @@ def migrate_constraint_changes(field, new_config, maintenance):
         return {
             'success': False,
             'error': str(e),
+            'errors': [str(e)],
             'migration_type': 'constraint_change'
         }
 
 
-def apply_constraint_changes(value, new_constraints):
-    """Apply new storage constraints to a field value"""
-    if value is None:
-        return value
-    
-    # Handle max length constraint
-    max_length = new_constraints.get('max_storage_length')
-    if max_length and isinstance(value, str) and len(value) > max_length:
-        return value[:max_length]
-    
-    # Handle other constraint types as needed
-    return value
-
-
 def verify_schema_migration_success(field, new_config):
     """Verify that migration completed successfully"""
     try:
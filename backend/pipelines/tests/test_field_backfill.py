@@ -0,0 +1,72 @@
+"""
+Tests for set-based field backfills
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from pipelines.field_backfill import FieldBackfill
+from pipelines.models import Pipeline, Record
+
+User = get_user_model()
+
+
+class FieldBackfillTest(TestCase):
+    """Backfills rewrite one key in keyset batches without touching other data"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='backfilluser',
+            email='backfill@example.com',
+            password='testpass123'
+        )
+        cls.pipeline = Pipeline.objects.create(name='Backfill', created_by=cls.user)
+        cls.other = Pipeline.objects.create(name='Other', created_by=cls.user)
+        Record.objects.bulk_create(
+            [
+                Record(pipeline=cls.pipeline, data={'name': f'R{i}', 'note': 'x' * i}, created_by=cls.user)
+                for i in range(5)
+            ] + [
+                Record(pipeline=cls.pipeline, data={'name': 'Set', 'stage': 'won'}, created_by=cls.user),
+                Record(pipeline=cls.pipeline, data={'name': 'Gone'}, created_by=cls.user, is_deleted=True),
+                Record(pipeline=cls.other, data={'name': 'Elsewhere'}, created_by=cls.user),
+            ]
+        )
+
+    def data(self, pipeline=None):
+        return list(
+            Record.objects.filter(pipeline=pipeline or self.pipeline, is_deleted=False)
+            .order_by('id').values_list('data', flat=True)
+        )
+
+    def deleted_data(self):
+        return Record.objects.get(pipeline=self.pipeline, is_deleted=True).data
+
+    def test_add_default_only_fills_missing_keys(self):
+        progress = []
+        result = FieldBackfill(self.pipeline, batch_size=2, progress=lambda *p: progress.append(p)).add_default(
+            'stage', {'value': 'new'}
+        )
+
+        self.assertEqual((result.records_matched, result.records_updated, result.batches), (5, 5, 3))
+        self.assertEqual(progress, [(2, 5), (4, 5), (5, 5)])
+        self.assertEqual([d['stage'] for d in self.data()], [{'value': 'new'}] * 5 + ['won'])
+        self.assertEqual(self.data(self.other), [{'name': 'Elsewhere'}])
+        self.assertEqual(self.deleted_data(), {'name': 'Gone'})
+
+    def test_include_deleted_rewrites_soft_deleted_records(self):
+        result = FieldBackfill(self.pipeline, include_deleted=True).add_default('stage', 'new')
+
+        self.assertEqual((result.records_matched, result.records_updated), (6, 6))
+        self.assertEqual(self.deleted_data(), {'name': 'Gone', 'stage': 'new'})
+
+    def test_rename_moves_value(self):
+        result = FieldBackfill(self.pipeline).rename('name', 'title')
+        self.assertEqual(result.records_updated, 6)
+        self.assertTrue(all('name' not in d for d in self.data()))
+        self.assertEqual(self.data()[-1], {'title': 'Set', 'stage': 'won'})
+
+    def test_truncate_text(self):
+        result = FieldBackfill(self.pipeline).apply_constraints('note', {'max_storage_length': 2})
+        self.assertEqual(result.records_updated, 2)
+        self.assertEqual([d.get('note') for d in self.data()], ['', 'x', 'xx', 'xx', 'xx', None])
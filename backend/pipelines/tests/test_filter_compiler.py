@@ -0,0 +1,183 @@
+"""
+Equivalence tests for the SavedFilter SQL compiler
+
+Every case runs the same filter config through the compiled SQL and through
+the Python reference evaluator (record_matches_filter_config) and expects
+both to select exactly the same records.
+"""
+import itertools
+
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase
+
+from pipelines.filter_compiler import (
+    NUMERIC_OPERATORS,
+    TEXT_OPERATORS,
+    FilterCompiler,
+    compile_filter_config,
+    evaluate_filter_condition,
+    record_matches_filter_config,
+)
+from pipelines.models import Pipeline, Record, SavedFilter
+
+User = get_user_model()
+
+# Values stored under the filtered field; None means the key is absent
+FIELD_VALUES = [
+    None, 'json-null', '', ' ', 'Acme', 'acme corp', 'ACME', 'Ac_me', '100%', 'back\\slash',
+    '5', '5.0', ' 7 ', '-3', '.5', '1e3', '1000', 'inf', '-Infinity', 'nan', 'abc5',
+    0, 5, -3, 1000, 2.5, 1000.0,
+    True, False,
+    [], ['vip', 'new'], [1, 2],
+    [{'user_id': 5}, {'user_id': 8}], [{'user_id': '6'}], [{'role': 'owner'}],
+    {'k': 'v'}, {},
+]
+
+FILTER_VALUES = [
+    None, '', 'acme', 'ACME', 'corp', 'Ac_', 'c_m', '%', 'ac%', '\\', '5', '5.0', '7', '-3',
+    '0', '1000', '999.5', '2.5', 'inf', '-inf', 'nan', 'abc', 'true', 'false', 'vip',
+    '{"user_id": 5}', '{"user_id": "6"}', '{"user_id": "x"}', '{"user_id": null}',
+    '"user_id"', '[1]', '{"other": 1}', "'vip'", 5, 2.5, True,
+]
+
+
+class FilterCompilerEquivalenceTest(TestCase):
+    """Compiled SQL selects the same records as the Python evaluator"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='filteruser',
+            email='filter@example.com',
+            password='testpass123'
+        )
+        cls.pipeline = Pipeline.objects.create(
+            name='Filter Compiler Pipeline',
+            description='Test pipeline',
+            created_by=cls.user
+        )
+
+        # bulk_create stores the data as-is, without save-time validation
+        records = []
+        for value in FIELD_VALUES:
+            if value is None:
+                data = {'other': 'x'}
+            elif value == 'json-null':
+                data = {'f': None}
+            else:
+                data = {'f': value}
+            data['g'] = 'won' if len(records) % 2 else 'lost'
+            records.append(Record(
+                pipeline=cls.pipeline,
+                data=data,
+                created_by=cls.user,
+                updated_by=cls.user
+            ))
+        Record.objects.bulk_create(records)
+        cls.records = list(Record.objects.filter(pipeline=cls.pipeline))
+
+    def assertEquivalent(self, filter_config):
+        expected = {r.id for r in self.records if record_matches_filter_config(r.data, filter_config)}
+        actual = set(
+            Record.objects.filter(pipeline=self.pipeline)
+            .filter(compile_filter_config(filter_config))
+            .values_list('id', flat=True)
+        )
+        if expected != actual:
+            by_id = {r.id: r.data for r in self.records}
+            self.fail(
+                f"Mismatch for {filter_config}\n"
+                f"  only python: {[by_id[i] for i in expected - actual]}\n"
+                f"  only sql:    {[by_id[i] for i in actual - expected]}"
+            )
+
+    @staticmethod
+    def single(operator, value, field='f'):
+        return {'groups': [{'logic': 'AND', 'filters': [{'field': field, 'operator': operator, 'value': value}]}]}
+
+    def test_text_operators(self):
+        for operator, value in itertools.product(sorted(TEXT_OPERATORS), FILTER_VALUES):
+            with self.subTest(operator=operator, value=value):
+                self.assertEquivalent(self.single(operator, value))
+
+    def test_numeric_operators(self):
+        for operator, value in itertools.product(sorted(NUMERIC_OPERATORS), FILTER_VALUES):
+            with self.subTest(operator=operator, value=value):
+                self.assertEquivalent(self.single(operator, value))
+
+    def test_unknown_operator_matches_nothing(self):
+        self.assertEquivalent(self.single('regex', 'a.*'))
+        self.assertEquivalent(self.single(None, 'a'))
+
+    def test_missing_field_name(self):
+        for operator in ('is_empty', 'is_not_empty', 'equals'):
+            with self.subTest(operator=operator):
+                self.assertEquivalent(self.single(operator, '', field=None))
+
+    def test_group_logic(self):
+        won = {'field': 'g', 'operator': 'equals', 'value': 'won'}
+        acme = {'field': 'f', 'operator': 'contains', 'value': 'acme'}
+        big = {'field': 'f', 'operator': 'gte', 'value': '1000'}
+        empty = {'field': 'f', 'operator': 'is_empty', 'value': ''}
+
+        configs = [
+            {},
+            {'groups': []},
+            {'groups': [{'filters': []}]},
+            {'groupLogic': 'OR', 'groups': [{'filters': []}, {'filters': [won]}]},
+            {'groupLogic': 'AND', 'groups': [{'logic': 'OR', 'filters': [acme, big]}, {'logic': 'AND', 'filters': [won]}]},
+            {'groupLogic': 'OR', 'groups': [{'logic': 'AND', 'filters': [acme, won]}, {'logic': 'AND', 'filters': [empty]}]},
+            {'groupLogic': 'or', 'groups': [{'logic': 'or', 'filters': [empty, big]}]},
+        ]
+        for config in configs:
+            with self.subTest(config=config):
+                self.assertEquivalent(config)
+
+    def test_saved_filter_filter_records(self):
+        saved_filter = SavedFilter.objects.create(
+            name='Big deals',
+            pipeline=self.pipeline,
+            created_by=self.user,
+            filter_config=self.single('gte', '1000')
+        )
+        expected = {r.id for r in self.records if record_matches_filter_config(r.data, saved_filter.filter_config)}
+        self.assertEqual(set(saved_filter.filter_records().values_list('id', flat=True)), expected)
+
+
+class FilterCompilerConstantFoldingTest(SimpleTestCase):
+    """Conditions whose outcome is known at compile time never reach SQL"""
+
+    def setUp(self):
+        self.compiler = FilterCompiler()
+
+    def test_empty_config_matches_everything(self):
+        self.assertEqual(compile_filter_config({}), Q())
+        self.assertEqual(compile_filter_config({'groups': [{'filters': []}]}), Q())
+
+    def test_unknown_operator_matches_nothing(self):
+        config = {'groups': [{'filters': [{'field': 'f', 'operator': 'bogus', 'value': 'x'}]}]}
+        self.assertEqual(compile_filter_config(config), Q(pk__in=[]))
+
+    def test_non_numeric_filter_value_matches_nothing(self):
+        self.assertIs(self.compiler.compile_condition('f', 'gt', 'abc'), False)
+        self.assertIs(self.compiler.compile_condition('f', 'lte', 'nan'), False)
+
+    def test_missing_branch_only_when_empty_string_matches(self):
+        sql, _ = self.compiler.compile_condition('f', 'is_empty', None)
+        self.assertIn('IS NULL', sql)
+        sql, _ = self.compiler.compile_condition('f', 'equals', 'acme')
+        self.assertNotIn('IS NULL', sql)
+
+    def test_user_contains_uses_jsonb_containment(self):
+        sql, params = self.compiler.compile_condition('owner', 'contains', '{"user_id": 5}')
+        self.assertIn('@>', sql)
+        self.assertIn('[{"user_id": 5}]', params)
+        self.assertIn('[{"user_id": "5"}]', params)
+
+    def test_reference_evaluator_user_field_contains(self):
+        users = [{'user_id': 5}, {'user_id': '6'}]
+        self.assertTrue(evaluate_filter_condition(users, 'contains', '{"user_id": "5"}'))
+        self.assertTrue(evaluate_filter_condition(users, 'contains', '{"user_id": 6}'))
+        self.assertFalse(evaluate_filter_condition(users, 'contains', '{"user_id": 7}'))
+        self.assertFalse(evaluate_filter_condition(users, 'contains', '5'))
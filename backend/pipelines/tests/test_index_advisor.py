@@ -0,0 +1,83 @@
+"""
+Tests for the expression-index advisor
+"""
+from django.test import SimpleTestCase
+
+from pipelines.index_advisor import (
+    ManagedIndex,
+    RecordIndexAdvisor,
+    index_expression_sql,
+    index_name,
+)
+from pipelines.models import Pipeline
+from pipelines.query_planner import NUMERIC_TEXT_PATTERN
+
+FIELD_SCHEMA = {
+    'name': {'type': 'text', 'config': {}},
+    'deal_value': {'type': 'number', 'config': {'format': 'currency'}},
+    'close_date': {'type': 'date', 'config': {}},
+    'employees': {'type': 'number', 'config': {}, 'create_index': True},
+    'labels': {'type': 'tags', 'config': {}},
+}
+
+
+class RecordIndexAdvisorTest(SimpleTestCase):
+    """Proposals are derived from usage and the field schema only"""
+
+    def setUp(self):
+        self.pipeline = Pipeline(id=7, name='Deals', field_schema=FIELD_SCHEMA)
+        self.advisor = RecordIndexAdvisor(self.pipeline, min_uses=10, max_indexes=1)
+
+    def proposals(self, usage, existing=()):
+        return {proposal.slug: proposal for proposal in self.advisor.proposals(usage=usage, existing=existing)}
+
+    def test_index_expression_matches_planner(self):
+        self.assertEqual(
+            index_expression_sql('deal_value', FIELD_SCHEMA['deal_value']),
+            "(CASE WHEN (data->'deal_value'->>'amount') ~ '" + NUMERIC_TEXT_PATTERN + "' "
+            "THEN (data->'deal_value'->>'amount')::numeric END)"
+        )
+        self.assertEqual(index_expression_sql("it's", {'type': 'date'}), "(data->>'it''s')")
+
+    def test_index_names_fit_postgres(self):
+        self.assertEqual(index_name(7, 'close_date'), 'idx_rec_expr_7_close_date')
+        long_name = index_name(7, 'x' * 80)
+        self.assertEqual(len(long_name), 63)
+        self.assertNotEqual(long_name, index_name(7, 'x' * 81))
+
+    def test_hot_and_pinned_fields_are_wanted(self):
+        proposals = self.proposals({
+            'deal_value': {'filter': 8, 'sort': 4},
+            'close_date': {'filter': 11, 'sort': 0},
+            'name': {'filter': 0, 'sort': 3},
+        })
+        self.assertNotIn('labels', proposals)
+        self.assertTrue(proposals['deal_value'].hot)
+        # Over the threshold but beyond max_indexes
+        self.assertFalse(proposals['close_date'].wanted)
+        self.assertTrue(proposals['employees'].wanted)
+        self.assertFalse(proposals['name'].wanted)
+
+        sql = proposals['deal_value'].create_sql()
+        self.assertIn('CREATE INDEX CONCURRENTLY IF NOT EXISTS "idx_rec_expr_7_deal_value"', sql)
+        self.assertIn('WHERE pipeline_id = 7 AND is_deleted = false', sql)
+
+    def test_stale_and_cold_indexes(self):
+        def managed(slug, expression, valid=True):
+            return ManagedIndex(index_name(7, slug), 7, slug, expression, valid)
+
+        existing = [
+            managed('close_date', index_expression_sql('close_date', FIELD_SCHEMA['close_date'])),
+            managed('name', index_expression_sql('name', FIELD_SCHEMA['name'])),
+            managed('removed', "(data->>'removed')"),
+            managed('employees', "(data->>'employees')"),
+            managed('deal_value', index_expression_sql('deal_value', FIELD_SCHEMA['deal_value']), valid=False),
+        ]
+        proposals = self.advisor.proposals(usage={'name': {'filter': 0, 'sort': 7}}, existing=existing)
+
+        self.assertEqual(
+            {index.slug for index in self.advisor.stale(proposals, existing)},
+            {'removed', 'employees', 'deal_value'}
+        )
+        self.assertEqual({index.slug for index in self.advisor.cold(proposals, existing)}, {'close_date'})
+        self.assertTrue({p.slug: p for p in proposals}['close_date'].exists)
@@ -0,0 +1,149 @@
+"""
+Tests for the typed record filter planner
+"""
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import SimpleTestCase
+
+from pipelines.models import Pipeline, Record
+from pipelines.query_planner import (
+    NUMERIC_TEXT_PATTERN,
+    RecordQueryPlanner,
+    get_filter_plan,
+    invalidate_filter_plans,
+)
+
+FIELD_SCHEMA = {
+    'name': {'type': 'text', 'config': {}},
+    'amount': {'type': 'number', 'config': {}},
+    'deal_value': {'type': 'number', 'config': {'format': 'currency'}},
+    'active': {'type': 'boolean', 'config': {}},
+    'labels': {'type': 'tags', 'config': {}},
+    'company': {'type': 'relation', 'config': {'target_pipeline_id': 2}},
+    'owner': {'type': 'user', 'config': {}},
+    'closes_on': {'type': 'date', 'config': {}},
+    'stage__old': {'type': 'select', 'config': {}},
+}
+
+
+class RecordQueryPlannerTest(SimpleTestCase):
+    """Parameters are resolved against field types, not parameter names"""
+
+    def setUp(self):
+        self.pipeline = Pipeline(id=9001, name='Deals', field_schema=FIELD_SCHEMA)
+        invalidate_filter_plans()
+
+    def sql(self, params):
+        """SQL and parameter values (JSON adapters unwrapped) of the planned query"""
+        plan = RecordQueryPlanner(self.pipeline).plan(params)
+        sql, sql_params = plan.apply(Record.objects.all(), params).query.sql_with_params()
+        return sql, [getattr(param, 'obj', param) for param in sql_params]
+
+    def strategies(self, params):
+        return {f['param']: f['strategy'] for f in RecordQueryPlanner(self.pipeline).plan(params).describe()}
+
+    def test_parse_uses_known_slugs(self):
+        planner = RecordQueryPlanner(self.pipeline)
+        self.assertEqual(planner.parse('data__stage__old'), ('stage__old', None))
+        self.assertEqual(planner.parse('data__amount__gte'), ('amount', 'gte'))
+        self.assertEqual(planner.parse('data__unknown__bogus'), ('unknown__bogus', None))
+        self.assertIsNone(planner.parse('status'))
+
+    def test_equality_uses_containment(self):
+        self.assertEqual(self.strategies({
+            'data__name': 'Acme', 'data__labels__icontains': 'vip',
+            'data__company__contains': '3', 'data__owner__user_id': '7',
+        }), dict.fromkeys([
+            'data__name', 'data__labels__icontains', 'data__company__contains', 'data__owner__user_id',
+        ], 'jsonb_containment'))
+        sql, params = self.sql({'data__name': 'Acme'})
+        self.assertEqual(sql.count('"pipelines_record"."data" @> %s'), 1)
+        self.assertEqual(params, [{'name': 'Acme'}])
+        self.assertNotIn('CAST', sql)
+
+    def test_number_equality_uses_the_range_expression(self):
+        self.assertEqual(self.strategies({'data__amount': '5', 'data__deal_value': '5'}), {
+            'data__amount': 'numeric_expression', 'data__deal_value': 'numeric_expression',
+        })
+        equality_sql, equality_params = self.sql({'data__amount': '5'})
+        range_sql, _ = self.sql({'data__amount__gte': '5'})
+        self.assertIn(equality_sql.split(' = %s')[0].split('WHERE ')[-1], range_sql)
+        self.assertEqual([str(param) for param in equality_params], ['amount', 'amount', '5'])
+
+        sql, params = self.sql({'data__deal_value': '99.5'})
+        self.assertIn("THEN (data->%s->>%s)::numeric END) = %s", sql)
+        self.assertEqual([str(param) for param in params], ['deal_value', 'amount', 'deal_value', 'amount', '99.5'])
+
+    def test_boolean_equality_matches_text_values(self):
+        self.assertEqual(self.strategies({'data__active': 'yes'}), {'data__active': 'text_equality'})
+        sql, params = self.sql({'data__active': 'false'})
+        self.assertIn('lower(data->>%s) = %s', sql)
+        self.assertEqual(params, ['active', 'false'])
+
+    def test_tag_named_text_field_is_not_treated_as_tags(self):
+        self.pipeline.field_schema = dict(FIELD_SCHEMA, company_tags={'type': 'text', 'config': {}})
+        self.assertEqual(self.strategies({'data__company_tags__icontains': 'x'}), {'data__company_tags__icontains': 'text_pattern'})
+
+    def test_ranges(self):
+        sql, params = self.sql({'data__amount__gte': '10', 'data__deal_value__lt': '99.5', 'data__closes_on__gt': '2024-01-01'})
+        self.assertIn("(CASE WHEN (data->>%s) ~ '", sql)
+        self.assertIn("THEN (data->>%s)::numeric END) >= %s", sql)
+        self.assertIn("THEN (data->%s->>%s)::numeric END) < %s", sql)
+        self.assertIn("(data->>%s) > %s", sql)
+        self.assertEqual(
+            [str(param) for param in params],
+            ['amount', 'amount', '10', 'deal_value', 'amount', 'deal_value', 'amount', '99.5', 'closes_on', '2024-01-01']
+        )
+
+    def test_numeric_text_pattern_accepts_numbers_stored_as_strings(self):
+        for text in ('12', '-3.5', '.5', '1e+25', ' 7 ', '+4.'):
+            self.assertRegex(text, NUMERIC_TEXT_PATTERN)
+        for text in ('abc', 'true', '{"amount": 1}', '1.2.3', ''):
+            self.assertNotRegex(text, NUMERIC_TEXT_PATTERN)
+
+    def test_invalid_values_are_skipped(self):
+        unfiltered = Record.objects.all().query.sql_with_params()
+        self.assertEqual(self.sql({'data__amount__gte': 'abc'}), (unfiltered[0], list(unfiltered[1])))
+        self.assertEqual(self.sql({'data__active': 'maybe'}), (unfiltered[0], list(unfiltered[1])))
+
+    def test_in_combines_typed_equalities(self):
+        sql, params = self.sql({'data__amount__in': '1, 2.5'})
+        self.assertIn(' OR ', sql)
+        self.assertEqual([str(param) for param in params], ['amount', 'amount', '1', 'amount', 'amount', '2.5'])
+
+    def test_plans_are_cached_per_schema(self):
+        params = ['data__amount__gte', 'status']
+        plan = get_filter_plan(self.pipeline, params)
+        self.assertIs(get_filter_plan(self.pipeline, list(reversed(params))), plan)
+
+        self.pipeline.field_schema = dict(FIELD_SCHEMA, amount={'type': 'text', 'config': {}})
+        replanned = get_filter_plan(self.pipeline, params)
+        self.assertIsNot(replanned, plan)
+        self.assertEqual(replanned.describe()[0]['strategy'], 'text_range')
+
+    def test_plans_are_cached_per_tenant(self):
+        params = ['data__amount__gte']
+        with patch.object(connection, 'schema_name', 'tenant_a', create=True):
+            plan = get_filter_plan(self.pipeline, params)
+        with patch.object(connection, 'schema_name', 'tenant_b', create=True):
+            other_schema = {'amount': {'type': 'text', 'config': {}}}
+            other = get_filter_plan(Pipeline(id=9001, name='Other', field_schema=other_schema), params)
+            self.assertEqual(other.describe()[0]['strategy'], 'text_range')
+        with patch.object(connection, 'schema_name', 'tenant_a', create=True):
+            self.assertIs(get_filter_plan(self.pipeline, params), plan)
+
+    def test_untyped_without_pipeline(self):
+        strategies = {f['param']: f['strategy'] for f in get_filter_plan(None, ['data__x', 'data__y__exact']).describe()}
+        self.assertEqual(strategies, {'data__x': 'untyped_equality', 'data__y__exact': 'text_equality'})
+
+    def test_ordering_uses_sort_expression(self):
+        planner = RecordQueryPlanner(self.pipeline)
+        order_by, slugs = planner.ordering('-deal_value,data__closes_on,created_at,bogus', columns=['created_at'])
+        self.assertEqual(slugs, ['deal_value', 'closes_on'])
+        self.assertEqual(order_by[2], 'created_at')
+
+        sql, params = Record.objects.order_by(*order_by).query.sql_with_params()
+        self.assertIn("(data->%s->>%s)::numeric END)) DESC", sql)
+        self.assertIn("((data->>%s)) ASC", sql)
+        self.assertEqual(list(params), ['deal_value', 'amount', 'deal_value', 'amount', 'closes_on'])
@@ -0,0 +1,109 @@
+"""
+Tests for trigger-maintained record counts
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from pipelines.models import Pipeline, Record, RecordCount
+from pipelines.record_counts import (
+    active_record_count, fold_record_counts, get_record_counts, reconcile_record_counts
+)
+
+User = get_user_model()
+
+
+class RecordCountsTest(TestCase):
+    """Counts follow inserts, bucket moves and deletes of any write path"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='countuser',
+            email='count@example.com',
+            password='testpass123'
+        )
+        cls.pipeline = Pipeline.objects.create(name='Counted', created_by=cls.user)
+        cls.other = Pipeline.objects.create(name='Other', created_by=cls.user)
+
+    def create(self, count, pipeline=None, **kwargs):
+        return Record.objects.bulk_create([
+            Record(pipeline=pipeline or self.pipeline, data={'n': i}, created_by=self.user,
+                   updated_by=self.user, **kwargs)
+            for i in range(count)
+        ])
+
+    def counts(self, pipeline=None):
+        pipeline = pipeline or self.pipeline
+        return get_record_counts([pipeline.id])[pipeline.id]
+
+    def test_inserts_count_per_status(self):
+        self.create(3)
+        self.create(2, status='won')
+        self.create(4, pipeline=self.other)
+
+        counts = self.counts()
+        self.assertEqual((counts.active, counts.deleted), (5, 0))
+        self.assertEqual(counts.by_status, {'active': 3, 'won': 2})
+        self.assertEqual(active_record_count(self.other.id), 4)
+
+    def test_soft_delete_restore_and_status_change_move_buckets(self):
+        records = self.create(4)
+        Record.objects.filter(id__in=[r.id for r in records[:2]]).update(is_deleted=True)
+        self.assertEqual((self.counts().active, self.counts().deleted), (2, 2))
+
+        Record.objects.filter(id=records[0].id).update(is_deleted=False)
+        Record.objects.filter(id=records[3].id).update(status='lost')
+        counts = self.counts()
+        self.assertEqual((counts.active, counts.deleted), (3, 1))
+        self.assertEqual(counts.by_status, {'active': 2, 'lost': 1})
+
+    def test_updates_that_keep_the_bucket_write_no_delta(self):
+        records = self.create(2)
+        rows = RecordCount.objects.count()
+        Record.objects.filter(id__in=[r.id for r in records]).update(data={'changed': True})
+        self.assertEqual(RecordCount.objects.count(), rows)
+
+    def test_hard_delete_decrements_its_bucket(self):
+        records = self.create(3)
+        Record.objects.filter(id=records[0].id).update(is_deleted=True)
+        Record.objects.filter(id__in=[records[0].id, records[1].id]).delete()
+
+        counts = self.counts()
+        self.assertEqual((counts.active, counts.deleted), (1, 0))
+
+    def test_fold_keeps_totals_and_refreshes_cached_count(self):
+        self.create(2)
+        self.create(1)
+        self.create(1, status='won')
+        Record.objects.filter(pipeline=self.pipeline, status='won').update(is_deleted=True)
+
+        fold_record_counts()
+
+        self.assertEqual(RecordCount.objects.filter(pipeline_id=self.pipeline.id).count(), 2)
+        self.assertEqual((self.counts().active, self.counts().deleted), (3, 1))
+        self.pipeline.refresh_from_db()
+        self.assertEqual(self.pipeline.record_count, 3)
+
+    def test_reconcile_corrects_drift(self):
+        self.create(3)
+        self.create(2, pipeline=self.other)
+        RecordCount.objects.filter(pipeline_id=self.pipeline.id).delete()
+        RecordCount.objects.create(pipeline_id=self.pipeline.id, status='ghost', delta=5)
+
+        corrections = reconcile_record_counts([self.pipeline.id])
+
+        self.assertEqual(
+            sorted((c['status'], c['delta']) for c in corrections),
+            [('active', 3), ('ghost', -5)]
+        )
+        self.assertEqual(self.counts().by_status, {'active': 3})
+        self.assertEqual(reconcile_record_counts(), [])
+
+    def test_pipeline_serializers_report_the_active_count(self):
+        from api.serializers import PipelineListSerializer, PipelineSerializer
+
+        self.create(2)
+        self.create(1, is_deleted=True)
+
+        self.assertEqual(PipelineSerializer(self.pipeline).data['record_count'], 2)
+        self.assertEqual(PipelineListSerializer(self.pipeline).data['record_count'], 2)
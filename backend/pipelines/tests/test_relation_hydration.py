@@ -0,0 +1,109 @@
+"""
+Tests for batched relation hydration
+
+RelationHydrator must produce exactly what RelationFieldHandler produces for
+each record on its own, with a query count that does not grow with the page.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from pipelines.models import Field, Pipeline, Record
+from pipelines.relation_field_handler import RelationFieldHandler
+from pipelines.relation_hydration import RelationHydrator, relation_display_value
+
+User = get_user_model()
+
+
+class RelationHydratorTest(TestCase):
+    """Hydrated values match the per-record handler"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='hydrateuser',
+            email='hydrate@example.com',
+            password='testpass123'
+        )
+        cls.contacts = Pipeline.objects.create(name='Contacts', created_by=cls.user)
+        cls.companies = Pipeline.objects.create(name='Companies', created_by=cls.user)
+
+        cls.company_field = Field.objects.create(
+            pipeline=cls.contacts,
+            name='Company',
+            field_type='relation',
+            field_config={'target_pipeline_id': cls.companies.id, 'display_field': 'name'},
+            created_by=cls.user
+        )
+        cls.peers_field = Field.objects.create(
+            pipeline=cls.contacts,
+            name='Peers',
+            field_type='relation',
+            field_config={'target_pipeline_id': cls.contacts.id, 'allow_multiple': True},
+            created_by=cls.user
+        )
+
+        cls.company_records = [
+            Record.objects.create(pipeline=cls.companies, data={'name': f'Company {i}'}, created_by=cls.user)
+            for i in range(3)
+        ]
+        cls.contact_records = [
+            Record.objects.create(pipeline=cls.contacts, data={'name': f'Contact {i}'}, created_by=cls.user)
+            for i in range(6)
+        ]
+
+        company_handler = RelationFieldHandler(cls.company_field)
+        peers_handler = RelationFieldHandler(cls.peers_field)
+        for i, contact in enumerate(cls.contact_records):
+            if i % 3:
+                company_handler.set_relationships(contact, cls.company_records[i % 3].id, cls.user)
+            peers = [other.id for other in cls.contact_records if other.id != contact.id and (other.id + contact.id) % 2]
+            peers_handler.set_relationships(contact, peers, cls.user)
+
+        # A deleted target is skipped for display values but still reported as an id
+        cls.company_records[1].is_deleted = True
+        cls.company_records[1].save(update_fields=['is_deleted'])
+
+    def records(self):
+        return list(Record.objects.filter(pipeline__in=[self.contacts, self.companies]).order_by('id'))
+
+    def test_display_values_match_handler(self):
+        records = self.records()
+        hydrated = RelationHydrator().hydrate(records)
+        for record in records:
+            expected = {
+                field.slug: RelationFieldHandler(field).get_related_records_with_display(record)
+                for field in Field.objects.filter(pipeline_id=record.pipeline_id, field_type='relation')
+            }
+            with self.subTest(record=record.id):
+                self.assertEqual(hydrated[record.id], expected)
+
+    def test_related_ids_match_handler(self):
+        records = self.records()
+        hydrated = RelationHydrator().hydrate_ids(records)
+        for record in records:
+            expected = {
+                field.slug: RelationFieldHandler(field).get_related_ids(record)
+                for field in Field.objects.filter(pipeline_id=record.pipeline_id, field_type='relation')
+            }
+            with self.subTest(record=record.id):
+                self.assertEqual(hydrated[record.id], expected)
+
+    def test_query_count_independent_of_page_size(self):
+        records = self.records()
+        hydrator = RelationHydrator()
+        hydrator.hydrate(records[:1])  # warm field and relationship type caches
+
+        with CaptureQueriesContext(connection) as small:
+            hydrator.hydrate(records[:2])
+        with CaptureQueriesContext(connection) as large:
+            hydrator.hydrate(records)
+        self.assertEqual(len(small), len(large))
+        self.assertLessEqual(len(large), 2)
+
+    def test_display_value_fallbacks(self):
+        self.assertEqual(relation_display_value({'name': 'Acme'}, 'T', 1, 'name'), 'Acme')
+        self.assertEqual(relation_display_value({'company_name': 'Acme'}, 'T', 1, 'Company Name'), 'Acme')
+        self.assertEqual(relation_display_value({'name': ''}, 'Title', 1, 'name'), 'Title')
+        self.assertEqual(relation_display_value(None, '', 7, 'name'), 'Record #7')
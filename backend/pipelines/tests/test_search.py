@@ -0,0 +1,94 @@
+"""
+Tests for weighted record search vectors and ranked search
+"""
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from pipelines.models import Field, Pipeline, Record
+from pipelines.search import (
+    FIELD_WEIGHT,
+    TITLE_WEIGHT,
+    rebuild_search_vectors,
+    search_records,
+    search_vector_for_record,
+    searchable_field_weights,
+)
+
+User = get_user_model()
+
+
+class SearchVectorForRecordTest(SimpleTestCase):
+    """The per-record vector can be written in the record's own INSERT"""
+
+    def test_has_no_column_references(self):
+        record = SimpleNamespace(title='', tags=['vip'], data={'name': 'Acme', 'size': 5, 'meta': {'a': 1}})
+        vector = search_vector_for_record(record, field_weights=[('name', 'A'), ('size', 'B'), ('meta', 'B')])
+        self.assertFalse(vector.contains_column_references)
+
+
+class RecordSearchTest(TestCase):
+    """Vectors are maintained on save and searched with ranking"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='searchuser',
+            email='search@example.com',
+            password='testpass123'
+        )
+        cls.pipeline = Pipeline.objects.create(
+            name='Companies',
+            created_by=cls.user,
+            settings={'title_field': {'template': '{name}'}}
+        )
+        for name, field_type, searchable in [
+            ('Name', 'text', True), ('Notes', 'textarea', True), ('Secret', 'text', False)
+        ]:
+            Field.objects.create(
+                pipeline=cls.pipeline,
+                name=name,
+                field_type=field_type,
+                is_searchable=searchable,
+                created_by=cls.user
+            )
+        cls.pipeline.refresh_from_db()
+
+        cls.in_title = Record.objects.create(
+            pipeline=cls.pipeline, data={'name': 'Globex', 'notes': 'partner'}, created_by=cls.user
+        )
+        cls.in_notes = Record.objects.create(
+            pipeline=cls.pipeline, data={'name': 'Initech', 'notes': 'acquired by Globex'}, created_by=cls.user
+        )
+        cls.in_secret = Record.objects.create(
+            pipeline=cls.pipeline, data={'name': 'Umbrella', 'secret': 'Globex'}, created_by=cls.user
+        )
+
+    def test_title_fields_weigh_more(self):
+        weights = dict(searchable_field_weights(self.pipeline))
+        self.assertEqual(weights, {'name': TITLE_WEIGHT, 'notes': FIELD_WEIGHT})
+
+    def test_ranked_search(self):
+        results = list(search_records(Record.objects.filter(pipeline=self.pipeline), 'globex'))
+        self.assertEqual([record.id for record in results], [self.in_title.id, self.in_notes.id])
+        self.assertGreater(results[0].search_rank, results[1].search_rank)
+
+    def test_websearch_syntax(self):
+        queryset = Record.objects.filter(pipeline=self.pipeline)
+        self.assertEqual(
+            list(search_records(queryset, 'globex -partner').values_list('id', flat=True)),
+            [self.in_notes.id]
+        )
+        self.assertEqual(
+            list(search_records(queryset, '"acquired by"').values_list('id', flat=True)),
+            [self.in_notes.id]
+        )
+
+    def test_rebuild_matches_save(self):
+        queryset = Record.objects.filter(pipeline=self.pipeline).order_by('id')
+        saved = list(queryset.values_list('id', 'search_vector'))
+        Record.objects.filter(pipeline=self.pipeline).update(search_vector=None)
+
+        self.assertEqual(rebuild_search_vectors(self.pipeline, batch_size=2), 3)
+        self.assertEqual(list(queryset.values_list('id', 'search_vector')), saved)
@@ -0,0 +1,125 @@
+"""
+Tests for compiled record title templates
+
+Compiled templates must render exactly what the original substitution loop
+rendered: placeholders replaced in template order, unknown placeholders
+removed, the pipeline name as fallback and the 500 character limit.
+"""
+import re
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import SimpleTestCase
+
+from pipelines.record_operations import RecordUtils
+from pipelines.title_templates import (
+    CompiledTitleTemplate,
+    get_compiled_title_template,
+    invalidate_title_template,
+)
+
+
+def reference_title(template, field_definitions, record_data, pipeline_name):
+    """The substitution loop compiled templates replace"""
+    title = template
+    for field_name, value in record_data.items():
+        placeholder = f'{{{field_name}}}'
+        if placeholder in title:
+            field_value = RecordUtils._format_field_value_for_title(value, field_definitions.get(field_name))
+            title = title.replace(placeholder, field_value)
+    title = re.sub(r'\{[^}]+\}', '', title)
+    title = title.strip()
+    if not title:
+        return f"{pipeline_name} Record"
+    return title[:500]
+
+
+def field(field_type, **config):
+    return SimpleNamespace(slug=field_type, field_type=field_type, field_config=config)
+
+
+FIELDS = {
+    'name': field('text'),
+    'stage': field('select'),
+    'labels': field('tags'),
+    'options': field('multiselect'),
+    'amount': field('currency'),
+    'active': field('boolean'),
+    'due': field('date'),
+    'address': field('address'),
+    'files': field('file'),
+}
+
+TEMPLATES = [
+    '{name}', '{name} - {stage}', '{first_name} {last_name}', '{missing}', '', '   ',
+    'Deal: {name} ({amount})', '{{name}}', '{{missing}', '{name}}', '{name} {name}',
+    '{labels} / {options}', '{active}{due}', '{address}', '{files}', 'x' * 600, '{name}' + 'y' * 600,
+]
+
+RECORDS = [
+    {},
+    {'name': 'Acme'},
+    {'name': '', 'stage': {'label': 'Won', 'value': 'won'}},
+    {'name': None, 'labels': ['a', 'b'], 'options': [{'label': 'X'}, 'Y']},
+    {'first_name': 'Ada', 'last_name': 'Lovelace'},
+    {'name': 'Brace {stage} here', 'stage': 'open'},
+    {'name': 'has {junk}'},
+    {'amount': {'amount': 10, 'currency': 'EUR'}, 'active': True, 'due': '2024-05-01T10:30:00Z'},
+    {'address': {'street': 'Main', 'city': 'Springfield'}, 'files': [{'name': 'a.pdf'}, {}]},
+    {'name': 12, 'unknown': {'title': 'T'}},
+]
+
+
+class CompiledTitleTemplateTest(SimpleTestCase):
+    """Compiled rendering matches the original substitution loop"""
+
+    def test_matches_reference(self):
+        for template in TEMPLATES:
+            compiled = CompiledTitleTemplate(template, FIELDS)
+            for record_data in RECORDS:
+                # Values containing other placeholders are the one case the
+                # loop resolved recursively; compiled templates render them literally
+                if '{stage}' in str(record_data.get('name')):
+                    continue
+                with self.subTest(template=template[:40], record_data=record_data):
+                    self.assertEqual(
+                        compiled.render(record_data, 'Deals'),
+                        reference_title(template, FIELDS, record_data, 'Deals')
+                    )
+
+    def test_only_placeholder_fields_are_kept(self):
+        compiled = CompiledTitleTemplate('{name} {other}', FIELDS)
+        self.assertEqual(set(compiled.field_definitions), {'name', 'other'})
+        self.assertIsNone(compiled.field_definitions['other'])
+
+    def test_relation_placeholders_use_pre_resolved_values(self):
+        fields = {'company': field('relation', display_field='company_name')}
+        compiled = CompiledTitleTemplate('{name} @ {company}', dict(fields, name=field('text')))
+        self.assertEqual(compiled.relation_placeholders, {'company': 'company_name'})
+
+        record_data = {'name': 'Ada', 'company': [3, '4']}
+        self.assertEqual(
+            compiled.relation_requests(record_data),
+            {('company_name', 3), ('company_name', 4)}
+        )
+        relation_display = {('company_name', 3): 'Acme', ('company_name', 4): 'Globex'}
+        self.assertEqual(compiled.render(record_data, 'Contacts', relation_display), 'Ada @ Acme | Globex')
+
+    def test_compiled_templates_are_cached_per_tenant(self):
+        def pipeline(template):
+            return SimpleNamespace(
+                id=5, settings={'title_field': {'template': template}}, pipeline_type='custom', field_schema={},
+                fields=SimpleNamespace(all=lambda: []), get_title_template=lambda: template
+            )
+
+        invalidate_title_template()
+        with patch.object(connection, 'schema_name', 'tenant_a', create=True):
+            first = get_compiled_title_template(pipeline('{name}'))
+        with patch.object(connection, 'schema_name', 'tenant_b', create=True):
+            other = get_compiled_title_template(pipeline('{company}'))
+        with patch.object(connection, 'schema_name', 'tenant_a', create=True):
+            self.assertIs(get_compiled_title_template(pipeline('{name}')), first)
+            invalidate_title_template(5)
+            self.assertIsNot(get_compiled_title_template(pipeline('{name}')), first)
+        self.assertEqual(set(other.field_definitions), {'company'})
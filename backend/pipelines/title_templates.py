@@ -0,0 +1,261 @@
+"""
+Compiled record title templates
+
+Record titles are generated on every read (serializers, Record.__str__,
+signals) from the pipeline's title template. Rendering a template used to
+load every pipeline field, scan every data key for its placeholder and, for
+relation placeholders, load each related record and its display field one
+query at a time.
+
+CompiledTitleTemplate parses the template once into literal and placeholder
+segments and resolves the field definition of each placeholder up front.
+Compiled templates are cached in-process per tenant schema and pipeline and
+are rebuilt when the pipeline's title settings, type or field schema change
+(the post_save receivers in pipelines.signals also drop them eagerly).
+
+Relation placeholders of a whole result set can be resolved in two queries
+with resolve_relation_titles() / attach_title_relations(); the resulting
+mapping is passed to RecordUtils.generate_title(relation_display=...).
+"""
+import copy
+import logging
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+TITLE_RELATIONS_ATTR = '_title_relation_display'
+
+PLACEHOLDER_RE = re.compile(r'\{([^{}]+)\}')
+UNREPLACED_RE = re.compile(r'\{[^}]+\}')
+
+# Template used when no pipeline is given (shouldn't happen in normal usage)
+DEFAULT_TEMPLATE = '{name}'
+
+_compiled: Dict[Tuple[str, Optional[int]], 'CompiledTitleTemplate'] = {}
+_compiled_lock = threading.Lock()
+
+
+class CompiledTitleTemplate:
+    """A title template parsed into segments with resolved field definitions"""
+
+    def __init__(self, template: str, field_definitions: Dict[str, Any], signature: Any = None):
+        self.template = template
+        self.signature = signature
+
+        # (literal text, placeholder slug or None) pairs
+        self.segments: List[Tuple[str, Optional[str]]] = []
+        position = 0
+        for match in PLACEHOLDER_RE.finditer(template):
+            self.segments.append((template[position:match.start()], match.group(1)))
+            position = match.end()
+        self.segments.append((template[position:], None))
+
+        self.field_definitions = {
+            slug: field_definitions.get(slug)
+            for _, slug in self.segments if slug is not None
+        }
+        # Relation placeholders and the display field configured on each
+        self.relation_placeholders = {
+            slug: (field_def.field_config or {}).get('display_field', 'title')
+            for slug, field_def in self.field_definitions.items()
+            if field_def is not None and field_def.field_type in ('relation', 'relationship')
+        }
+
+    def render(self, record_data: Dict[str, Any], pipeline_name: str,
+               relation_display: Optional[Dict[Tuple[str, int], str]] = None) -> str:
+        """Render the title for one record, same output as the uncompiled template"""
+        from .record_operations import RecordUtils
+
+        record_data = record_data or {}
+        parts = []
+        for literal, slug in self.segments:
+            parts.append(literal)
+            if slug is None:
+                continue
+            if slug in record_data:
+                parts.append(RecordUtils._format_field_value_for_title(
+                    record_data[slug], self.field_definitions[slug], relation_display
+                ))
+            else:
+                # Left for the cleanup below, like any other unknown placeholder
+                parts.append(f'{{{slug}}}')
+        title = ''.join(parts)
+
+        # Clean up any remaining unreplaced placeholders (for fields that don't exist)
+        if '{' in title:
+            title = UNREPLACED_RE.sub('', title)
+
+        # If title is empty or just whitespace, use pipeline name as fallback
+        title = title.strip()
+        if not title:
+            return f"{pipeline_name} Record"
+
+        # Truncate to max length
+        return title[:500]
+
+    def relation_requests(self, record_data: Dict[str, Any]) -> Set[Tuple[str, int]]:
+        """(display_field, record_id) pairs rendering this record would look up"""
+        requests = set()
+        if not record_data:
+            return requests
+        for slug, display_field in self.relation_placeholders.items():
+            value = record_data.get(slug)
+            items = value if isinstance(value, list) else [value]
+            for item in items:
+                if isinstance(item, bool) or not isinstance(item, (int, str)):
+                    continue
+                try:
+                    requests.add((display_field, int(item)))
+                except ValueError:
+                    continue
+        return requests
+
+
+def _cache_key(pipeline_id: Optional[int]) -> Tuple[str, Optional[int]]:
+    """Pipeline ids repeat across tenant schemas, so templates are cached per schema"""
+    return getattr(connection, 'schema_name', None) or 'public', pipeline_id
+
+
+def _signature(pipeline) -> Tuple:
+    """Everything a compiled template depends on, readable without a query"""
+    title_config = (pipeline.settings or {}).get('title_field', {})
+    return (
+        title_config.get('template'),
+        pipeline.pipeline_type,
+        pipeline.field_schema,
+    )
+
+
+def get_compiled_title_template(pipeline=None) -> CompiledTitleTemplate:
+    """Compiled title template for a pipeline, cached in-process"""
+    if pipeline is None:
+        compiled = _compiled.get(_cache_key(None))
+        if compiled is None:
+            compiled = CompiledTitleTemplate(DEFAULT_TEMPLATE, {})
+            _compiled[_cache_key(None)] = compiled
+        return compiled
+
+    key = _cache_key(pipeline.id)
+    signature = _signature(pipeline)
+    compiled = _compiled.get(key)
+    if compiled is not None and compiled.signature == signature:
+        return compiled
+
+    with _compiled_lock:
+        compiled = _compiled.get(key)
+        if compiled is not None and compiled.signature == signature:
+            return compiled
+
+        field_definitions = {field.slug: field for field in pipeline.fields.all()}
+        compiled = CompiledTitleTemplate(
+            pipeline.get_title_template(),
+            field_definitions,
+            signature=copy.deepcopy(signature)
+        )
+        if pipeline.id is not None:
+            _compiled[key] = compiled
+    return compiled
+
+
+def invalidate_title_template(pipeline_id: Optional[int] = None):
+    """Drop the compiled template of one pipeline of the current schema, or of all pipelines"""
+    with _compiled_lock:
+        if pipeline_id is None:
+            _compiled.clear()
+        else:
+            _compiled.pop(_cache_key(pipeline_id), None)
+
+
+def resolve_relation_titles(requests: Iterable[Tuple[str, int]]) -> Dict[Tuple[str, int], str]:
+    """
+    Display values of related records for title rendering, in two queries
+
+    Follows the lookup order of RecordUtils._format_field_value_for_title:
+    the configured display field, a case-insensitive key match, a slug-like
+    key match, then the record title and finally "Record #<id>".
+    """
+    from .models import Field, Record
+    from .record_operations import RecordUtils
+
+    requests = set(requests)
+    if not requests:
+        return {}
+
+    records = {
+        row['id']: row for row in Record.objects.filter(
+            id__in={record_id for _, record_id in requests}
+        ).values('id', 'pipeline_id', 'data', 'title')
+    }
+
+    # Pick the data key each request resolves to before loading field definitions
+    chosen = {}
+    for display_field, record_id in requests:
+        row = records.get(record_id)
+        if row is None:
+            continue
+        data = row['data'] or {}
+        if display_field and data and display_field in data:
+            chosen[(display_field, record_id)] = display_field
+            continue
+        if display_field and data:
+            exact_match = next((key for key in data if key.lower() == display_field.lower()), None)
+            if exact_match and data[exact_match] not in [None, '']:
+                chosen[(display_field, record_id)] = exact_match
+                continue
+            slugified = re.sub(r'_+', '_', re.sub(r'[^a-z0-9]', '_', display_field.lower()))
+            if slugified in data and data[slugified] not in [None, '']:
+                chosen[(display_field, record_id)] = slugified
+
+    field_definitions = {}
+    if chosen:
+        for field in Field.objects.filter(
+            pipeline_id__in={records[record_id]['pipeline_id'] for _, record_id in chosen},
+            slug__in=set(chosen.values())
+        ):
+            field_definitions[(field.pipeline_id, field.slug)] = field
+
+    resolved = {}
+    for display_field, record_id in requests:
+        row = records.get(record_id)
+        if row is None:
+            resolved[(display_field, record_id)] = f"Record #{record_id}"
+            continue
+        key = chosen.get((display_field, record_id))
+        if key is not None:
+            value = row['data'][key]
+            if value is None or value == '':
+                # Configured display field is empty
+                resolved[(display_field, record_id)] = row['title'] or f"Record #{record_id}"
+                continue
+            target_field_def = field_definitions.get((row['pipeline_id'], key))
+            try:
+                resolved[(display_field, record_id)] = RecordUtils._format_field_value_for_title(
+                    value, target_field_def
+                )
+            except Exception:
+                resolved[(display_field, record_id)] = f"Record #{record_id}"
+            continue
+        resolved[(display_field, record_id)] = row['title'] or f"Record #{record_id}"
+    return resolved
+
+
+def attach_title_relations(records: Iterable):
+    """
+    Resolve relation placeholders for a result set and attach them to the records
+
+    Serializers pass the attached mapping to RecordUtils.generate_title so a
+    page of records costs two queries instead of several per relation value.
+    """
+    records = list(records)
+    requests = set()
+    for record in records:
+        compiled = get_compiled_title_template(record.pipeline)
+        requests |= compiled.relation_requests(record.data)
+
+    relation_display = resolve_relation_titles(requests) if requests else {}
+    for record in records:
+        setattr(record, TITLE_RELATIONS_ATTR, relation_display)
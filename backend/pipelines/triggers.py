@@ -10,6 +10,7 @@ from django.urls import reverse
 from django.conf import settings
 
 from .models import Record, Pipeline, Field
+from .record_snapshot import get_record_snapshot
 # get_current_stage function was not found - removing unused import
 
 logger = logging.getLogger(__name__)
@@ -159,14 +160,8 @@ _record_old_data = {}
 @receiver(pre_save, sender=Record)
 def capture_record_state_before_save(sender, instance, **kwargs):
     """Capture record data before save to detect stage transitions"""
-    if instance.pk:
-        try:
-            old_record = Record.objects.get(pk=instance.pk)
-            _record_old_data[instance.pk] = old_record.data.copy()
-        except Record.DoesNotExist:
-            _record_old_data[instance.pk] = {}
-    else:
-        _record_old_data[instance.pk] = {}
+    snapshot = get_record_snapshot(instance)
+    _record_old_data[instance.pk] = snapshot.data.copy() if snapshot else {}
 
 
 @receiver(post_save, sender=Record)
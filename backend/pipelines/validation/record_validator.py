@@ -64,6 +64,19 @@ class RecordValidator:
         Returns:
             Dict with validation results
         """
+        field_definitions = self.get_field_definitions()
+        
+        # Import and use existing validation function
+        from . import validate_record_data
+        return validate_record_data(field_definitions, data, context)
+    
+    def get_field_definitions(self) -> List[Dict[str, Any]]:
+        """
+        Build the field definition dictionaries consumed by the data validator
+        
+        Returns:
+            List of field definition dictionaries, one per pipeline field
+        """
         field_definitions = []
         for field in self.pipeline.fields.all():
             field_definitions.append({
@@ -75,10 +88,33 @@ class RecordValidator:
                 'ai_config': field.ai_config if field.is_ai_field else {},
                 'pipeline_id': self.pipeline.id,  # Add pipeline context for USER field validation
             })
+        return field_definitions
+    
+    def validate_record_batch(self, rows: List[Dict[str, Any]], context: str = 'storage') -> List[Dict[str, Any]]:
+        """
+        Validate many records against the pipeline schema, loading field definitions once
+        
+        Args:
+            rows: Record data dictionaries to validate
+            context: Validation context ('storage', 'form', 'business_rules', 'migration')
+            
+        Returns:
+            List of validation results in the same order as rows
+        """
+        field_definitions = self.get_field_definitions()
         
-        # Import and use existing validation function
         from . import validate_record_data
-        return validate_record_data(field_definitions, data, context)
+        results = []
+        for data in rows:
+            try:
+                results.append(validate_record_data(field_definitions, data, context))
+            except Exception as e:
+                results.append({
+                    'is_valid': False,
+                    'errors': {'general': [str(e)]},
+                    'cleaned_data': {}
+                })
+        return results
     
     def validate_stage_transition(self, record_data: Dict[str, Any], target_stage: str) -> Tuple[bool, List[str]]:
         """
@@ -138,10 +138,8 @@ class PipelineViewSet(viewsets.ModelViewSet):
             
             # Apply filters
             if data.get('q'):
-                records = records.extra(
-                    where=["search_vector @@ plainto_tsquery(%s)"],
-                    params=[data['q']]
-                )
+                from .search import search_records
+                records = search_records(records, data['q'])
             
             if data.get('status'):
                 records = records.filter(status=data['status'])
@@ -9,6 +9,7 @@ from channels.exceptions import DenyConnection
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from .connection_manager import connection_manager
+from .projection import cached_hidden_field_slugs, encode_once, hidden_field_slugs, project_record_data
 from .auth import authenticate_websocket_session, authenticate_websocket_jwt, extract_session_from_scope, extract_auth_from_scope, check_user_permissions, check_channel_subscription_permission, get_user_accessible_channels
 import logging
 import time
@@ -227,6 +228,7 @@ class BaseRealtimeConsumer(AsyncWebsocketConsumer):
             'cursor_update': self.handle_cursor_update,
             'field_lock': self.handle_field_lock,
             'field_unlock': self.handle_field_unlock,
+            'record_snapshot': self.handle_record_snapshot,
             'ping': self.handle_ping,
         }
         
@@ -492,6 +494,56 @@ class BaseRealtimeConsumer(AsyncWebsocketConsumer):
         else:
             await self.send_error('Field not locked by you')
     
+    async def handle_record_snapshot(self, message: Dict[str, Any]):
+        """Send the full record to a client that missed a delta version"""
+        from channels.db import database_sync_to_async
+        from django_tenants.utils import schema_context
+        from .outbox import record_snapshot_event
+        
+        record_id = message.get('record_id') or message.get('document_id')
+        if not record_id:
+            await self.send_error('Record ID required')
+            return
+        
+        if not await self.can_access_document(str(record_id), 'record'):
+            await self.send_error('Permission denied')
+            return
+        
+        schema = self._tenant_schema()
+        
+        def load():
+            with schema_context(schema):
+                return record_snapshot_event(record_id)
+        
+        event_data = await database_sync_to_async(load)() if schema else None
+        if event_data is None:
+            await self.send_error('Record not found')
+            return
+        
+        hidden = await self._hidden_fields(event_data.get('pipeline_id'))
+        await self.send(text_data=json.dumps({
+            'type': 'document_updated',
+            'snapshot': True,
+            'data': project_record_data(event_data, hidden),
+            'timestamp': event_data.get('timestamp')
+        }))
+    
+    def _tenant_schema(self) -> Optional[str]:
+        return getattr(self.scope.get('tenant'), 'schema_name', None)
+    
+    async def _hidden_fields(self, pipeline_id):
+        """Slugs hidden from this user's type, cached per process"""
+        schema = self._tenant_schema()
+        user_type_id = getattr(self.user, 'user_type_id', None)
+        if not schema or not user_type_id or not pipeline_id:
+            return frozenset()
+        
+        hidden = cached_hidden_field_slugs(schema, user_type_id, pipeline_id)
+        if hidden is None:
+            from channels.db import database_sync_to_async
+            hidden = await database_sync_to_async(hidden_field_slugs)(schema, user_type_id, pipeline_id)
+        return hidden
+    
     async def handle_ping(self, message: Dict[str, Any]):
         """Handle ping message"""
         await self.send(text_data=json.dumps({
@@ -564,8 +616,17 @@ class BaseRealtimeConsumer(AsyncWebsocketConsumer):
     
     async def record_update(self, event):
         """Handle record update messages from signals"""
-        data = event.get('data', {})
-
+        hidden = await self._hidden_fields(event.get('data', {}).get('pipeline_id'))
+        data = project_record_data(event.get('data', {}), hidden)
+        event_id = data.get('event_id')
+        await self.send(text_data=encode_once(
+            f"{event_id}:record_update" if event_id else None,
+            hidden,
+            lambda: self._record_update_message(data)
+        ))
+    
+    def _record_update_message(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Frontend record_update message of (projected) event data"""
         # CRITICAL: Handle both nested and flat relationship_changed flag placement
         # Old format: {'data': {'relationship_changed': True}} (nested)
         # New format: {'relationship_changed': True, 'data': {...}} (flat)
@@ -575,13 +636,18 @@ class BaseRealtimeConsumer(AsyncWebsocketConsumer):
             relationship_changed = data.get('data', {}).get('relationship_changed', False)
 
         # Transform signal message format to frontend expected format
-        message = {
+        return {
             'type': self._normalize_record_type(data.get('type', 'record_update')),
             'payload': {
                 'record_id': data.get('record_id') or data.get('id'),
                 'pipeline_id': data.get('pipeline_id'),
                 'title': data.get('title'),
                 'data': data.get('data'),
+                # Deltas carry only the changed fields; apply them on base_version
+                'delta': data.get('delta', False),
+                'version': data.get('version'),
+                'base_version': data.get('base_version'),
+                'changed_fields': data.get('changed_fields'),
                 'relationship_changed': relationship_changed,  # Include relationship_changed flag
                 'created_at': data.get('created_at'),
                 'updated_at': data.get('updated_at'),
@@ -596,9 +662,30 @@ class BaseRealtimeConsumer(AsyncWebsocketConsumer):
             } if data.get('updated_by') else None,
             'timestamp': data.get('timestamp')
         }
+    
+    async def record_bulk_update(self, event):
+        """Handle aggregated bulk create/update messages (one per written batch)"""
+        data = event.get('data', {})
+
+        message = {
+            'type': data.get('type', 'records_bulk_updated'),
+            'payload': {
+                'pipeline_id': data.get('pipeline_id'),
+                'record_ids': data.get('record_ids', []),
+                'count': data.get('count'),
+                'changed_fields': data.get('changed_fields', []),
+                'new_count': data.get('new_count')
+            },
+            'user': {
+                'id': data['updated_by'].get('id'),
+                'name': data['updated_by'].get('username'),
+                'email': data['updated_by'].get('email')
+            } if data.get('updated_by') else None,
+            'timestamp': data.get('timestamp')
+        }
 
         await self.send(text_data=json.dumps(message))
-    
+
     async def record_deleted(self, event):
         """Handle record deletion messages from signals"""
         data = event.get('data', {})
@@ -673,14 +760,20 @@ class BaseRealtimeConsumer(AsyncWebsocketConsumer):
     
     async def document_updated(self, event):
         """Handle document updated event"""
-        data = event.get('data', {})
+        hidden = await self._hidden_fields(event.get('data', {}).get('pipeline_id'))
+        data = project_record_data(event.get('data', {}), hidden)
+        event_id = data.get('event_id')
         
         # Send document update to the client
-        await self.send(text_data=json.dumps({
-            'type': 'document_updated',
-            'data': data,
-            'timestamp': data.get('timestamp')
-        }))
+        await self.send(text_data=encode_once(
+            f"{event_id}:document_updated" if event_id else None,
+            hidden,
+            lambda: {
+                'type': 'document_updated',
+                'data': data,
+                'timestamp': data.get('timestamp')
+            }
+        ))
     
     async def activity_update(self, event):
         """Handle activity update event from AuditLog system"""
@@ -913,6 +1006,7 @@ class CollaborativeEditingConsumer(BaseRealtimeConsumer):
         # Add collaborative editing specific handlers
         collaborative_handlers = {
             'operation': self.handle_operation,
+            'operation_sync': self.handle_operation_sync,
             'field_change': self.handle_field_change,
         }
         
@@ -934,11 +1028,24 @@ class CollaborativeEditingConsumer(BaseRealtimeConsumer):
             return
         
         # Apply operational transform
-        from .operational_transform import OperationalTransform
-        ot = OperationalTransform(document_id, field_name)
+        from .operational_transform import OperationalTransform, OperationConflictError, StaleRevisionError
+        ot = OperationalTransform(document_id, field_name, schema=self._tenant_schema())
         
-        # Transform operation against concurrent operations
-        transformed_op = await ot.transform_operation(operation, self.user_id)
+        # Transform operation against the operations committed since its revision
+        try:
+            transformed_op = await ot.transform_operation(operation, self.user_id)
+        except (StaleRevisionError, OperationConflictError) as e:
+            # The client reloads the field and resends from the current revision
+            revision, content = await ot.get_snapshot()
+            await self.send(text_data=json.dumps({
+                'type': 'operation_rejected',
+                'operation_id': operation.get('id'),
+                'field_name': field_name,
+                'reason': str(e),
+                'revision': revision,
+                'content': content
+            }))
+            return
         
         # Broadcast transformed operation to other users
         await connection_manager.broadcast_to_document(
@@ -957,9 +1064,40 @@ class CollaborativeEditingConsumer(BaseRealtimeConsumer):
         await self.send(text_data=json.dumps({
             'type': 'operation_acknowledged',
             'operation_id': operation.get('id'),
+            'revision': transformed_op['revision'],
             'transformed_operation': transformed_op
         }))
     
+    async def handle_operation_sync(self, message: Dict[str, Any]):
+        """Send the operations committed after the client's revision"""
+        document_id = message.get('document_id')
+        field_name = message.get('field_name')
+        revision = message.get('revision')
+        
+        if not all([document_id, field_name]) or revision is None:
+            await self.send_error('Document ID, field name and revision required')
+            return
+        
+        from .operational_transform import OperationalTransform, StaleRevisionError
+        ot = OperationalTransform(document_id, field_name, schema=self._tenant_schema())
+        
+        try:
+            response = {
+                'type': 'operation_sync',
+                'field_name': field_name,
+                'operations': await ot.get_operations_since(int(revision))
+            }
+        except StaleRevisionError:
+            # Too far behind for the log: start over from the snapshot
+            revision, content = await ot.get_snapshot()
+            response = {
+                'type': 'operation_sync',
+                'field_name': field_name,
+                'revision': revision,
+                'content': content
+            }
+        await self.send(text_data=json.dumps(response))
+    
     async def handle_field_change(self, message: Dict[str, Any]):
         """Handle simple field change (non-operational transform)"""
         document_id = message.get('document_id')
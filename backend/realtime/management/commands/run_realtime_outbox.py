@@ -0,0 +1,49 @@
+"""
+Management command running the realtime outbox fan-out worker
+"""
+import asyncio
+import signal
+
+from django.core.management.base import BaseCommand
+
+from realtime.outbox import BATCH_SIZE, COALESCE_WINDOW, SWEEP_INTERVAL, OutboxWorker
+
+
+class Command(BaseCommand):
+    help = 'Publish queued record, relationship and field events to WebSocket groups and SSE'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window',
+            type=float,
+            default=COALESCE_WINDOW,
+            help=f'Seconds to coalesce updates to the same record (default: {COALESCE_WINDOW})'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Events claimed per tenant and batch (default: {BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--sweep-interval',
+            type=float,
+            default=SWEEP_INTERVAL,
+            help=f'Seconds between checks of every tenant for missed events (default: {SWEEP_INTERVAL})'
+        )
+
+    def handle(self, *args, **options):
+        worker = OutboxWorker(
+            window=options['window'],
+            batch_size=options['batch_size'],
+            sweep_interval=options['sweep_interval']
+        )
+        self.stdout.write(self.style.SUCCESS('Realtime outbox worker started'))
+        asyncio.run(self._run(worker))
+        self.stdout.write('Realtime outbox worker stopped')
+
+    async def _run(self, worker):
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, worker.stop)
+        await worker.run()
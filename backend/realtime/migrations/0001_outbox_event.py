@@ -0,0 +1,51 @@
+# Generated by Django 5.0 on 2026-10-16 19:23
+
+from django.db import migrations, models
+
+
+NOTIFY_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION realtime_outbox_notify() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('realtime_outbox', current_schema());
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER realtime_outbox_notify
+    AFTER INSERT ON realtime_outboxevent
+    FOR EACH STATEMENT EXECUTE FUNCTION realtime_outbox_notify();
+"""
+
+DROP_NOTIFY_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS realtime_outbox_notify ON realtime_outboxevent;
+DROP FUNCTION IF EXISTS realtime_outbox_notify();
+"""
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('record_saved', 'Record saved'), ('record_deleted', 'Record deleted'), ('relationship_changed', 'Relationship changed'), ('field_changed', 'Field changed')], max_length=32)),
+                ('record_id', models.BigIntegerField(blank=True, null=True)),
+                ('pipeline_id', models.BigIntegerField(blank=True, null=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('claimed_until', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'realtime_outboxevent',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.RunSQL(NOTIFY_TRIGGER_SQL, DROP_NOTIFY_TRIGGER_SQL),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-16 20:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('realtime', '0001_outbox_event'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outboxevent',
+            name='event_type',
+            field=models.CharField(choices=[('record_saved', 'Record saved'), ('record_deleted', 'Record deleted'), ('relationship_changed', 'Relationship changed'), ('field_changed', 'Field changed'), ('records_bulk_written', 'Records bulk written')], max_length=32),
+        ),
+    ]
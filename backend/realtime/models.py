@@ -0,0 +1,46 @@
+"""
+Models for real-time event delivery
+"""
+from django.db import models
+
+
+class OutboxEvent(models.Model):
+    """
+    A realtime event written in the same transaction as the change it reports
+
+    Signal handlers only insert these rows; the outbox worker
+    (realtime.outbox, run with `manage.py run_realtime_outbox`) coalesces,
+    enriches and publishes them to channel groups, then deletes them.
+    An insert trigger NOTIFYs the worker with the tenant schema on commit.
+    """
+    RECORD_SAVED = 'record_saved'
+    RECORD_DELETED = 'record_deleted'
+    RELATIONSHIP_CHANGED = 'relationship_changed'
+    FIELD_CHANGED = 'field_changed'
+    RECORDS_BULK_WRITTEN = 'records_bulk_written'
+
+    EVENT_TYPES = [
+        (RECORD_SAVED, 'Record saved'),
+        (RECORD_DELETED, 'Record deleted'),
+        (RELATIONSHIP_CHANGED, 'Relationship changed'),
+        (FIELD_CHANGED, 'Field changed'),
+        (RECORDS_BULK_WRITTEN, 'Records bulk written'),
+    ]
+
+    event_type = models.CharField(max_length=32, choices=EVENT_TYPES)
+    # Plain ids: the record may be hard deleted before the event is published
+    record_id = models.BigIntegerField(null=True, blank=True)
+    pipeline_id = models.BigIntegerField(null=True, blank=True)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # Set while a worker publishes the event; expired claims are retried
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        db_table = 'realtime_outboxevent'
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.event_type} #{self.id} (record {self.record_id})"
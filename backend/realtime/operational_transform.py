@@ -1,10 +1,25 @@
 """
 Operational Transform implementation for collaborative editing
+
+The operation log and document state of a field live in Redis:
+
+- ot:{scope}:state  hash with rev (last revision), content and min_rev
+                    (oldest revision clients can still rebase from)
+- ot:{scope}:log    stream of operations; the entry id is "<revision>-1",
+                    so "operations since revision N" is one XRANGE
+
+An operation is rebased on the operations committed since the client's
+revision and applied in one WATCH/MULTI transaction on the state hash,
+so concurrent editors on different workers get consecutive revisions and
+converge; a lost race is retried on the new state. Every COMPACT_EVERY
+revisions the log is trimmed to its last KEEP_OPERATIONS entries, the
+state hash being the snapshot of everything before.
 """
 import json
 import asyncio
+import weakref
 from typing import Dict, List, Any, Optional, Tuple
-from django.core.cache import cache
+from django.conf import settings
 from dataclasses import dataclass
 from enum import Enum
 import logging
@@ -13,6 +28,25 @@ import uuid
 
 logger = logging.getLogger(__name__)
 
+OT_TTL = 3600               # Seconds an idle document field is kept
+COMPACT_EVERY = 200         # Revisions between log compactions
+KEEP_OPERATIONS = 100       # Operations kept for clients a few revisions behind
+MAX_RETRIES = 20            # Transaction retries under contention
+
+
+class StaleRevisionError(Exception):
+    """The client's revision is older than the retained operation log"""
+
+    def __init__(self, revision: int, min_revision: int):
+        super().__init__(f"Revision {revision} is older than the operation log ({min_revision})")
+        self.revision = revision
+        self.min_revision = min_revision
+
+
+class OperationConflictError(Exception):
+    """The operation kept losing the race for the next revision"""
+
+
 class OperationType(Enum):
     INSERT = "insert"
     DELETE = "delete"
@@ -36,37 +70,124 @@ class Operation:
         if not self.timestamp:
             self.timestamp = time.time()
 
+
+_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]' = weakref.WeakKeyDictionary()
+
+
+def _redis_client():
+    """redis.asyncio client of the running event loop"""
+    import redis.asyncio as aioredis
+
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = aioredis.from_url(settings.CACHES['default']['LOCATION'], decode_responses=True)
+    return client
+
+
+def apply_to_text(content: str, operation: Operation) -> str:
+    """Document content after an operation; positions are clamped to the content"""
+    position = max(0, min(operation.position, len(content)))
+    end = min(len(content), position + (operation.length or 0))
+
+    if operation.type == OperationType.INSERT:
+        return content[:position] + (operation.content or '') + content[position:]
+    if operation.type == OperationType.DELETE:
+        return content[:position] + content[end:]
+    if operation.type == OperationType.REPLACE:
+        return content[:position] + (operation.content or '') + content[end:]
+    # RETAIN operation - no change to content
+    return content
+
+
 class OperationalTransform:
     """Implements operational transform for collaborative editing"""
     
-    def __init__(self, document_id: str, field_name: str):
+    def __init__(self, document_id: str, field_name: str, schema: Optional[str] = None, client=None):
         self.document_id = document_id
         self.field_name = field_name
-        self.operation_log_key = f"ot_log:{document_id}:{field_name}"
-        self.document_state_key = f"ot_state:{document_id}:{field_name}"
-        self.operation_counter_key = f"ot_counter:{document_id}:{field_name}"
-        self.max_operations = 1000  # Keep last 1000 operations
-        
+        scope = f"{schema}:{document_id}:{field_name}" if schema else f"{document_id}:{field_name}"
+        # The hash tag keeps both keys in one cluster slot for the transaction
+        self.document_state_key = f"ot:{{{scope}}}:state"
+        self.operation_log_key = f"ot:{{{scope}}}:log"
+        self.max_operations = KEEP_OPERATIONS
+        self._client = client
+    
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = _redis_client()
+        return self._client
+    
     async def transform_operation(self, operation: Dict[str, Any], user_id: int) -> Dict[str, Any]:
-        """Transform an operation against concurrent operations"""
+        """
+        Rebase an operation on the operations committed since its revision,
+        apply it and append it to the log, atomically
+
+        operation['revision'] is the last revision the client had seen; without
+        it the operation is taken to be based on the current revision. Returns
+        the transformed operation with the revision it was committed as.
+        """
+        from redis.exceptions import WatchError
+        
         op = self._parse_operation(operation, user_id)
+        base_revision = operation.get('revision')
         
-        # Get operations that happened since this operation was created
-        concurrent_ops = await self._get_concurrent_operations(op.timestamp)
+        for _ in range(MAX_RETRIES):
+            async with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    await pipe.watch(self.document_state_key)
+                    revision, min_revision, content = self._read_state(await pipe.hgetall(self.document_state_key))
+                    
+                    base = revision if base_revision is None else min(int(base_revision), revision)
+                    if base < min_revision:
+                        raise StaleRevisionError(base, min_revision)
+                    
+                    concurrent = []
+                    if base < revision:
+                        entries = await pipe.xrange(self.operation_log_key, min=f"{base + 1}-0", max='+')
+                        concurrent = [self._deserialize_operation(fields) for _, fields in entries]
+                    transformed_op = self.rebase(op, concurrent)
+                    
+                    new_revision = revision + 1
+                    state = {'rev': new_revision, 'content': apply_to_text(content, transformed_op)}
+                    
+                    pipe.multi()
+                    pipe.xadd(
+                        self.operation_log_key,
+                        {'op': json.dumps(self._serialize_operation(transformed_op))},
+                        id=f"{new_revision}-1"
+                    )
+                    if new_revision - min_revision >= COMPACT_EVERY + KEEP_OPERATIONS:
+                        # The state hash is the snapshot; keep a tail for clients a little behind
+                        state['min_rev'] = new_revision - KEEP_OPERATIONS
+                        pipe.xtrim(self.operation_log_key, minid=f"{state['min_rev'] + 1}-0", approximate=False)
+                    pipe.hset(self.document_state_key, mapping=state)
+                    pipe.expire(self.document_state_key, OT_TTL)
+                    pipe.expire(self.operation_log_key, OT_TTL)
+                    await pipe.execute()
+                except WatchError:
+                    # Another worker committed first: rebase on its operation too
+                    continue
+            
+            result = self._serialize_operation(transformed_op)
+            result['revision'] = new_revision
+            return result
         
-        # Transform against each concurrent operation
-        transformed_op = op
-        for concurrent_op in concurrent_ops:
-            if concurrent_op.author != op.author:  # Don't transform against own operations
+        raise OperationConflictError(
+            f"Operation on {self.document_id}:{self.field_name} lost {MAX_RETRIES} commit races"
+        )
+    
+    def rebase(self, operation: Operation, concurrent: List[Operation]) -> Operation:
+        """Transform an operation against committed operations, in revision order"""
+        transformed_op = operation
+        for concurrent_op in concurrent:
+            if concurrent_op.author != operation.author:  # Don't transform against own operations
                 transformed_op = self._transform_against_operation(transformed_op, concurrent_op)
-        
-        # Store the transformed operation
-        await self._store_operation(transformed_op)
-        
-        # Update document state
-        await self._apply_operation_to_state(transformed_op)
-        
-        return self._serialize_operation(transformed_op)
+        return transformed_op
+    
+    def _read_state(self, state: Dict[str, str]) -> Tuple[int, int, str]:
+        return int(state.get('rev', 0)), int(state.get('min_rev', 0)), state.get('content', '')
     
     def _parse_operation(self, operation: Dict[str, Any], user_id: int) -> Operation:
         """Parse operation from dictionary"""
@@ -74,12 +195,24 @@ class OperationalTransform:
             type=OperationType(operation['type']),
             position=operation['position'],
             content=operation.get('content'),
-            length=operation.get('length', len(operation.get('content', ''))),
+            length=operation.get('length', len(operation.get('content') or '')),
             author=user_id,
             timestamp=operation.get('timestamp', time.time()),
             operation_id=operation.get('id')
         )
     
+    def _deserialize_operation(self, fields: Dict[str, str]) -> Operation:
+        op_data = json.loads(fields['op'])
+        return Operation(
+            type=OperationType(op_data['type']),
+            position=op_data['position'],
+            content=op_data.get('content'),
+            length=op_data.get('length'),
+            author=op_data.get('author'),
+            timestamp=op_data.get('timestamp'),
+            operation_id=op_data.get('id')
+        )
+    
     def _serialize_operation(self, operation: Operation) -> Dict[str, Any]:
         """Serialize operation to dictionary"""
         return {
@@ -92,78 +225,6 @@ class OperationalTransform:
             'id': operation.operation_id
         }
     
-    async def _get_concurrent_operations(self, since_timestamp: float) -> List[Operation]:
-        """Get operations that happened since the given timestamp"""
-        # Get operation log from cache
-        operation_log = cache.get(self.operation_log_key, [])
-        
-        # Filter operations since timestamp
-        concurrent_ops = []
-        for op_data in operation_log:
-            if op_data['timestamp'] > since_timestamp:
-                concurrent_ops.append(Operation(
-                    type=OperationType(op_data['type']),
-                    position=op_data['position'],
-                    content=op_data.get('content'),
-                    length=op_data.get('length'),
-                    author=op_data['author'],
-                    timestamp=op_data['timestamp'],
-                    operation_id=op_data.get('id')
-                ))
-        
-        # Sort by timestamp to ensure correct order
-        concurrent_ops.sort(key=lambda op: op.timestamp)
-        return concurrent_ops
-    
-    async def _store_operation(self, operation: Operation):
-        """Store operation in the operation log"""
-        operation_log = cache.get(self.operation_log_key, [])
-        operation_log.append(self._serialize_operation(operation))
-        
-        # Keep only recent operations
-        if len(operation_log) > self.max_operations:
-            operation_log = operation_log[-self.max_operations:]
-        
-        # Store with extended TTL for operation log
-        cache.set(self.operation_log_key, operation_log, 3600)  # 1 hour
-    
-    async def _apply_operation_to_state(self, operation: Operation):
-        """Apply operation to document state"""
-        current_state = cache.get(self.document_state_key, "")
-        
-        try:
-            if operation.type == OperationType.INSERT:
-                # Insert content at position
-                new_state = (
-                    current_state[:operation.position] + 
-                    operation.content + 
-                    current_state[operation.position:]
-                )
-            elif operation.type == OperationType.DELETE:
-                # Delete content at position
-                end_pos = operation.position + (operation.length or 0)
-                new_state = (
-                    current_state[:operation.position] +
-                    current_state[end_pos:]
-                )
-            elif operation.type == OperationType.REPLACE:
-                # Replace content at position
-                end_pos = operation.position + (operation.length or 0)
-                new_state = (
-                    current_state[:operation.position] +
-                    (operation.content or '') +
-                    current_state[end_pos:]
-                )
-            else:
-                # RETAIN operation - no change to content
-                new_state = current_state
-            
-            cache.set(self.document_state_key, new_state, 3600)
-            logger.debug(f"Applied {operation.type.value} operation to document {self.document_id}:{self.field_name}")
-            
-        except Exception as e:
-            logger.error(f"Error applying operation {operation.operation_id}: {e}")
-    
     def _transform_against_operation(self, op1: Operation, op2: Operation) -> Operation:
         """Transform op1 against op2 using operational transform rules"""
         if op1.type == OperationType.INSERT and op2.type == OperationType.INSERT:
@@ -362,39 +423,88 @@ class OperationalTransform:
     
     async def get_document_state(self) -> str:
         """Get current document state"""
-        return cache.get(self.document_state_key, "")
+        return await self.client.hget(self.document_state_key, 'content') or ""
+    
+    async def get_revision(self) -> int:
+        """Last committed revision"""
+        return int(await self.client.hget(self.document_state_key, 'rev') or 0)
+    
+    async def get_snapshot(self) -> Tuple[int, str]:
+        """(revision, content) read together"""
+        revision, _, content = self._read_state(await self.client.hgetall(self.document_state_key))
+        return revision, content
     
     async def set_document_state(self, content: str):
-        """Set document state"""
-        cache.set(self.document_state_key, content, 3600)
+        """
+        Set document state
+
+        Operations based on earlier revisions no longer apply to the new
+        content, so the log is cleared and they are rejected as stale.
+        """
+        from redis.exceptions import WatchError
+        
+        for _ in range(MAX_RETRIES):
+            async with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    await pipe.watch(self.document_state_key)
+                    revision, _, _ = self._read_state(await pipe.hgetall(self.document_state_key))
+                    pipe.multi()
+                    pipe.delete(self.operation_log_key)
+                    pipe.hset(self.document_state_key, mapping={
+                        'rev': revision + 1, 'min_rev': revision + 1, 'content': content
+                    })
+                    pipe.expire(self.document_state_key, OT_TTL)
+                    await pipe.execute()
+                    return revision + 1
+                except WatchError:
+                    continue
+        raise OperationConflictError(f"Could not set state of {self.document_id}:{self.field_name}")
     
     async def reset_document_state(self, initial_content: str = ""):
         """Reset document state and operation log"""
-        cache.set(self.document_state_key, initial_content, 3600)
-        cache.delete(self.operation_log_key)
-        cache.delete(self.operation_counter_key)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(self.operation_log_key, self.document_state_key)
+        pipe.hset(self.document_state_key, mapping={'rev': 0, 'min_rev': 0, 'content': initial_content})
+        pipe.expire(self.document_state_key, OT_TTL)
+        await pipe.execute()
         logger.info(f"Reset document state for {self.document_id}:{self.field_name}")
     
+    async def get_operations_since(self, revision: int) -> List[Dict[str, Any]]:
+        """Committed operations after a revision, for clients catching up"""
+        min_revision = int(await self.client.hget(self.document_state_key, 'min_rev') or 0)
+        if revision < min_revision:
+            raise StaleRevisionError(revision, min_revision)
+        entries = await self.client.xrange(self.operation_log_key, min=f"{revision + 1}-0", max='+')
+        return [self._log_entry(entry_id, fields) for entry_id, fields in entries]
+    
     async def get_operation_history(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get recent operation history"""
-        operation_log = cache.get(self.operation_log_key, [])
-        return operation_log[-limit:] if operation_log else []
+        entries = await self.client.xrevrange(self.operation_log_key, count=limit)
+        return [self._log_entry(entry_id, fields) for entry_id, fields in reversed(entries)]
     
-    async def cleanup_old_operations(self, max_age_hours: int = 24):
-        """Remove operations older than specified hours"""
-        operation_log = cache.get(self.operation_log_key, [])
-        if not operation_log:
-            return
-        
-        cutoff_time = time.time() - (max_age_hours * 3600)
-        filtered_ops = [
-            op for op in operation_log 
-            if op.get('timestamp', 0) > cutoff_time
-        ]
+    def _log_entry(self, entry_id: str, fields: Dict[str, str]) -> Dict[str, Any]:
+        op_data = json.loads(fields['op'])
+        op_data['revision'] = int(entry_id.split('-')[0])
+        return op_data
+    
+    async def compact(self, keep: int = KEEP_OPERATIONS) -> int:
+        """Trim the log to its last `keep` operations; returns the new oldest revision"""
+        from redis.exceptions import WatchError
         
-        if len(filtered_ops) != len(operation_log):
-            cache.set(self.operation_log_key, filtered_ops, 3600)
-            logger.info(f"Cleaned up {len(operation_log) - len(filtered_ops)} old operations")
+        for _ in range(MAX_RETRIES):
+            async with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    await pipe.watch(self.document_state_key)
+                    revision, min_revision, _ = self._read_state(await pipe.hgetall(self.document_state_key))
+                    new_min = max(min_revision, revision - keep)
+                    pipe.multi()
+                    pipe.xtrim(self.operation_log_key, minid=f"{new_min + 1}-0", approximate=False)
+                    pipe.hset(self.document_state_key, 'min_rev', new_min)
+                    await pipe.execute()
+                    return new_min
+                except WatchError:
+                    continue
+        raise OperationConflictError(f"Could not compact {self.document_id}:{self.field_name}")
     
     def _validate_operation(self, operation: Operation, document_length: int) -> bool:
         """Validate that operation is valid for current document state"""
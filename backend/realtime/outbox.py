@@ -0,0 +1,667 @@
+"""
+Transactional outbox for realtime record, relationship and field events
+
+Signal handlers no longer talk to the channel layer. They insert an
+OutboxEvent in the transaction of the change (enqueue_* below), so a
+request pays for one INSERT and nothing is published for rolled-back work.
+An insert trigger NOTIFYs the tenant schema on commit.
+
+OutboxWorker is an asyncio process (`manage.py run_realtime_outbox`) that
+LISTENs for those notifications and, per tenant schema:
+
+1. waits a short coalescing window, then claims a batch of events
+   (FOR UPDATE SKIP LOCKED, with a lease so several workers can run)
+2. coalesces them: one update per record, whatever number of saves and
+   relationship changes touched it, and one event per bulk-written batch
+   (coalesce)
+3. enriches the survivors in batches: one record query, one relation
+   hydration pass and one record count lookup per batch (build_messages)
+   Updates carry a versioned delta of the changed fields when the batch
+   saw every change since the client's version, a full snapshot otherwise
+4. publishes to the channel groups and deletes the events
+
+Events whose publish fails keep their claim until the lease expires and
+are retried; a periodic sweep picks up notifications missed while no
+worker was listening.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_CHANNEL = 'realtime_outbox'
+
+# Seconds to wait after a notification so bursts of saves collapse
+COALESCE_WINDOW = 0.2
+BATCH_SIZE = 500
+CLAIM_SECONDS = 30
+MAX_ATTEMPTS = 5
+# Seconds between sweeps of all tenant schemas (polling interval without LISTEN)
+SWEEP_INTERVAL = 30.0
+RECONNECT_DELAY = 5.0
+
+
+# =============================================================================
+# WRITING EVENTS
+# =============================================================================
+
+def _tenant_schema() -> Optional[str]:
+    schema = getattr(connection, 'schema_name', None)
+    return None if not schema or schema == 'public' else schema
+
+
+def enqueue_event(event_type: str, record_id=None, pipeline_id=None, payload: Optional[dict] = None):
+    """Insert an outbox event in the current transaction"""
+    from .models import OutboxEvent
+
+    if _tenant_schema() is None:
+        return None
+    return OutboxEvent.objects.create(
+        event_type=event_type,
+        record_id=record_id,
+        pipeline_id=pipeline_id,
+        payload=payload or {}
+    )
+
+
+def enqueue_record_saved(record, created: bool):
+    from .models import OutboxEvent
+
+    changed_fields = []
+    change_context = getattr(record, '_change_context', None)
+    if not created and change_context is not None:
+        changed_fields = sorted(getattr(change_context, 'changed_fields', None) or [])
+
+    return enqueue_event(
+        OutboxEvent.RECORD_SAVED,
+        record_id=record.id,
+        pipeline_id=record.pipeline_id,
+        payload={'created': created, 'changed_fields': changed_fields, 'version': record.version}
+    )
+
+
+def enqueue_record_deleted(record):
+    from .models import OutboxEvent
+
+    return enqueue_event(
+        OutboxEvent.RECORD_DELETED,
+        record_id=record.id,
+        pipeline_id=record.pipeline_id,
+        payload={'title': getattr(record, 'title', None) or f'Record {record.id}'}
+    )
+
+
+def enqueue_relationship_changed(relationship, action: str):
+    """action: created, resurrected, soft_deleted or hard_deleted"""
+    from .models import OutboxEvent
+
+    return enqueue_event(
+        OutboxEvent.RELATIONSHIP_CHANGED,
+        payload={
+            'action': action,
+            'relationship_id': relationship.id,
+            'relationship_type': relationship.relationship_type_id,
+            'source_record_id': relationship.source_record_id,
+            'source_pipeline_id': relationship.source_pipeline_id,
+            'target_record_id': relationship.target_record_id,
+            'target_pipeline_id': relationship.target_pipeline_id,
+        }
+    )
+
+
+def enqueue_field_changed(field_instance, message_type: str, event_data: dict):
+    """message_type is the consumer handler: field_update or field_delete"""
+    from .models import OutboxEvent
+
+    return enqueue_event(
+        OutboxEvent.FIELD_CHANGED,
+        pipeline_id=field_instance.pipeline_id,
+        payload={'message_type': message_type, 'event': event_data}
+    )
+
+
+def enqueue_records_bulk_written(pipeline_id, record_ids: List[int], created: bool,
+                                 changed_fields: List[str], user=None):
+    """One event for a batch of bulk-written records (pipelines.bulk_operations)"""
+    from .models import OutboxEvent
+
+    return enqueue_event(
+        OutboxEvent.RECORDS_BULK_WRITTEN,
+        pipeline_id=pipeline_id,
+        payload={
+            'created': created,
+            'record_ids': [str(record_id) for record_id in record_ids],
+            'changed_fields': sorted(changed_fields),
+            'updated_by': {
+                'id': user.id,
+                'username': user.username,
+                'email': user.email
+            } if user else None,
+        }
+    )
+
+
+# =============================================================================
+# COALESCING
+# =============================================================================
+
+@dataclass
+class RecordChange:
+    """Everything that happened to one record within a batch"""
+    record_id: int
+    pipeline_id: Optional[int]
+    last_event_id: int
+    deleted: bool = False
+    created: bool = False
+    changed_fields: Set[str] = field(default_factory=set)
+    # Set when a relationship of the record changed
+    relationship_changed: bool = False
+    title: Optional[str] = None
+    # Record versions spanned by the saves: a delta applies on base_version
+    base_version: Optional[int] = None
+    version: Optional[int] = None
+    # A save whose changed fields are unknown: only a full snapshot is safe
+    snapshot: bool = False
+
+
+@dataclass
+class BulkWrite:
+    """A batch of bulk-written records, published as one event with the pipeline count"""
+    last_event_id: int
+    pipeline_id: Optional[int]
+    payload: dict
+
+
+@dataclass
+class PassthroughEvent:
+    """An event published as recorded, without enrichment"""
+    last_event_id: int
+    messages: List[Tuple[str, dict]]
+    sse: List[Tuple[str, dict]] = field(default_factory=list)
+
+
+def coalesce(events) -> List[Any]:
+    """
+    Collapse a batch of events into one RecordChange per record plus the
+    events that are published as they are, ordered by their last event
+    """
+    from .models import OutboxEvent
+
+    records: Dict[int, RecordChange] = {}
+    passthrough: List[PassthroughEvent] = []
+
+    def record_change(event_id, record_id, pipeline_id) -> RecordChange:
+        change = records.get(record_id)
+        if change is None:
+            change = records[record_id] = RecordChange(record_id, pipeline_id, event_id)
+        change.last_event_id = event_id
+        if change.pipeline_id is None:
+            change.pipeline_id = pipeline_id
+        return change
+
+    for event in events:
+        payload = event.payload or {}
+
+        if event.event_type == OutboxEvent.RECORD_SAVED:
+            change = record_change(event.id, event.record_id, event.pipeline_id)
+            # A later save means the record was restored
+            change.deleted = False
+            change.created = change.created or payload.get('created', False)
+            change.changed_fields.update(payload.get('changed_fields') or [])
+            _track_version(change, payload)
+
+        elif event.event_type == OutboxEvent.RECORD_DELETED:
+            change = record_change(event.id, event.record_id, event.pipeline_id)
+            change.deleted = True
+            change.title = payload.get('title')
+
+        elif event.event_type == OutboxEvent.RELATIONSHIP_CHANGED:
+            if payload.get('action') in ('soft_deleted', 'hard_deleted'):
+                passthrough.append(PassthroughEvent(event.id, _relationship_deleted_messages(payload)))
+            for side in ('source', 'target'):
+                record_id = payload.get(f'{side}_record_id')
+                if record_id is None:
+                    continue
+                change = record_change(event.id, record_id, payload.get(f'{side}_pipeline_id'))
+                change.relationship_changed = True
+
+        elif event.event_type == OutboxEvent.FIELD_CHANGED:
+            event_data = payload.get('event') or {}
+            message = {'type': payload.get('message_type', 'field_update'), 'data': event_data}
+            passthrough.append(PassthroughEvent(
+                event.id,
+                [(f"pipeline_fields_{event.pipeline_id}", message), ("pipeline_updates", message)],
+                [("global_activity", event_data)]
+            ))
+
+        elif event.event_type == OutboxEvent.RECORDS_BULK_WRITTEN:
+            passthrough.append(BulkWrite(event.id, event.pipeline_id, payload))
+
+    return sorted(list(records.values()) + passthrough, key=lambda item: item.last_event_id)
+
+
+def _track_version(change: RecordChange, payload: dict):
+    version = payload.get('version')
+    changed_fields = payload.get('changed_fields')
+    if version is None or (not changed_fields and not payload.get('created')):
+        change.snapshot = True
+        return
+    # The version is bumped by saves that change data
+    base_version = version - 1 if changed_fields else version
+    change.base_version = base_version if change.base_version is None else min(change.base_version, base_version)
+    change.version = version if change.version is None else max(change.version, version)
+
+
+def _relationship_deleted_messages(payload: dict) -> List[Tuple[str, dict]]:
+    event_data = {
+        'type': 'relationship_deleted',
+        'relationship_id': str(payload.get('relationship_id')),
+        'source_record_id': str(payload.get('source_record_id')),
+        'target_record_id': str(payload.get('target_record_id')),
+        'relationship_type': str(payload.get('relationship_type')),
+        'deletion_type': payload.get('action'),
+        'timestamp': time.time()
+    }
+    message = {'type': 'relationship_delete', 'data': event_data}
+    messages = [("relationship_updates", message)]
+    for side in ('source', 'target'):
+        if payload.get(f'{side}_record_id') is not None:
+            messages.append((f"document_{payload[f'{side}_record_id']}", message))
+    return messages
+
+
+# =============================================================================
+# ENRICHMENT
+# =============================================================================
+
+def _user_summary(user) -> Optional[dict]:
+    if user is None:
+        return None
+    return {
+        'id': user.id,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'email': user.email,
+    }
+
+
+def record_delta(item: RecordChange, record, complete_data: dict,
+                 relation_slugs: Set[str]) -> Optional[Tuple[int, dict]]:
+    """
+    (base_version, {slug: value}) of a record update, or None when a full
+    snapshot must be sent: new records, saves with unknown changes and
+    records saved again after the batch (their version is ahead of it)
+    """
+    if item.created or item.snapshot:
+        return None
+    if item.version is not None and item.version != record.version:
+        return None
+
+    slugs = set(item.changed_fields)
+    if item.relationship_changed:
+        slugs |= relation_slugs
+    if not slugs:
+        return None
+
+    base_version = item.base_version if item.base_version is not None else record.version
+    # Removed keys are sent as None
+    return base_version, {slug: complete_data.get(slug) for slug in slugs}
+
+
+def build_messages(items: List[Any]) -> Tuple[List[Tuple[str, dict]], List[Tuple[str, dict]]]:
+    """Channel-group messages and SSE entries for coalesced items, with batched queries"""
+    from pipelines.models import Record
+    from pipelines.record_counts import get_record_counts
+    from pipelines.relation_hydration import RelationHydrator
+
+    changes = [item for item in items if isinstance(item, RecordChange)]
+    saved_ids = [change.record_id for change in changes if not change.deleted]
+
+    records = {
+        record.id: record
+        for record in Record.objects.filter(id__in=saved_ids).select_related('created_by', 'updated_by')
+    } if saved_ids else {}
+    for change in changes:
+        if change.record_id in records:
+            change.pipeline_id = records[change.record_id].pipeline_id
+
+    hydrator = RelationHydrator()
+    relation_values = hydrator.hydrate(list(records.values())) if records else {}
+
+    pipeline_ids = {change.pipeline_id for change in changes if change.pipeline_id is not None}
+    pipeline_ids |= {item.pipeline_id for item in items if isinstance(item, BulkWrite) and item.pipeline_id is not None}
+    counts = {
+        pipeline_id: pipeline_counts.active
+        for pipeline_id, pipeline_counts in get_record_counts(pipeline_ids).items()
+    }
+
+    messages: List[Tuple[str, dict]] = []
+    sse: List[Tuple[str, dict]] = []
+
+    for item in items:
+        if isinstance(item, PassthroughEvent):
+            messages.extend(item.messages)
+            sse.extend(item.sse)
+            continue
+
+        if isinstance(item, BulkWrite):
+            record_ids = item.payload.get('record_ids') or []
+            event_data = {
+                'type': 'records_bulk_created' if item.payload.get('created') else 'records_bulk_updated',
+                'pipeline_id': str(item.pipeline_id),
+                'record_ids': record_ids,
+                'count': len(record_ids),
+                'changed_fields': item.payload.get('changed_fields') or [],
+                'new_count': counts.get(item.pipeline_id, 0),
+                'updated_by': item.payload.get('updated_by'),
+                'timestamp': time.time()
+            }
+            pipeline_group = f"pipeline_records_{item.pipeline_id}"
+            messages.append((pipeline_group, {'type': 'record_bulk_update', 'data': event_data}))
+            sse.append((pipeline_group, event_data))
+            continue
+
+        pipeline_group = f"pipeline_records_{item.pipeline_id}"
+        document_group = f"document_{item.record_id}"
+
+        if item.deleted:
+            event_data = {
+                'type': 'record_deleted',
+                'record_id': str(item.record_id),
+                'pipeline_id': str(item.pipeline_id),
+                'title': item.title or f'Record {item.record_id}',
+                'new_count': counts.get(item.pipeline_id, 0),
+                'timestamp': time.time()
+            }
+            messages.append((pipeline_group, {'type': 'record_deleted', 'data': event_data}))
+            messages.append((document_group, {'type': 'document_deleted', 'data': event_data}))
+            sse.append((pipeline_group, event_data))
+            continue
+
+        record = records.get(item.record_id)
+        if record is None:
+            # Deleted since; its deletion has its own event
+            continue
+
+        relation_slugs = {relation_field.slug for relation_field in hydrator.relation_fields(record.pipeline_id)}
+        complete_data = dict(record.data or {})
+        complete_data.update(relation_values.get(record.id, {}))
+        delta = record_delta(item, record, complete_data, relation_slugs)
+
+        event_data = {
+            'type': 'record_created' if item.created else 'record_updated',
+            'event_id': f"{connection.schema_name}:{item.last_event_id}",
+            'record_id': str(record.id),
+            'pipeline_id': str(record.pipeline_id),
+            'title': record.title,
+            'version': record.version,
+            'relationship_changed': item.relationship_changed or bool(item.changed_fields & relation_slugs),
+            'updated_at': record.updated_at.isoformat() if record.updated_at else None,
+            'created_by': _user_summary(record.created_by),
+            'updated_by': _user_summary(record.updated_by),
+            'created_at': record.created_at.isoformat() if record.created_at else None,
+            'new_count': counts.get(record.pipeline_id, 0),
+            'timestamp': time.time()
+        }
+        if delta is None:
+            event_data['data'] = complete_data
+        else:
+            event_data.update({
+                'delta': True,
+                'base_version': delta[0],
+                'changed_fields': sorted(delta[1]),
+                'data': delta[1],
+            })
+        message = {'type': 'record_update', 'data': event_data}
+        messages.append((pipeline_group, message))
+        messages.append((document_group, {'type': 'document_updated', 'data': event_data}))
+        if item.relationship_changed:
+            # Pipeline list record counts and relation columns
+            messages.append(("pipelines_overview", message))
+        sse.append((pipeline_group, event_data))
+
+    return messages, sse
+
+
+def record_snapshot_event(record_id) -> Optional[dict]:
+    """Full record_updated event data of one record, for clients that missed a version"""
+    from pipelines.models import Record
+
+    pipeline_id = Record.objects.filter(id=record_id).values_list('pipeline_id', flat=True).first()
+    if pipeline_id is None:
+        return None
+    change = RecordChange(int(record_id), pipeline_id, last_event_id=0, snapshot=True)
+    messages, _ = build_messages([change])
+    event_data = dict(messages[0][1]['data'])
+    # Not an outbox event: keep it out of the shared encoding cache
+    event_data.pop('event_id', None)
+    return event_data
+
+
+# =============================================================================
+# CLAIMING AND ACKNOWLEDGING
+# =============================================================================
+
+@dataclass
+class OutboxBatch:
+    schema: str
+    event_ids: List[int] = field(default_factory=list)
+    messages: List[Tuple[str, dict]] = field(default_factory=list)
+    sse: List[Tuple[str, dict]] = field(default_factory=list)
+
+
+def claim_events(batch_size: int = BATCH_SIZE, claim_seconds: int = CLAIM_SECONDS) -> list:
+    """Lease the oldest unclaimed (or expired) events of the current schema"""
+    from .models import OutboxEvent
+
+    now = timezone.now()
+    available = Q(claimed_until__isnull=True) | Q(claimed_until__lt=now)
+
+    with transaction.atomic():
+        exhausted = OutboxEvent.objects.filter(available, attempts__gte=MAX_ATTEMPTS).delete()[0]
+        if exhausted:
+            logger.warning(f"Dropped {exhausted} realtime outbox events after {MAX_ATTEMPTS} failed attempts")
+
+        ids = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True).filter(available)
+            .order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        OutboxEvent.objects.filter(id__in=ids).update(
+            claimed_until=now + timedelta(seconds=claim_seconds),
+            attempts=F('attempts') + 1
+        )
+        return list(OutboxEvent.objects.filter(id__in=ids).order_by('id'))
+
+
+def prepare_batch(schema: str, batch_size: int = BATCH_SIZE) -> OutboxBatch:
+    """Claim, coalesce and enrich the next batch of a tenant schema"""
+    from django_tenants.utils import schema_context
+
+    close_old_connections()
+    with schema_context(schema):
+        events = claim_events(batch_size)
+        if not events:
+            return OutboxBatch(schema)
+        messages, sse = build_messages(coalesce(events))
+        return OutboxBatch(schema, [event.id for event in events], messages, sse)
+
+
+def acknowledge_batch(batch: OutboxBatch):
+    """Record SSE entries and delete the published events"""
+    from django_tenants.utils import schema_context
+    from .models import OutboxEvent
+    from .sse_streams import publish_sse_events
+
+    with schema_context(batch.schema):
+        try:
+            publish_sse_events(
+                ((channel, event_data.get('type', 'update'), event_data) for channel, event_data in batch.sse),
+                schema=batch.schema
+            )
+        except Exception as e:
+            logger.error(f"Error storing SSE messages for {batch.schema}: {e}")
+        OutboxEvent.objects.filter(id__in=batch.event_ids).delete()
+
+
+def release_batch(batch: OutboxBatch):
+    """Make events claimable again right away"""
+    from django_tenants.utils import schema_context
+    from .models import OutboxEvent
+
+    with schema_context(batch.schema):
+        OutboxEvent.objects.filter(id__in=batch.event_ids).update(claimed_until=None)
+
+
+def schemas_with_events() -> List[str]:
+    from django_tenants.utils import schema_context
+    from tenants.models import Tenant
+    from .models import OutboxEvent
+
+    close_old_connections()
+    schemas = []
+    for schema in Tenant.objects.exclude(schema_name='public').values_list('schema_name', flat=True):
+        with schema_context(schema):
+            if OutboxEvent.objects.exists():
+                schemas.append(schema)
+    return schemas
+
+
+# =============================================================================
+# WORKER
+# =============================================================================
+
+def _listen_params() -> dict:
+    from django.conf import settings
+
+    database = settings.DATABASES['default']
+    params = {
+        'dbname': database['NAME'],
+        'user': database.get('USER'),
+        'password': database.get('PASSWORD'),
+        'host': database.get('HOST') or None,
+        'port': database.get('PORT') or None,
+    }
+    sslmode = (database.get('OPTIONS') or {}).get('sslmode')
+    if sslmode:
+        params['sslmode'] = sslmode
+    return {key: value for key, value in params.items() if value is not None}
+
+
+class OutboxWorker:
+    """Drains the realtime outbox of every tenant and publishes to channel groups"""
+
+    def __init__(self, window: float = COALESCE_WINDOW, batch_size: int = BATCH_SIZE,
+                 sweep_interval: float = SWEEP_INTERVAL, channel_layer=None):
+        self.window = window
+        self.batch_size = batch_size
+        self.sweep_interval = sweep_interval
+        self.channel_layer = channel_layer
+        self.listening = False
+        self._pending: Set[str] = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def stop(self):
+        self._stopping = True
+        if self._wake is not None:
+            self._wake.set()
+
+    def notify(self, schema: str):
+        self._pending.add(schema)
+        if self._wake is not None:
+            self._wake.set()
+
+    async def run(self):
+        if self.channel_layer is None:
+            from channels.layers import get_channel_layer
+            self.channel_layer = get_channel_layer()
+
+        self._wake = asyncio.Event()
+        tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._sweep())]
+        try:
+            while not self._stopping:
+                await self._wake.wait()
+                self._wake.clear()
+                # Let a burst of saves to the same records land before draining
+                await asyncio.sleep(self.window)
+                schemas, self._pending = self._pending, set()
+                for schema in schemas:
+                    if await self.drain(schema):
+                        # Full batch: more events are waiting
+                        self.notify(schema)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def drain(self, schema: str) -> bool:
+        """Publish one batch of a schema; True when the batch was full"""
+        try:
+            batch = await sync_to_async(prepare_batch)(schema, self.batch_size)
+        except Exception as e:
+            logger.error(f"Failed to prepare realtime outbox batch for {schema}: {e}", exc_info=True)
+            return False
+        if not batch.event_ids:
+            return False
+
+        by_group: Dict[str, List[dict]] = defaultdict(list)
+        for group, message in batch.messages:
+            by_group[group].append(message)
+        results = await asyncio.gather(
+            *(self._send_group(group, messages) for group, messages in by_group.items()),
+            return_exceptions=True
+        )
+        failures = [result for result in results if isinstance(result, Exception)]
+        if failures:
+            logger.error(f"Failed to publish {len(failures)} of {len(by_group)} groups for {schema}: {failures[0]}")
+            # The claim expires and the batch is retried
+            return False
+
+        await sync_to_async(acknowledge_batch)(batch)
+        logger.debug(f"Published {len(batch.event_ids)} outbox events of {schema} as {len(batch.messages)} messages")
+        return len(batch.event_ids) >= self.batch_size
+
+    async def _send_group(self, group: str, messages: List[dict]):
+        # Messages of one group keep their order
+        for message in messages:
+            await self.channel_layer.group_send(group, message)
+
+    async def _listen(self):
+        import psycopg
+
+        while not self._stopping:
+            try:
+                conn = await psycopg.AsyncConnection.connect(autocommit=True, **_listen_params())
+                async with conn:
+                    await conn.execute(f"LISTEN {OUTBOX_CHANNEL}")
+                    self.listening = True
+                    logger.info(f"Listening for realtime outbox notifications on '{OUTBOX_CHANNEL}'")
+                    async for notification in conn.notifies():
+                        self.notify(notification.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Realtime outbox LISTEN connection lost, polling until it is back: {e}")
+            self.listening = False
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _sweep(self):
+        """Pick up events whose notification was missed"""
+        while not self._stopping:
+            try:
+                for schema in await sync_to_async(schemas_with_events)():
+                    self.notify(schema)
+            except Exception as e:
+                logger.error(f"Realtime outbox sweep failed: {e}")
+            await asyncio.sleep(self.sweep_interval if self.listening else self.window * 5)
@@ -0,0 +1,117 @@
+"""
+Per-subscriber field projection of realtime record events
+
+Record events are built once by the outbox worker, with every field.
+Consumers drop the fields the connected user's type may not view
+(UserTypeFieldPermission can_view=False or visibility 'hidden') before
+sending. The hidden slugs are cached per process for each tenant, user
+type and pipeline, and the encoded frame is cached per event and hidden
+set, so a process encodes an event once per distinct projection rather
+than once per socket.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, Optional, Tuple
+
+PROJECTION_TTL = 60         # Seconds before other processes see permission changes
+ENCODED_CACHE_SIZE = 512
+
+_hidden_cache: Dict[Tuple[str, int, int], Tuple[float, FrozenSet[str]]] = {}
+_encoded_cache: 'OrderedDict[Tuple[str, FrozenSet[str]], str]' = OrderedDict()
+_lock = threading.Lock()
+
+
+def load_hidden_field_slugs(user_type_id: int, pipeline_id: int) -> FrozenSet[str]:
+    """Slugs of the pipeline's fields hidden from a user type, read in the current schema"""
+    from django.db.models import Q
+    from authentication.models import UserTypeFieldPermission
+    from pipelines.models import Field
+
+    field_ids = UserTypeFieldPermission.objects.filter(
+        user_type_id=user_type_id,
+        pipeline_id=pipeline_id
+    ).filter(
+        Q(can_view=False) | Q(visibility='hidden')
+    ).values_list('field_id', flat=True)
+    return frozenset(
+        Field.objects.filter(pipeline_id=pipeline_id, id__in=list(field_ids)).values_list('slug', flat=True)
+    )
+
+
+def hidden_field_slugs(schema: str, user_type_id: Optional[int], pipeline_id) -> FrozenSet[str]:
+    """Cached load_hidden_field_slugs of a tenant schema (sync context)"""
+    if not user_type_id or not pipeline_id:
+        return frozenset()
+    key = (schema, int(user_type_id), int(pipeline_id))
+    now = time.monotonic()
+    cached = _hidden_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    from django_tenants.utils import schema_context
+
+    with schema_context(schema):
+        hidden = load_hidden_field_slugs(int(user_type_id), int(pipeline_id))
+    with _lock:
+        _hidden_cache[key] = (now + PROJECTION_TTL, hidden)
+    return hidden
+
+
+def cached_hidden_field_slugs(schema: str, user_type_id: Optional[int], pipeline_id) -> Optional[FrozenSet[str]]:
+    """The cached hidden slugs, or None when they have to be loaded"""
+    if not user_type_id or not pipeline_id:
+        return frozenset()
+    cached = _hidden_cache.get((schema, int(user_type_id), int(pipeline_id)))
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    return None
+
+
+def invalidate_field_projection(schema: Optional[str] = None, user_type_id: Optional[int] = None,
+                                pipeline_id: Optional[int] = None):
+    """Forget cached projections of this process matching the given keys"""
+    with _lock:
+        for key in list(_hidden_cache):
+            if schema is not None and key[0] != schema:
+                continue
+            if user_type_id is not None and key[1] != user_type_id:
+                continue
+            if pipeline_id is not None and key[2] != pipeline_id:
+                continue
+            del _hidden_cache[key]
+        _encoded_cache.clear()
+
+
+def project_record_data(event_data: dict, hidden: FrozenSet[str]) -> dict:
+    """event_data without the hidden fields; the same dict when nothing is hidden"""
+    data = event_data.get('data')
+    if not hidden or not isinstance(data, dict) or not hidden.intersection(data):
+        return event_data
+
+    projected = dict(event_data)
+    projected['data'] = {slug: value for slug, value in data.items() if slug not in hidden}
+    if 'changed_fields' in projected:
+        projected['changed_fields'] = [slug for slug in projected['changed_fields'] if slug not in hidden]
+    return projected
+
+
+def encode_once(event_id: Optional[str], hidden: FrozenSet[str], build: Callable[[], dict]) -> str:
+    """JSON text of build(), shared by every socket with the same event and projection"""
+    if not event_id:
+        return json.dumps(build())
+
+    key = (event_id, hidden)
+    with _lock:
+        text = _encoded_cache.get(key)
+        if text is not None:
+            _encoded_cache.move_to_end(key)
+            return text
+
+    text = json.dumps(build())
+    with _lock:
+        _encoded_cache[key] = text
+        while len(_encoded_cache) > ENCODED_CACHE_SIZE:
+            _encoded_cache.popitem(last=False)
+    return text
@@ -0,0 +1,265 @@
+"""
+Redis Streams transport for Server-Sent Events
+
+Every SSE event of a tenant is appended once (XADD) to the tenant's stream
+`sse_events:{schema}` with the channel it belongs to. Stream ids are
+monotonic, so they double as SSE event ids: a reconnecting client sends
+`Last-Event-ID` and the missed events are replayed with XRANGE.
+
+Each process runs a single fan-in reader per event loop (SSEStreamHub):
+one blocking XREAD over the streams that local connections listen to,
+dispatching every entry to the subscriptions of that stream. Connections
+filter by channel and never poll Redis themselves.
+"""
+import asyncio
+import json
+import logging
+import re
+import weakref
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+STREAM_PREFIX = 'sse_events'
+STREAM_MAXLEN = 10000       # Approximate entries kept per tenant for replay
+READ_BLOCK_MS = 15000       # XREAD block; new streams restart the read anyway
+READ_COUNT = 500
+REPLAY_LIMIT = 1000         # Events replayed on resume before asking for a resync
+QUEUE_SIZE = 1000           # Events buffered per connection before it is reset
+RECONNECT_DELAY = 2
+
+_STREAM_ID = re.compile(r'^(\d+)-(\d+)$')
+
+
+def stream_key(schema: str) -> str:
+    return f"{STREAM_PREFIX}:{schema}"
+
+
+def parse_event_id(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Stream id 'ms-seq' as a comparable tuple, None when malformed"""
+    match = _STREAM_ID.match((value or '').strip())
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def format_sse(event_type: str, data, event_id: Optional[str] = None, retry: Optional[int] = None) -> str:
+    """Format one SSE frame; `data` may be pre-encoded JSON"""
+    data_str = data if isinstance(data, str) else json.dumps(data, default=str)
+    frame = ''
+    if event_id:
+        frame += f"id: {event_id}\n"
+    if retry:
+        frame += f"retry: {retry}\n"
+    return frame + f"event: {event_type}\ndata: {data_str}\n\n"
+
+
+# =============================================================================
+# WRITERS
+# =============================================================================
+
+def _current_schema() -> Optional[str]:
+    from django.db import connection
+    return getattr(connection, 'schema_name', None)
+
+
+def publish_sse_events(events: Iterable[Tuple[str, str, dict]], schema: Optional[str] = None) -> List[str]:
+    """
+    Append (channel, event_type, data) events to the tenant stream
+
+    One XADD per event in a single round trip, whatever the number of
+    subscribers. Returns the stream ids assigned to the events.
+    """
+    from django_redis import get_redis_connection
+
+    schema = schema or _current_schema()
+    events = list(events)
+    if not schema or not events:
+        return []
+
+    pipe = get_redis_connection("default").pipeline(transaction=False)
+    key = stream_key(schema)
+    for channel, event_type, data in events:
+        pipe.xadd(
+            key,
+            {'channel': channel, 'type': event_type, 'data': json.dumps(data, default=str)},
+            maxlen=STREAM_MAXLEN,
+            approximate=True
+        )
+    return [entry_id.decode() if isinstance(entry_id, bytes) else entry_id for entry_id in pipe.execute()]
+
+
+def publish_sse_event(channel: str, event_type: str, data: dict, schema: Optional[str] = None) -> Optional[str]:
+    ids = publish_sse_events([(channel, event_type, data)], schema=schema)
+    return ids[0] if ids else None
+
+
+# =============================================================================
+# READERS
+# =============================================================================
+
+@dataclass(frozen=True)
+class SSEEvent:
+    """One stream entry, encoded as an SSE frame once per process"""
+    id: str
+    channel: str
+    type: str
+    data: str
+
+    @classmethod
+    def from_entry(cls, entry_id: str, fields: dict) -> 'SSEEvent':
+        return cls(
+            id=entry_id,
+            channel=fields.get('channel', ''),
+            type=fields.get('type', 'update'),
+            data=fields.get('data', '{}')
+        )
+
+    @property
+    def frame(self) -> str:
+        return format_sse(self.type, self.data, event_id=self.id)
+
+
+class SSESubscription:
+    """Live events of some channels of one tenant stream, for one connection"""
+
+    def __init__(self, stream: str, channels: Iterable[str], start_id: str, queue_size: int = QUEUE_SIZE):
+        self.stream = stream
+        self.channels = frozenset(channels)
+        self.start_id = start_id
+        self.start = parse_event_id(start_id) or (0, 0)
+        self.queue_size = queue_size
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.overflowed = False
+
+    def offer(self, event: SSEEvent):
+        """Queue an event read by the hub; events up to start_id are already replayed"""
+        if self.overflowed or event.channel not in self.channels:
+            return
+        if (parse_event_id(event.id) or (0, 0)) <= self.start:
+            return
+        if self.queue.qsize() >= self.queue_size:
+            # A slow client is cut off after what it has queued and resumes from its Last-Event-ID
+            self.overflowed = True
+            self.queue.put_nowait(None)
+            return
+        self.queue.put_nowait(event)
+
+
+class SSEStreamHub:
+    """Single blocking XREAD per event loop, fanned out to SSE subscriptions"""
+
+    def __init__(self, redis_url: Optional[str] = None, client=None, block_ms: int = READ_BLOCK_MS):
+        self.redis_url = redis_url or settings.CACHES['default']['LOCATION']
+        self.block_ms = block_ms
+        self._client = client
+        self._subscriptions: Dict[str, Set[SSESubscription]] = {}
+        self._cursors: Dict[str, str] = {}
+        self._reader: Optional[asyncio.Task] = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis.asyncio as aioredis
+            self._client = aioredis.from_url(self.redis_url, decode_responses=True)
+        return self._client
+
+    async def _tail(self, stream: str) -> str:
+        entries = await self.client.xrevrange(stream, count=1)
+        return entries[0][0] if entries else '0-0'
+
+    async def subscribe(self, schema: str, channels: Iterable[str]) -> SSESubscription:
+        """
+        Start receiving live events of `channels`
+
+        The subscription's start_id is the position live delivery begins
+        after; replay(last_event_id, subscription) fills the gap before it.
+        """
+        stream = stream_key(schema)
+        tail = None
+        if stream not in self._cursors:
+            tail = await self._tail(stream)
+
+        # No await from here on: the cursor cannot move while registering
+        new_stream = stream not in self._cursors
+        if new_stream:
+            self._cursors[stream] = tail
+        subscription = SSESubscription(stream, channels, self._cursors[stream])
+        self._subscriptions.setdefault(stream, set()).add(subscription)
+
+        if new_stream and self._reader and not self._reader.done():
+            # Restart the blocked XREAD so it includes the new stream
+            self._reader.cancel()
+            self._reader = None
+        if not self._reader or self._reader.done():
+            self._reader = asyncio.ensure_future(self._read_loop())
+        return subscription
+
+    def unsubscribe(self, subscription: SSESubscription):
+        subscriptions = self._subscriptions.get(subscription.stream)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.stream]
+            self._cursors.pop(subscription.stream, None)
+
+    async def replay(self, last_event_id: str, subscription: SSESubscription,
+                     limit: int = REPLAY_LIMIT) -> Tuple[List[SSEEvent], bool]:
+        """
+        Events of the subscription's channels after `last_event_id`, up to its start_id
+
+        Returns (events, complete); complete is False when more than `limit`
+        stream entries were missed and the client should reload instead.
+        """
+        after = parse_event_id(last_event_id)
+        if not after or after >= subscription.start:
+            return [], True
+
+        # The stream was trimmed past the client's position
+        head = await self.client.xrange(subscription.stream, count=1)
+        if head and parse_event_id(head[0][0]) > after:
+            return [], False
+
+        entries = await self.client.xrange(
+            subscription.stream, min=f"({last_event_id}", max=subscription.start_id, count=limit
+        )
+        events = [SSEEvent.from_entry(entry_id, fields) for entry_id, fields in entries]
+        complete = len(entries) < limit or (events and events[-1].id == subscription.start_id)
+        return [event for event in events if event.channel in subscription.channels], bool(complete)
+
+    async def _read_loop(self):
+        while self._subscriptions:
+            streams = dict(self._cursors)
+            try:
+                response = await self.client.xread(streams, count=READ_COUNT, block=self.block_ms)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"SSE stream read failed: {e}")
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+
+            for stream, entries in response or []:
+                if stream not in self._cursors:
+                    continue
+                for entry_id, fields in entries:
+                    event = SSEEvent.from_entry(entry_id, fields)
+                    for subscription in list(self._subscriptions.get(stream, ())):
+                        subscription.offer(event)
+                    self._cursors[stream] = entry_id
+
+
+_hubs: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, SSEStreamHub]' = weakref.WeakKeyDictionary()
+
+
+def get_stream_hub() -> SSEStreamHub:
+    """The hub of the running event loop"""
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = SSEStreamHub()
+    return hub
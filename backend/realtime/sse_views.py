@@ -1,19 +1,22 @@
 """
 Server-Sent Events (SSE) views for real-time notifications and activity feeds
+
+Events are read from the tenant's Redis stream by the process-wide fan-in
+reader (realtime.sse_streams); each event carries its stream id so clients
+resume with Last-Event-ID after a reconnect.
 """
-import json
 import asyncio
 import time
+from functools import wraps
 from typing import AsyncGenerator, Dict, Any, Optional
+from asgiref.sync import sync_to_async
 from django.http import StreamingHttpResponse
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.views.decorators.http import require_http_methods
-from django.views.decorators.csrf import csrf_exempt
-from django.utils.decorators import method_decorator
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.http import HttpResponseForbidden
-from channels.layers import get_channel_layer
+from .sse_streams import format_sse, get_stream_hub, publish_sse_event
 import logging
 
 User = get_user_model()
@@ -22,9 +25,9 @@ logger = logging.getLogger(__name__)
 class SSEHandler:
     """Handles Server-Sent Events streaming"""
     
-    def __init__(self, user: User):
+    def __init__(self, user: User, schema: str):
         self.user = user
-        self.channel_layer = get_channel_layer()
+        self.schema = schema
         self.heartbeat_interval = 30  # seconds
         self.max_retry_delay = 30000  # milliseconds
         self.connection_timeout = 3600  # 1 hour
@@ -32,136 +35,107 @@ class SSEHandler:
     async def create_event_stream(
         self, 
         channels: list, 
-        initial_data: Optional[Dict[str, Any]] = None
+        initial_data: Optional[Dict[str, Any]] = None,
+        last_event_id: Optional[str] = None
     ) -> AsyncGenerator[str, None]:
-        """Create SSE event stream"""
+        """Create SSE event stream, replaying events after last_event_id"""
         
         start_time = time.time()
-        
-        # Send initial connection event
-        yield self._format_sse_message('connected', {
-            'user_id': self.user.id,
-            'timestamp': start_time,
-            'retry': self.max_retry_delay
-        })
-        
-        # Send initial data if provided
-        if initial_data:
-            yield self._format_sse_message('initial_data', initial_data)
-        
-        # Start heartbeat and message loop
-        last_heartbeat = start_time
-        message_count = 0
+        hub = get_stream_hub()
+        subscription = await hub.subscribe(self.schema, channels)
         
         try:
+            # Send initial connection event
+            yield format_sse('connected', {
+                'user_id': self.user.id,
+                'timestamp': start_time,
+                'retry': self.max_retry_delay
+            }, retry=self.max_retry_delay)
+            
+            complete = True
+            if last_event_id:
+                # Resume: replay what was missed instead of a fresh snapshot
+                missed, complete = await hub.replay(last_event_id, subscription)
+                for event in missed:
+                    yield event.frame
+                if not complete:
+                    yield format_sse('resync', {'message': 'Missed events are no longer available'})
+            
+            # Send initial data if provided
+            if initial_data and (not last_event_id or not complete):
+                yield format_sse('initial_data', initial_data)
+            
+            message_count = 0
             while True:
-                current_time = time.time()
-                
-                # Check connection timeout
-                if current_time - start_time > self.connection_timeout:
-                    yield self._format_sse_message('timeout', {
+                elapsed = time.time() - start_time
+                if elapsed > self.connection_timeout:
+                    yield format_sse('timeout', {
                         'message': 'Connection timeout',
                         'duration': self.connection_timeout
                     })
                     break
                 
-                # Check for new messages
-                messages = await self._get_pending_messages(channels)
-                
-                for message in messages:
-                    yield self._format_sse_message(message['type'], message['data'])
-                    message_count += 1
-                
-                # Send heartbeat if needed
-                if current_time - last_heartbeat >= self.heartbeat_interval:
-                    yield self._format_sse_message('heartbeat', {
-                        'timestamp': current_time,
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    yield format_sse('heartbeat', {
+                        'timestamp': time.time(),
                         'messages_sent': message_count
                     })
-                    last_heartbeat = current_time
+                    continue
+                
+                if event is None:
+                    # Client fell too far behind; it reconnects with its Last-Event-ID
+                    yield format_sse('reconnect', {'retry': self.max_retry_delay})
+                    break
                 
-                # Short sleep to prevent busy waiting
-                await asyncio.sleep(0.5)
+                yield event.frame
+                message_count += 1
                 
         except asyncio.CancelledError:
             # Client disconnected
             logger.info(f"SSE stream cancelled for user {self.user.id}")
+            raise
         except Exception as e:
             logger.error(f"SSE stream error for user {self.user.id}: {e}")
-            yield self._format_sse_message('error', {
+            yield format_sse('error', {
                 'message': 'Stream error occurred',
                 'retry': self.max_retry_delay
             })
-    
-    async def _get_pending_messages(self, channels: list) -> list:
-        """Get pending messages for user from subscribed channels"""
-        messages = []
-        
-        # Check each subscribed channel for messages
-        for channel in channels:
-            message_key = f"sse_messages:{self.user.id}:{channel}"
-            channel_messages = cache.get(message_key, [])
-            
-            if channel_messages:
-                messages.extend(channel_messages)
-                # Clear processed messages
-                cache.delete(message_key)
-        
-        # Sort messages by timestamp if available
-        messages.sort(key=lambda msg: msg.get('timestamp', 0))
-        return messages
-    
-    def _format_sse_message(self, event_type: str, data: Dict[str, Any]) -> str:
-        """Format message as SSE format"""
-        data_str = json.dumps(data, default=str)  # Handle datetime serialization
-        return f"event: {event_type}\ndata: {data_str}\n\n"
+        finally:
+            hub.unsubscribe(subscription)
 
 
-@require_http_methods(["GET"])
-@login_required
-def notifications_stream(request):
-    """SSE endpoint for user notifications"""
+def sse_login_required(view):
+    """login_required for async SSE views"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def _in_tenant(request, func, *args, **kwargs):
+    """Run a sync data helper in the request's tenant schema"""
+    from django_tenants.utils import schema_context
     
-    def event_stream():
-        """Generator for notification events"""
-        handler = SSEHandler(request.user)
-        
-        # Subscribe to user-specific notification channels
-        channels = [
-            f"user_notifications:{request.user.id}",
-            f"system_notifications"
-        ]
-        
-        # Add tenant-specific notifications if user has tenant
-        if hasattr(request.user, 'tenant'):
-            channels.append(f"tenant_announcements:{request.user.tenant.id}")
-        
-        # Get initial notification data
-        initial_data = {
-            'unread_count': get_unread_notification_count(request.user),
-            'recent_notifications': get_recent_notifications(request.user, limit=5)
-        }
-        
-        # Create async event stream
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            async_generator = handler.create_event_stream(channels, initial_data)
-            
-            while True:
-                try:
-                    message = loop.run_until_complete(async_generator.__anext__())
-                    yield message
-                except StopAsyncIteration:
-                    break
-        except GeneratorExit:
-            loop.close()
-        finally:
-            loop.close()
+    def run():
+        with schema_context(request.tenant.schema_name):
+            return func(*args, **kwargs)
     
+    return await sync_to_async(run)()
+
+
+def _stream_response(request, user: User, channels: list, initial_data: Optional[Dict[str, Any]] = None):
+    handler = SSEHandler(user, request.tenant.schema_name)
     response = StreamingHttpResponse(
-        event_stream(),
+        handler.create_event_stream(
+            channels,
+            initial_data,
+            last_event_id=request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+        ),
         content_type='text/event-stream'
     )
     
@@ -170,184 +144,113 @@ def notifications_stream(request):
     response['Connection'] = 'keep-alive'
     response['X-Accel-Buffering'] = 'no'  # For nginx
     response['Access-Control-Allow-Origin'] = '*'
-    response['Access-Control-Allow-Headers'] = 'Cache-Control'
+    response['Access-Control-Allow-Headers'] = 'Cache-Control, Last-Event-ID'
     
     return response
 
 
 @require_http_methods(["GET"])
-@login_required  
-def activity_stream(request):
+@sse_login_required
+async def notifications_stream(request):
+    """SSE endpoint for user notifications"""
+    user = await request.auser()
+    
+    # Subscribe to user-specific notification channels
+    channels = [
+        f"user_notifications:{user.id}",
+        "system_notifications"
+    ]
+    
+    # Add tenant-specific notifications if user has tenant
+    if hasattr(user, 'tenant'):
+        channels.append(f"tenant_announcements:{user.tenant.id}")
+    
+    # Get initial notification data
+    initial_data = {
+        'unread_count': get_unread_notification_count(user),
+        'recent_notifications': get_recent_notifications(user, limit=5)
+    }
+    
+    return _stream_response(request, user, channels, initial_data)
+
+
+@require_http_methods(["GET"])
+@sse_login_required
+async def activity_stream(request):
     """SSE endpoint for activity feed"""
+    user = await request.auser()
     
-    def event_stream():
-        handler = SSEHandler(request.user)
-        
-        # Get pipeline IDs user has access to
-        accessible_pipelines = get_accessible_pipeline_ids(request.user)
-        
-        # Subscribe to activity channels
-        channels = []
-        for pipeline_id in accessible_pipelines:
-            channels.append(f"pipeline_activity_{pipeline_id}")
-        
-        # Add user-specific activity
-        channels.extend([
-            f"user_activity_{request.user.id}",
-            "global_activity"
-        ])
-        
-        # Get initial activity data
-        initial_data = {
-            'recent_activity': get_recent_activity(request.user, limit=20)
-        }
-        
-        # Create async stream
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            async_generator = handler.create_event_stream(channels, initial_data)
-            
-            while True:
-                try:
-                    message = loop.run_until_complete(async_generator.__anext__())
-                    yield message
-                except StopAsyncIteration:
-                    break
-        except GeneratorExit:
-            loop.close()
-        finally:
-            loop.close()
+    # Get pipeline IDs user has access to
+    accessible_pipelines = await _in_tenant(request, get_accessible_pipeline_ids, user)
     
-    response = StreamingHttpResponse(
-        event_stream(),
-        content_type='text/event-stream'
-    )
+    # Subscribe to activity channels
+    channels = [f"pipeline_activity_{pipeline_id}" for pipeline_id in accessible_pipelines]
     
-    response['Cache-Control'] = 'no-cache'
-    response['Connection'] = 'keep-alive'
-    response['X-Accel-Buffering'] = 'no'
-    response['Access-Control-Allow-Origin'] = '*'
-    response['Access-Control-Allow-Headers'] = 'Cache-Control'
+    # Add user-specific activity
+    channels.extend([
+        f"user_activity_{user.id}",
+        "global_activity"
+    ])
     
-    return response
+    # Get initial activity data
+    initial_data = {
+        'recent_activity': await _in_tenant(request, get_recent_activity, user, limit=20)
+    }
+    
+    return _stream_response(request, user, channels, initial_data)
 
 
 @require_http_methods(["GET"])
-@login_required
-def dashboard_stream(request, dashboard_id):
+@sse_login_required
+async def dashboard_stream(request, dashboard_id):
     """SSE endpoint for live dashboard updates"""
+    user = await request.auser()
     
     # Validate dashboard access
-    if not can_access_dashboard(request.user, dashboard_id):
+    if not can_access_dashboard(user, dashboard_id):
         return HttpResponseForbidden("Dashboard access denied")
     
-    def event_stream():
-        handler = SSEHandler(request.user)
-        
-        # Subscribe to dashboard-specific channels
-        channels = [
-            f"dashboard_updates:{dashboard_id}",
-            f"dashboard_data:{dashboard_id}"
-        ]
-        
-        # Add pipeline data channels for dashboard
-        dashboard_pipelines = get_dashboard_pipeline_ids(dashboard_id)
-        for pipeline_id in dashboard_pipelines:
-            channels.append(f"pipeline_data:{pipeline_id}")
-        
-        # Get initial dashboard data
-        initial_data = get_dashboard_data(dashboard_id, request.user)
-        
-        # Create async stream
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            async_generator = handler.create_event_stream(channels, initial_data)
-            
-            while True:
-                try:
-                    message = loop.run_until_complete(async_generator.__anext__())
-                    yield message
-                except StopAsyncIteration:
-                    break
-        except GeneratorExit:
-            loop.close()
-        finally:
-            loop.close()
+    # Subscribe to dashboard-specific channels
+    channels = [
+        f"dashboard_updates:{dashboard_id}",
+        f"dashboard_data:{dashboard_id}"
+    ]
     
-    response = StreamingHttpResponse(
-        event_stream(),
-        content_type='text/event-stream'
-    )
+    # Add pipeline data channels for dashboard
+    for pipeline_id in get_dashboard_pipeline_ids(dashboard_id):
+        channels.append(f"pipeline_data:{pipeline_id}")
     
-    response['Cache-Control'] = 'no-cache'
-    response['Connection'] = 'keep-alive'
-    response['X-Accel-Buffering'] = 'no'
-    response['Access-Control-Allow-Origin'] = '*'
-    response['Access-Control-Allow-Headers'] = 'Cache-Control'
+    # Get initial dashboard data
+    initial_data = get_dashboard_data(dashboard_id, user)
     
-    return response
+    return _stream_response(request, user, channels, initial_data)
 
 
 @require_http_methods(["GET"])
-@login_required
-def pipeline_stream(request, pipeline_id):
+@sse_login_required
+async def pipeline_stream(request, pipeline_id):
     """SSE endpoint for pipeline-specific updates"""
+    user = await request.auser()
     
     # Check pipeline access
-    if not can_access_pipeline(request.user, pipeline_id):
+    if not can_access_pipeline(user, pipeline_id):
         return HttpResponseForbidden("Pipeline access denied")
     
-    def event_stream():
-        handler = SSEHandler(request.user)
-        
-        # Subscribe to pipeline-specific channels
-        channels = [
-            f"pipeline_updates_{pipeline_id}",
-            f"pipeline_records_{pipeline_id}",
-            f"pipeline_activity_{pipeline_id}"
-        ]
-        
-        # Get initial pipeline data
-        initial_data = {
-            'pipeline_info': get_pipeline_info(pipeline_id),
-            'recent_records': get_recent_pipeline_records(pipeline_id, limit=10),
-            'pipeline_stats': get_pipeline_stats(pipeline_id)
-        }
-        
-        # Create async stream
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            async_generator = handler.create_event_stream(channels, initial_data)
-            
-            while True:
-                try:
-                    message = loop.run_until_complete(async_generator.__anext__())
-                    yield message
-                except StopAsyncIteration:
-                    break
-        except GeneratorExit:
-            loop.close()
-        finally:
-            loop.close()
-    
-    response = StreamingHttpResponse(
-        event_stream(),
-        content_type='text/event-stream'
-    )
+    # Subscribe to pipeline-specific channels
+    channels = [
+        f"pipeline_updates_{pipeline_id}",
+        f"pipeline_records_{pipeline_id}",
+        f"pipeline_activity_{pipeline_id}"
+    ]
     
-    response['Cache-Control'] = 'no-cache'
-    response['Connection'] = 'keep-alive'
-    response['X-Accel-Buffering'] = 'no'
-    response['Access-Control-Allow-Origin'] = '*'
-    response['Access-Control-Allow-Headers'] = 'Cache-Control'
+    # Get initial pipeline data
+    initial_data = {
+        'pipeline_info': get_pipeline_info(pipeline_id),
+        'recent_records': get_recent_pipeline_records(pipeline_id, limit=10),
+        'pipeline_stats': get_pipeline_stats(pipeline_id)
+    }
     
-    return response
+    return _stream_response(request, user, channels, initial_data)
 
 
 # Utility functions for SSE data
@@ -557,20 +460,9 @@ def get_pipeline_stats(pipeline_id: str) -> dict:
 # SSE message broadcasting utilities
 async def broadcast_notification(user_id: int, notification_data: dict):
     """Broadcast notification to user via SSE"""
-    message_key = f"sse_messages:{user_id}:user_notifications:{user_id}"
-    messages = cache.get(message_key, [])
-    
-    messages.append({
-        'type': 'notification',
-        'data': notification_data,
-        'timestamp': time.time()
-    })
-    
-    # Keep only recent messages
-    if len(messages) > 50:
-        messages = messages[-50:]
-    
-    cache.set(message_key, messages, 300)  # 5 minute TTL
+    await sync_to_async(publish_sse_event)(
+        f"user_notifications:{user_id}", 'notification', notification_data
+    )
 
 
 async def broadcast_activity(activity_data: dict, channels: list = None):
@@ -579,26 +471,4 @@ async def broadcast_activity(activity_data: dict, channels: list = None):
         channels = ['global_activity']
     
     for channel in channels:
-        # Find users subscribed to this channel
-        # In a real implementation, this would be more efficient
-        for user_id in get_users_subscribed_to_channel(channel):
-            message_key = f"sse_messages:{user_id}:{channel}"
-            messages = cache.get(message_key, [])
-            
-            messages.append({
-                'type': 'activity',
-                'data': activity_data,
-                'timestamp': time.time()
-            })
-            
-            if len(messages) > 20:
-                messages = messages[-20:]
-            
-            cache.set(message_key, messages, 300)
-
-
-def get_users_subscribed_to_channel(channel: str) -> list:
-    """Get list of user IDs subscribed to a channel"""
-    # This would integrate with the connection manager
-    # For now, return empty list
-    return []
\ No newline at end of file
+        await sync_to_async(publish_sse_event)(channel, 'activity', activity_data)
@@ -0,0 +1,195 @@
+"""
+Tests for the Redis-backed operational transform log
+"""
+import asyncio
+
+from django.test import SimpleTestCase
+from redis.exceptions import WatchError
+
+from realtime import operational_transform
+from realtime.operational_transform import (
+    Operation,
+    OperationType,
+    OperationalTransform,
+    StaleRevisionError,
+    apply_to_text,
+)
+
+
+def entry_revision(entry_id):
+    return int(entry_id.split('-')[0])
+
+
+class MemoryRedis:
+    """The hash, stream and WATCH/MULTI subset the OT store uses"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.streams = {}
+        self.versions = {}
+        # Called once before a transaction commits, to simulate another worker
+        self.interleave = None
+
+    def pipeline(self, transaction=True):
+        return MemoryPipeline(self)
+
+    def touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    async def hgetall(self, key):
+        return {field: str(value) for field, value in self.hashes.get(key, {}).items()}
+
+    async def hget(self, key, field):
+        return (await self.hgetall(key)).get(field)
+
+    async def xrange(self, key, min='-', max='+', count=None):
+        low = entry_revision(min) if min != '-' else 0
+        return [(entry_id, fields) for entry_id, fields in self.streams.get(key, []) if entry_revision(entry_id) >= low]
+
+    async def xrevrange(self, key, count=None):
+        return list(reversed(self.streams.get(key, [])))[:count]
+
+
+class MemoryPipeline:
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.watched = {}
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def watch(self, key):
+        self.watched[key] = self.redis.versions.get(key, 0)
+
+    async def hgetall(self, key):
+        return await self.redis.hgetall(key)
+
+    async def xrange(self, *args, **kwargs):
+        return await self.redis.xrange(*args, **kwargs)
+
+    def multi(self):
+        self.commands = []
+
+    def xadd(self, key, fields, id):
+        self.commands.append(lambda: self.redis.streams.setdefault(key, []).append((id, fields)))
+
+    def xtrim(self, key, minid, approximate=True):
+        self.commands.append(lambda: self.redis.streams.__setitem__(key, [
+            entry for entry in self.redis.streams.get(key, []) if entry_revision(entry[0]) >= entry_revision(minid)
+        ]))
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        def run():
+            self.redis.hashes.setdefault(key, {}).update(mapping or {field: value})
+            self.redis.touch(key)
+        self.commands.append(run)
+
+    def delete(self, *keys):
+        def run():
+            for key in keys:
+                self.redis.hashes.pop(key, None)
+                self.redis.streams.pop(key, None)
+                self.redis.touch(key)
+        self.commands.append(run)
+
+    def expire(self, key, seconds):
+        pass
+
+    async def execute(self):
+        if self.redis.interleave:
+            interleave, self.redis.interleave = self.redis.interleave, None
+            await interleave()
+        if any(self.redis.versions.get(key, 0) != version for key, version in self.watched.items()):
+            raise WatchError()
+        for command in self.commands:
+            command()
+
+
+class ApplyToTextTest(SimpleTestCase):
+
+    def test_operations(self):
+        self.assertEqual(apply_to_text('hello', Operation(OperationType.INSERT, 5, content=' world')), 'hello world')
+        self.assertEqual(apply_to_text('hello', Operation(OperationType.DELETE, 1, length=3)), 'ho')
+        self.assertEqual(apply_to_text('hello', Operation(OperationType.REPLACE, 0, content='J', length=1)), 'Jello')
+        # Out of range positions are clamped
+        self.assertEqual(apply_to_text('hi', Operation(OperationType.INSERT, 9, content='!')), 'hi!')
+
+
+class OperationLogTest(SimpleTestCase):
+
+    def setUp(self):
+        self.redis = MemoryRedis()
+
+    def ot(self):
+        return OperationalTransform('1:2', 'notes', schema='demo', client=self.redis)
+
+    def test_revisions_are_consecutive_and_concurrent_edits_converge(self):
+        async def scenario():
+            ot = self.ot()
+            await ot.reset_document_state('abc')
+            first = await ot.transform_operation({'type': 'insert', 'position': 0, 'content': 'X', 'revision': 0}, 1)
+            # Based on revision 0 too: rebased past the first insert
+            second = await ot.transform_operation({'type': 'insert', 'position': 3, 'content': 'Y', 'revision': 0}, 2)
+            return first, second, await ot.get_snapshot(), await ot.get_operations_since(1)
+
+        first, second, snapshot, since = asyncio.run(scenario())
+        self.assertEqual((first['revision'], second['revision']), (1, 2))
+        self.assertEqual(second['position'], 4)
+        self.assertEqual(snapshot, (2, 'XabcY'))
+        self.assertEqual([operation['revision'] for operation in since], [2])
+
+    def test_lost_race_is_rebased_on_the_winner(self):
+        async def scenario():
+            ot = self.ot()
+            await ot.reset_document_state('abc')
+
+            async def other_worker():
+                await self.ot().transform_operation({'type': 'insert', 'position': 0, 'content': 'Z', 'revision': 0}, 3)
+
+            self.redis.interleave = other_worker
+            result = await ot.transform_operation({'type': 'insert', 'position': 1, 'content': 'Q', 'revision': 0}, 1)
+            return result, await ot.get_snapshot()
+
+        result, snapshot = asyncio.run(scenario())
+        self.assertEqual(result['revision'], 2)
+        self.assertEqual(snapshot, (2, 'ZaQbc'))
+
+    def test_compaction_rejects_stale_revisions(self):
+        async def scenario():
+            ot = self.ot()
+            await ot.reset_document_state('')
+            for revision in range(6):
+                await ot.transform_operation(
+                    {'type': 'insert', 'position': revision, 'content': 'x', 'revision': revision}, 1
+                )
+            await ot.compact(keep=2)
+            return ot, await ot.get_operations_since(4)
+
+        ot, since = asyncio.run(scenario())
+        self.assertEqual([operation['revision'] for operation in since], [5, 6])
+        with self.assertRaises(StaleRevisionError):
+            asyncio.run(ot.get_operations_since(3))
+        with self.assertRaises(StaleRevisionError):
+            asyncio.run(ot.transform_operation({'type': 'insert', 'position': 0, 'content': 'y', 'revision': 1}, 2))
+
+    def test_log_is_compacted_while_editing(self):
+        saved = (operational_transform.COMPACT_EVERY, operational_transform.KEEP_OPERATIONS)
+        operational_transform.COMPACT_EVERY, operational_transform.KEEP_OPERATIONS = 3, 2
+        self.addCleanup(lambda: setattr(operational_transform, 'COMPACT_EVERY', saved[0]))
+        self.addCleanup(lambda: setattr(operational_transform, 'KEEP_OPERATIONS', saved[1]))
+
+        async def scenario():
+            ot = self.ot()
+            await ot.reset_document_state('')
+            for _ in range(5):
+                await ot.transform_operation({'type': 'insert', 'position': 0, 'content': 'x'}, 1)
+            return ot
+
+        ot = asyncio.run(scenario())
+        self.assertEqual(self.redis.hashes[ot.document_state_key]['min_rev'], 3)
+        self.assertEqual([entry_revision(entry_id) for entry_id, _ in self.redis.streams[ot.operation_log_key]], [4, 5])
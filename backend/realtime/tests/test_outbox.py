@@ -0,0 +1,151 @@
+"""
+Tests for the realtime outbox coalescing and fan-out
+"""
+import asyncio
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from realtime.models import OutboxEvent
+from realtime.outbox import (
+    BulkWrite, OutboxBatch, OutboxWorker, PassthroughEvent, RecordChange, build_messages, coalesce, record_delta
+)
+
+
+def event(event_id, event_type, record_id=None, pipeline_id=None, **payload):
+    return SimpleNamespace(
+        id=event_id, event_type=event_type, record_id=record_id, pipeline_id=pipeline_id, payload=payload
+    )
+
+
+class CoalesceTest(SimpleTestCase):
+    """Many events about a record become one update"""
+
+    def test_saves_collapse_per_record(self):
+        items = coalesce([
+            event(1, OutboxEvent.RECORD_SAVED, 10, 1, created=True, changed_fields=[]),
+            event(2, OutboxEvent.RECORD_SAVED, 11, 1, created=False, changed_fields=['name']),
+            event(3, OutboxEvent.RECORD_SAVED, 10, 1, created=False, changed_fields=['stage']),
+        ])
+        self.assertEqual([(item.record_id, item.last_event_id) for item in items], [(11, 2), (10, 3)])
+        self.assertTrue(items[1].created)
+        self.assertEqual(items[1].changed_fields, {'stage'})
+
+    def test_last_of_delete_and_restore_wins(self):
+        deleted, = coalesce([
+            event(1, OutboxEvent.RECORD_SAVED, 10, 1),
+            event(2, OutboxEvent.RECORD_DELETED, 10, 1, title='Acme'),
+        ])
+        self.assertTrue(deleted.deleted)
+        self.assertEqual(deleted.title, 'Acme')
+
+        restored, = coalesce([
+            event(1, OutboxEvent.RECORD_DELETED, 10, 1, title='Acme'),
+            event(2, OutboxEvent.RECORD_SAVED, 10, 1),
+        ])
+        self.assertFalse(restored.deleted)
+
+    def test_relationship_changes_refresh_both_records(self):
+        items = coalesce([
+            event(1, OutboxEvent.RECORD_SAVED, 10, 1),
+            event(2, OutboxEvent.RELATIONSHIP_CHANGED, action='hard_deleted', relationship_id=5,
+                  relationship_type=3, source_record_id=10, source_pipeline_id=1,
+                  target_record_id=20, target_pipeline_id=2),
+        ])
+        passthrough, = [item for item in items if isinstance(item, PassthroughEvent)]
+        self.assertEqual(
+            [group for group, _ in passthrough.messages],
+            ['relationship_updates', 'document_10', 'document_20']
+        )
+        changes = {item.record_id: item for item in items if isinstance(item, RecordChange)}
+        self.assertEqual(set(changes), {10, 20})
+        self.assertTrue(changes[10].relationship_changed)
+        self.assertEqual(changes[20].pipeline_id, 2)
+
+    def test_field_events_pass_through(self):
+        item, = coalesce([
+            event(1, OutboxEvent.FIELD_CHANGED, pipeline_id=4, message_type='field_delete', event={'field_id': '9'}),
+        ])
+        self.assertEqual(item.messages[0], ('pipeline_fields_4', {'type': 'field_delete', 'data': {'field_id': '9'}}))
+        self.assertEqual(item.sse, [('global_activity', {'field_id': '9'})])
+
+    def test_bulk_writes_publish_one_event_per_batch(self):
+        items = coalesce([
+            event(1, OutboxEvent.RECORDS_BULK_WRITTEN, pipeline_id=4, created=True,
+                  record_ids=['10', '11'], changed_fields=[], updated_by=None),
+        ])
+        self.assertIsInstance(items[0], BulkWrite)
+
+        counts = {4: SimpleNamespace(active=12)}
+        with mock.patch('pipelines.record_counts.get_record_counts', return_value=counts):
+            messages, sse = build_messages(items)
+
+        (group, message), = messages
+        self.assertEqual(group, 'pipeline_records_4')
+        self.assertEqual(message['type'], 'record_bulk_update')
+        self.assertEqual(message['data']['type'], 'records_bulk_created')
+        self.assertEqual(message['data']['record_ids'], ['10', '11'])
+        self.assertEqual(message['data']['new_count'], 12)
+        self.assertEqual(sse, [('pipeline_records_4', message['data'])])
+
+
+class RecordDeltaTest(SimpleTestCase):
+    """Updates carry only the changed fields when every version is known"""
+
+    def change(self, *saves):
+        change, = coalesce([
+            event(number, OutboxEvent.RECORD_SAVED, 10, 1, **save) for number, save in enumerate(saves, 1)
+        ])
+        return change
+
+    def test_versions_span_coalesced_saves(self):
+        change = self.change(
+            {'changed_fields': ['name'], 'version': 4},
+            {'changed_fields': ['stage'], 'version': 5},
+        )
+        record = SimpleNamespace(version=5)
+        data = {'name': 'Acme', 'stage': 'won', 'notes': 'long text'}
+        self.assertEqual(record_delta(change, record, data, set()), (3, {'name': 'Acme', 'stage': 'won'}))
+
+    def test_relationship_changes_send_relation_fields(self):
+        change = RecordChange(10, 1, 1, relationship_changed=True)
+        record = SimpleNamespace(version=7)
+        data = {'name': 'Acme', 'company': [{'id': 3}]}
+        self.assertEqual(record_delta(change, record, data, {'company'}), (7, {'company': [{'id': 3}]}))
+
+    def test_snapshot_when_changes_are_unknown(self):
+        record = SimpleNamespace(version=5)
+        # Saved again after the batch
+        self.assertIsNone(record_delta(self.change({'changed_fields': ['name'], 'version': 4}), record, {}, set()))
+        # Changed fields not tracked
+        self.assertIsNone(record_delta(self.change({'changed_fields': [], 'version': 5}), record, {}, set()))
+        # New record
+        self.assertIsNone(record_delta(self.change({'created': True, 'version': 1}), SimpleNamespace(version=1), {}, set()))
+
+
+class OutboxWorkerTest(SimpleTestCase):
+    """Batches are acknowledged only once every group received its messages"""
+
+    def drain(self, channel_layer, batch):
+        worker = OutboxWorker(batch_size=2, channel_layer=channel_layer)
+        with mock.patch('realtime.outbox.prepare_batch', return_value=batch), \
+                mock.patch('realtime.outbox.acknowledge_batch') as acknowledge:
+            full = asyncio.run(worker.drain('tenant'))
+        return full, acknowledge
+
+    def test_publishes_in_group_order(self):
+        sent = []
+        channel_layer = SimpleNamespace(group_send=mock.AsyncMock(side_effect=lambda g, m: sent.append((g, m['n']))))
+        batch = OutboxBatch('tenant', [1, 2], [('a', {'n': 1}), ('b', {'n': 2}), ('a', {'n': 3})])
+
+        full, acknowledge = self.drain(channel_layer, batch)
+        self.assertTrue(full)
+        acknowledge.assert_called_once_with(batch)
+        self.assertEqual([n for group, n in sent if group == 'a'], [1, 3])
+
+    def test_failed_publish_is_not_acknowledged(self):
+        channel_layer = SimpleNamespace(group_send=mock.AsyncMock(side_effect=ConnectionError('redis down')))
+        full, acknowledge = self.drain(channel_layer, OutboxBatch('tenant', [1], [('a', {'n': 1})]))
+        self.assertFalse(full)
+        acknowledge.assert_not_called()
@@ -0,0 +1,45 @@
+"""
+Tests for per-subscriber field projection of record events
+"""
+from django.test import SimpleTestCase
+
+from realtime import projection
+from realtime.projection import encode_once, project_record_data
+
+
+class ProjectRecordDataTest(SimpleTestCase):
+
+    def test_hidden_fields_are_dropped(self):
+        event_data = {'record_id': '1', 'data': {'name': 'Acme', 'salary': 10}, 'changed_fields': ['name', 'salary']}
+        projected = project_record_data(event_data, frozenset({'salary'}))
+        self.assertEqual(projected['data'], {'name': 'Acme'})
+        self.assertEqual(projected['changed_fields'], ['name'])
+        self.assertEqual(event_data['data'], {'name': 'Acme', 'salary': 10})
+
+    def test_nothing_hidden_is_not_copied(self):
+        event_data = {'data': {'name': 'Acme'}}
+        self.assertIs(project_record_data(event_data, frozenset()), event_data)
+        self.assertIs(project_record_data(event_data, frozenset({'salary'})), event_data)
+
+
+class EncodeOnceTest(SimpleTestCase):
+
+    def setUp(self):
+        projection.invalidate_field_projection()
+
+    def test_same_event_and_projection_encoded_once(self):
+        calls = []
+
+        def build():
+            calls.append(1)
+            return {'type': 'record_update'}
+
+        first = encode_once('demo:5:record_update', frozenset(), build)
+        second = encode_once('demo:5:record_update', frozenset(), build)
+        encode_once('demo:5:record_update', frozenset({'salary'}), build)
+        self.assertEqual(first, second)
+        self.assertEqual(len(calls), 2)
+
+    def test_events_without_id_are_not_cached(self):
+        encode_once(None, frozenset(), dict)
+        self.assertEqual(len(projection._encoded_cache), 0)
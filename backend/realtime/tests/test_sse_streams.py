@@ -0,0 +1,147 @@
+"""
+Tests for the Redis Streams SSE transport
+"""
+import asyncio
+
+from django.test import SimpleTestCase
+
+from realtime.sse_streams import (
+    SSEEvent,
+    SSEStreamHub,
+    SSESubscription,
+    format_sse,
+    parse_event_id,
+    stream_key,
+)
+
+
+class MemoryStreams:
+    """The XADD/XRANGE/XREAD subset the hub uses, kept in memory"""
+
+    def __init__(self):
+        self.entries = {}
+        self.sequence = 0
+
+    def add(self, schema, channel, event_type='update', data='{}'):
+        self.sequence += 1
+        entry_id = f"1000-{self.sequence}"
+        self.entries.setdefault(stream_key(schema), []).append(
+            (entry_id, {'channel': channel, 'type': event_type, 'data': data})
+        )
+        return entry_id
+
+    def trim(self, schema, keep):
+        self.entries[stream_key(schema)] = self.entries[stream_key(schema)][-keep:]
+
+    async def xrevrange(self, stream, count=None):
+        return list(reversed(self.entries.get(stream, [])))[:count]
+
+    async def xrange(self, stream, min='-', max='+', count=None):
+        low = (0, 0) if min == '-' else parse_event_id(min.lstrip('('))
+        high = parse_event_id(max) if max != '+' else (float('inf'), 0)
+        entries = [
+            (entry_id, fields) for entry_id, fields in self.entries.get(stream, [])
+            if (parse_event_id(entry_id) > low if min.startswith('(') else parse_event_id(entry_id) >= low)
+            and parse_event_id(entry_id) <= high
+        ]
+        return entries[:count]
+
+    async def xread(self, streams, count=None, block=None):
+        response = []
+        for stream, cursor in streams.items():
+            entries = [e for e in self.entries.get(stream, []) if parse_event_id(e[0]) > parse_event_id(cursor)]
+            if entries:
+                response.append((stream, entries[:count]))
+        if not response:
+            await asyncio.sleep(0.01)
+        return response
+
+
+class SSEFormatTest(SimpleTestCase):
+
+    def test_event_ids(self):
+        self.assertEqual(parse_event_id('1700000000000-3'), (1700000000000, 3))
+        self.assertLess(parse_event_id('1000-9'), parse_event_id('1000-10'))
+        self.assertIsNone(parse_event_id('abc'))
+        self.assertIsNone(parse_event_id(None))
+
+    def test_frame(self):
+        self.assertEqual(
+            SSEEvent('1000-1', 'global_activity', 'record_update', '{"a": 1}').frame,
+            'id: 1000-1\nevent: record_update\ndata: {"a": 1}\n\n'
+        )
+        self.assertEqual(format_sse('connected', {'a': 1}, retry=3000), 'retry: 3000\nevent: connected\ndata: {"a": 1}\n\n')
+
+
+class SSESubscriptionTest(SimpleTestCase):
+
+    def test_filters_channels_and_replayed_events(self):
+        subscription = SSESubscription('sse_events:demo', ['a'], '1000-2')
+        subscription.offer(SSEEvent('1000-2', 'a', 'update', '{}'))
+        subscription.offer(SSEEvent('1000-3', 'b', 'update', '{}'))
+        subscription.offer(SSEEvent('1000-4', 'a', 'update', '{}'))
+        self.assertEqual(subscription.queue.qsize(), 1)
+        self.assertEqual(subscription.queue.get_nowait().id, '1000-4')
+
+    def test_overflow_resets_connection(self):
+        subscription = SSESubscription('sse_events:demo', ['a'], '0-0', queue_size=2)
+        for seq in range(1, 5):
+            subscription.offer(SSEEvent(f'1000-{seq}', 'a', 'update', '{}'))
+        self.assertTrue(subscription.overflowed)
+        self.assertEqual([subscription.queue.get_nowait().id for _ in range(2)], ['1000-1', '1000-2'])
+        self.assertIsNone(subscription.queue.get_nowait())
+
+
+class SSEStreamHubTest(SimpleTestCase):
+
+    def setUp(self):
+        self.streams = MemoryStreams()
+        self.hub = SSEStreamHub(redis_url='redis://unused', client=self.streams, block_ms=10)
+
+    def test_live_events_fan_out_once_per_stream(self):
+        async def scenario():
+            self.streams.add('demo', 'a')
+            first = await self.hub.subscribe('demo', ['a'])
+            second = await self.hub.subscribe('demo', ['a', 'b'])
+            self.streams.add('demo', 'b', data='{"n": 2}')
+            self.streams.add('demo', 'a', data='{"n": 3}')
+            received = (
+                await asyncio.wait_for(first.queue.get(), 1),
+                [await asyncio.wait_for(second.queue.get(), 1) for _ in range(2)],
+            )
+            self.hub.unsubscribe(first)
+            self.hub.unsubscribe(second)
+            return received
+
+        first, second = asyncio.run(scenario())
+        self.assertEqual(first.data, '{"n": 3}')
+        self.assertEqual([event.channel for event in second], ['b', 'a'])
+        self.assertEqual(self.hub._cursors, {})
+
+    def test_resume_replays_missed_events(self):
+        missed = self.streams.add('demo', 'a')
+        self.streams.add('demo', 'a', data='{"n": 2}')
+        self.streams.add('demo', 'b')
+
+        async def scenario():
+            subscription = await self.hub.subscribe('demo', ['a'])
+            self.hub.unsubscribe(subscription)
+            return await self.hub.replay(missed, subscription)
+
+        events, complete = asyncio.run(scenario())
+        self.assertTrue(complete)
+        self.assertEqual([event.data for event in events], ['{"n": 2}'])
+
+    def test_resume_past_trimmed_entries_asks_for_resync(self):
+        missed = self.streams.add('demo', 'a')
+        self.streams.add('demo', 'a')
+        self.streams.add('demo', 'a')
+        self.streams.trim('demo', keep=1)
+
+        async def scenario():
+            subscription = await self.hub.subscribe('demo', ['a'])
+            self.hub.unsubscribe(subscription)
+            return await self.hub.replay(missed, subscription)
+
+        events, complete = asyncio.run(scenario())
+        self.assertFalse(complete)
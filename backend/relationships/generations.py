@@ -0,0 +1,125 @@
+"""
+Generation counters for relationship graph caches
+
+Every record node (pipeline_id, record_id) has a generation in the shared
+cache, bumped after commit whenever one of its relationships or the record
+itself is saved or deleted. Changes that affect the whole graph (relationship
+types, traversal permissions) bump the tenant generation instead.
+
+Cached adjacency lists and cached query results remember the generations
+of the nodes they were computed from, read before computing. An entry is
+used only while all of them are unchanged, so hits are never stale and the
+TTLs only bound memory. Hit, miss, stale and invalidation counts are kept
+per tenant (query_cache_stats).
+"""
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+Node = Tuple[int, int]
+Generation = Tuple[int, int]    # (tenant generation, node generation)
+
+GENERATION_TTL = 60 * 60 * 24 * 30  # Longer than any entry validated against it
+RESULT_TTL = 60 * 60 * 24
+
+STATS = ('hits', 'misses', 'stale', 'invalidations')
+
+
+def _current_schema() -> str:
+    from django.db import connection
+    return getattr(connection, 'schema_name', 'public')
+
+
+def _node_key(schema: str, node: Node) -> str:
+    return f"rel_gen:{schema}:{node[0]}:{node[1]}"
+
+
+def _tenant_key(schema: str) -> str:
+    return f"rel_gen:{schema}"
+
+
+def _incr(key: str, amount: int = 1, timeout: Optional[int] = GENERATION_TTL) -> int:
+    try:
+        return cache.incr(key, amount)
+    except ValueError:
+        if cache.add(key, amount, timeout):
+            return amount
+        return cache.incr(key, amount)
+
+
+class NodeGenerations:
+    """Generations of one tenant's nodes, read from the shared cache"""
+
+    def __init__(self, schema: Optional[str] = None):
+        self.schema = schema or _current_schema()
+        self._tenant: Optional[int] = None
+
+    def tenant(self) -> int:
+        """The tenant generation, read once per instance"""
+        if self._tenant is None:
+            self._tenant = int(cache.get(_tenant_key(self.schema)) or 0)
+        return self._tenant
+
+    def get(self, nodes: Iterable[Node]) -> Dict[Node, Generation]:
+        keys = {_node_key(self.schema, node): node for node in nodes}
+        if not keys:
+            return {}
+        values = cache.get_many(list(keys))
+        tenant = self.tenant()
+        return {node: (tenant, int(values.get(key) or 0)) for key, node in keys.items()}
+
+    def is_current(self, generations: Dict[Node, Generation]) -> bool:
+        return self.get(generations) == generations
+
+
+def bump_nodes(nodes: Iterable[Node], schema: Optional[str] = None):
+    """Invalidate cached graph data of `nodes` once the current transaction commits"""
+    schema = schema or _current_schema()
+    nodes = {node for node in nodes if node[0] is not None and node[1] is not None}
+    if not nodes:
+        return
+
+    def bump():
+        try:
+            for node in nodes:
+                _incr(_node_key(schema, node))
+            record_stat('invalidations', len(nodes), schema=schema)
+        except Exception as e:
+            logger.error(f"Failed to bump relationship graph generations: {e}")
+
+    transaction.on_commit(bump)
+
+
+def bump_tenant(schema: Optional[str] = None):
+    """Invalidate all cached graph data of a tenant once the current transaction commits"""
+    schema = schema or _current_schema()
+
+    def bump():
+        try:
+            _incr(_tenant_key(schema))
+            record_stat('invalidations', schema=schema)
+        except Exception as e:
+            logger.error(f"Failed to bump relationship graph generation of {schema}: {e}")
+
+    transaction.on_commit(bump)
+
+
+def record_stat(name: str, amount: int = 1, schema: Optional[str] = None):
+    try:
+        _incr(f"rel_cache_stats:{schema or _current_schema()}:{name}", amount, timeout=None)
+    except Exception as e:
+        logger.debug(f"Failed to count relationship cache {name}: {e}")
+
+
+def query_cache_stats(schema: Optional[str] = None) -> Dict[str, float]:
+    """Hit, miss, stale and invalidation counts of the relationship query cache"""
+    schema = schema or _current_schema()
+    values = cache.get_many([f"rel_cache_stats:{schema}:{name}" for name in STATS])
+    stats = {name: int(values.get(f"rel_cache_stats:{schema}:{name}") or 0) for name in STATS}
+    lookups = stats['hits'] + stats['misses'] + stats['stale']
+    stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+    return stats
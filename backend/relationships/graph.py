@@ -0,0 +1,344 @@
+"""
+Relationship graph traversal over cached adjacency lists
+
+Records are nodes (pipeline_id, record_id) and active record-to-record
+relationships are edges. Instead of recursive CTEs that carry whole paths
+per row, traversals walk the graph breadth first in Python and load the
+adjacency of a frontier in one query per level: an indexed join of the
+frontier ids against (source_pipeline_id, source_record_id) and against
+(target_pipeline_id, target_record_id).
+
+Loaded adjacency lists are kept in a per-tenant LRU (AdjacencyCache) with
+every edge of a node, whatever the traversal's filters. Entries carry the
+node generation they were loaded at (relationships.generations) and are
+reloaded once it moves. Edges are followed source to target, and target to
+source only for bidirectional relationship types.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+Node = Tuple[int, int]  # (pipeline_id, record_id)
+Generation = Tuple[int, int]
+
+ADJACENCY_TTL = 60 * 60         # Entries are validated by generation; this only bounds memory
+ADJACENCY_CACHE_SIZE = 20000    # Nodes kept per tenant
+
+FORWARD = 'forward'
+REVERSE = 'reverse'
+BOTH = 'both'
+
+
+@dataclass(frozen=True)
+class Edge:
+    """A relationship seen from one of its endpoints"""
+    relationship_id: int
+    relationship_type_id: int
+    neighbor: Node
+    direction: str          # 'forward' when the node is the source, 'reverse' when it is the target
+    strength: float
+    is_bidirectional: bool
+
+
+AdjacencyLoader = Callable[[Sequence[Node]], Dict[Node, List[Edge]]]
+
+
+ADJACENCY_SQL = """
+SELECT 'forward', r.source_pipeline_id, r.source_record_id, r.target_pipeline_id, r.target_record_id,
+       r.id, r.relationship_type_id, r.strength, rt.is_bidirectional
+FROM unnest(%s::bigint[], %s::bigint[]) AS f(pipeline_id, record_id)
+JOIN relationships_relationship r
+  ON r.source_pipeline_id = f.pipeline_id AND r.source_record_id = f.record_id
+JOIN relationships_relationshiptype rt ON rt.id = r.relationship_type_id
+WHERE r.is_deleted = FALSE AND r.user_id IS NULL AND r.status = 'active'
+UNION ALL
+SELECT 'reverse', r.target_pipeline_id, r.target_record_id, r.source_pipeline_id, r.source_record_id,
+       r.id, r.relationship_type_id, r.strength, rt.is_bidirectional
+FROM unnest(%s::bigint[], %s::bigint[]) AS f(pipeline_id, record_id)
+JOIN relationships_relationship r
+  ON r.target_pipeline_id = f.pipeline_id AND r.target_record_id = f.record_id
+JOIN relationships_relationshiptype rt ON rt.id = r.relationship_type_id
+WHERE r.is_deleted = FALSE AND r.user_id IS NULL AND r.status = 'active'
+"""
+
+
+def load_adjacency(nodes: Sequence[Node]) -> Dict[Node, List[Edge]]:
+    """Every active edge of `nodes`, in one query against the current schema"""
+    from django.db import connection
+
+    adjacency: Dict[Node, List[Edge]] = {node: [] for node in nodes}
+    if not nodes:
+        return adjacency
+
+    pipeline_ids = [node[0] for node in nodes]
+    record_ids = [node[1] for node in nodes]
+    with connection.cursor() as cursor:
+        cursor.execute(ADJACENCY_SQL, [pipeline_ids, record_ids, pipeline_ids, record_ids])
+        for direction, pipeline_id, record_id, other_pipeline_id, other_record_id, \
+                relationship_id, type_id, strength, is_bidirectional in cursor.fetchall():
+            adjacency[(pipeline_id, record_id)].append(Edge(
+                relationship_id=relationship_id,
+                relationship_type_id=type_id,
+                neighbor=(other_pipeline_id, other_record_id),
+                direction=direction,
+                strength=float(strength) if strength is not None else 1.0,
+                is_bidirectional=is_bidirectional
+            ))
+    return adjacency
+
+
+class AdjacencyCache:
+    """Per-tenant LRU of node adjacency lists"""
+
+    def __init__(self, size: int = ADJACENCY_CACHE_SIZE, ttl: float = ADJACENCY_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._tenants: Dict[str, 'OrderedDict[Node, Tuple[float, Generation, Tuple[Edge, ...]]]'] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, schema: str, generations: Dict[Node, Generation]) -> Dict[Node, Tuple[Edge, ...]]:
+        """Cached adjacency of the nodes whose entry is still at the given generation"""
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            entries = self._tenants.get(schema)
+            if not entries:
+                return found
+            for node, generation in generations.items():
+                cached = entries.get(node)
+                if cached is None:
+                    continue
+                if cached[0] <= now or cached[1] != generation:
+                    del entries[node]
+                    continue
+                entries.move_to_end(node)
+                found[node] = cached[2]
+        return found
+
+    def set_many(self, schema: str, adjacency: Dict[Node, Iterable[Edge]], generations: Dict[Node, Generation]):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            entries = self._tenants.setdefault(schema, OrderedDict())
+            for node, edges in adjacency.items():
+                entries[node] = (expires, generations[node], tuple(edges))
+                entries.move_to_end(node)
+            while len(entries) > self.size:
+                entries.popitem(last=False)
+
+    def invalidate(self, schema: Optional[str] = None, nodes: Optional[Iterable[Node]] = None):
+        """Forget the given nodes of a tenant, the whole tenant, or everything"""
+        with self._lock:
+            if schema is None:
+                self._tenants.clear()
+            elif nodes is None:
+                self._tenants.pop(schema, None)
+            elif schema in self._tenants:
+                entries = self._tenants[schema]
+                for node in nodes:
+                    entries.pop(node, None)
+
+
+adjacency_cache = AdjacencyCache()
+
+
+@dataclass
+class Step:
+    """How a traversal reached a node"""
+    node: Node
+    parent: Optional[Node]
+    edge: Optional[Edge]
+    depth: int
+    path_relationships: Tuple[int, ...] = ()
+    path_types: Tuple[int, ...] = ()
+    path_strength: float = 1.0
+
+
+class RelationshipGraph:
+    """Breadth-first traversals of one tenant's relationship graph"""
+
+    def __init__(self, schema: Optional[str] = None, loader: Optional[AdjacencyLoader] = None,
+                 cache: Optional[AdjacencyCache] = None, generations=None):
+        if schema is None:
+            from django.db import connection
+            schema = getattr(connection, 'schema_name', 'public')
+        if generations is None:
+            from .generations import NodeGenerations
+            generations = NodeGenerations(schema)
+        self.schema = schema
+        self.loader = loader or load_adjacency
+        self.cache = cache if cache is not None else adjacency_cache
+        self.generations = generations
+        self.queries = 0
+        # Generations of every node the traversal depended on, read before its data
+        self.observed: Dict[Node, Generation] = {}
+
+    def observe(self, nodes: Iterable[Node]) -> Dict[Node, Generation]:
+        """Current generations of `nodes`, remembered in `observed`"""
+        nodes = list(dict.fromkeys(nodes))
+        unseen = [node for node in nodes if node not in self.observed]
+        if unseen:
+            self.observed.update(self.generations.get(unseen))
+        return {node: self.observed[node] for node in nodes}
+
+    def adjacency(self, nodes: Iterable[Node]) -> Dict[Node, Tuple[Edge, ...]]:
+        """Adjacency lists of `nodes`, loading the uncached or outdated ones in one batch"""
+        generations = self.observe(nodes)
+        found = self.cache.get_many(self.schema, generations)
+        missing = [node for node in generations if node not in found]
+        if missing:
+            loaded = self.loader(missing)
+            self.queries += 1
+            loaded = {node: tuple(loaded.get(node, ())) for node in missing}
+            self.cache.set_many(self.schema, loaded, generations)
+            found.update(loaded)
+        return found
+
+    @staticmethod
+    def _follows(edge: Edge, direction: str, relationship_types: Optional[Set[int]]) -> bool:
+        """Whether a traversal in `direction` may cross `edge` away from the node it belongs to"""
+        if relationship_types and edge.relationship_type_id not in relationship_types:
+            return False
+        if edge.direction == FORWARD:
+            return direction in (FORWARD, BOTH)
+        return edge.is_bidirectional and direction in (REVERSE, BOTH)
+
+    @staticmethod
+    def _leads_here(edge: Edge, relationship_types: Optional[Set[int]]) -> bool:
+        """Whether a forward traversal may cross `edge` towards the node it belongs to"""
+        if relationship_types and edge.relationship_type_id not in relationship_types:
+            return False
+        return edge.direction == REVERSE or edge.is_bidirectional
+
+    def traverse(self, start: Node, max_depth: int = 1, direction: str = BOTH,
+                 relationship_types: Optional[Iterable[int]] = None,
+                 limit: Optional[int] = None,
+                 can_cross: Optional[Callable[[Edge], bool]] = None) -> List[Step]:
+        """
+        Bounded BFS from `start`: the first step reaching each node, by depth
+
+        Edges rejected by `can_cross` (e.g. forbidden by traversal
+        permissions) are pruned, so nothing is reached through them.
+        Stops after the level at which `limit` nodes were reached.
+        """
+        types = set(relationship_types) if relationship_types else None
+        visited = {start}
+        frontier = [Step(start, None, None, 0)]
+        steps: List[Step] = []
+
+        for depth in range(1, max_depth + 1):
+            if not frontier or (limit and len(steps) >= limit):
+                break
+            adjacency = self.adjacency(step.node for step in frontier)
+            next_frontier = []
+            for step in frontier:
+                for edge in adjacency.get(step.node, ()):
+                    if edge.neighbor in visited or not self._follows(edge, direction, types):
+                        continue
+                    if can_cross is not None and not can_cross(edge):
+                        continue
+                    visited.add(edge.neighbor)
+                    next_frontier.append(Step(
+                        node=edge.neighbor,
+                        parent=step.node,
+                        edge=edge,
+                        depth=depth,
+                        path_relationships=step.path_relationships + (edge.relationship_id,),
+                        path_types=step.path_types + (edge.relationship_type_id,),
+                        path_strength=step.path_strength * edge.strength
+                    ))
+            steps.extend(next_frontier)
+            frontier = next_frontier
+
+        return steps
+
+    def shortest_path(self, source: Node, target: Node, max_depth: int = 5,
+                      relationship_types: Optional[Iterable[int]] = None) -> Optional[List[int]]:
+        """
+        Relationship ids of a shortest path from source to target, None when
+        there is none within max_depth edges
+
+        Bidirectional BFS: the smaller of the two frontiers is expanded one
+        whole level at a time, so the searches meet after visiting about
+        twice the square root of the nodes a one-sided search would.
+        """
+        if source == target:
+            return []
+        types = set(relationship_types) if relationship_types else None
+
+        # node -> (neighbor towards the search origin, relationship id)
+        forward: Dict[Node, Optional[Tuple[Node, int]]] = {source: None}
+        backward: Dict[Node, Optional[Tuple[Node, int]]] = {target: None}
+        forward_frontier: Deque[Node] = deque([source])
+        backward_frontier: Deque[Node] = deque([target])
+        forward_depth = backward_depth = 0
+
+        while forward_frontier and backward_frontier and forward_depth + backward_depth < max_depth:
+            expand_forward = len(forward_frontier) <= len(backward_frontier)
+            frontier = forward_frontier if expand_forward else backward_frontier
+            seen, other = (forward, backward) if expand_forward else (backward, forward)
+
+            adjacency = self.adjacency(frontier)
+            next_frontier: Deque[Node] = deque()
+            meetings = []
+            for node in frontier:
+                for edge in adjacency.get(node, ()):
+                    crosses = (
+                        self._follows(edge, BOTH, types) if expand_forward
+                        else self._leads_here(edge, types)
+                    )
+                    if not crosses or edge.neighbor in seen:
+                        continue
+                    seen[edge.neighbor] = (node, edge.relationship_id)
+                    next_frontier.append(edge.neighbor)
+                    if edge.neighbor in other:
+                        meetings.append(edge.neighbor)
+
+            if expand_forward:
+                forward_frontier, forward_depth = next_frontier, forward_depth + 1
+            else:
+                backward_frontier, backward_depth = next_frontier, backward_depth + 1
+
+            if meetings:
+                # Every meeting node of this level is at the same distance from the side just expanded
+                best = min(meetings, key=lambda node: self._distance(other, node))
+                return self._join(forward, backward, best)
+
+        return None
+
+    @staticmethod
+    def _distance(parents: Dict[Node, Optional[Tuple[Node, int]]], node: Node) -> int:
+        distance = 0
+        while parents[node] is not None:
+            node = parents[node][0]
+            distance += 1
+        return distance
+
+    @staticmethod
+    def _join(forward, backward, meeting: Node) -> List[int]:
+        head = []
+        node = meeting
+        while forward[node] is not None:
+            node, relationship_id = forward[node]
+            head.append(relationship_id)
+        tail = []
+        node = meeting
+        while backward[node] is not None:
+            node, relationship_id = backward[node]
+            tail.append(relationship_id)
+        return list(reversed(head)) + tail
+
+
+def invalidate_relationship_adjacency(relationship, schema: Optional[str] = None):
+    """Outdate cached graph data of both endpoints of a relationship, in every process"""
+    from .generations import bump_nodes
+
+    if schema is None:
+        from django.db import connection
+        schema = getattr(connection, 'schema_name', 'public')
+    nodes = [(relationship.target_pipeline_id, relationship.target_record_id)]
+    if relationship.source_pipeline_id is not None:
+        nodes.append((relationship.source_pipeline_id, relationship.source_record_id))
+    adjacency_cache.invalidate(schema, nodes)
+    bump_nodes(nodes, schema=schema)
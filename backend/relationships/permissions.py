@@ -1,7 +1,8 @@
 """
 Relationship permission management system
 """
-from typing import List, Dict, Any, Optional, Set
+from dataclasses import dataclass, field
+from typing import Callable, List, Dict, Any, Optional, Set, Tuple
 from django.core.cache import cache
 from django.contrib.auth import get_user_model
 from authentication.permissions import AsyncPermissionManager
@@ -11,6 +12,127 @@ import logging
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+TRAVERSAL_MATRIX_TTL = 300
+DEFAULT_MAX_TRAVERSAL_DEPTH = 3
+
+
+@dataclass(frozen=True)
+class TraversalRule:
+    """PermissionTraversal settings of one user type for one relationship type"""
+    can_traverse_forward: bool = True
+    can_traverse_reverse: bool = True
+    max_depth: int = DEFAULT_MAX_TRAVERSAL_DEPTH
+    visible_fields: Dict[str, Dict[str, bool]] = field(default_factory=dict)
+    restricted_fields: Dict[str, Dict[str, bool]] = field(default_factory=dict)
+
+
+DEFAULT_TRAVERSAL_RULE = TraversalRule()
+
+
+def _traversal_matrix_version_key() -> str:
+    from django.db import connection
+    return f"rel_perm_matrix_version:{getattr(connection, 'schema_name', 'public')}"
+
+
+def invalidate_traversal_matrices():
+    """Make every cached traversal matrix of the current tenant stale"""
+    key = _traversal_matrix_version_key()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+
+def load_traversal_rules(user_type_id: Optional[int]) -> Dict[int, TraversalRule]:
+    """Rules of a user type by relationship type id, cached until PermissionTraversal changes"""
+    if not user_type_id:
+        return {}
+
+    from django.db import connection
+    version = cache.get_or_set(_traversal_matrix_version_key(), 1, None)
+    cache_key = f"rel_perm_matrix:{getattr(connection, 'schema_name', 'public')}:{user_type_id}:{version}"
+    rules = cache.get(cache_key)
+    if rules is None:
+        rules = {
+            row['relationship_type_id']: TraversalRule(
+                can_traverse_forward=row['can_traverse_forward'],
+                can_traverse_reverse=row['can_traverse_reverse'],
+                max_depth=row['max_depth'],
+                visible_fields=row['visible_fields'] or {},
+                restricted_fields=row['restricted_fields'] or {}
+            )
+            for row in PermissionTraversal.objects.filter(user_type_id=user_type_id).values(
+                'relationship_type_id', 'can_traverse_forward', 'can_traverse_reverse',
+                'max_depth', 'visible_fields', 'restricted_fields'
+            )
+        }
+        cache.set(cache_key, rules, TRAVERSAL_MATRIX_TTL)
+    return rules
+
+
+class TraversalPermissionMatrix:
+    """
+    Traversal permissions of one user for every relationship type and direction
+
+    Built from one PermissionTraversal query per user type (cached), so
+    checking a whole traversal costs no query per row. Relationship types
+    without a rule may be traversed both ways, as before.
+    """
+
+    def __init__(self, rules: Dict[int, TraversalRule], authenticated: bool = True,
+                 base_permissions: Optional[Callable[[], Dict[str, Any]]] = None):
+        self.rules = rules
+        self.authenticated = authenticated
+        self._base_permissions_loader = base_permissions or dict
+        self._base_permissions: Optional[Dict[str, Any]] = None
+        self._visible_fields: Dict[Tuple[int, int], Dict[str, bool]] = {}
+
+    def rule(self, relationship_type_id: int) -> TraversalRule:
+        return self.rules.get(relationship_type_id, DEFAULT_TRAVERSAL_RULE)
+
+    def can_traverse(self, relationship_type_id: int, direction: str = 'forward') -> bool:
+        if not self.authenticated:
+            return False
+        rule = self.rule(relationship_type_id)
+        return rule.can_traverse_forward if direction == 'forward' else rule.can_traverse_reverse
+
+    def max_depth(self, relationship_type_id: int) -> int:
+        return self.rule(relationship_type_id).max_depth
+
+    def base_field_permissions(self, pipeline_id: int) -> Dict[str, bool]:
+        if self._base_permissions is None:
+            self._base_permissions = self._base_permissions_loader() or {}
+        return self._base_permissions.get('pipelines', {}).get(str(pipeline_id), {}).get('fields', {})
+
+    def visible_fields(self, relationship_type_id: int, target_pipeline_id: int) -> Dict[str, bool]:
+        """Field visibility of a pipeline's records reached through a relationship type"""
+        key = (relationship_type_id, target_pipeline_id)
+        if key not in self._visible_fields:
+            self._visible_fields[key] = self._combine_field_visibility(
+                self.rule(relationship_type_id), target_pipeline_id
+            )
+        return self._visible_fields[key]
+
+    def _combine_field_visibility(self, rule: TraversalRule, target_pipeline_id: int) -> Dict[str, bool]:
+        base_field_perms = self.base_field_permissions(target_pipeline_id)
+        visible_fields = rule.visible_fields.get(str(target_pipeline_id), {})
+        restricted_fields = rule.restricted_fields.get(str(target_pipeline_id), {})
+
+        # If no specific config, use base permissions
+        if not visible_fields and not restricted_fields:
+            return base_field_perms
+
+        # Combine with base permissions (more restrictive wins)
+        final_permissions = {}
+        for field_name, base_perm in base_field_perms.items():
+            if field_name in restricted_fields:
+                final_permissions[field_name] = False
+            elif field_name in visible_fields:
+                final_permissions[field_name] = visible_fields[field_name] and base_perm
+            else:
+                final_permissions[field_name] = base_perm
+        return final_permissions
+
 
 class RelationshipPermissionManager:
     """Manage relationship traversal permissions"""
@@ -19,6 +141,20 @@ class RelationshipPermissionManager:
         self.user = user
         self.base_permission_manager = AsyncPermissionManager(user)
         self.cache_key_prefix = f"rel_perms:{user.id}"
+        self._traversal_matrix: Optional[TraversalPermissionMatrix] = None
+    
+    def traversal_matrix(self) -> TraversalPermissionMatrix:
+        """Traversal permissions of the user, loaded once per manager"""
+        if self._traversal_matrix is None:
+            from authentication.permissions import SyncPermissionManager
+
+            authenticated = self.user.is_authenticated
+            self._traversal_matrix = TraversalPermissionMatrix(
+                load_traversal_rules(getattr(self.user, 'user_type_id', None)) if authenticated else {},
+                authenticated=authenticated,
+                base_permissions=SyncPermissionManager(self.user).get_user_permissions
+            )
+        return self._traversal_matrix
     
     def can_traverse_relationship(
         self, 
@@ -26,59 +162,11 @@ class RelationshipPermissionManager:
         direction: str = 'forward'
     ) -> bool:
         """Check if user can traverse a specific relationship type"""
-        cache_key = f"{self.cache_key_prefix}:traverse:{relationship_type.id}:{direction}"
-        result = cache.get(cache_key)
-        
-        if result is None:
-            result = self._calculate_traversal_permission(relationship_type, direction)
-            cache.set(cache_key, result, 300)  # 5 minutes
-        
-        return result
-    
-    def _calculate_traversal_permission(
-        self, 
-        relationship_type: RelationshipType, 
-        direction: str
-    ) -> bool:
-        """Calculate if user can traverse relationship in given direction"""
-        # Basic permission check - user must be authenticated
-        if not self.user.is_authenticated:
-            return False
-        
-        # Get user type specific traversal settings
-        try:
-            traversal_config = PermissionTraversal.objects.get(
-                user_type=self.user.user_type,
-                relationship_type=relationship_type
-            )
-            
-            if direction == 'forward':
-                return traversal_config.can_traverse_forward
-            else:
-                return traversal_config.can_traverse_reverse
-                
-        except PermissionTraversal.DoesNotExist:
-            # Default to allowing traversal if no specific config
-            return True
+        return self.traversal_matrix().can_traverse(relationship_type.id, direction)
     
     def get_max_traversal_depth(self, relationship_type: RelationshipType) -> int:
         """Get maximum traversal depth for user and relationship type"""
-        cache_key = f"{self.cache_key_prefix}:max_depth:{relationship_type.id}"
-        result = cache.get(cache_key)
-        
-        if result is None:
-            try:
-                traversal_config = PermissionTraversal.objects.get(
-                    user_type=self.user.user_type,
-                    relationship_type=relationship_type
-                )
-                result = traversal_config.max_depth
-            except PermissionTraversal.DoesNotExist:
-                result = 3  # Default max depth
-            
-            cache.set(cache_key, result, 300)
-        
-        return result
+        return self.traversal_matrix().max_depth(relationship_type.id)
     
     def get_visible_fields_through_relationship(
         self, 
@@ -86,57 +174,7 @@ class RelationshipPermissionManager:
         target_pipeline_id: int
     ) -> Dict[str, bool]:
         """Get field visibility when accessing records through relationships"""
-        cache_key = f"{self.cache_key_prefix}:fields:{relationship_type.id}:{target_pipeline_id}"
-        result = cache.get(cache_key)
-        
-        if result is None:
-            result = self._calculate_field_visibility(relationship_type, target_pipeline_id)
-            cache.set(cache_key, result, 300)
-        
-        return result
-    
-    def _calculate_field_visibility(
-        self, 
-        relationship_type: RelationshipType,
-        target_pipeline_id: int
-    ) -> Dict[str, bool]:
-        """Calculate field visibility through relationship"""
-        # Start with base pipeline permissions
-        base_permissions = self.base_permission_manager.get_user_permissions()
-        pipeline_perms = base_permissions.get('pipelines', {}).get(str(target_pipeline_id), {})
-        base_field_perms = pipeline_perms.get('fields', {})
-        
-        # Apply relationship-specific restrictions
-        try:
-            traversal_config = PermissionTraversal.objects.get(
-                user_type=self.user.user_type,
-                relationship_type=relationship_type
-            )
-            
-            # Start with visible fields from traversal config
-            visible_fields = traversal_config.visible_fields.get(str(target_pipeline_id), {})
-            restricted_fields = traversal_config.restricted_fields.get(str(target_pipeline_id), {})
-            
-            # Combine with base permissions (more restrictive wins)
-            final_permissions = {}
-            
-            # If no specific config, use base permissions
-            if not visible_fields and not restricted_fields:
-                return base_field_perms
-            
-            # Apply restrictions
-            for field_name, base_perm in base_field_perms.items():
-                if field_name in restricted_fields:
-                    final_permissions[field_name] = False
-                elif field_name in visible_fields:
-                    final_permissions[field_name] = visible_fields[field_name] and base_perm
-                else:
-                    final_permissions[field_name] = base_perm
-            
-            return final_permissions
-            
-        except PermissionTraversal.DoesNotExist:
-            return base_field_perms
+        return self.traversal_matrix().visible_fields(relationship_type.id, target_pipeline_id)
     
     def validate_relationship_path(
         self, 
@@ -229,7 +267,5 @@ class RelationshipPermissionManager:
     
     def clear_cache(self):
         """Clear relationship permission cache for user"""
-        # In production, this would use Redis SCAN to clear matching keys
-        # For now, we'll rely on TTL expiration
         logger.info(f"Clearing relationship permission cache for user {self.user.id}")
-        pass
\ No newline at end of file
+        self._traversal_matrix = None
\ No newline at end of file
@@ -1,5 +1,5 @@
 """
-Relationship query engine with recursive graph traversal
+Relationship query engine with breadth-first graph traversal
 """
 from typing import List, Dict, Any, Optional, Set, Tuple
 from django.db import connection, transaction
@@ -7,6 +7,8 @@ from django.core.cache import cache
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from pipelines.models import Pipeline, Record
+from .generations import RESULT_TTL, record_stat
+from .graph import RelationshipGraph
 from .models import Relationship, RelationshipType, RelationshipPath
 from .permissions import RelationshipPermissionManager
 import json
@@ -23,7 +25,7 @@ class RelationshipQueryManager:
     def __init__(self, user: User):
         self.user = user
         self.permission_manager = RelationshipPermissionManager(user)
-        self.cache_ttl = 300  # 5 minutes
+        self.cache_ttl = RESULT_TTL  # Entries are validated by node generations
     
     def get_related_records(
         self,
@@ -36,18 +38,21 @@ class RelationshipQueryManager:
         limit: Optional[int] = None
     ) -> Dict[str, Any]:
         """Get related records with permission filtering"""
-        
+        graph = RelationshipGraph()
+        root = (source_pipeline_id, source_record_id)
         cache_key = self._generate_cache_key(
             'related_records',
             source_pipeline_id,
             source_record_id,
+            graph.observe([root])[root],
             relationship_types,
             max_depth,
             direction,
+            include_paths,
             limit
         )
         
-        result = cache.get(cache_key)
+        result = self._get_cached_result(cache_key, graph)
         if result is not None:
             return result
         
@@ -60,13 +65,14 @@ class RelationshipQueryManager:
                 max_depth=max_depth,
                 direction=direction,
                 include_paths=include_paths,
-                limit=limit
+                limit=limit,
+                graph=graph
             )
             
             # Filter results based on permissions
             result = self._filter_results_by_permissions(result)
             
-            cache.set(cache_key, result, self.cache_ttl)
+            self._cache_result(cache_key, result, graph)
             return result
             
         except Exception as e:
@@ -88,58 +94,64 @@ class RelationshipQueryManager:
         max_depth: int = 5
     ) -> Optional[Dict[str, Any]]:
         """Find shortest path between two records"""
-        
+        graph = RelationshipGraph()
+        source = (source_pipeline_id, source_record_id)
+        target = (target_pipeline_id, target_record_id)
+        endpoints = graph.observe([source, target])
         cache_key = self._generate_cache_key(
             'shortest_path',
             source_pipeline_id,
             source_record_id,
+            endpoints[source],
             target_pipeline_id,
             target_record_id,
+            endpoints[target],
             max_depth
         )
         
-        result = cache.get(cache_key)
+        result = self._get_cached_result(cache_key, graph)
         if result is not None:
             return result
         
-        # Check if path already computed and cached in RelationshipPath
-        try:
-            cached_path = RelationshipPath.objects.filter(
-                source_pipeline_id=source_pipeline_id,
-                source_record_id=source_record_id,
-                target_pipeline_id=target_pipeline_id,
-                target_record_id=target_record_id
-            ).order_by('path_length').first()
-            
-            if cached_path and not cached_path.is_expired():
-                result = self._convert_path_to_result(cached_path)
-                cache.set(cache_key, result, self.cache_ttl)
-                return result
-                
-        except Exception as e:
-            logger.warning(f"Error checking cached path: {e}")
-        
-        # Compute path using recursive CTE
+        # Compute path with bidirectional BFS
         try:
             result = self._compute_shortest_path(
                 source_pipeline_id,
                 source_record_id,
                 target_pipeline_id,
                 target_record_id,
-                max_depth
+                max_depth,
+                graph=graph
             )
             
-            # Cache the computed path
+            # Materialize the computed path for the paths API
             if result and result.get('found') and result.get('path'):
-                self._cache_computed_path(result)
+                self._cache_computed_path(
+                    result, source_pipeline_id, source_record_id, target_pipeline_id, target_record_id
+                )
             
-            cache.set(cache_key, result, self.cache_ttl)
+            self._cache_result(cache_key, result, graph)
             return result
             
         except Exception as e:
             logger.error(f"Error computing shortest path: {e}")
             return {'found': False, 'path_length': None, 'path': None, 'error': str(e)}
     
+    def _get_cached_result(self, cache_key: str, graph: RelationshipGraph) -> Optional[Dict[str, Any]]:
+        """Cached result whose nodes are all still at the generations it was computed from"""
+        entry = cache.get(cache_key)
+        if entry is None:
+            record_stat('misses')
+            return None
+        if not graph.generations.is_current(entry['generations']):
+            record_stat('stale')
+            return None
+        record_stat('hits')
+        return entry['result']
+    
+    def _cache_result(self, cache_key: str, result: Dict[str, Any], graph: RelationshipGraph):
+        cache.set(cache_key, {'generations': dict(graph.observed), 'result': result}, self.cache_ttl)
+    
     def _execute_traversal_query(
         self,
         source_pipeline_id: int,
@@ -148,277 +160,118 @@ class RelationshipQueryManager:
         max_depth: int,
         direction: str,
         include_paths: bool,
-        limit: Optional[int]
+        limit: Optional[int],
+        graph: Optional[RelationshipGraph] = None
     ) -> Dict[str, Any]:
-        """Execute recursive traversal query using PostgreSQL CTE"""
+        """Bounded BFS over cached adjacency lists, then one query for the reached records"""
+        graph = graph or RelationshipGraph()
+        source = (source_pipeline_id, source_record_id)
+        matrix = self.permission_manager.traversal_matrix()
+        steps = graph.traverse(
+            source,
+            max_depth=max_depth,
+            direction=direction,
+            relationship_types=relationship_types,
+            limit=limit,
+            can_cross=lambda edge: matrix.can_traverse(edge.relationship_type_id, edge.direction)
+        )
+        steps.sort(key=lambda step: (step.depth, -step.path_strength))
+        if limit:
+            steps = steps[:limit]
         
-        with connection.cursor() as cursor:
-            # Base query parameters
-            params = [source_pipeline_id, source_record_id]
-            
-            # Build relationship type filter
-            type_filter = ""
-            if relationship_types:
-                type_placeholders = ','.join(['%s'] * len(relationship_types))
-                type_filter = f"AND r.relationship_type_id IN ({type_placeholders})"
-                params.extend(relationship_types)
-            
-            # Build direction conditions
-            forward_condition = """
-                r.source_pipeline_id = %s 
-                AND r.source_record_id = %s
-                AND r.is_deleted = FALSE
-                AND r.status = 'active'
-            """
-            
-            reverse_condition = """
-                r.target_pipeline_id = %s 
-                AND r.target_record_id = %s
-                AND r.is_deleted = FALSE
-                AND r.status = 'active'
-                AND rt.is_bidirectional = TRUE
-            """
-            
-            # Recursive CTE for traversal
-            if direction == 'forward':
-                direction_sql = forward_condition
-                params_for_direction = params[:2]  # Only source params
-            elif direction == 'reverse':
-                direction_sql = reverse_condition
-                params_for_direction = params[:2]  # Only source params
-            else:  # both
-                direction_sql = f"({forward_condition}) OR ({reverse_condition})"
-                params_for_direction = params[:2] + params[:2]  # Both source params twice
-            
-            query = f"""
-            WITH RECURSIVE relationship_traversal AS (
-                -- Base case: direct relationships
-                SELECT 
-                    r.id as relationship_id,
-                    r.relationship_type_id,
-                    CASE 
-                        WHEN r.source_pipeline_id = %s AND r.source_record_id = %s 
-                        THEN r.source_pipeline_id
-                        ELSE r.target_pipeline_id
-                    END as source_pipeline_id,
-                    CASE 
-                        WHEN r.source_pipeline_id = %s AND r.source_record_id = %s 
-                        THEN r.source_record_id
-                        ELSE r.target_record_id
-                    END as source_record_id,
-                    CASE 
-                        WHEN r.source_pipeline_id = %s AND r.source_record_id = %s 
-                        THEN r.target_pipeline_id
-                        ELSE r.source_pipeline_id
-                    END as target_pipeline_id,
-                    CASE 
-                        WHEN r.source_pipeline_id = %s AND r.source_record_id = %s 
-                        THEN r.target_record_id
-                        ELSE r.source_record_id
-                    END as target_record_id,
-                    rt.forward_label,
-                    rt.reverse_label,
-                    1 as depth,
-                    ARRAY[r.id] as path_relationships,
-                    ARRAY[r.relationship_type_id] as path_types,
-                    r.strength as path_strength,
-                    CASE 
-                        WHEN r.source_pipeline_id = %s AND r.source_record_id = %s 
-                        THEN 'forward'
-                        ELSE 'reverse'
-                    END as direction
-                FROM relationships_relationship r
-                JOIN relationships_relationshiptype rt ON r.relationship_type_id = rt.id
-                WHERE ({direction_sql})
-                  {type_filter}
-                
-                UNION ALL
-                
-                -- Recursive case: follow relationships
-                SELECT 
-                    r.id as relationship_id,
-                    r.relationship_type_id,
-                    rt.source_pipeline_id,
-                    rt.source_record_id,
-                    CASE 
-                        WHEN r.source_pipeline_id = rt.target_pipeline_id AND r.source_record_id = rt.target_record_id
-                        THEN r.target_pipeline_id
-                        ELSE r.source_pipeline_id
-                    END as target_pipeline_id,
-                    CASE 
-                        WHEN r.source_pipeline_id = rt.target_pipeline_id AND r.source_record_id = rt.target_record_id
-                        THEN r.target_record_id
-                        ELSE r.source_record_id
-                    END as target_record_id,
-                    rtype.forward_label,
-                    rtype.reverse_label,
-                    rt.depth + 1,
-                    rt.path_relationships || r.id,
-                    rt.path_types || r.relationship_type_id,
-                    rt.path_strength * r.strength,
-                    CASE 
-                        WHEN r.source_pipeline_id = rt.target_pipeline_id AND r.source_record_id = rt.target_record_id
-                        THEN 'forward'
-                        ELSE 'reverse'
-                    END as direction
-                FROM relationships_relationship r
-                JOIN relationships_relationshiptype rtype ON r.relationship_type_id = rtype.id
-                JOIN relationship_traversal rt ON (
-                    (r.source_pipeline_id = rt.target_pipeline_id AND r.source_record_id = rt.target_record_id) OR
-                    (r.target_pipeline_id = rt.target_pipeline_id AND r.target_record_id = rt.target_record_id)
-                )
-                WHERE rt.depth < %s
-                  AND r.is_deleted = FALSE
-                  AND r.status = 'active'
-                  AND r.id != ALL(rt.path_relationships)  -- Prevent cycles
-                  {type_filter}
-            )
-            SELECT 
-                rt.*,
-                sp.name as source_pipeline_name,
-                tp.name as target_pipeline_name,
-                sr.title as source_record_title,
-                tr.title as target_record_title,
-                sr.data as source_record_data,
-                tr.data as target_record_data
-            FROM relationship_traversal rt
-            JOIN pipelines_pipeline sp ON rt.source_pipeline_id = sp.id
-            JOIN pipelines_pipeline tp ON rt.target_pipeline_id = tp.id
-            LEFT JOIN pipelines_record sr ON rt.source_pipeline_id = sr.pipeline_id AND rt.source_record_id = sr.id AND sr.is_deleted = FALSE
-            LEFT JOIN pipelines_record tr ON rt.target_pipeline_id = tr.pipeline_id AND rt.target_record_id = tr.id AND tr.is_deleted = FALSE
-            ORDER BY rt.depth, rt.path_strength DESC
-            """
-            
-            # Add limit if specified
-            if limit:
-                query += f" LIMIT {limit}"
-            
-            # Prepare all parameters
-            query_params = (
-                params_for_direction + params_for_direction + params_for_direction + params_for_direction + params_for_direction +  # For CASE conditions
-                [max_depth]  # For depth limit
-            )
-            
-            if relationship_types:
-                query_params = list(query_params) + relationship_types  # Add type filter params again for recursive part
-            
-            cursor.execute(query, query_params)
-            columns = [col[0] for col in cursor.description]
-            results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        # The reached records' data is part of the result
+        graph.observe(step.node for step in steps)
+        records = self._load_traversal_records([source] + [step.node for step in steps])
+        source_row = records.get(source, {})
+        
+        results = []
+        for step in steps:
+            target_row = records.get(step.node, {})
+            results.append({
+                'relationship_id': step.edge.relationship_id,
+                'relationship_type_id': step.edge.relationship_type_id,
+                'source_pipeline_id': source_pipeline_id,
+                'source_record_id': source_record_id,
+                'target_pipeline_id': step.node[0],
+                'target_record_id': step.node[1],
+                'depth': step.depth,
+                'path_relationships': list(step.path_relationships),
+                'path_types': list(step.path_types),
+                'path_strength': step.path_strength,
+                'direction': step.edge.direction,
+                'source_pipeline_name': source_row.get('pipeline__name', ''),
+                'target_pipeline_name': target_row.get('pipeline__name', ''),
+                'source_record_title': source_row.get('title'),
+                'target_record_title': target_row.get('title'),
+                'source_record_data': source_row.get('data'),
+                'target_record_data': target_row.get('data'),
+            })
         
         return self._organize_traversal_results(results, include_paths)
     
+    def _load_traversal_records(self, nodes: List[Tuple[int, int]]) -> Dict[Tuple[int, int], Dict[str, Any]]:
+        """Title, data and pipeline name of the non-deleted records among `nodes`"""
+        wanted = set(nodes)
+        rows = Record.objects.filter(
+            id__in={record_id for _, record_id in wanted}
+        ).values('id', 'pipeline_id', 'pipeline__name', 'title', 'data')
+        return {
+            (row['pipeline_id'], row['id']): row
+            for row in rows
+            if (row['pipeline_id'], row['id']) in wanted
+        }
+    
     def _compute_shortest_path(
         self,
         source_pipeline_id: int,
         source_record_id: int,
         target_pipeline_id: int,
         target_record_id: int,
-        max_depth: int
+        max_depth: int,
+        graph: Optional[RelationshipGraph] = None
     ) -> Dict[str, Any]:
         """Compute shortest path using bidirectional BFS"""
+        path_relationships = (graph or RelationshipGraph()).shortest_path(
+            (source_pipeline_id, source_record_id),
+            (target_pipeline_id, target_record_id),
+            max_depth=max_depth
+        )
         
-        with connection.cursor() as cursor:
-            query = """
-            WITH RECURSIVE path_search AS (
-                -- Forward search from source
-                SELECT 
-                    %s as search_pipeline_id,
-                    %s as search_record_id,
-                    r.target_pipeline_id as current_pipeline_id,
-                    r.target_record_id as current_record_id,
-                    1 as depth,
-                    ARRAY[r.id] as path_relationships,
-                    'forward' as search_direction
-                FROM relationships_relationship r
-                WHERE r.source_pipeline_id = %s 
-                  AND r.source_record_id = %s
-                  AND r.is_deleted = FALSE
-                  AND r.status = 'active'
-                
-                UNION ALL
-                
-                -- Continue forward search
-                SELECT 
-                    ps.search_pipeline_id,
-                    ps.search_record_id,
-                    r.target_pipeline_id,
-                    r.target_record_id,
-                    ps.depth + 1,
-                    ps.path_relationships || r.id,
-                    ps.search_direction
-                FROM path_search ps
-                JOIN relationships_relationship r ON (
-                    r.source_pipeline_id = ps.current_pipeline_id AND 
-                    r.source_record_id = ps.current_record_id
-                )
-                WHERE ps.depth < %s
-                  AND r.is_deleted = FALSE
-                  AND r.status = 'active'
-                  AND r.id != ALL(ps.path_relationships)
-            )
-            SELECT * FROM path_search 
-            WHERE current_pipeline_id = %s AND current_record_id = %s
-            ORDER BY depth
-            LIMIT 1
-            """
-            
-            cursor.execute(query, [
-                source_pipeline_id, source_record_id,  # search identifiers
-                source_pipeline_id, source_record_id,  # starting point
-                max_depth,  # depth limit
-                target_pipeline_id, target_record_id   # target
-            ])
-            
-            result = cursor.fetchone()
-            
-            if result:
-                columns = [col[0] for col in cursor.description]
-                path_data = dict(zip(columns, result))
-                
-                return {
-                    'found': True,
-                    'path_length': path_data['depth'],
-                    'path_relationships': path_data['path_relationships'],
-                    'path': self._reconstruct_path_details(path_data['path_relationships'])
-                }
-            
-            return {'found': False, 'path_length': None, 'path': None}
+        if path_relationships:
+            return {
+                'found': True,
+                'path_length': len(path_relationships),
+                'path_relationships': path_relationships,
+                'path': self._reconstruct_path_details(path_relationships)
+            }
+        
+        return {'found': False, 'path_length': None, 'path': None}
     
     def _filter_results_by_permissions(self, results: Dict[str, Any]) -> Dict[str, Any]:
-        """Filter query results based on user permissions"""
+        """Filter query results based on user permissions, without a query per row"""
         if not results.get('relationships'):
             return results
         
+        matrix = self.permission_manager.traversal_matrix()
         filtered_relationships = []
         
         for rel_data in results['relationships']:
             relationship_type_id = rel_data.get('relationship_type_id')
             direction = rel_data.get('direction', 'forward')
             
-            try:
-                relationship_type = RelationshipType.objects.get(id=relationship_type_id)
-            except RelationshipType.DoesNotExist:
-                continue
-            
-            # Check traversal permission
-            if not self.permission_manager.can_traverse_relationship(relationship_type, direction):
+            # Forbidden edges are pruned during traversal; this guards cached results
+            if not matrix.can_traverse(relationship_type_id, direction):
                 continue
             
             # Filter target record fields based on permissions
             target_pipeline_id = rel_data.get('target_pipeline_id')
-            if target_pipeline_id:
-                visible_fields = self.permission_manager.get_visible_fields_through_relationship(
-                    relationship_type, target_pipeline_id
-                )
-                
-                # Apply field filtering to target record data
-                if rel_data.get('target_record_data'):
-                    filtered_data = {}
-                    for field_name, field_value in rel_data['target_record_data'].items():
-                        if visible_fields.get(field_name, True):  # Default to visible
-                            filtered_data[field_name] = field_value
-                    rel_data['target_record_data'] = filtered_data
+            if target_pipeline_id and rel_data.get('target_record_data'):
+                visible_fields = matrix.visible_fields(relationship_type_id, target_pipeline_id)
+                rel_data['target_record_data'] = {
+                    field_name: field_value
+                    for field_name, field_value in rel_data['target_record_data'].items()
+                    if visible_fields.get(field_name, True)  # Default to visible
+                }
             
             filtered_relationships.append(rel_data)
         
@@ -495,14 +348,22 @@ class RelationshipQueryManager:
     
     def _generate_cache_key(self, operation: str, *args) -> str:
         """Generate cache key for relationship queries"""
-        key_parts = [f"rel_query:{self.user.id}", operation] + [str(arg) for arg in args]
+        schema = getattr(connection, 'schema_name', 'public')
+        key_parts = [f"rel_query:{schema}:{self.user.id}", operation] + [str(arg) for arg in args]
         key_string = ":".join(key_parts)
         # Hash long keys to prevent cache key size issues
         if len(key_string) > 200:
             return hashlib.md5(key_string.encode()).hexdigest()
         return key_string
     
-    def _cache_computed_path(self, path_result: Dict[str, Any]):
+    def _cache_computed_path(
+        self,
+        path_result: Dict[str, Any],
+        source_pipeline_id: int,
+        source_record_id: int,
+        target_pipeline_id: int,
+        target_record_id: int
+    ):
         """Cache computed path in RelationshipPath table"""
         try:
             if not path_result.get('found') or not path_result.get('path_relationships'):
@@ -511,24 +372,23 @@ class RelationshipQueryManager:
             # Extract path information
             path_relationships = path_result['path_relationships']
             path_length = path_result['path_length']
-            
-            # Get first and last relationships to determine endpoints
-            first_rel = Relationship.objects.get(id=path_relationships[0])
+            types_by_id = dict(
+                Relationship.objects.filter(id__in=path_relationships).values_list('id', 'relationship_type_id')
+            )
             
             # Calculate expiration (24 hours from now)
             expires_at = timezone.now() + timezone.timedelta(hours=24)
             
             # Create or update path cache
             RelationshipPath.objects.update_or_create(
-                source_pipeline=first_rel.source_pipeline,
-                source_record_id=first_rel.source_record_id,
-                target_pipeline=first_rel.target_pipeline,
-                target_record_id=first_rel.target_record_id,
+                source_pipeline_id=source_pipeline_id,
+                source_record_id=source_record_id,
+                target_pipeline_id=target_pipeline_id,
+                target_record_id=target_record_id,
                 path_length=path_length,
                 defaults={
                     'path_relationships': path_relationships,
-                    'path_types': [rel.relationship_type_id for rel in 
-                                 Relationship.objects.filter(id__in=path_relationships)],
+                    'path_types': [types_by_id.get(relationship_id) for relationship_id in path_relationships],
                     'path_strength': 1.0,  # Could calculate actual strength
                     'expires_at': expires_at
                 }
@@ -537,16 +397,6 @@ class RelationshipQueryManager:
         except Exception as e:
             logger.warning(f"Error caching computed path: {e}")
     
-    def _convert_path_to_result(self, cached_path: RelationshipPath) -> Dict[str, Any]:
-        """Convert cached RelationshipPath to result format"""
-        return {
-            'found': True,
-            'path_length': cached_path.path_length,
-            'path_relationships': cached_path.path_relationships,
-            'path': self._reconstruct_path_details(cached_path.path_relationships),
-            'cached': True
-        }
-    
     def _reconstruct_path_details(self, relationship_ids: List[int]) -> List[Dict[str, Any]]:
         """Reconstruct detailed path information from relationship IDs"""
         if not relationship_ids:
@@ -558,8 +408,10 @@ class RelationshipQueryManager:
                 is_deleted=False
             ).select_related('relationship_type', 'source_pipeline', 'target_pipeline')
             
+            # Keep the order of the path
+            position = {relationship_id: index for index, relationship_id in enumerate(relationship_ids)}
             path_details = []
-            for rel in relationships:
+            for rel in sorted(relationships, key=lambda rel: position[rel.id]):
                 path_details.append({
                     'relationship_id': rel.id,
                     'relationship_type': rel.relationship_type.name,
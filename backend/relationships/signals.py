@@ -4,7 +4,11 @@ Relationship signals for automatic relationship management
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import Relationship, RelationshipPath
+from pipelines.models import Record
+from .generations import bump_nodes, bump_tenant
+from .graph import adjacency_cache, invalidate_relationship_adjacency
+from .models import PermissionTraversal, Relationship, RelationshipPath, RelationshipType
+from .permissions import invalidate_traversal_matrices
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,21 +29,15 @@ def handle_relationship_created(sender, instance, created, **kwargs):
         #     if reverse_rel:
         #         logger.info(f"Created reverse relationship: {reverse_rel}")
 
-        # Trigger WebSocket updates for both records involved in the relationship
-        _trigger_websocket_updates_for_relationship(instance, 'created')
-
         # Invalidate related path caches
         _invalidate_path_caches(instance)
     else:
         # Check if this is a soft delete (is_deleted changed to True)
+        # WebSocket updates for both records are queued by realtime.signals
         if instance.is_deleted:
             logger.info(f"Relationship soft-deleted: {instance}")
-            # Trigger WebSocket updates for soft deletion
-            _trigger_websocket_updates_for_relationship(instance, 'deleted')
         else:
             logger.info(f"Relationship updated: {instance}")
-            # Trigger WebSocket updates for relationship updates
-            _trigger_websocket_updates_for_relationship(instance, 'updated')
 
         # Invalidate related path caches for any update
         _invalidate_path_caches(instance)
@@ -50,15 +48,14 @@ def handle_relationship_deleted(sender, instance, **kwargs):
     """Handle relationship deletion"""
     logger.info(f"Relationship deleted: {instance}")
 
-    # Trigger WebSocket updates for both records involved in the relationship
-    _trigger_websocket_updates_for_relationship(instance, 'deleted')
-
     # Invalidate related path caches
     _invalidate_path_caches(instance)
 
 
 def _invalidate_path_caches(relationship):
     """Invalidate cached paths that might be affected by relationship changes"""
+    invalidate_relationship_adjacency(relationship)
+
     try:
         # Find and mark expired all paths that might involve this relationship
         affected_paths = RelationshipPath.objects.filter(
@@ -74,6 +71,30 @@ def _invalidate_path_caches(relationship):
         logger.error(f"Error invalidating path caches: {e}")
 
 
+@receiver(post_save, sender=RelationshipType)
+@receiver(post_delete, sender=RelationshipType)
+def handle_relationship_type_changed(sender, instance, **kwargs):
+    """Cached adjacency records is_bidirectional of every edge of the type"""
+    from django.db import connection
+    adjacency_cache.invalidate(getattr(connection, 'schema_name', 'public'))
+    bump_tenant()
+
+
+@receiver(post_save, sender=PermissionTraversal)
+@receiver(post_delete, sender=PermissionTraversal)
+def handle_permission_traversal_changed(sender, instance, **kwargs):
+    """Traversal permission matrices and the query results filtered by them are cached"""
+    invalidate_traversal_matrices()
+    bump_tenant()
+
+
+@receiver(post_save, sender=Record)
+@receiver(post_delete, sender=Record)
+def handle_record_graph_node_changed(sender, instance, **kwargs):
+    """Cached traversal results carry the titles and data of the records they reach"""
+    bump_nodes([(instance.pipeline_id, instance.id)])
+
+
 # Cleanup expired paths periodically (this could be moved to a management command)
 def cleanup_expired_paths():
     """Clean up expired relationship paths"""
@@ -87,29 +108,3 @@ def cleanup_expired_paths():
 
     except Exception as e:
         logger.error(f"Error cleaning up expired paths: {e}")
-
-
-def _trigger_websocket_updates_for_relationship(relationship, action):
-    """Trigger WebSocket updates for both records involved in a relationship change"""
-    try:
-        # Import here to avoid circular imports
-        from realtime.signals import _trigger_record_update_for_relationship_change
-
-        logger.info(f"🔗 WEBSOCKET: Processing relationship {action} - ID: {relationship.id}")
-        logger.info(f"🔗 WEBSOCKET: Source record: {relationship.source_record_id}, Target record: {relationship.target_record_id}")
-
-        # For bidirectional relationships, we need to update both records
-        # even though we only store one relationship record
-        if relationship.relationship_type.is_bidirectional:
-            logger.info(f"🔗 WEBSOCKET: Triggering bidirectional updates")
-
-            # Trigger update for both records involved
-            _trigger_record_update_for_relationship_change(relationship, True, None)
-        else:
-            logger.info(f"🔗 WEBSOCKET: Triggering unidirectional update")
-            _trigger_record_update_for_relationship_change(relationship, False, None)
-
-    except Exception as e:
-        logger.error(f"❌ WEBSOCKET: Error triggering relationship updates: {e}")
-        import traceback
-        traceback.print_exc()
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""
+Tests for breadth-first relationship graph traversal
+"""
+from django.test import SimpleTestCase
+
+from .graph import AdjacencyCache, Edge, RelationshipGraph
+from .permissions import TraversalPermissionMatrix, TraversalRule
+
+
+class MemoryGraph:
+    """Adjacency loader over a list of (id, type, source, target, bidirectional) edges"""
+
+    def __init__(self, edges):
+        self.edges = edges
+        self.loads = []
+
+    def __call__(self, nodes):
+        self.loads.append(list(nodes))
+        adjacency = {node: [] for node in nodes}
+        for relationship_id, type_id, source, target, bidirectional in self.edges:
+            if source in adjacency:
+                adjacency[source].append(Edge(relationship_id, type_id, target, 'forward', 1.0, bidirectional))
+            if target in adjacency:
+                adjacency[target].append(Edge(relationship_id, type_id, source, 'reverse', 0.5, bidirectional))
+        return adjacency
+
+
+class MemoryGenerations:
+    """Node generations kept in a dict"""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, nodes):
+        return {node: (0, self.values.get(node, 0)) for node in nodes}
+
+    def is_current(self, generations):
+        return self.get(generations) == generations
+
+    def bump(self, node):
+        self.values[node] = self.values.get(node, 0) + 1
+
+
+def node(record_id):
+    return (1, record_id)
+
+
+class RelationshipGraphTest(SimpleTestCase):
+
+    def graph(self, edges):
+        loader = MemoryGraph(edges)
+        graph = RelationshipGraph(
+            schema='test', loader=loader, cache=AdjacencyCache(), generations=MemoryGenerations()
+        )
+        return graph, loader
+
+    def test_traverse_reaches_each_node_once_by_depth(self):
+        graph, loader = self.graph([
+            (1, 10, node(1), node(2), True),
+            (2, 10, node(2), node(3), True),
+            (3, 10, node(1), node(3), True),
+            (4, 10, node(3), node(4), True),
+        ])
+
+        steps = graph.traverse(node(1), max_depth=3, direction='forward')
+
+        self.assertEqual([(s.node, s.depth) for s in steps], [(node(2), 1), (node(3), 1), (node(4), 2)])
+        self.assertEqual(steps[-1].path_relationships, (3, 4))
+        # One adjacency load per level
+        self.assertEqual(len(loader.loads), 3)
+
+    def test_reverse_edges_need_bidirectional_types(self):
+        graph, _ = self.graph([
+            (1, 10, node(2), node(1), True),
+            (2, 20, node(3), node(1), False),
+        ])
+
+        self.assertEqual([s.node for s in graph.traverse(node(1), direction='reverse')], [node(2)])
+        self.assertEqual(graph.traverse(node(1), direction='forward'), [])
+
+    def test_relationship_type_filter(self):
+        graph, _ = self.graph([
+            (1, 10, node(1), node(2), True),
+            (2, 20, node(1), node(3), True),
+        ])
+
+        steps = graph.traverse(node(1), relationship_types=[20])
+        self.assertEqual([s.node for s in steps], [node(3)])
+
+    def test_shortest_path_meets_in_the_middle(self):
+        graph, _ = self.graph([
+            (1, 10, node(1), node(2), False),
+            (2, 10, node(2), node(3), False),
+            (3, 10, node(3), node(4), False),
+            (4, 10, node(4), node(5), False),
+            (5, 10, node(1), node(9), False),
+            (6, 10, node(9), node(5), False),
+        ])
+
+        self.assertEqual(graph.shortest_path(node(1), node(5)), [5, 6])
+        self.assertIsNone(graph.shortest_path(node(1), node(5), max_depth=1))
+
+    def test_shortest_path_follows_only_allowed_directions(self):
+        graph, _ = self.graph([
+            (1, 10, node(2), node(1), False),
+            (2, 20, node(3), node(2), True),
+        ])
+
+        self.assertIsNone(graph.shortest_path(node(1), node(3)))
+        self.assertEqual(graph.shortest_path(node(3), node(1)), [2, 1])
+        self.assertEqual(graph.shortest_path(node(2), node(3)), [2])
+
+    def test_adjacency_is_cached_until_invalidated(self):
+        cache, generations = AdjacencyCache(), MemoryGenerations()
+        loader = MemoryGraph([(1, 10, node(1), node(2), True)])
+
+        def traverse(schema='test'):
+            graph = RelationshipGraph(schema=schema, loader=loader, cache=cache, generations=generations)
+            graph.traverse(node(1))
+            return graph
+
+        traverse()
+        traverse()
+        traverse('other')
+        self.assertEqual(len(loader.loads), 2)
+
+        cache.invalidate('test', [node(1)])
+        traverse()
+        self.assertEqual(loader.loads[-1], [node(1)])
+
+    def test_generation_bump_outdates_cached_adjacency(self):
+        cache, generations = AdjacencyCache(), MemoryGenerations()
+        loader = MemoryGraph([(1, 10, node(1), node(2), True)])
+        graph = RelationshipGraph(schema='test', loader=loader, cache=cache, generations=generations)
+        graph.traverse(node(1))
+        observed = dict(graph.observed)
+
+        loader.edges.append((2, 10, node(1), node(3), True))
+        generations.bump(node(1))
+        self.assertFalse(generations.is_current(observed))
+
+        graph = RelationshipGraph(schema='test', loader=loader, cache=cache, generations=generations)
+        self.assertEqual([s.node for s in graph.traverse(node(1))], [node(2), node(3)])
+        self.assertEqual(graph.observed, {node(1): (0, 1)})
+
+    def test_cache_evicts_least_recently_used(self):
+        cache = AdjacencyCache(size=2)
+        generations = {node(i): (0, 0) for i in (1, 2, 3)}
+        cache.set_many('test', {node(1): [], node(2): []}, generations)
+        cache.get_many('test', {node(1): (0, 0)})
+        cache.set_many('test', {node(3): []}, generations)
+
+        self.assertEqual(set(cache.get_many('test', generations)), {node(1), node(3)})
+
+
+class TraversalPruningTest(SimpleTestCase):
+
+    def test_forbidden_edges_are_pruned_during_traversal(self):
+        loader = MemoryGraph([
+            (1, 10, node(1), node(2), True),
+            (2, 20, node(1), node(3), True),
+            (3, 10, node(3), node(4), True),
+            (4, 10, node(5), node(1), True),
+        ])
+        matrix = TraversalPermissionMatrix({
+            20: TraversalRule(can_traverse_forward=False),
+            10: TraversalRule(can_traverse_reverse=False),
+        })
+        graph = RelationshipGraph(schema='test', loader=loader, cache=AdjacencyCache(), generations=MemoryGenerations())
+
+        steps = graph.traverse(
+            node(1), max_depth=3,
+            can_cross=lambda edge: matrix.can_traverse(edge.relationship_type_id, edge.direction)
+        )
+
+        # Node 4 is only reachable through the forbidden type 20, node 5 through a forbidden reverse edge
+        self.assertEqual([s.node for s in steps], [node(2)])
+
+    def test_field_visibility_combines_rule_and_base_permissions(self):
+        loads = []
+        base = {'pipelines': {'7': {'fields': {'name': True, 'salary': True, 'notes': False}}}}
+        matrix = TraversalPermissionMatrix(
+            {10: TraversalRule(restricted_fields={'7': {'salary': True}})},
+            base_permissions=lambda: loads.append(1) or base
+        )
+
+        self.assertEqual(matrix.visible_fields(10, 7), {'name': True, 'salary': False, 'notes': False})
+        self.assertEqual(matrix.visible_fields(20, 7), {'name': True, 'salary': True, 'notes': False})
+        self.assertEqual(matrix.visible_fields(10, 7), {'name': True, 'salary': False, 'notes': False})
+        self.assertEqual(len(loads), 1)
+        self.assertFalse(TraversalPermissionMatrix({}, authenticated=False).can_traverse(10))
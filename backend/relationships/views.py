@@ -29,6 +29,7 @@ from .serializers import (
     RelationshipStatsSerializer,
 )
 from .permissions import RelationshipPermissionManager
+from .generations import query_cache_stats
 from .queries import RelationshipQueryManager
 
 
@@ -232,7 +233,8 @@ class RelationshipViewSet(viewsets.ModelViewSet):
             'relationship_types_count': relationship_types_count,
             'most_connected_records': most_connected,
             'relationship_distribution': type_distribution,
-            'recent_activity': recent_activity
+            'recent_activity': recent_activity,
+            'query_cache': query_cache_stats()
         }
         
         serializer = RelationshipStatsSerializer(stats_data)
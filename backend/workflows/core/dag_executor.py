@@ -0,0 +1,246 @@
+"""
+Parallel executor for a workflow's node graph
+
+Nodes run as soon as every dependency has finished, each in its own
+asyncio task, so independent branches overlap and a fan-out workflow
+takes as long as its critical path. Concurrency is capped per execution
+and per tenant (per event loop).
+
+Context is deterministic whatever the completion order: a node runs on a
+copy of the trigger context with the changes of its ancestors applied in
+topological order, and the execution context receives every node's
+changes in that same order at the end. A node's changes are the context
+keys its processor set plus node_{id} / node_{id}_output.
+
+A failed node with error_handling.continue_on_error counts as finished
+for its dependents; a node runs only when at least one of its
+dependencies succeeded (start nodes always run), otherwise it is skipped.
+Any other failure stops new nodes from starting, lets running ones finish
+and is raised.
+
+A node whose result carries suspend_until (a durable wait) suspends: its
+descendants are deferred while independent branches run on, and after the
+run `suspended` holds the waiting nodes for the engine to checkpoint. A
+resumed run starts from the waiting node with its final result passed in
+`completed_results`; nodes that also depend on nodes outside the resumed
+branch which are not in `completed` stay deferred.
+"""
+import asyncio
+import logging
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+NodeRunner = Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Any]]
+
+DEFAULT_MAX_PARALLEL_NODES = 8
+DEFAULT_MAX_PARALLEL_NODES_PER_TENANT = 32
+
+_tenant_semaphores: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]' = \
+    weakref.WeakKeyDictionary()
+
+
+def _workflow_setting(name: str, default: int) -> int:
+    return getattr(settings, 'WORKFLOW_CONFIG', {}).get(name, default)
+
+
+def tenant_semaphore(tenant_schema: Optional[str], limit: int) -> asyncio.Semaphore:
+    """Semaphore shared by every execution of a tenant on the running event loop"""
+    semaphores = _tenant_semaphores.setdefault(asyncio.get_running_loop(), {})
+    key = tenant_schema or ''
+    if key not in semaphores:
+        semaphores[key] = asyncio.Semaphore(limit)
+    return semaphores[key]
+
+
+def suspended_until(result: Any) -> Optional[str]:
+    """The time a node's result asks its execution to resume at, if it suspends"""
+    if isinstance(result, dict):
+        return result.get('suspend_until')
+    return None
+
+
+def _continues_on_error(node_data: Dict[str, Any]) -> bool:
+    return bool(node_data.get('data', {}).get('error_handling', {}).get('continue_on_error'))
+
+
+class ParallelNodeExecutor:
+    """Runs the nodes of an execution graph (WorkflowEngine._build_execution_graph) concurrently"""
+
+    def __init__(
+        self,
+        graph: Dict[str, Dict[str, Any]],
+        run_node: NodeRunner,
+        tenant_schema: Optional[str] = None,
+        max_parallel: Optional[int] = None,
+        max_parallel_per_tenant: Optional[int] = None
+    ):
+        self.graph = graph
+        self.run_node = run_node
+        self.tenant_schema = tenant_schema
+        self.max_parallel = max_parallel or _workflow_setting('MAX_PARALLEL_NODES', DEFAULT_MAX_PARALLEL_NODES)
+        self.max_parallel_per_tenant = max_parallel_per_tenant or _workflow_setting(
+            'MAX_PARALLEL_NODES_PER_TENANT', DEFAULT_MAX_PARALLEL_NODES_PER_TENANT
+        )
+        self.suspended: Dict[str, Dict[str, Any]] = {}
+        self.deferred: Set[str] = set()
+        self.finished: Set[str] = set()
+
+    def _reachable(self, start_nodes: Iterable[str]) -> Set[str]:
+        reachable: Set[str] = set()
+        stack = [node_id for node_id in start_nodes if node_id in self.graph]
+        while stack:
+            node_id = stack.pop()
+            if node_id in reachable:
+                continue
+            reachable.add(node_id)
+            stack.extend(d for d in self.graph[node_id].get('dependents', []) if d in self.graph)
+        return reachable
+
+    def topological_order(self, start_nodes: Iterable[str]) -> List[str]:
+        """Nodes reachable from start_nodes, dependencies first, ties in definition order"""
+        scope = self._reachable(start_nodes)
+        position = {node_id: index for index, node_id in enumerate(self.graph)}
+        pending = {
+            node_id: len({d for d in self.graph[node_id].get('dependencies', []) if d in scope})
+            for node_id in scope
+        }
+        ready = sorted((n for n, count in pending.items() if count == 0), key=position.get)
+        order = []
+        while ready:
+            node_id = ready.pop(0)
+            order.append(node_id)
+            for dependent in sorted(set(self.graph[node_id].get('dependents', [])) & scope, key=position.get):
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    ready.append(dependent)
+            ready.sort(key=position.get)
+
+        if len(order) < len(scope):
+            logger.warning(f"Workflow graph has a cycle; not running nodes {sorted(scope - set(order))}")
+        return order
+
+    async def run(
+        self,
+        context: Dict[str, Any],
+        start_nodes: Iterable[str],
+        completed_results: Optional[Dict[str, Any]] = None,
+        completed: Optional[Iterable[str]] = None
+    ) -> Dict[str, Any]:
+        """Execute the graph from start_nodes, merging node changes into `context`"""
+        start_nodes = list(start_nodes)
+        completed_results = completed_results or {}
+        completed = set(completed) if completed is not None else None
+        order = self.topological_order(start_nodes)
+        index = {node_id: i for i, node_id in enumerate(order)}
+        dependencies = {
+            node_id: sorted({d for d in self.graph[node_id].get('dependencies', []) if d in index}, key=index.get)
+            for node_id in order
+        }
+        ancestors: Dict[str, Set[str]] = {}
+        for node_id in order:
+            ancestors[node_id] = set(dependencies[node_id])
+            for dependency in dependencies[node_id]:
+                ancestors[node_id] |= ancestors[dependency]
+
+        base = dict(context)
+        changes: Dict[str, Dict[str, Any]] = {}
+        succeeded: Set[str] = set()
+        resolved: Set[str] = set()
+        waiting: Dict[str, Dict[str, Any]] = {}
+        deferred: Set[str] = set()
+        failures: Dict[str, BaseException] = {}
+        running: Dict[asyncio.Task, str] = {}
+        execution_limit = asyncio.Semaphore(self.max_parallel)
+        tenant_limit = tenant_semaphore(self.tenant_schema, self.max_parallel_per_tenant)
+        starts = set(start_nodes)
+
+        def node_context(node_id: str) -> Dict[str, Any]:
+            node_ctx = dict(base)
+            for ancestor in sorted(ancestors[node_id], key=index.get):
+                node_ctx.update(changes.get(ancestor, {}))
+            return node_ctx
+
+        async def execute(node_id: str) -> Dict[str, Any]:
+            node_ctx = node_context(node_id)
+            snapshot = dict(node_ctx)
+            if node_id in completed_results:
+                result = completed_results[node_id]
+            else:
+                async with tenant_limit, execution_limit:
+                    result = await self.run_node(self.graph[node_id], node_ctx)
+            if suspended_until(result):
+                waiting[node_id] = result
+                return {}
+            node_changes = {
+                key: value for key, value in node_ctx.items()
+                if key not in snapshot or snapshot[key] is not value
+            }
+            if result and isinstance(result, dict):
+                node_changes[f"node_{node_id}"] = result
+                if 'output' in result:
+                    node_changes[f"node_{node_id}_output"] = result['output']
+            return node_changes
+
+        def blocked(node_id: str) -> bool:
+            if any(d in waiting or d in deferred for d in dependencies[node_id]):
+                return True
+            # Resumed runs: dependencies outside this branch must have completed before
+            return completed is not None and any(
+                d not in index and d not in completed for d in self.graph[node_id].get('dependencies', [])
+            )
+
+        def ready_nodes() -> List[str]:
+            return [
+                node_id for node_id in order
+                if node_id not in resolved and node_id not in running.values()
+                and all(d in resolved for d in dependencies[node_id])
+            ]
+
+        try:
+            while True:
+                for node_id in ([] if failures else ready_nodes()):
+                    if blocked(node_id):
+                        deferred.add(node_id)
+                        resolved.add(node_id)
+                    elif node_id in starts or any(d in succeeded for d in dependencies[node_id]):
+                        running[asyncio.ensure_future(execute(node_id))] = node_id
+                    else:
+                        # Every dependency failed with continue_on_error or was skipped
+                        logger.info(f"Skipping node {node_id}: no dependency succeeded")
+                        resolved.add(node_id)
+                if not failures and ready_nodes():
+                    continue
+                if not running:
+                    break
+
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(finished, key=lambda t: index[running[t]]):
+                    node_id = running.pop(task)
+                    error = task.exception()
+                    if error is None and node_id in waiting:
+                        logger.info(f"Node {node_id} suspends the execution until {suspended_until(waiting[node_id])}")
+                    elif error is None:
+                        changes[node_id] = task.result()
+                        succeeded.add(node_id)
+                    else:
+                        logger.error(f"Node {node_id} execution failed: {error}")
+                        if not _continues_on_error(self.graph[node_id]):
+                            failures[node_id] = error
+                    resolved.add(node_id)
+        finally:
+            for task in running:
+                task.cancel()
+
+        if failures:
+            raise failures[min(failures, key=index.get)]
+
+        self.suspended = waiting
+        self.deferred = deferred
+        self.finished = resolved - deferred - set(waiting)
+        for node_id in order:
+            context.update(changes.get(node_id, {}))
+        return context
@@ -0,0 +1,111 @@
+"""
+Buffered node logs for a workflow execution
+
+Node logs are built in memory as nodes start and finish and written with
+one bulk_create per checkpoint: once FLUSH_SIZE finished logs are pending,
+once FLUSH_INTERVAL seconds have passed since the last write, and when the
+execution ends (flush_all, which also writes logs of nodes that never
+finished). Rows are inserted in their final state, so no log is written
+twice. Live progress goes through the broadcaster and is not delayed.
+"""
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django_tenants.utils import schema_context
+
+from ..models import ExecutionStatus, WorkflowExecution, WorkflowExecutionLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_SIZE = 50
+DEFAULT_FLUSH_INTERVAL = 5.0  # seconds
+
+
+class ExecutionLogBuffer:
+    """Collects the node logs of one execution and writes them in batches"""
+
+    def __init__(
+        self,
+        execution: WorkflowExecution,
+        tenant_schema: str,
+        flush_size: Optional[int] = None,
+        flush_interval: Optional[float] = None
+    ):
+        config = getattr(settings, 'WORKFLOW_CONFIG', {})
+        self.execution = execution
+        self.tenant_schema = tenant_schema
+        self.flush_size = flush_size or config.get('EXECUTION_LOG_FLUSH_SIZE', DEFAULT_FLUSH_SIZE)
+        self.flush_interval = flush_interval or config.get('EXECUTION_LOG_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+        self.running: List[WorkflowExecutionLog] = []
+        self.finished: List[WorkflowExecutionLog] = []
+        self.written = 0
+        self._last_flush = time.monotonic()
+
+    def start(self, node_id: str, node_type: str, node_name: str, input_data: Dict[str, Any]) -> WorkflowExecutionLog:
+        """Log a node as running; nothing is written yet"""
+        log = WorkflowExecutionLog(
+            tenant_id=self.execution.tenant_id,
+            execution=self.execution,
+            node_id=node_id,
+            node_type=node_type,
+            node_name=node_name,
+            status=ExecutionStatus.RUNNING,
+            input_data=input_data,
+            started_at=timezone.now()
+        )
+        self.running.append(log)
+        return log
+
+    def finish(
+        self,
+        log: WorkflowExecutionLog,
+        status: str,
+        duration_ms: int,
+        output_data: Optional[Dict[str, Any]] = None,
+        error_details: Optional[Dict[str, Any]] = None
+    ):
+        log.status = status
+        log.output_data = output_data
+        log.error_details = error_details
+        log.duration_ms = duration_ms
+        log.completed_at = timezone.now()
+        self.running.remove(log)
+        self.finished.append(log)
+
+    def due(self) -> bool:
+        return bool(self.finished) and (
+            len(self.finished) >= self.flush_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        )
+
+    async def checkpoint(self):
+        """Write finished logs if enough are pending or the flush interval has passed"""
+        if self.due():
+            await sync_to_async(self._write)(self._take())
+
+    def _take(self, include_running: bool = False) -> List[WorkflowExecutionLog]:
+        logs, self.finished = self.finished, []
+        if include_running:
+            logs, self.running = logs + self.running, []
+        self._last_flush = time.monotonic()
+        return logs
+
+    def _write(self, logs: List[WorkflowExecutionLog]) -> int:
+        if not logs:
+            return 0
+        try:
+            with schema_context(self.tenant_schema):
+                WorkflowExecutionLog.objects.bulk_create(logs)
+        except Exception as e:
+            logger.error(f"Failed to write {len(logs)} node logs of execution {self.execution.id}: {e}")
+            return 0
+        self.written += len(logs)
+        return len(logs)
+
+    def flush_all(self) -> int:
+        """Write everything still buffered, including nodes that never finished (sync)"""
+        return self._write(self._take(include_running=True))
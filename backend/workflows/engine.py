@@ -13,11 +13,16 @@ from asgiref.sync import sync_to_async
 from pipelines.models import Pipeline, Record, Field
 from tenants.models import Tenant
 from .models import (
-    Workflow, WorkflowExecution, WorkflowExecutionLog,
+    Workflow, WorkflowExecution,
     WorkflowApproval, ExecutionStatus, WorkflowNodeType
 )
 import logging
 from channels.layers import get_channel_layer
+from .core.dag_executor import ParallelNodeExecutor
+from .core.execution_log import ExecutionLogBuffer
+from .recovery.timers import (
+    cancel_timers, claim_timer, latest_wait_checkpoint, resume_result, save_wait_checkpoint, schedule_timer
+)
 
 # Import all node processors
 from .nodes.ai.prompt import AIPromptProcessor
@@ -197,6 +202,7 @@ class WorkflowEngine:
                 )
 
         execution = await create_execution()
+        log_buffer = ExecutionLogBuffer(execution, tenant_schema)
 
         # Broadcast execution started
         if self.broadcaster:
@@ -220,50 +226,23 @@ class WorkflowEngine:
             }
 
             # Ensure Record object is available for FieldPathResolver (relation traversal)
-            if 'record' not in context and 'record_id' in context and 'pipeline_id' in context:
-                # Lazy load Record if only ID was provided
-                @sync_to_async
-                def fetch_record():
-                    from pipelines.models import Record as PipelineRecord
-                    with schema_context(tenant_schema):
-                        try:
-                            return PipelineRecord.objects.get(
-                                id=context['record_id'],
-                                pipeline_id=context['pipeline_id'],
-                                is_deleted=False
-                            )
-                        except PipelineRecord.DoesNotExist:
-                            logger.warning(f"Record {context['record_id']} not found for workflow context")
-                            return None
-
-                record = await fetch_record()
-                if record:
-                    context['record'] = record
-                    logger.debug(f"Loaded Record {record.id} into workflow context for relation traversal")
+            await self._attach_record(context, tenant_schema)
 
             # Execute nodes in dependency order
-            await self._execute_nodes(execution, execution_graph, context, start_node_id)
-
-            # Mark execution as successful using sync_to_async
-            @sync_to_async
-            def mark_success():
-                with schema_context(tenant_schema):
-                    execution.status = ExecutionStatus.SUCCESS
-                    execution.completed_at = timezone.now()
-                    execution.save()
-
-            await mark_success()
+            executor = await self._execute_nodes(execution, execution_graph, context, log_buffer, start_node_id)
 
-            # Update workflow metrics
-            @sync_to_async
-            def update_metrics():
-                with schema_context(tenant_schema):
-                    execution.refresh_from_db()
-                    execution_time_ms = int((execution.completed_at - execution.started_at).total_seconds() * 1000)
-                    workflow.update_performance_metrics(execution_time_ms, True)
-                    workflow.save()
+            # Waiting nodes: checkpoint and release the worker until their timers fire
+            if executor.suspended:
+                await sync_to_async(self._suspend_execution)(
+                    execution, log_buffer, tenant_schema, context, executor.finished, executor.suspended
+                )
+                logger.info(f"Workflow {workflow.name} paused on durable timers in tenant {tenant_schema}")
+                return execution
 
-            await update_metrics()
+            # Write remaining node logs, the final status and workflow metrics in one round trip
+            await sync_to_async(self._finish_execution)(
+                workflow, execution, log_buffer, tenant_schema, ExecutionStatus.SUCCESS
+            )
 
             # Broadcast execution completed
             if self.broadcaster:
@@ -273,27 +252,9 @@ class WorkflowEngine:
             return execution
 
         except Exception as e:
-            # Mark execution as failed using sync_to_async
-            @sync_to_async
-            def mark_failed():
-                with schema_context(tenant_schema):
-                    execution.status = ExecutionStatus.FAILED
-                    execution.error_message = str(e)
-                    execution.completed_at = timezone.now()
-                    execution.save()
-
-            await mark_failed()
-
-            # Update workflow metrics for failure
-            @sync_to_async
-            def update_failure_metrics():
-                with schema_context(tenant_schema):
-                    execution.refresh_from_db()
-                    execution_time_ms = int((execution.completed_at - execution.started_at).total_seconds() * 1000)
-                    workflow.update_performance_metrics(execution_time_ms, False)
-                    workflow.save()
-
-            await update_failure_metrics()
+            await sync_to_async(self._finish_execution)(
+                workflow, execution, log_buffer, tenant_schema, ExecutionStatus.FAILED, str(e)
+            )
 
             # Broadcast execution completed (with error)
             if self.broadcaster:
@@ -302,16 +263,150 @@ class WorkflowEngine:
             logger.error(f"Workflow {workflow.name} execution failed in tenant {tenant_schema}: {e}")
             raise
 
+    async def resume_execution(self, timer_id: str, tenant_schema: str) -> Optional[WorkflowExecution]:
+        """Continue a paused execution from the wait node of a fired durable timer"""
+
+        @sync_to_async
+        def claim():
+            with schema_context(tenant_schema):
+                timer = claim_timer(timer_id)
+                if not timer:
+                    return None
+                execution = WorkflowExecution.objects.select_related('workflow').get(id=timer.execution_id)
+                checkpoint = latest_wait_checkpoint(execution)
+                if execution.status != ExecutionStatus.PAUSED or not checkpoint:
+                    logger.warning(f"Timer {timer_id} fired for execution {execution.id} that is not waiting")
+                    return None
+                execution.status = ExecutionStatus.RUNNING
+                execution.save(update_fields=['status'])
+                return timer, execution, checkpoint
+
+        claimed = await claim()
+        if not claimed:
+            return None
+        timer, execution, checkpoint = claimed
+        workflow = execution.workflow
+        log_buffer = ExecutionLogBuffer(execution, tenant_schema)
+
+        state = checkpoint.execution_state
+        waiting = dict(state.get('waiting_nodes', {}))
+        completed = set(state.get('completed_nodes', []))
+        node_result = resume_result(waiting.pop(timer.node_id, {}))
+
+        try:
+            context = dict(checkpoint.context_data)
+            await self._attach_record(context, tenant_schema)
+
+            execution_graph = self._build_execution_graph(workflow.get_nodes(), workflow.get_edges())
+            executor = self._node_executor(execution, execution_graph, context, log_buffer)
+            await executor.run(
+                context, [timer.node_id], completed_results={timer.node_id: node_result}, completed=completed
+            )
+
+            # Other waits still pending: checkpoint the progress and keep waiting
+            waiting.update(executor.suspended)
+            if waiting:
+                await sync_to_async(self._suspend_execution)(
+                    execution, log_buffer, tenant_schema, context, completed | executor.finished, waiting
+                )
+                return execution
+
+            await sync_to_async(self._finish_execution)(
+                workflow, execution, log_buffer, tenant_schema, ExecutionStatus.SUCCESS
+            )
+
+            if self.broadcaster:
+                await self.broadcaster.broadcast_execution_completed(execution)
+
+            logger.info(f"Workflow {workflow.name} resumed and completed in tenant {tenant_schema}")
+            return execution
+
+        except Exception as e:
+            await sync_to_async(self._finish_execution)(
+                workflow, execution, log_buffer, tenant_schema, ExecutionStatus.FAILED, str(e)
+            )
+
+            if self.broadcaster:
+                await self.broadcaster.broadcast_execution_completed(execution)
+
+            logger.error(f"Resumed workflow {workflow.name} execution failed in tenant {tenant_schema}: {e}")
+            raise
+
+    async def _attach_record(self, context: Dict[str, Any], tenant_schema: str):
+        """Load the Record into the context when only its ID was provided"""
+        if 'record' in context or 'record_id' not in context or 'pipeline_id' not in context:
+            return
+
+        @sync_to_async
+        def fetch_record():
+            from pipelines.models import Record as PipelineRecord
+            with schema_context(tenant_schema):
+                try:
+                    return PipelineRecord.objects.get(
+                        id=context['record_id'],
+                        pipeline_id=context['pipeline_id'],
+                        is_deleted=False
+                    )
+                except PipelineRecord.DoesNotExist:
+                    logger.warning(f"Record {context['record_id']} not found for workflow context")
+                    return None
+
+        record = await fetch_record()
+        if record:
+            context['record'] = record
+            logger.debug(f"Loaded Record {record.id} into workflow context for relation traversal")
+
+    def _suspend_execution(
+        self,
+        execution: WorkflowExecution,
+        log_buffer: ExecutionLogBuffer,
+        tenant_schema: str,
+        context: Dict[str, Any],
+        completed_nodes,
+        waiting_nodes: Dict[str, Dict[str, Any]]
+    ):
+        """Flush buffered node logs, checkpoint the execution and register timers for its waiting nodes"""
+        with schema_context(tenant_schema):
+            log_buffer.flush_all()
+            _, timers = save_wait_checkpoint(execution, context, completed_nodes, waiting_nodes)
+            for timer in timers:
+                schedule_timer(timer, tenant_schema)
+
+    def _finish_execution(
+        self,
+        workflow: Workflow,
+        execution: WorkflowExecution,
+        log_buffer: ExecutionLogBuffer,
+        tenant_schema: str,
+        status: str,
+        error_message: str = ''
+    ):
+        """Flush buffered node logs, store the final status and record workflow metrics"""
+        with schema_context(tenant_schema):
+            log_buffer.flush_all()
+
+            execution.status = status
+            execution.completed_at = timezone.now()
+            update_fields = ['status', 'completed_at']
+            if error_message:
+                execution.error_message = error_message
+                update_fields.append('error_message')
+            execution.save(update_fields=update_fields)
+            if status == ExecutionStatus.FAILED:
+                cancel_timers(execution)
+
+            execution_time_ms = int((execution.completed_at - execution.started_at).total_seconds() * 1000)
+            workflow.update_performance_metrics(execution_time_ms, status == ExecutionStatus.SUCCESS)
+
     async def _execute_nodes(
         self,
         execution: WorkflowExecution,
         execution_graph: Dict[str, Any],
         context: Dict[str, Any],
+        log_buffer: ExecutionLogBuffer,
         start_node_id: Optional[str] = None
-    ):
-        """Execute nodes in dependency order"""
-
-        executed_nodes = set()
+    ) -> ParallelNodeExecutor:
+        """Execute nodes in dependency order, independent branches concurrently"""
 
         # Determine starting point
         if start_node_id:
@@ -326,58 +421,32 @@ class WorkflowEngine:
                 if not node_data.get('dependencies', [])
             ]
 
-        # Execute using breadth-first approach
-        queue = start_nodes.copy()
-
-        while queue:
-            node_id = queue.pop(0)
-
-            if node_id in executed_nodes:
-                continue
+        # Run every node as soon as its dependencies are done, merging outputs in topological order
+        executor = self._node_executor(execution, execution_graph, context, log_buffer)
+        await executor.run(context, start_nodes)
+        return executor
 
-            node_data = execution_graph[node_id]
-
-            # Check if all dependencies are satisfied
-            dependencies_met = all(
-                dep in executed_nodes
-                for dep in node_data.get('dependencies', [])
-            )
-
-            if not dependencies_met:
-                # Re-queue for later execution
-                queue.append(node_id)
-                continue
-
-            # Execute the node
-            try:
-                result = await self._execute_single_node(execution, node_data, context)
-                executed_nodes.add(node_id)
-
-                # Update context with node output
-                if result and isinstance(result, dict):
-                    context[f"node_{node_id}"] = result
-                    # Also add specific outputs to context
-                    if 'output' in result:
-                        context[f"node_{node_id}_output"] = result['output']
-
-                # Add dependent nodes to queue
-                for dependent in node_data.get('dependents', []):
-                    if dependent not in queue and dependent not in executed_nodes:
-                        queue.append(dependent)
-
-            except Exception as e:
-                logger.error(f"Node {node_id} execution failed: {e}")
-                # Check if node has error handling
-                if node_data.get('data', {}).get('error_handling', {}).get('continue_on_error'):
-                    executed_nodes.add(node_id)
-                    continue
-                raise
+    def _node_executor(
+        self,
+        execution: WorkflowExecution,
+        execution_graph: Dict[str, Any],
+        context: Dict[str, Any],
+        log_buffer: ExecutionLogBuffer
+    ) -> ParallelNodeExecutor:
+        return ParallelNodeExecutor(
+            execution_graph,
+            lambda node_data, node_context: self._execute_single_node(
+                execution, node_data, node_context, log_buffer
+            ),
+            tenant_schema=context.get('tenant_schema')
+        )
 
     async def _execute_single_node(
         self,
         execution: WorkflowExecution,
         node_data: Dict[str, Any],
-        context: Dict[str, Any]
+        context: Dict[str, Any],
+        log_buffer: ExecutionLogBuffer
     ) -> Dict[str, Any]:
         """Execute a single workflow node using the appropriate processor"""
 
@@ -385,24 +454,10 @@ class WorkflowEngine:
         node_type = node_data['type']
         node_config = node_data.get('data', {})
 
-        # Get tenant from context
-        tenant_schema = context.get('tenant_schema')
-
-        # Create execution log using sync_to_async
-        @sync_to_async
-        def create_log():
-            with schema_context(tenant_schema):
-                return WorkflowExecutionLog.objects.create(
-                    tenant_id=context.get('tenant_id'),
-                    execution=execution,
-                    node_id=node_id,
-                    node_type=node_type,
-                    node_name=node_config.get('name', node_id),
-                    status=ExecutionStatus.RUNNING,
-                    input_data=self._prepare_node_input(node_config, context)
-                )
-
-        log = await create_log()
+        # Buffered execution log, written at the next checkpoint
+        log = log_buffer.start(
+            node_id, node_type, node_config.get('name', node_id), self._prepare_node_input(node_config, context)
+        )
 
         # Broadcast node started
         if self.broadcaster:
@@ -422,17 +477,7 @@ class WorkflowEngine:
 
             # Update log with success
             duration_ms = int((time.time() - start_time) * 1000)
-
-            @sync_to_async
-            def update_log_success():
-                with schema_context(tenant_schema):
-                    log.status = ExecutionStatus.SUCCESS
-                    log.output_data = result
-                    log.duration_ms = duration_ms
-                    log.completed_at = timezone.now()
-                    log.save()
-
-            await update_log_success()
+            log_buffer.finish(log, ExecutionStatus.SUCCESS, duration_ms, output_data=result)
 
             # Broadcast node completed
             if self.broadcaster:
@@ -440,22 +485,16 @@ class WorkflowEngine:
                     execution, node_id, ExecutionStatus.SUCCESS, result, None, duration_ms
                 )
 
+            await log_buffer.checkpoint()
             return result
 
         except Exception as e:
             # Update log with error
             duration_ms = int((time.time() - start_time) * 1000)
-
-            @sync_to_async
-            def update_log_error():
-                with schema_context(tenant_schema):
-                    log.status = ExecutionStatus.FAILED
-                    log.error_details = {'error': str(e), 'type': type(e).__name__}
-                    log.duration_ms = duration_ms
-                    log.completed_at = timezone.now()
-                    log.save()
-
-            await update_log_error()
+            log_buffer.finish(
+                log, ExecutionStatus.FAILED, duration_ms,
+                error_details={'error': str(e), 'type': type(e).__name__}
+            )
 
             # Broadcast node completed (with error)
             if self.broadcaster:
@@ -463,6 +502,8 @@ class WorkflowEngine:
                     execution, node_id, ExecutionStatus.FAILED, None, str(e), duration_ms
                 )
 
+            await log_buffer.checkpoint()
+
             # Check if we should retry
             retry_config = node_config.get('error_handling', {})
             if retry_config.get('retry_count', 0) > 0:
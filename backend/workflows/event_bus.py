@@ -0,0 +1,482 @@
+"""
+Durable trigger event bus on Redis Streams
+
+Record, form and message events are appended to one of PARTITIONS streams
+(`workflow_events:{n}`), chosen by the event's ordering key (the record,
+pipeline or sender it concerns), after the transaction that caused them
+commits. Events survive process restarts and are consumed by any number of
+TriggerEventWorker processes (`manage.py run_trigger_event_worker`), each
+with one long-lived event loop.
+
+- Workers share the partitions through leases, each holding about
+  PARTITIONS / live workers, and read them with XREADGROUP in the
+  `workflow_triggers` consumer group.
+- Within a worker, events with different keys run concurrently up to
+  EVENT_BUS_CONCURRENCY; events with the same key run in stream order.
+  A worker stops reading while that many events are in flight.
+- Delivery is at least once: an event is acknowledged after its handler
+  succeeds. Unacknowledged events are claimed again after RETRY_AFTER_MS
+  (the failed handler's, or the previous owner's after a crash) and moved
+  to the `workflow_events:dead` stream after MAX_DELIVERIES attempts.
+  Completed event ids are remembered for a day, so redelivered events that
+  already ran are acknowledged without running again.
+
+event_bus_stats() reports backlog, pending and dead-letter counts.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import socket
+import time
+import uuid
+import weakref
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+STREAM_PREFIX = 'workflow_events'
+DEAD_LETTER_STREAM = f'{STREAM_PREFIX}:dead'
+WORKERS_KEY = f'{STREAM_PREFIX}:workers'
+GROUP = 'workflow_triggers'
+
+DEFAULT_PARTITIONS = 16
+DEFAULT_CONCURRENCY = 32
+STREAM_MAXLEN = 100000          # Approximate entries kept per partition
+LEASE_MS = 30000
+BALANCE_INTERVAL = 10           # Seconds between lease renewals
+RETRY_AFTER_MS = 60000          # Idle time before an unacknowledged event is claimed again
+MAX_DELIVERIES = 5
+DONE_TTL = 60 * 60 * 24
+READ_BLOCK_MS = 2000
+
+_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]' = weakref.WeakKeyDictionary()
+
+
+def _bus_setting(name: str, default: int) -> int:
+    return getattr(settings, 'WORKFLOW_CONFIG', {}).get(name, default)
+
+
+def partition_count() -> int:
+    return _bus_setting('EVENT_BUS_PARTITIONS', DEFAULT_PARTITIONS)
+
+
+def stream_key(partition: int) -> str:
+    return f"{STREAM_PREFIX}:{partition}"
+
+
+def partition_for(key: str, partitions: Optional[int] = None) -> int:
+    """Stable partition of an ordering key"""
+    return zlib.crc32(key.encode()) % (partitions or partition_count())
+
+
+def _lease_key(partition: int) -> str:
+    return f"{STREAM_PREFIX}:lease:{partition}"
+
+
+def _done_key(event_id: str) -> str:
+    return f"{STREAM_PREFIX}:done:{event_id}"
+
+
+def _redis_client():
+    """redis.asyncio client of the running event loop"""
+    import redis.asyncio as aioredis
+
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = aioredis.from_url(settings.CACHES['default']['LOCATION'], decode_responses=True)
+    return client
+
+
+# =============================================================================
+# PUBLISHING
+# =============================================================================
+
+@dataclass
+class TriggerEvent:
+    """One event as carried by the bus"""
+    id: str
+    event_type: str
+    schema: str
+    key: str
+    data: Dict[str, Any]
+    published_at: str = ''
+
+    def to_fields(self) -> Dict[str, str]:
+        return {
+            'id': self.id,
+            'type': self.event_type,
+            'schema': self.schema,
+            'key': self.key,
+            'data': json.dumps(self.data, default=str),
+            'published_at': self.published_at,
+        }
+
+    @classmethod
+    def from_fields(cls, fields: Dict[str, str]) -> 'TriggerEvent':
+        return cls(
+            id=fields['id'],
+            event_type=fields['type'],
+            schema=fields['schema'],
+            key=fields.get('key', ''),
+            data=json.loads(fields.get('data') or '{}'),
+            published_at=fields.get('published_at', '')
+        )
+
+
+def _current_schema() -> str:
+    from django.db import connection
+    return getattr(connection, 'schema_name', 'public')
+
+
+def publish_trigger_event(
+    event_type: str,
+    data: Dict[str, Any],
+    key: str,
+    schema: Optional[str] = None,
+    on_commit: bool = True
+) -> str:
+    """
+    Append an event for the trigger workers; returns its id
+
+    With on_commit (the default) the event is published once the current
+    transaction commits, so workers never see events of rolled-back writes;
+    otherwise it is published immediately and failures raise.
+    """
+    return publish_trigger_events([(event_type, data, key)], schema=schema, on_commit=on_commit)[0]
+
+
+def publish_trigger_events(
+    events: Iterable[Tuple[str, Dict[str, Any], str]],
+    schema: Optional[str] = None,
+    on_commit: bool = True
+) -> List[str]:
+    """Append (event type, data, key) events in one round trip; see publish_trigger_event"""
+    from django_redis import get_redis_connection
+
+    schema = schema or _current_schema()
+    published_at = timezone.now().isoformat()
+    events = [
+        TriggerEvent(
+            id=uuid.uuid4().hex,
+            event_type=event_type,
+            schema=schema,
+            key=str(key),
+            data=data,
+            published_at=published_at
+        )
+        for event_type, data, key in events
+    ]
+    if not events:
+        return []
+
+    def publish():
+        pipe = get_redis_connection("default").pipeline(transaction=False)
+        for event in events:
+            pipe.xadd(
+                stream_key(partition_for(f"{event.schema}:{event.key}")),
+                event.to_fields(),
+                maxlen=STREAM_MAXLEN,
+                approximate=True
+            )
+        pipe.execute()
+
+    def publish_after_commit():
+        try:
+            publish()
+        except Exception as e:
+            logger.error(f"Failed to publish {len(events)} trigger event(s), first {events[0].event_type} {events[0].id}: {e}")
+
+    if on_commit:
+        transaction.on_commit(publish_after_commit)
+    else:
+        publish()
+    return [event.id for event in events]
+
+
+def event_bus_stats(partitions: Optional[int] = None) -> Dict[str, Any]:
+    """Backlog per partition (entries not yet read by the group), pending and dead-letter counts"""
+    from django_redis import get_redis_connection
+
+    redis = get_redis_connection("default")
+    stats = {'partitions': {}, 'backlog': 0, 'pending': 0}
+    for partition in range(partitions or partition_count()):
+        key = stream_key(partition)
+        try:
+            groups = {g['name'].decode() if isinstance(g['name'], bytes) else g['name']: g for g in redis.xinfo_groups(key)}
+        except Exception:
+            groups = {}
+        group = groups.get(GROUP, {})
+        entry = {
+            'length': redis.xlen(key),
+            'pending': group.get('pending', 0),
+            'lag': group.get('lag') or 0,
+            'owner': redis.get(_lease_key(partition)),
+        }
+        if isinstance(entry['owner'], bytes):
+            entry['owner'] = entry['owner'].decode()
+        stats['partitions'][partition] = entry
+        stats['backlog'] += entry['lag']
+        stats['pending'] += entry['pending']
+    stats['dead_letters'] = redis.xlen(DEAD_LETTER_STREAM)
+    stats['workers'] = redis.zcard(WORKERS_KEY)
+    return stats
+
+
+# =============================================================================
+# CONSUMING
+# =============================================================================
+
+EventHandler = Callable[[TriggerEvent], Awaitable[Any]]
+
+
+@dataclass
+class WorkerStats:
+    processed: int = 0
+    failed: int = 0
+    duplicates: int = 0
+    dead_lettered: int = 0
+    in_flight: int = 0
+    partitions: Set[int] = field(default_factory=set)
+
+
+class TriggerEventWorker:
+    """Consumes the partitions leased to this process and runs the handler per event"""
+
+    def __init__(
+        self,
+        handler: EventHandler,
+        name: Optional[str] = None,
+        redis=None,
+        partitions: Optional[int] = None,
+        concurrency: Optional[int] = None
+    ):
+        self.handler = handler
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._redis = redis
+        self.partitions = partitions or partition_count()
+        self.concurrency = concurrency or _bus_setting('EVENT_BUS_CONCURRENCY', DEFAULT_CONCURRENCY)
+        self.stats = WorkerStats()
+        self._tails: Dict[str, asyncio.Task] = {}
+        self._in_flight: Set[Tuple[str, str]] = set()
+        self._idle: Optional[asyncio.Event] = None
+        self._groups: Set[str] = set()
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = _redis_client()
+        return self._redis
+
+    @property
+    def owned(self) -> Set[int]:
+        return self.stats.partitions
+
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        """Consume until `stop` is set, then finish the events in flight"""
+        stop = stop or asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        next_balance = 0.0
+        try:
+            while not stop.is_set():
+                if time.monotonic() >= next_balance:
+                    await self.balance()
+                    await self.reclaim()
+                    next_balance = time.monotonic() + BALANCE_INTERVAL
+
+                if not self.owned:
+                    await self._sleep(stop, BALANCE_INTERVAL)
+                    continue
+                # Backpressure: read only what there is capacity for
+                capacity = self.concurrency - len(self._in_flight)
+                if capacity <= 0:
+                    await self._wait_for_capacity()
+                    continue
+
+                response = await self.redis.xreadgroup(
+                    GROUP, self.name,
+                    {stream_key(p): '>' for p in sorted(self.owned)},
+                    count=capacity, block=READ_BLOCK_MS
+                )
+                for stream, entries in response or []:
+                    self.dispatch(stream, entries)
+        finally:
+            await self.drain()
+            await self.release()
+
+    async def _sleep(self, stop: asyncio.Event, seconds: float):
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _wait_for_capacity(self):
+        tasks = [task for task in self._tails.values() if not task.done()]
+        if tasks:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+
+    async def drain(self):
+        tasks = [task for task in self._tails.values() if not task.done()]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    # -- partitions -----------------------------------------------------------
+
+    async def balance(self):
+        """Renew this worker's leases and take or give back partitions towards a fair share"""
+        now = time.time()
+        await self.redis.zadd(WORKERS_KEY, {self.name: now})
+        await self.redis.zremrangebyscore(WORKERS_KEY, 0, now - LEASE_MS / 1000)
+        live = max(1, await self.redis.zcard(WORKERS_KEY))
+        share = math.ceil(self.partitions / live)
+
+        owners = await self.redis.mget([_lease_key(p) for p in range(self.partitions)])
+        mine = [p for p, owner in enumerate(owners) if owner == self.name]
+        for partition in mine[share:]:
+            await self._release(partition)
+        for partition in mine[:share]:
+            await self.redis.pexpire(_lease_key(partition), LEASE_MS)
+
+        owned = set(mine[:share])
+        for partition, owner in enumerate(owners):
+            if len(owned) >= share:
+                break
+            if owner is None and await self.redis.set(_lease_key(partition), self.name, nx=True, px=LEASE_MS):
+                await self._ensure_group(stream_key(partition))
+                owned.add(partition)
+        self.stats.partitions = owned
+
+    async def _ensure_group(self, stream: str):
+        if stream in self._groups:
+            return
+        try:
+            await self.redis.xgroup_create(stream, GROUP, id='0', mkstream=True)
+        except Exception as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+        self._groups.add(stream)
+
+    async def _release(self, partition: int):
+        if await self.redis.get(_lease_key(partition)) == self.name:
+            await self.redis.delete(_lease_key(partition))
+
+    async def release(self):
+        for partition in list(self.owned):
+            await self._release(partition)
+        self.stats.partitions = set()
+        await self.redis.zrem(WORKERS_KEY, self.name)
+
+    async def reclaim(self):
+        """Claim events left unacknowledged for RETRY_AFTER_MS in owned partitions"""
+        for partition in sorted(self.owned):
+            stream = stream_key(partition)
+            pending = await self.redis.xpending_range(stream, GROUP, '-', '+', 100, idle=RETRY_AFTER_MS)
+            retry = []
+            for entry in pending:
+                entry_id = entry['message_id']
+                if (stream, entry_id) in self._in_flight:
+                    continue
+                if entry['times_delivered'] >= MAX_DELIVERIES:
+                    await self._dead_letter(stream, entry_id)
+                else:
+                    retry.append(entry_id)
+            if retry:
+                claimed = await self.redis.xclaim(stream, GROUP, self.name, RETRY_AFTER_MS, retry)
+                self.dispatch(stream, [entry for entry in claimed if entry[1]])
+
+    async def _dead_letter(self, stream: str, entry_id: str):
+        entries = await self.redis.xrange(stream, entry_id, entry_id)
+        if entries:
+            await self.redis.xadd(DEAD_LETTER_STREAM, {**entries[0][1], 'stream': stream, 'entry_id': entry_id},
+                                  maxlen=STREAM_MAXLEN, approximate=True)
+        await self.redis.xack(stream, GROUP, entry_id)
+        self.stats.dead_lettered += 1
+        logger.error(f"Moved trigger event {entry_id} of {stream} to the dead-letter stream")
+
+    # -- events ---------------------------------------------------------------
+
+    def dispatch(self, stream: str, entries: List[Tuple[str, Dict[str, str]]]):
+        """Schedule entries; each waits for the previous event with the same key"""
+        for entry_id, fields in entries:
+            if (stream, entry_id) in self._in_flight:
+                continue
+            self._in_flight.add((stream, entry_id))
+            self.stats.in_flight = len(self._in_flight)
+            key = f"{fields.get('schema')}:{fields.get('key')}"
+            previous = self._tails.get(key)
+            task = asyncio.ensure_future(self._run_after(previous, stream, entry_id, fields))
+            self._tails[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._tails.get(key) is task:
+            del self._tails[key]
+
+    async def _run_after(self, previous: Optional[asyncio.Task], stream: str, entry_id: str, fields: Dict[str, str]):
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        try:
+            await self.process(stream, entry_id, fields)
+        finally:
+            self._in_flight.discard((stream, entry_id))
+            self.stats.in_flight = len(self._in_flight)
+
+    async def process(self, stream: str, entry_id: str, fields: Dict[str, str]):
+        """Run the handler once per event id and acknowledge it"""
+        try:
+            event = TriggerEvent.from_fields(fields)
+        except (KeyError, ValueError) as e:
+            logger.error(f"Discarding malformed trigger event {entry_id} of {stream}: {e}")
+            await self.redis.xack(stream, GROUP, entry_id)
+            return
+
+        if await self.redis.exists(_done_key(event.id)):
+            self.stats.duplicates += 1
+            await self.redis.xack(stream, GROUP, entry_id)
+            return
+
+        try:
+            await self.handler(event)
+        except Exception as e:
+            # Left pending; reclaim() retries it after RETRY_AFTER_MS
+            self.stats.failed += 1
+            logger.error(f"Trigger event {event.id} ({event.event_type}) failed: {e}", exc_info=True)
+            return
+
+        await self.redis.set(_done_key(event.id), 1, ex=DONE_TTL)
+        await self.redis.xack(stream, GROUP, entry_id)
+        self.stats.processed += 1
+
+
+# =============================================================================
+# HANDLER
+# =============================================================================
+
+async def run_trigger_event(event: TriggerEvent):
+    """Start the workflows whose trigger nodes match the event"""
+    from asgiref.sync import sync_to_async
+    from django_tenants.utils import schema_context
+    from .trigger_registry import trigger_registry
+
+    trigger_data = dict(event.data)
+    record_id = trigger_data.get('record_id')
+    if event.event_type in ('record_created', 'record_updated') and record_id:
+        @sync_to_async
+        def load_record():
+            from pipelines.models import Record
+            with schema_context(event.schema):
+                return Record.objects.filter(id=record_id, is_deleted=False).first()
+
+        # The live Record is what FieldPathResolver traverses relations from
+        trigger_data['record'] = await load_record()
+
+    await trigger_registry.trigger_workflows(event.event_type, trigger_data, tenant_schema=event.schema)
@@ -0,0 +1,55 @@
+"""
+Management command to consume the trigger event bus
+Run several of these; partitions are shared among the live workers
+"""
+import asyncio
+import json
+import signal
+from django.core.management.base import BaseCommand
+from workflows.event_bus import TriggerEventWorker, event_bus_stats, run_trigger_event
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Run a worker that starts workflows for events on the trigger event bus'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=None,
+            help='Maximum number of events processed at once (default: EVENT_BUS_CONCURRENCY)',
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Print backlog, pending and dead-letter counts and exit',
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(event_bus_stats(), indent=2, default=str))
+            return
+
+        worker = TriggerEventWorker(run_trigger_event, concurrency=options['concurrency'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Starting trigger event worker {worker.name} (concurrency {worker.concurrency})')
+        )
+        asyncio.run(self._run(worker))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Trigger event worker stopped: {worker.stats.processed} processed, '
+                f'{worker.stats.failed} failed, {worker.stats.dead_lettered} dead-lettered'
+            )
+        )
+
+    async def _run(self, worker: TriggerEventWorker):
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        # Finishes the events in flight and releases the partitions before returning
+        await worker.run(stop)
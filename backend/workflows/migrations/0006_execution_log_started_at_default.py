@@ -0,0 +1,19 @@
+# Generated by Django 5.0 on 2026-10-16 19:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0005_alter_workflowexecutionlog_node_type'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='workflowexecutionlog',
+            name='started_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
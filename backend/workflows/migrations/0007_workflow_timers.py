@@ -0,0 +1,36 @@
+# Generated by Django 5.0 on 2026-10-16 19:56
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0006_execution_log_started_at_default'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='workflowcheckpoint',
+            name='checkpoint_type',
+            field=models.CharField(choices=[('auto', 'Automatic'), ('manual', 'Manual'), ('node_completion', 'Node Completion'), ('error_boundary', 'Error Boundary'), ('milestone', 'Milestone'), ('wait', 'Waiting on Timer')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='WorkflowTimer',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('node_id', models.CharField(max_length=100)),
+                ('fire_at', models.DateTimeField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('fired', 'Fired'), ('cancelled', 'Cancelled')], default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('fired_at', models.DateTimeField(blank=True, null=True)),
+                ('checkpoint', models.ForeignKey(blank=True, help_text='Checkpoint the timer was registered with', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='timers', to='workflows.workflowcheckpoint')),
+                ('execution', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timers', to='workflows.workflowexecution')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'fire_at'], name='workflows_w_status_968b82_idx'), models.Index(fields=['execution', 'status'], name='workflows_w_executi_91b13c_idx')],
+            },
+        ),
+    ]
@@ -5,6 +5,7 @@ Leverages existing Phase 3 AI infrastructure
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 import json
 import uuid
 from enum import Enum
@@ -258,29 +259,15 @@ class Workflow(models.Model):
         return self.allowed_users.filter(id=user.id).exists()
     
     def update_performance_metrics(self, execution_time_ms: int, success: bool):
-        """Update workflow performance metrics"""
-        self.execution_count += 1
-        
-        # Update average execution time
-        if self.avg_execution_time_ms == 0:
-            self.avg_execution_time_ms = execution_time_ms
-        else:
-            # Rolling average
-            self.avg_execution_time_ms = int(
-                (self.avg_execution_time_ms * (self.execution_count - 1) + execution_time_ms) / self.execution_count
-            )
-        
-        # Update success rate
-        if success:
-            success_count = int(self.success_rate * (self.execution_count - 1) / 100) if self.execution_count > 1 else 0
-            success_count += 1
-            self.success_rate = (success_count / self.execution_count) * 100
-        else:
-            success_count = int(self.success_rate * (self.execution_count - 1) / 100) if self.execution_count > 1 else 0
-            self.success_rate = (success_count / self.execution_count) * 100
-        
-        from django.utils import timezone
-        self.last_executed_at = timezone.now()
+        """Record one execution in the performance metrics with a single atomic UPDATE"""
+        count = models.F('execution_count')
+        Workflow.objects.filter(pk=self.pk).update(
+            # Running means over the previous count, computed from the row's current values
+            avg_execution_time_ms=(models.F('avg_execution_time_ms') * count + execution_time_ms) / (count + 1),
+            success_rate=(models.F('success_rate') * count + (100.0 if success else 0.0)) / (count + 1),
+            execution_count=count + 1,
+            last_executed_at=timezone.now()
+        )
 
 
 class WorkflowExecution(models.Model):
@@ -341,7 +328,7 @@ class WorkflowExecutionLog(models.Model):
     node_name = models.CharField(max_length=255, blank=True)
     
     # Execution details
-    started_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(default=timezone.now)
     completed_at = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=ExecutionStatus.choices, default=ExecutionStatus.PENDING)
     
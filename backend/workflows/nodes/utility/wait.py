@@ -5,11 +5,14 @@ import asyncio
 import logging
 from typing import Dict, Any
 from datetime import datetime, timedelta
+from django.conf import settings
 from django.utils import timezone
 from workflows.nodes.base import AsyncNodeProcessor
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_DURABLE_WAIT_MIN_SECONDS = 30
+
 
 class WaitDelayProcessor(AsyncNodeProcessor):
     """Process wait/delay nodes for workflow timing control"""
@@ -127,7 +130,21 @@ class WaitDelayProcessor(AsyncNodeProcessor):
                 
             else:
                 raise ValueError(f"Unsupported schedule type: {schedule_type}")
-            
+
+            # Longer waits pause the execution on a durable timer instead of holding the worker
+            if actual_delay >= self._durable_wait_min_seconds():
+                return {
+                    'success': True,
+                    'delay_type': delay_type,
+                    'delay_value': delay_value,
+                    'schedule_type': schedule_type,
+                    'actual_delay_seconds': actual_delay,
+                    'started_at': start_time.isoformat(),
+                    'suspend_until': (start_time + timedelta(seconds=actual_delay)).isoformat()
+                }
+
+            if actual_delay > 0:
+                await asyncio.sleep(actual_delay)
             end_time = timezone.now()
             
             return {
@@ -151,8 +168,11 @@ class WaitDelayProcessor(AsyncNodeProcessor):
                 'schedule_type': schedule_type
             }
     
+    def _durable_wait_min_seconds(self) -> float:
+        return getattr(settings, 'WORKFLOW_CONFIG', {}).get('DURABLE_WAIT_MIN_SECONDS', DEFAULT_DURABLE_WAIT_MIN_SECONDS)
+
     async def _process_immediate_delay(self, delay_type: str, delay_value: float) -> float:
-        """Process immediate delay"""
+        """Seconds to wait for an immediate delay"""
         
         if delay_value <= 0:
             return 0
@@ -174,11 +194,10 @@ class WaitDelayProcessor(AsyncNodeProcessor):
             logger.warning(f"Delay capped from {delay_seconds}s to {max_delay}s")
             delay_seconds = max_delay
         
-        await asyncio.sleep(delay_seconds)
         return delay_seconds
     
     async def _process_scheduled_delay(self, schedule_datetime: str, context: Dict[str, Any]) -> float:
-        """Process scheduled delay until specific datetime"""
+        """Seconds to wait until a specific datetime"""
         
         if not schedule_datetime:
             raise ValueError("schedule_datetime required for scheduled delay")
@@ -218,7 +237,6 @@ class WaitDelayProcessor(AsyncNodeProcessor):
         if delay_seconds > max_delay:
             raise ValueError(f"Scheduled delay too long: {delay_seconds}s (max: {max_delay}s)")
         
-        await asyncio.sleep(delay_seconds)
         return delay_seconds
     
     async def _process_business_hours_delay(
@@ -227,7 +245,7 @@ class WaitDelayProcessor(AsyncNodeProcessor):
         delay_value: float, 
         business_hours_config: Dict[str, Any]
     ) -> float:
-        """Process delay respecting business hours"""
+        """Seconds to wait for a delay respecting business hours"""
         
         # Default business hours configuration
         default_config = {
@@ -260,7 +278,6 @@ class WaitDelayProcessor(AsyncNodeProcessor):
             else:
                 total_delay = delay_to_business
             
-            await asyncio.sleep(total_delay)
             return total_delay
     
     def _is_business_hours(self, dt: datetime, config: Dict[str, Any]) -> bool:
@@ -5,12 +5,12 @@ Provides comprehensive workflow execution replay, error recovery, and state rest
 
 from .manager import workflow_recovery_manager
 from .models import (
-    WorkflowCheckpoint, WorkflowRecoveryLog, RecoveryStrategy,
-    CheckpointType, RecoveryStatus
+    WorkflowCheckpoint, WorkflowRecoveryLog, RecoveryStrategy, WorkflowTimer,
+    CheckpointType, RecoveryStatus, TimerStatus
 )
 
 __all__ = [
     'workflow_recovery_manager',
-    'WorkflowCheckpoint', 'WorkflowRecoveryLog', 'RecoveryStrategy',
-    'CheckpointType', 'RecoveryStatus'
+    'WorkflowCheckpoint', 'WorkflowRecoveryLog', 'RecoveryStrategy', 'WorkflowTimer',
+    'CheckpointType', 'RecoveryStatus', 'TimerStatus'
 ]
\ No newline at end of file
@@ -23,6 +23,7 @@ class CheckpointType(models.TextChoices):
     NODE_COMPLETION = 'node_completion', 'Node Completion'
     ERROR_BOUNDARY = 'error_boundary', 'Error Boundary'
     MILESTONE = 'milestone', 'Milestone'
+    WAIT = 'wait', 'Waiting on Timer'
 
 
 class RecoveryStatus(models.TextChoices):
@@ -34,6 +35,13 @@ class RecoveryStatus(models.TextChoices):
     CANCELLED = 'cancelled', 'Cancelled'
 
 
+class TimerStatus(models.TextChoices):
+    """Status of durable workflow timers"""
+    PENDING = 'pending', 'Pending'
+    FIRED = 'fired', 'Fired'
+    CANCELLED = 'cancelled', 'Cancelled'
+
+
 class RecoveryStrategyType(models.TextChoices):
     """Types of recovery strategies"""
     RETRY = 'retry', 'Retry from Last Checkpoint'
@@ -121,6 +129,42 @@ class WorkflowCheckpoint(models.Model):
         return 0.0
 
 
+class WorkflowTimer(models.Model):
+    """
+    Durable timer of a paused execution's wait node
+    The execution resumes from the node's checkpoint when the timer fires
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    
+    # Relationships
+    execution = models.ForeignKey(WorkflowExecution, on_delete=models.CASCADE, related_name='timers')
+    checkpoint = models.ForeignKey(
+        WorkflowCheckpoint,
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='timers',
+        help_text="Checkpoint the timer was registered with"
+    )
+    node_id = models.CharField(max_length=100)
+    
+    # Timer details
+    fire_at = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=TimerStatus.choices, default=TimerStatus.PENDING)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    fired_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'fire_at']),
+            models.Index(fields=['execution', 'status']),
+        ]
+        
+    def __str__(self):
+        return f"Timer {self.node_id} at {self.fire_at} ({self.status})"
+
+
 class RecoveryStrategy(models.Model):
     """
     Recovery strategies for different types of workflow failures
@@ -0,0 +1,146 @@
+"""
+Durable timers for waiting workflow executions
+
+A wait node that suspends (see WaitDelayProcessor) ends its execution's run
+instead of sleeping in it: the engine stores a WAIT checkpoint holding the
+merged context, the nodes completed so far and every pending wait, marks the
+execution paused and registers a WorkflowTimer per new wait. Nothing of the
+execution stays in memory or on a worker while it waits.
+
+A Celery task due at the timer's fire time resumes the execution from the
+wait node (WorkflowEngine.resume_execution); a periodic sweep fires timers
+whose task was lost. Timers are claimed atomically, so a timer resumes its
+execution at most once.
+"""
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import ExecutionStatus, WorkflowExecution
+from .models import CheckpointType, TimerStatus, WorkflowCheckpoint, WorkflowTimer
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_RETENTION_AFTER_FIRE = timedelta(days=30)
+SWEEP_GRACE = timedelta(minutes=1)      # Leave due timers to their own task this long
+
+
+def serializable_context(context: Dict[str, Any]) -> Dict[str, Any]:
+    """The context as stored in a checkpoint; live objects such as the Record are reloaded on resume"""
+    return json.loads(json.dumps({k: v for k, v in context.items() if k != 'record'}, default=str))
+
+
+def _fire_time(waiting_result: Dict[str, Any]) -> datetime:
+    return datetime.fromisoformat(waiting_result['suspend_until'])
+
+
+def latest_wait_checkpoint(execution: WorkflowExecution) -> Optional[WorkflowCheckpoint]:
+    return WorkflowCheckpoint.objects.filter(
+        execution=execution,
+        checkpoint_type=CheckpointType.WAIT
+    ).order_by('-sequence_number').first()
+
+
+def save_wait_checkpoint(
+    execution: WorkflowExecution,
+    context: Dict[str, Any],
+    completed_nodes: Iterable[str],
+    waiting_nodes: Dict[str, Dict[str, Any]]
+) -> Tuple[WorkflowCheckpoint, List[WorkflowTimer]]:
+    """Pause the execution at a WAIT checkpoint; returns it and the timers of newly waiting nodes"""
+    context_data = serializable_context(context)
+    waiting_nodes = json.loads(json.dumps(waiting_nodes, default=str))
+    state = {
+        'execution_id': str(execution.id),
+        'workflow_id': str(execution.workflow_id),
+        'status': ExecutionStatus.PAUSED,
+        'completed_nodes': sorted(completed_nodes),
+        'waiting_nodes': waiting_nodes,
+    }
+    last_fire_at = max(_fire_time(result) for result in waiting_nodes.values())
+
+    with transaction.atomic():
+        last_checkpoint = WorkflowCheckpoint.objects.select_for_update().filter(
+            execution=execution
+        ).order_by('-sequence_number').first()
+
+        checkpoint = WorkflowCheckpoint.objects.create(
+            workflow_id=execution.workflow_id,
+            execution=execution,
+            checkpoint_type=CheckpointType.WAIT,
+            node_id=next(iter(waiting_nodes)),
+            sequence_number=(last_checkpoint.sequence_number + 1) if last_checkpoint else 1,
+            execution_state=state,
+            context_data=context_data,
+            node_outputs=waiting_nodes,
+            description=f"Waiting on {', '.join(waiting_nodes)}",
+            checkpoint_size_bytes=len(json.dumps(state).encode('utf-8')) + len(json.dumps(context_data).encode('utf-8')),
+            expires_at=last_fire_at + CHECKPOINT_RETENTION_AFTER_FIRE
+        )
+
+        pending = WorkflowTimer.objects.filter(execution=execution, status=TimerStatus.PENDING)
+        pending.update(checkpoint=checkpoint)
+        scheduled = set(pending.values_list('node_id', flat=True))
+        timers = WorkflowTimer.objects.bulk_create([
+            WorkflowTimer(execution=execution, checkpoint=checkpoint, node_id=node_id, fire_at=_fire_time(result))
+            for node_id, result in waiting_nodes.items() if node_id not in scheduled
+        ])
+
+        execution.status = ExecutionStatus.PAUSED
+        execution.execution_context = context_data
+        execution.save(update_fields=['status', 'execution_context'])
+
+    logger.info(f"Execution {execution.id} paused at checkpoint {checkpoint.sequence_number} waiting on {list(waiting_nodes)}")
+    return checkpoint, timers
+
+
+def claim_timer(timer_id) -> Optional[WorkflowTimer]:
+    """Mark a pending timer fired; None if it already fired or was cancelled"""
+    now = timezone.now()
+    claimed = WorkflowTimer.objects.filter(id=timer_id, status=TimerStatus.PENDING).update(
+        status=TimerStatus.FIRED, fired_at=now
+    )
+    if not claimed:
+        return None
+    return WorkflowTimer.objects.get(id=timer_id)
+
+
+def cancel_timers(execution: WorkflowExecution) -> int:
+    return WorkflowTimer.objects.filter(execution=execution, status=TimerStatus.PENDING).update(
+        status=TimerStatus.CANCELLED
+    )
+
+
+def resume_result(waiting_result: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Any]:
+    """The wait node's final result once its timer has fired"""
+    now = now or timezone.now()
+    result = {key: value for key, value in waiting_result.items() if key != 'suspend_until'}
+    result['resumed_at'] = now.isoformat()
+    if result.get('started_at'):
+        result['total_wait_time'] = (now - datetime.fromisoformat(result['started_at'])).total_seconds()
+    return result
+
+
+def schedule_timer(timer: WorkflowTimer, tenant_schema: str):
+    """Queue the timer's task for its fire time once the current transaction commits"""
+    from ..tasks import fire_workflow_timer
+
+    transaction.on_commit(lambda: fire_workflow_timer.apply_async(
+        args=[tenant_schema, str(timer.id), str(timer.execution_id)],
+        eta=timer.fire_at
+    ))
+
+
+def overdue_timers(now: Optional[datetime] = None) -> List[Tuple[str, str]]:
+    """(timer id, execution id) of pending timers whose task should have fired them"""
+    now = now or timezone.now()
+    return [
+        (str(timer_id), str(execution_id))
+        for timer_id, execution_id in WorkflowTimer.objects.filter(
+            status=TimerStatus.PENDING, fire_at__lte=now - SWEEP_GRACE
+        ).values_list('id', 'execution_id')
+    ]
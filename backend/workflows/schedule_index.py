@@ -0,0 +1,338 @@
+"""
+Next-fire-time index of scheduled workflow triggers
+
+Every schedule trigger node of an active workflow, across all tenants, is one
+member of a Redis sorted set scored by its next fire time (epoch seconds).
+A tick pops only the members that are due, enqueues their runs according to
+the trigger's misfire policy and reschedules them at their following fire
+time, so its cost grows with the number of due schedules rather than with
+the number of tenants or workflows.
+
+Saving or deleting a workflow resyncs its members once the transaction
+commits. The index is rebuilt from the database when its built marker is
+missing (first tick, or Redis data loss) and by the daily rebuild task.
+"""
+import json
+import logging
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Callable, Iterable, List, Optional
+
+import pytz
+from croniter import croniter
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+INDEX_KEY = 'workflow_schedule_index'
+ENTRIES_KEY = f'{INDEX_KEY}:entries'
+BUILT_KEY = f'{INDEX_KEY}:built'
+
+SCHEDULE_NODE_TYPES = ('trigger_schedule', 'trigger_scheduled')
+
+# How runs missed while the scheduler was behind are handled
+MISFIRE_FIRE_ONCE = 'fire_once'     # One run for all missed fire times (default)
+MISFIRE_FIRE_ALL = 'fire_all'       # One run per missed fire time, up to MAX_CATCH_UP_RUNS
+MISFIRE_SKIP = 'skip'               # Only runs at most MISFIRE_GRACE_SECONDS late
+MISFIRE_POLICIES = (MISFIRE_FIRE_ONCE, MISFIRE_FIRE_ALL, MISFIRE_SKIP)
+
+MAX_CATCH_UP_RUNS = 10
+MISFIRE_GRACE_SECONDS = 300
+TICK_BATCH_SIZE = 500
+
+# Moves a member from the score it was read at to its next fire time;
+# only the tick that wins this compare-and-set enqueues the runs
+_CLAIM_SCRIPT = """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if score and tonumber(score) == tonumber(ARGV[2]) then
+    redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+
+@dataclass
+class ScheduleEntry:
+    """One schedule trigger node as stored in the index"""
+    schema: str
+    workflow_id: str
+    node_id: str
+    cron_expression: str
+    timezone: str = 'UTC'
+    misfire_policy: str = MISFIRE_FIRE_ONCE
+    triggered_by_id: Optional[int] = None
+
+    @property
+    def member(self) -> str:
+        return f"{self.schema}:{self.workflow_id}:{self.node_id}"
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, value) -> 'ScheduleEntry':
+        return cls(**json.loads(value))
+
+    def same_schedule(self, other: 'ScheduleEntry') -> bool:
+        return (self.cron_expression, self.timezone) == (other.cron_expression, other.timezone)
+
+
+def _workflow_key(schema: str, workflow_id) -> str:
+    return f"{INDEX_KEY}:workflow:{schema}:{workflow_id}"
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def schedule_entries(workflow, schema: str) -> List[ScheduleEntry]:
+    """Schedule trigger nodes of an active workflow with a valid cron expression"""
+    if getattr(workflow, 'status', 'active') != 'active':
+        return []
+
+    entries = []
+    for node in (workflow.workflow_definition or {}).get('nodes', []):
+        if node.get('type', '').lower() not in SCHEDULE_NODE_TYPES:
+            continue
+        data = node.get('data') or {}
+        config = data.get('config') if isinstance(data.get('config'), dict) else data
+        cron_expression = config.get('cron_expression') or config.get('cron')
+        if not cron_expression and isinstance(config.get('schedule'), str):
+            cron_expression = config['schedule']
+        tz_name = config.get('timezone') or 'UTC'
+        misfire_policy = config.get('misfire_policy') or MISFIRE_FIRE_ONCE
+
+        if not cron_expression or not croniter.is_valid(cron_expression):
+            logger.warning(f"Skipping schedule trigger {node.get('id')} of workflow {workflow.id}: invalid cron expression")
+            continue
+        if tz_name not in pytz.all_timezones_set:
+            logger.warning(f"Skipping schedule trigger {node.get('id')} of workflow {workflow.id}: unknown timezone {tz_name}")
+            continue
+
+        entries.append(ScheduleEntry(
+            schema=schema,
+            workflow_id=str(workflow.id),
+            node_id=str(node.get('id')),
+            cron_expression=cron_expression,
+            timezone=tz_name,
+            misfire_policy=misfire_policy if misfire_policy in MISFIRE_POLICIES else MISFIRE_FIRE_ONCE,
+            triggered_by_id=getattr(workflow, 'created_by_id', None)
+        ))
+    return entries
+
+
+def next_fire_time(entry: ScheduleEntry, after: datetime) -> datetime:
+    """First fire time of the entry strictly after `after`, in UTC"""
+    tz = pytz.timezone(entry.timezone)
+    local = after.astimezone(tz)
+    return croniter(entry.cron_expression, local).get_next(datetime).astimezone(dt_timezone.utc)
+
+
+def due_runs(entry: ScheduleEntry, scheduled_for: datetime, now: datetime) -> List[datetime]:
+    """Fire times to run for an entry scheduled at `scheduled_for`, under its misfire policy"""
+    missed = [scheduled_for]
+    while len(missed) <= MAX_CATCH_UP_RUNS:
+        following = next_fire_time(entry, missed[-1])
+        if following > now:
+            break
+        missed.append(following)
+
+    if entry.misfire_policy == MISFIRE_FIRE_ALL:
+        return missed[-MAX_CATCH_UP_RUNS:]
+    if entry.misfire_policy == MISFIRE_SKIP:
+        return [t for t in missed[-1:] if (now - t).total_seconds() <= MISFIRE_GRACE_SECONDS]
+    return missed[-1:]
+
+
+def _epoch(moment: datetime) -> int:
+    return int(moment.timestamp())
+
+
+def _from_epoch(value) -> datetime:
+    return datetime.fromtimestamp(int(float(value)), tz=dt_timezone.utc)
+
+
+def enqueue_scheduled_run(entry: ScheduleEntry, scheduled_for: datetime, catch_up: bool):
+    from .tasks import execute_workflow_async
+
+    execute_workflow_async.delay(
+        tenant_schema=entry.schema,
+        workflow_id=entry.workflow_id,
+        trigger_data={
+            'trigger_type': 'schedule',
+            'node_id': entry.node_id,
+            'cron_expression': entry.cron_expression,
+            'timezone': entry.timezone,
+            'scheduled_for': scheduled_for.isoformat(),
+            'triggered_at': timezone.now().isoformat(),
+            'catch_up': catch_up
+        },
+        triggered_by_id=entry.triggered_by_id
+    )
+
+
+class ScheduleIndex:
+    """The shared next-fire-time index of all tenants' schedule triggers"""
+
+    def __init__(self, redis=None, enqueue: Callable[[ScheduleEntry, datetime, bool], Any] = enqueue_scheduled_run):
+        self._redis = redis
+        self.enqueue = enqueue
+        self._claim = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            from django_redis import get_redis_connection
+            self._redis = get_redis_connection("default")
+        return self._redis
+
+    # -- maintenance ------------------------------------------------------------
+
+    def sync_workflow(self, workflow, schema: str, now: Optional[datetime] = None) -> int:
+        """Replace a workflow's members; unchanged schedules keep their next fire time"""
+        now = now or timezone.now()
+        entries = {entry.member: entry for entry in schedule_entries(workflow, schema)}
+        workflow_key = _workflow_key(schema, workflow.id)
+        current = {_decode(m) for m in self.redis.smembers(workflow_key)}
+
+        stale = current - set(entries)
+        if stale:
+            self._remove_members(stale)
+            self.redis.srem(workflow_key, *stale)
+
+        for member, entry in entries.items():
+            stored = self.redis.hget(ENTRIES_KEY, member)
+            unchanged = stored and ScheduleEntry.from_json(_decode(stored)).same_schedule(entry)
+            self.redis.hset(ENTRIES_KEY, member, entry.to_json())
+            self.redis.sadd(workflow_key, member)
+            if not unchanged or self.redis.zscore(INDEX_KEY, member) is None:
+                self.redis.zadd(INDEX_KEY, {member: _epoch(next_fire_time(entry, now))})
+        return len(entries)
+
+    def remove_workflow(self, workflow_id, schema: str):
+        workflow_key = _workflow_key(schema, workflow_id)
+        members = {_decode(m) for m in self.redis.smembers(workflow_key)}
+        if members:
+            self._remove_members(members)
+        self.redis.delete(workflow_key)
+
+    def _remove_members(self, members: Iterable[str]):
+        members = list(members)
+        self.redis.zrem(INDEX_KEY, *members)
+        self.redis.hdel(ENTRIES_KEY, *members)
+
+    def rebuild(self, workflows_by_schema: Callable[[], Iterable]) -> int:
+        """
+        Resync every tenant's workflows; `workflows_by_schema` yields (schema, workflows)
+
+        workflows is None for a tenant whose workflows could not be loaded:
+        its members are kept as they are rather than swept as stale.
+        """
+        total = 0
+        seen = set()
+        failed_schemas = set()
+        for schema, workflows in workflows_by_schema():
+            if workflows is None:
+                failed_schemas.add(schema)
+                continue
+            for workflow in workflows:
+                total += self.sync_workflow(workflow, schema)
+                seen.add(_workflow_key(schema, workflow.id))
+
+        # Members of workflows that are gone or inactive
+        for member in [_decode(m) for m in self.redis.hkeys(ENTRIES_KEY)]:
+            schema, workflow_id, _ = member.split(':', 2)
+            if schema in failed_schemas:
+                continue
+            if _workflow_key(schema, workflow_id) not in seen:
+                self.remove_workflow(workflow_id, schema)
+        self.redis.set(BUILT_KEY, timezone.now().isoformat())
+        logger.info(f"Rebuilt workflow schedule index: {total} schedule triggers")
+        return total
+
+    def is_built(self) -> bool:
+        return bool(self.redis.exists(BUILT_KEY))
+
+    # -- ticking ----------------------------------------------------------------
+
+    def claim(self, member: str, score, next_score: int) -> bool:
+        if self._claim is None:
+            self._claim = self.redis.register_script(_CLAIM_SCRIPT)
+        return bool(self._claim(keys=[INDEX_KEY], args=[member, score, next_score]))
+
+    def tick(self, now: Optional[datetime] = None, batch_size: int = TICK_BATCH_SIZE) -> int:
+        """Enqueue the runs of every due schedule trigger; returns the number of runs enqueued"""
+        now = now or timezone.now()
+        enqueued = 0
+        while True:
+            due = self.redis.zrangebyscore(INDEX_KEY, '-inf', _epoch(now), start=0, num=batch_size, withscores=True)
+            for member, score in due:
+                enqueued += self._fire(_decode(member), score, now)
+            if len(due) < batch_size:
+                return enqueued
+
+    def _fire(self, member: str, score, now: datetime) -> int:
+        stored = self.redis.hget(ENTRIES_KEY, member)
+        if not stored:
+            self.redis.zrem(INDEX_KEY, member)
+            return 0
+
+        entry = ScheduleEntry.from_json(_decode(stored))
+        scheduled_for = _from_epoch(score)
+        runs = due_runs(entry, scheduled_for, now)
+        if not self.claim(member, score, _epoch(next_fire_time(entry, now))):
+            return 0  # Another tick got here first
+
+        catch_up = runs != [scheduled_for]
+        for run_at in runs:
+            try:
+                self.enqueue(entry, run_at, catch_up=catch_up)
+            except Exception as e:
+                logger.error(f"Failed to enqueue scheduled run of workflow {entry.workflow_id} ({entry.schema}): {e}")
+        if catch_up:
+            logger.info(f"Schedule {member} misfired: {len(runs)} run(s) enqueued for fire times since {scheduled_for}")
+        return len(runs)
+
+
+def tenant_active_workflows():
+    """(schema, active workflows) of every tenant, (schema, None) when they failed to load"""
+    from django_tenants.utils import schema_context
+    from tenants.models import Tenant
+    from .models import Workflow, WorkflowStatus
+
+    for schema in Tenant.objects.exclude(schema_name='public').values_list('schema_name', flat=True):
+        try:
+            with schema_context(schema):
+                workflows = list(Workflow.objects.filter(status=WorkflowStatus.ACTIVE).only(
+                    'id', 'status', 'workflow_definition', 'created_by_id'
+                ))
+        except Exception as e:
+            logger.error(f"Failed to load workflows of tenant {schema} for the schedule index: {e}")
+            workflows = None
+        yield schema, workflows
+
+
+def _current_schema() -> str:
+    from django.db import connection
+    return getattr(connection, 'schema_name', 'public')
+
+
+def reschedule_workflow(workflow, deleted: bool = False, schema: Optional[str] = None):
+    """Resync a workflow's schedule triggers once the current transaction commits"""
+    schema = schema or _current_schema()
+
+    def sync():
+        try:
+            if deleted:
+                schedule_index.remove_workflow(workflow.id, schema)
+            else:
+                schedule_index.sync_workflow(workflow, schema)
+        except Exception as e:
+            logger.error(f"Failed to update schedule index for workflow {workflow.id}: {e}")
+
+    transaction.on_commit(sync)
+
+
+schedule_index = ScheduleIndex()
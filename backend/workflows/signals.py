@@ -1,16 +1,40 @@
 """
 Signal handlers for workflow triggers
+
+Record events are published to the trigger event bus once the saving
+transaction commits; trigger event workers match and start the workflows.
 """
 import logging
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
+from pipelines.bulk_operations import records_bulk_written
 from pipelines.models import Record
-from workflows.views.trigger_events import RecordEventTriggerView
-import asyncio
+from workflows.event_bus import publish_trigger_event, publish_trigger_events
+from workflows.models import Workflow
+from workflows.schedule_index import reschedule_workflow
+from workflows.trigger_index import invalidate_workflow_triggers
 
 logger = logging.getLogger(__name__)
 
 
+def _record_event_data(instance, event_type: str) -> dict:
+    return {
+        'record_id': str(instance.id),
+        'pipeline_id': str(instance.pipeline_id),
+        'event_type': event_type,
+        'record_data': {
+            'id': str(instance.id),
+            'pipeline_id': str(instance.pipeline_id),
+            'data': instance.data,
+            'created_at': instance.created_at.isoformat() if instance.created_at else None,
+            'updated_at': instance.updated_at.isoformat() if instance.updated_at else None,
+        },
+        'triggered_at': timezone.now().isoformat(),
+        'triggered_by': str(instance.updated_by_id) if getattr(instance, 'updated_by_id', None) else None
+    }
+
+
 @receiver(post_save, sender=Record)
 def trigger_record_event_workflows(sender, instance, created, **kwargs):
     """
@@ -19,34 +43,30 @@ def trigger_record_event_workflows(sender, instance, created, **kwargs):
     event_type = 'created' if created else 'updated'
 
     try:
-        # Prepare record data with Record object for FieldPathResolver
-        record_data = {
-            'id': str(instance.id),
-            'pipeline_id': str(instance.pipeline_id),
-            'data': instance.data,
-            'record_object': instance,  # Pass actual Record instance for relation traversal
-            'created_at': instance.created_at.isoformat() if instance.created_at else None,
-            'updated_at': instance.updated_at.isoformat() if instance.updated_at else None,
-        }
-
-        # Create a trigger view instance to handle the event
-        trigger_view = RecordEventTriggerView()
-
-        # Run the async trigger in a sync context
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        # Events of one record are processed in order
+        publish_trigger_event(
+            f'record_{event_type}', _record_event_data(instance, event_type), key=f'record:{instance.id}'
+        )
+    except Exception as e:
+        logger.error(f"Failed to publish record {event_type} event: {e}")
 
-        try:
-            loop.run_until_complete(
-                trigger_view.trigger_record_event(event_type, record_data)
-            )
-        finally:
-            loop.close()
 
-        logger.info(f"Triggered {event_type} workflows for record {instance.id}")
+@receiver(records_bulk_written, sender=Record)
+def trigger_bulk_record_event_workflows(sender, record_ids, created, **kwargs):
+    """
+    Trigger workflows for records written by the bulk write path, which bypasses post_save;
+    one event per record, published together once the batch commits
+    """
+    event_type = 'created' if created else 'updated'
 
+    try:
+        records = Record.objects.filter(id__in=record_ids).order_by('id')
+        publish_trigger_events([
+            (f'record_{event_type}', _record_event_data(record, event_type), f'record:{record.id}')
+            for record in records
+        ])
     except Exception as e:
-        logger.error(f"Failed to trigger record {event_type} workflows: {e}")
+        logger.error(f"Failed to publish bulk record {event_type} events: {e}")
 
 
 @receiver(post_delete, sender=Record)
@@ -55,29 +75,33 @@ def trigger_record_deleted_workflows(sender, instance, **kwargs):
     Trigger workflows when a record is deleted
     """
     try:
-        # Prepare record data (limited since record is being deleted)
-        record_data = {
-            'id': str(instance.id),
-            'pipeline_id': str(instance.pipeline_id),
-            'data': instance.data,
-            'record_object': instance,  # Pass actual Record instance for relation traversal
-        }
+        publish_trigger_event(
+            'record_deleted', _record_event_data(instance, 'deleted'), key=f'record:{instance.id}'
+        )
+    except Exception as e:
+        logger.error(f"Failed to publish record deleted event: {e}")
 
-        # Create a trigger view instance to handle the event
-        trigger_view = RecordEventTriggerView()
 
-        # Run the async trigger in a sync context
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+@receiver(post_save, sender=Workflow)
+@receiver(post_delete, sender=Workflow)
+def reindex_workflow_triggers(sender, instance, **kwargs):
+    """
+    Refresh the workflow's entries in every process's trigger index
+    """
+    invalidate_workflow_triggers(instance.id)
 
-        try:
-            loop.run_until_complete(
-                trigger_view.trigger_record_event('deleted', record_data)
-            )
-        finally:
-            loop.close()
 
-        logger.info(f"Triggered deleted workflows for record {instance.id}")
+@receiver(post_save, sender=Workflow)
+def reschedule_workflow_on_save(sender, instance, **kwargs):
+    """
+    Sync the workflow's schedule triggers into the schedule index
+    """
+    reschedule_workflow(instance)
+
 
-    except Exception as e:
-        logger.error(f"Failed to trigger record deleted workflows: {e}")
\ No newline at end of file
+@receiver(post_delete, sender=Workflow)
+def reschedule_workflow_on_delete(sender, instance, **kwargs):
+    """
+    Drop the workflow's schedule triggers from the schedule index
+    """
+    reschedule_workflow(instance, deleted=True)
@@ -7,6 +7,7 @@ import logging
 from typing import Dict, Any, Optional
 from celery import shared_task
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.utils import timezone
 from django_tenants.utils import schema_context
 from tenants.models import Tenant
@@ -187,6 +188,89 @@ def process_scheduled_workflows():
     }
 
 
+@shared_task(name='workflows.process_scheduled_triggers')
+def process_scheduled_triggers():
+    """
+    Enqueue the runs of every due schedule trigger node across all tenants
+    Runs every minute via Celery Beat; only due entries of the schedule index are read
+    """
+    from .schedule_index import schedule_index, tenant_active_workflows
+
+    if not schedule_index.is_built():
+        schedule_index.rebuild(tenant_active_workflows)
+
+    enqueued = schedule_index.tick()
+    if enqueued:
+        logger.info(f"Scheduled triggers processed: {enqueued} workflow runs enqueued")
+    return enqueued
+
+
+@shared_task(name='workflows.rebuild_schedule_index')
+def rebuild_schedule_index():
+    """
+    Rebuild the schedule index from every tenant's active workflows
+    Runs daily to repair entries missed by workflow save signals
+    """
+    from .schedule_index import schedule_index, tenant_active_workflows
+
+    return schedule_index.rebuild(tenant_active_workflows)
+
+
+RESUME_LOCK_TIMEOUT = 60 * 60
+
+
+@shared_task(bind=True, max_retries=None, name='workflows.fire_workflow_timer')
+def fire_workflow_timer(self, tenant_schema: str, timer_id: str, execution_id: str):
+    """
+    Resume a paused execution when a durable timer of one of its wait nodes is due
+    Queued with the timer's fire time as ETA, and by the overdue timer sweep
+    """
+    # One resume per execution at a time: each continues from the previous one's checkpoint
+    lock_key = f"workflow_execution_resume:{execution_id}"
+    if not cache.add(lock_key, timer_id, RESUME_LOCK_TIMEOUT):
+        raise self.retry(countdown=5)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        execution = loop.run_until_complete(workflow_engine.resume_execution(timer_id, tenant_schema))
+    except Exception as e:
+        logger.error(f"Failed to resume execution {execution_id} from timer {timer_id}: {e}")
+        return {'success': False, 'error': str(e), 'execution_id': execution_id}
+    finally:
+        loop.close()
+        cache.delete(lock_key)
+
+    return {
+        'success': execution is not None,
+        'execution_id': execution_id,
+        'status': execution.status if execution else None
+    }
+
+
+@shared_task(name='workflows.fire_overdue_workflow_timers')
+def fire_overdue_workflow_timers():
+    """
+    Queue durable timers that are past due but were not fired by their own task
+    Runs periodically via Celery Beat as a backstop for lost ETA tasks
+    """
+    from .recovery.timers import overdue_timers
+
+    queued = 0
+    for tenant in Tenant.objects.exclude(schema_name='public'):
+        try:
+            with schema_context(tenant.schema_name):
+                for timer_id, execution_id in overdue_timers():
+                    fire_workflow_timer.delay(tenant.schema_name, timer_id, execution_id)
+                    queued += 1
+        except Exception as e:
+            logger.error(f"Failed to sweep workflow timers in tenant {tenant.schema_name}: {e}")
+
+    if queued:
+        logger.info(f"Queued {queued} overdue workflow timers")
+    return queued
+
+
 @shared_task
 def resume_paused_workflow(execution_id: str, tenant_schema: str, approval_result: Dict[str, Any]):
     """
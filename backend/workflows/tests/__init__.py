@@ -0,0 +1 @@
+# Workflow tests
@@ -0,0 +1,155 @@
+"""
+Test concurrent execution of workflow node graphs
+"""
+import asyncio
+
+from django.test import SimpleTestCase
+
+from workflows.core.dag_executor import ParallelNodeExecutor
+
+
+def build_graph(edges, nodes, continue_on_error=()):
+    graph = {
+        node_id: {
+            'id': node_id,
+            'data': {'error_handling': {'continue_on_error': node_id in continue_on_error}},
+            'dependencies': [],
+            'dependents': []
+        }
+        for node_id in nodes
+    }
+    for source, target in edges:
+        graph[source]['dependents'].append(target)
+        graph[target]['dependencies'].append(source)
+    return graph
+
+
+class Runner:
+    """Node runner with per-node delays and failures that records what it saw"""
+
+    def __init__(self, delays=None, failures=(), waits=()):
+        self.delays = delays or {}
+        self.failures = set(failures)
+        self.waits = set(waits)
+        self.started = []
+        self.seen = {}
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self, node_data, context):
+        node_id = node_data['id']
+        self.started.append(node_id)
+        self.seen[node_id] = dict(context)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delays.get(node_id, 0))
+            if node_id in self.failures:
+                raise RuntimeError(f"{node_id} failed")
+            if node_id in self.waits:
+                return {'success': True, 'suspend_until': '2030-01-01T00:00:00+00:00'}
+            context['last_writer'] = node_id
+            return {'success': True, 'output': node_id.upper()}
+        finally:
+            self.active -= 1
+
+
+class ParallelNodeExecutorTest(SimpleTestCase):
+
+    async def test_independent_branches_run_concurrently(self):
+        graph = build_graph([('start', 'a'), ('start', 'b'), ('a', 'end'), ('b', 'end')],
+                            ['start', 'a', 'b', 'end'])
+        runner = Runner(delays={'a': 0.05, 'b': 0.05})
+
+        await ParallelNodeExecutor(graph, runner, tenant_schema='test').run({}, ['start'])
+
+        self.assertEqual(runner.peak, 2)
+        self.assertEqual(runner.started[-1], 'end')
+        self.assertEqual(runner.seen['end']['node_a_output'], 'A')
+        self.assertEqual(runner.seen['end']['node_b_output'], 'B')
+
+    async def test_context_merge_follows_topological_order(self):
+        graph = build_graph([('start', 'a'), ('start', 'b')], ['start', 'a', 'b'])
+
+        for delays in ({'a': 0.02}, {'b': 0.02}):
+            context = await ParallelNodeExecutor(graph, Runner(delays=delays)).run({'trigger': 1}, ['start'])
+            self.assertEqual(context['last_writer'], 'b')
+            self.assertEqual(context['trigger'], 1)
+
+    async def test_siblings_do_not_see_each_other(self):
+        graph = build_graph([('start', 'a'), ('start', 'b')], ['start', 'a', 'b'])
+        runner = Runner(delays={'b': 0.02})
+
+        await ParallelNodeExecutor(graph, runner).run({}, ['start'])
+
+        self.assertNotIn('node_a', runner.seen['b'])
+        self.assertEqual(runner.seen['b']['last_writer'], 'start')
+
+    async def test_concurrency_is_capped(self):
+        graph = build_graph([('start', n) for n in 'abcdef'], ['start', *'abcdef'])
+        runner = Runner(delays={n: 0.01 for n in 'abcdef'})
+
+        await ParallelNodeExecutor(graph, runner, max_parallel=2).run({}, ['start'])
+
+        self.assertEqual(runner.peak, 2)
+
+    async def test_continue_on_error_skips_nodes_without_a_successful_dependency(self):
+        graph = build_graph([('start', 'a'), ('start', 'b'), ('a', 'after_a'), ('a', 'join'), ('b', 'join')],
+                            ['start', 'a', 'b', 'after_a', 'join'], continue_on_error={'a'})
+        runner = Runner(failures={'a'})
+
+        context = await ParallelNodeExecutor(graph, runner).run({}, ['start'])
+
+        self.assertNotIn('after_a', runner.started)
+        self.assertIn('join', runner.started)
+        self.assertNotIn('node_a', context)
+
+    async def test_failure_stops_new_nodes_and_is_raised(self):
+        graph = build_graph([('start', 'a'), ('start', 'b'), ('a', 'after_a'), ('b', 'after_b')],
+                            ['start', 'a', 'b', 'after_a', 'after_b'])
+        runner = Runner(delays={'b': 0.02}, failures={'a'})
+        context = {}
+
+        with self.assertRaisesMessage(RuntimeError, 'a failed'):
+            await ParallelNodeExecutor(graph, runner).run(context, ['start'])
+
+        self.assertIn('b', runner.started)
+        self.assertNotIn('after_a', runner.started)
+        self.assertNotIn('after_b', runner.started)
+        self.assertEqual(context, {})
+
+    async def test_waiting_nodes_defer_their_descendants(self):
+        graph = build_graph([('start', 'wait'), ('start', 'b'), ('wait', 'a'), ('a', 'join'), ('b', 'join'), ('b', 'c')],
+                            ['start', 'wait', 'b', 'a', 'join', 'c'])
+        executor = ParallelNodeExecutor(graph, Runner(waits={'wait'}))
+
+        context = await executor.run({}, ['start'])
+
+        self.assertEqual(set(executor.suspended), {'wait'})
+        self.assertEqual(executor.deferred, {'a', 'join'})
+        self.assertEqual(executor.finished, {'start', 'b', 'c'})
+        self.assertIn('node_c', context)
+        self.assertNotIn('node_wait', context)
+
+    async def test_resumed_runs_wait_for_other_pending_branches(self):
+        graph = build_graph([('start', 'w1'), ('start', 'w2'), ('w1', 'a'), ('w2', 'b'), ('a', 'join'), ('b', 'join')],
+                            ['start', 'w1', 'w2', 'a', 'b', 'join'])
+        runner = Runner()
+        executor = ParallelNodeExecutor(graph, runner)
+
+        # w1 fires first: join still waits on w2's branch
+        context = await executor.run({}, ['w1'], completed_results={'w1': {'success': True}}, completed={'start'})
+        self.assertEqual(runner.started, ['a'])
+        self.assertEqual(executor.deferred, {'join'})
+        self.assertEqual(context['node_w1'], {'success': True})
+
+        executor = ParallelNodeExecutor(graph, runner)
+        await executor.run(context, ['w2'], completed_results={'w2': {'success': True}}, completed={'start', 'w1', 'a'})
+        self.assertEqual(runner.started, ['a', 'b', 'join'])
+        self.assertEqual(runner.seen['join']['node_a_output'], 'A')
+
+    def test_topological_order_is_stable_and_ignores_unreachable_nodes(self):
+        graph = build_graph([('t1', 'x'), ('t1', 'y'), ('y', 'z'), ('x', 'z'), ('t2', 'w')],
+                            ['t1', 'y', 'x', 'z', 't2', 'w'])
+
+        self.assertEqual(ParallelNodeExecutor(graph, Runner()).topological_order(['t1']), ['t1', 'y', 'x', 'z'])
@@ -0,0 +1,112 @@
+"""
+Test trigger event dispatch on the event bus workers
+"""
+import asyncio
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from workflows.event_bus import GROUP, TriggerEvent, TriggerEventWorker, partition_for, publish_trigger_events
+
+
+class MemoryRedis:
+    """The few redis.asyncio calls event processing makes"""
+
+    def __init__(self):
+        self.values = {}
+        self.acked = []
+
+    async def exists(self, key):
+        return int(key in self.values)
+
+    async def set(self, key, value, **kwargs):
+        self.values[key] = value
+        return True
+
+    async def xack(self, stream, group, entry_id):
+        self.acked.append((stream, group, entry_id))
+        return 1
+
+
+def entry(entry_id, key, event_id=None, schema='tenant'):
+    event = TriggerEvent(
+        id=event_id or entry_id, event_type='record_updated', schema=schema, key=key, data={'n': entry_id}
+    )
+    return entry_id, event.to_fields()
+
+
+class TriggerEventWorkerTest(SimpleTestCase):
+
+    def setUp(self):
+        self.redis = MemoryRedis()
+        self.log = []
+        self.fail = set()
+        self.running = 0
+        self.peak = 0
+
+    async def handler(self, event):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        self.log.append(('start', event.data['n']))
+        await asyncio.sleep(0.01)
+        self.log.append(('end', event.data['n']))
+        self.running -= 1
+        if event.data['n'] in self.fail:
+            raise RuntimeError('boom')
+
+    def worker(self):
+        return TriggerEventWorker(self.handler, name='test', redis=self.redis, partitions=4, concurrency=8)
+
+    async def test_events_of_one_key_run_in_order_and_keys_run_concurrently(self):
+        worker = self.worker()
+        worker.dispatch('s', [entry('1', 'record:a'), entry('2', 'record:b'), entry('3', 'record:a')])
+        await worker.drain()
+
+        self.assertLess(self.log.index(('end', '1')), self.log.index(('start', '3')))
+        self.assertEqual(self.peak, 2)
+        self.assertEqual([e[2] for e in self.redis.acked], ['1', '2', '3'])
+        self.assertEqual(worker.stats.processed, 3)
+        self.assertEqual(worker.stats.in_flight, 0)
+
+    async def test_completed_events_are_acknowledged_without_running_again(self):
+        worker = self.worker()
+        worker.dispatch('s', [entry('1', 'record:a', event_id='e1')])
+        await worker.drain()
+        worker.dispatch('s', [entry('2', 'record:a', event_id='e1')])
+        await worker.drain()
+
+        self.assertEqual(self.log, [('start', '1'), ('end', '1')])
+        self.assertEqual(self.redis.acked, [('s', GROUP, '1'), ('s', GROUP, '2')])
+        self.assertEqual(worker.stats.duplicates, 1)
+
+    async def test_failed_events_stay_pending(self):
+        self.fail.add('1')
+        worker = self.worker()
+        worker.dispatch('s', [entry('1', 'record:a'), entry('2', 'record:a')])
+        await worker.drain()
+
+        # The next event of the key still runs; the failed one waits for reclaim()
+        self.assertEqual([e[2] for e in self.redis.acked], ['2'])
+        self.assertEqual(worker.stats.failed, 1)
+        self.assertNotIn('workflow_events:done:1', self.redis.values)
+
+    def test_partitions_are_stable(self):
+        self.assertEqual(partition_for('tenant:record:a', 16), partition_for('tenant:record:a', 16))
+        self.assertEqual({partition_for(f'tenant:record:{i}', 4) for i in range(100)}, {0, 1, 2, 3})
+
+
+class PublishTriggerEventsTest(SimpleTestCase):
+
+    def test_batch_is_published_in_one_pipeline(self):
+        redis = MagicMock()
+        with patch('django_redis.get_redis_connection', return_value=redis):
+            ids = publish_trigger_events(
+                [('record_created', {'n': i}, f'record:{i}') for i in range(3)], schema='tenant', on_commit=False
+            )
+
+        pipe = redis.pipeline.return_value
+        self.assertEqual(len(set(ids)), 3)
+        self.assertEqual(pipe.xadd.call_count, 3)
+        pipe.execute.assert_called_once()
+        fields = [TriggerEvent.from_fields(call.args[1]) for call in pipe.xadd.call_args_list]
+        self.assertEqual([(f.id, f.key, f.schema) for f in fields], [(i, f'record:{n}', 'tenant') for n, i in enumerate(ids)])
@@ -0,0 +1,63 @@
+"""
+Test batched writing of workflow node logs
+"""
+import uuid
+from contextlib import nullcontext
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from workflows.core.execution_log import ExecutionLogBuffer
+from workflows.models import ExecutionStatus, WorkflowExecution
+
+
+@patch('workflows.core.execution_log.schema_context', lambda schema: nullcontext())
+@patch('workflows.models.WorkflowExecutionLog.objects.bulk_create')
+class ExecutionLogBufferTest(SimpleTestCase):
+
+    def buffer(self, **kwargs):
+        execution = WorkflowExecution(id=uuid.uuid4(), tenant_id=1)
+        return ExecutionLogBuffer(execution, 'test', **kwargs)
+
+    def run_node(self, buffer, node_id, status=ExecutionStatus.SUCCESS):
+        log = buffer.start(node_id, 'condition', node_id, {'input': node_id})
+        buffer.finish(log, status, 5, output_data={'success': True})
+        return log
+
+    async def test_finished_logs_are_written_in_batches(self, bulk_create):
+        buffer = self.buffer(flush_size=2, flush_interval=3600)
+
+        self.run_node(buffer, 'a')
+        await buffer.checkpoint()
+        bulk_create.assert_not_called()
+
+        self.run_node(buffer, 'b')
+        await buffer.checkpoint()
+        bulk_create.assert_called_once()
+        self.assertEqual([log.node_id for log in bulk_create.call_args[0][0]], ['a', 'b'])
+        self.assertEqual(buffer.written, 2)
+
+    async def test_interval_triggers_a_checkpoint(self, bulk_create):
+        buffer = self.buffer(flush_size=100, flush_interval=0.001)
+        self.run_node(buffer, 'a')
+        buffer._last_flush -= 1
+
+        await buffer.checkpoint()
+
+        bulk_create.assert_called_once()
+
+    def test_flush_all_writes_unfinished_nodes_in_their_final_state(self, bulk_create):
+        buffer = self.buffer(flush_size=100, flush_interval=3600)
+        finished = self.run_node(buffer, 'a')
+        running = buffer.start('b', 'wait_delay', 'Wait', {})
+
+        self.assertEqual(buffer.flush_all(), 2)
+
+        logs = bulk_create.call_args[0][0]
+        self.assertEqual(logs, [finished, running])
+        self.assertEqual(finished.status, ExecutionStatus.SUCCESS)
+        self.assertIsNotNone(finished.completed_at)
+        self.assertLessEqual(finished.started_at, finished.completed_at)
+        self.assertEqual(running.status, ExecutionStatus.RUNNING)
+        self.assertEqual(buffer.flush_all(), 0)
+        bulk_create.assert_called_once()
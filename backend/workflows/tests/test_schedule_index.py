@@ -0,0 +1,180 @@
+"""
+Test the next-fire-time index of scheduled workflow triggers
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from workflows.schedule_index import (
+    INDEX_KEY, MISFIRE_FIRE_ALL, MISFIRE_FIRE_ONCE, MISFIRE_SKIP,
+    ScheduleEntry, ScheduleIndex, due_runs, schedule_entries
+)
+
+
+def at(hour, minute=0, day=1):
+    return datetime(2025, 1, day, hour, minute, tzinfo=dt_timezone.utc)
+
+
+def workflow(workflow_id, *configs, status='active'):
+    return SimpleNamespace(
+        id=workflow_id, status=status, created_by_id=7,
+        workflow_definition={'nodes': [
+            {'id': f'n{i}', 'type': 'trigger_schedule', 'data': {'config': config}}
+            for i, config in enumerate(configs)
+        ]}
+    )
+
+
+class MemoryRedis:
+    """The sync redis calls the schedule index makes"""
+
+    def __init__(self):
+        self.zset, self.hashes, self.sets, self.values = {}, {}, {}, {}
+
+    def zadd(self, key, mapping):
+        self.zset.update(mapping)
+
+    def zscore(self, key, member):
+        return self.zset.get(member)
+
+    def zrem(self, key, *members):
+        for member in members:
+            self.zset.pop(member, None)
+
+    def zrangebyscore(self, key, low, high, start=0, num=None, withscores=False):
+        due = sorted((score, member) for member, score in self.zset.items() if score <= high)
+        return [(member, float(score)) for score, member in due[start:start + num]]
+
+    def hset(self, key, field, value):
+        self.hashes[field] = value
+
+    def hget(self, key, field):
+        return self.hashes.get(field)
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.hashes.pop(field, None)
+
+    def hkeys(self, key):
+        return list(self.hashes)
+
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    def srem(self, key, *members):
+        self.sets.get(key, set()).difference_update(members)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def delete(self, key):
+        self.sets.pop(key, None)
+        self.values.pop(key, None)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+    def exists(self, key):
+        return int(key in self.values)
+
+    def register_script(self, script):
+        def claim(keys, args):
+            member, score, next_score = args
+            if self.zset.get(member) is None or float(self.zset[member]) != float(score):
+                return 0
+            self.zset[member] = int(next_score)
+            return 1
+        return claim
+
+
+class ScheduleEntriesTest(SimpleTestCase):
+
+    def test_reads_schedule_trigger_nodes(self):
+        entries = schedule_entries(workflow(
+            'w',
+            {'cron_expression': '0 9 * * *', 'timezone': 'Europe/London'},
+            {'schedule': '*/5 * * * *', 'misfire_policy': 'fire_all'},
+            {'cron_expression': 'not a cron'},
+            {'cron_expression': '0 9 * * *', 'timezone': 'Mars/Olympus'},
+        ), 'tenant')
+
+        self.assertEqual([(e.member, e.cron_expression, e.timezone, e.misfire_policy) for e in entries], [
+            ('tenant:w:n0', '0 9 * * *', 'Europe/London', MISFIRE_FIRE_ONCE),
+            ('tenant:w:n1', '*/5 * * * *', 'UTC', MISFIRE_FIRE_ALL),
+        ])
+        self.assertEqual(schedule_entries(workflow('w', {'cron_expression': '0 9 * * *'}, status='paused'), 't'), [])
+
+
+class DueRunsTest(SimpleTestCase):
+
+    def entry(self, policy):
+        return ScheduleEntry('t', 'w', 'n', '0 * * * *', misfire_policy=policy)
+
+    def test_on_time_run(self):
+        for policy in (MISFIRE_FIRE_ONCE, MISFIRE_FIRE_ALL, MISFIRE_SKIP):
+            self.assertEqual(due_runs(self.entry(policy), at(9), at(9, 0)), [at(9)])
+
+    def test_misfire_policies(self):
+        # Scheduler was down from 9:00 until 12:10
+        self.assertEqual(due_runs(self.entry(MISFIRE_FIRE_ONCE), at(9), at(12, 10)), [at(12)])
+        self.assertEqual(due_runs(self.entry(MISFIRE_FIRE_ALL), at(9), at(12, 10)), [at(9), at(10), at(11), at(12)])
+        self.assertEqual(due_runs(self.entry(MISFIRE_SKIP), at(9), at(12, 10)), [])
+        self.assertEqual(due_runs(self.entry(MISFIRE_SKIP), at(9), at(12, 4)), [at(12)])
+
+
+class ScheduleIndexTest(SimpleTestCase):
+
+    def setUp(self):
+        self.redis = MemoryRedis()
+        self.runs = []
+        self.index = ScheduleIndex(
+            redis=self.redis, enqueue=lambda entry, run_at, catch_up: self.runs.append((entry.member, run_at, catch_up))
+        )
+
+    def test_tick_fires_due_entries_and_reschedules_them(self):
+        self.index.sync_workflow(workflow('a', {'cron_expression': '0 * * * *'}), 't', now=at(8, 30))
+        self.index.sync_workflow(workflow('b', {'cron_expression': '0 12 * * *'}), 't', now=at(8, 30))
+
+        self.assertEqual(self.index.tick(now=at(8, 59)), 0)
+        self.assertEqual(self.index.tick(now=at(9, 0)), 1)
+        self.assertEqual(self.runs, [('t:a:n0', at(9), False)])
+        self.assertEqual(self.redis.zset['t:a:n0'], at(10).timestamp())
+
+        # Down for two hours: one catch-up run under the default policy
+        self.assertEqual(self.index.tick(now=at(12, 5)), 2)
+        self.assertEqual(self.runs[1:], [('t:a:n0', at(12), True), ('t:b:n0', at(12), False)])
+
+    def test_only_one_tick_claims_a_due_entry(self):
+        self.index.sync_workflow(workflow('a', {'cron_expression': '0 * * * *'}), 't', now=at(8, 30))
+        score = self.redis.zset['t:a:n0']
+
+        self.assertTrue(self.index.claim('t:a:n0', score, at(10).timestamp()))
+        self.assertFalse(self.index.claim('t:a:n0', score, at(10).timestamp()))
+
+    def test_sync_keeps_unchanged_schedules_and_drops_removed_ones(self):
+        self.index.sync_workflow(workflow('a', {'cron_expression': '0 * * * *'}, {'cron_expression': '0 9 * * *'}), 't', now=at(8, 30))
+        self.index.sync_workflow(workflow('a', {'cron_expression': '0 * * * *'}), 't', now=at(8, 45))
+
+        self.assertEqual(self.redis.zset, {'t:a:n0': at(9).timestamp()})
+
+        self.index.sync_workflow(workflow('a', {'cron_expression': '30 * * * *'}), 't', now=at(8, 45))
+        self.assertEqual(self.redis.zset, {'t:a:n0': (at(9) - timedelta(minutes=30) + timedelta(hours=1)).timestamp()})
+
+        self.index.remove_workflow('a', 't')
+        self.assertEqual(self.redis.zset, {})
+        self.assertEqual(self.redis.hashes, {})
+
+    def test_rebuild_keeps_members_of_tenants_that_failed_to_load(self):
+        self.index.sync_workflow(workflow('a', {'cron_expression': '0 * * * *'}), 't1', now=at(8, 30))
+        self.index.sync_workflow(workflow('b', {'cron_expression': '0 * * * *'}), 't2', now=at(8, 30))
+        self.index.sync_workflow(workflow('c', {'cron_expression': '0 * * * *'}), 't2', now=at(8, 30))
+
+        # t1 could not be loaded; t2 no longer has workflow c
+        self.index.rebuild(lambda: [
+            ('t1', None),
+            ('t2', [workflow('b', {'cron_expression': '0 * * * *'})]),
+        ])
+
+        self.assertEqual(set(self.redis.zset), {'t1:a:n0', 't2:b:n0'})
+        self.assertTrue(self.index.is_built())
@@ -0,0 +1,130 @@
+"""
+Test the compiled workflow trigger index
+"""
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from workflows.trigger_index import TriggerIndex, TriggerIndexes, invalidate_workflow_triggers
+
+
+def workflow(workflow_id, *nodes, status='active'):
+    return SimpleNamespace(
+        id=workflow_id, name=f'Workflow {workflow_id}', status=status,
+        workflow_definition={'nodes': [{'id': f'n{i}', 'type': t, 'data': d} for i, (t, d) in enumerate(nodes)]}
+    )
+
+
+def record_event(pipeline_id, data=None, changed_fields=None):
+    event = {'pipeline_id': pipeline_id, 'record_data': {'data': data or {}}}
+    if changed_fields is not None:
+        event['changed_fields'] = changed_fields
+    return event
+
+
+def matched(index, event_type, event):
+    return [t.workflow_id for t in index.match(event_type, event)]
+
+
+class TriggerIndexTest(SimpleTestCase):
+
+    def test_record_triggers_are_keyed_by_pipeline(self):
+        index = TriggerIndex()
+        index.add_workflow(workflow('a', ('trigger_record_created', {'pipeline_ids': ['1', '2']})))
+        index.add_workflow(workflow('b', ('trigger_record_created', {})))
+        index.add_workflow(workflow('c', ('trigger_record_created', {'pipeline_ids': ['3']})))
+        index.add_workflow(workflow('d', ('trigger_record_created', {}), status='paused'))
+
+        self.assertEqual(matched(index, 'record_created', record_event(2)), ['a', 'b'])
+        self.assertEqual(matched(index, 'record_created', record_event('3')), ['b', 'c'])
+        self.assertEqual(matched(index, 'record_updated', record_event('3')), [])
+
+    def test_updates_match_watched_fields_and_ignore_fields(self):
+        index = TriggerIndex()
+        index.add_workflow(workflow('watch', ('trigger_record_updated', {'watch_fields': ['stage']})))
+        index.add_workflow(workflow('any', ('trigger_record_updated', {'ignore_fields': ['notes']})))
+
+        self.assertEqual(matched(index, 'record_updated', record_event('1', changed_fields=['stage'])), ['watch', 'any'])
+        self.assertEqual(matched(index, 'record_updated', record_event('1', changed_fields=['notes'])), [])
+        # Without change tracking every trigger stays a candidate
+        self.assertEqual(matched(index, 'record_updated', record_event('1')), ['watch', 'any'])
+
+    def test_field_filters_are_precompiled(self):
+        index = TriggerIndex()
+        index.add_workflow(workflow('a', ('trigger_record_created', {
+            'field_filters': {'status': 'new', 'score': {'$gte': 50}}
+        })))
+
+        self.assertEqual(matched(index, 'record_created', record_event('1', {'status': 'new', 'score': 70})), ['a'])
+        self.assertEqual(matched(index, 'record_created', record_event('1', {'status': 'new', 'score': 20})), [])
+        self.assertEqual(matched(index, 'record_created', record_event('1', {'status': 'new', 'score': 'x'})), [])
+        self.assertEqual(matched(index, 'record_created', record_event('1', {'score': 70})), [])
+
+    def test_forms_and_webhooks(self):
+        index = TriggerIndex()
+        index.add_workflow(workflow(
+            'a',
+            ('trigger_form_submitted', {'pipeline_id': '5', 'form_mode': 'create'}),
+            ('trigger_webhook', {'path': 'hooks/lead'}),
+            ('trigger_form_submitted', {}),
+        ))
+
+        self.assertEqual(matched(index, 'form_submitted', {'pipeline_id': '5', 'form_mode': 'create'}), ['a'])
+        self.assertEqual(matched(index, 'form_submitted', {'pipeline_id': '5', 'form_mode': 'edit'}), [])
+        self.assertEqual(matched(index, 'webhook', {'path': 'hooks/lead'}), ['a'])
+        self.assertEqual(matched(index, 'webhook', {'path': 'hooks/other'}), [])
+
+    def test_reindexing_a_workflow_replaces_its_triggers(self):
+        index = TriggerIndex()
+        index.add_workflow(workflow('a', ('trigger_record_created', {'pipeline_ids': ['1']})))
+        index.add_workflow(workflow('a', ('trigger_record_created', {'pipeline_ids': ['2']})))
+
+        self.assertEqual(matched(index, 'record_created', record_event('1')), [])
+        self.assertEqual(matched(index, 'record_created', record_event('2')), ['a'])
+        self.assertEqual(len(index), 1)
+
+        index.remove_workflow('a')
+        self.assertEqual(len(index), 0)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+@patch('workflows.trigger_index.transaction.on_commit', lambda func: func())
+class TriggerIndexesTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.workflows = {'a': workflow('a', ('trigger_record_created', {}))}
+        self.loads = []
+
+        def loader(schema, workflow_ids=None):
+            self.loads.append(None if workflow_ids is None else set(workflow_ids))
+            return [w for w in self.workflows.values() if workflow_ids is None or w.id in workflow_ids]
+
+        self.indexes = TriggerIndexes(loader=loader)
+
+    def test_changes_are_applied_incrementally(self):
+        index = self.indexes.get('tenant')
+        self.assertIs(self.indexes.get('tenant'), index)
+        self.assertEqual(self.loads, [None])
+
+        self.workflows['b'] = workflow('b', ('trigger_record_created', {}))
+        invalidate_workflow_triggers('b', schema='tenant')
+        del self.workflows['a']
+        invalidate_workflow_triggers('a', schema='tenant')
+
+        self.assertIs(self.indexes.get('tenant'), index)
+        self.assertEqual(self.loads, [None, {'a', 'b'}])
+        self.assertEqual(matched(index, 'record_created', record_event('1')), ['b'])
+        self.assertEqual(index.version, 2)
+
+    def test_lost_change_log_forces_a_rebuild(self):
+        self.indexes.get('tenant')
+        invalidate_workflow_triggers('a', schema='tenant')
+        cache.delete('workflow_trigger_index:tenant:1')
+
+        index = self.indexes.get('tenant')
+
+        self.assertEqual(self.loads, [None, None])
+        self.assertEqual(index.version, 1)
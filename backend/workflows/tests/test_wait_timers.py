@@ -0,0 +1,55 @@
+"""
+Test that wait nodes suspend on durable timers instead of sleeping
+"""
+from datetime import datetime, timedelta
+
+from django.test import SimpleTestCase, override_settings
+
+from workflows.nodes.utility.wait import WaitDelayProcessor
+from workflows.recovery.timers import resume_result, serializable_context
+
+
+def wait_node(**config):
+    return {'id': 'wait', 'type': 'wait_delay', 'data': {'config': config}}
+
+
+@override_settings(WORKFLOW_CONFIG={'DURABLE_WAIT_MIN_SECONDS': 30})
+class WaitDelayProcessorTest(SimpleTestCase):
+
+    async def test_long_waits_suspend_until_the_fire_time(self):
+        result = await WaitDelayProcessor().process(
+            wait_node(schedule_type='immediate', delay_type='hours', delay_value=2), {}
+        )
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['actual_delay_seconds'], 7200)
+        started = datetime.fromisoformat(result['started_at'])
+        self.assertEqual(datetime.fromisoformat(result['suspend_until']) - started, timedelta(hours=2))
+
+    async def test_short_waits_run_in_place(self):
+        result = await WaitDelayProcessor().process(
+            wait_node(schedule_type='immediate', delay_type='seconds', delay_value=0.01), {}
+        )
+
+        self.assertTrue(result['success'])
+        self.assertNotIn('suspend_until', result)
+        self.assertIn('resumed_at', result)
+
+    def test_resume_result_reports_the_wait(self):
+        waiting = {
+            'success': True, 'actual_delay_seconds': 60,
+            'started_at': '2025-01-01T09:00:00+00:00', 'suspend_until': '2025-01-01T09:01:00+00:00'
+        }
+
+        result = resume_result(waiting, now=datetime.fromisoformat('2025-01-01T09:01:05+00:00'))
+
+        self.assertNotIn('suspend_until', result)
+        self.assertEqual(result['total_wait_time'], 65)
+        self.assertEqual(result['resumed_at'], '2025-01-01T09:01:05+00:00')
+
+    def test_checkpointed_context_drops_live_objects(self):
+        context = {'record': object(), 'record_id': 5, 'at': datetime(2025, 1, 1), 'node_a': {'output': [1]}}
+
+        self.assertEqual(serializable_context(context), {
+            'record_id': 5, 'at': '2025-01-01 00:00:00', 'node_a': {'output': [1]}
+        })
@@ -0,0 +1,337 @@
+"""
+Compiled index of workflow trigger nodes
+
+Each process keeps one TriggerIndex per tenant, built from the trigger nodes
+of active workflows. Triggers are bucketed by event type, scope (pipeline ID
+for record and form events, path for webhooks) and watched field, and carry
+precompiled predicates for the rest of their filter configuration, so the
+triggers of an event are found with a few dictionary lookups plus the
+predicates of the candidates.
+
+Saving or deleting a workflow bumps a per-tenant version in the shared cache
+and records the changed workflow under that version. Before matching, a
+process compares its version with the shared one and reloads only the
+workflows changed in between, or rebuilds the index when that change log is
+no longer complete.
+"""
+import logging
+import operator
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+# Trigger node types served by the registry, and the event each one listens to
+TRIGGER_EVENT_TYPES = {
+    'trigger_form_submitted': 'form_submitted',
+    'trigger_schedule': 'schedule',
+    'trigger_webhook': 'webhook',
+    'trigger_record_created': 'record_created',
+    'trigger_record_updated': 'record_updated',
+    'trigger_record_deleted': 'record_deleted',
+}
+RECORD_EVENTS = ('record_created', 'record_updated', 'record_deleted')
+
+FIELD_OPERATORS = {
+    '$eq': operator.eq,
+    '$ne': operator.ne,
+    '$gt': operator.gt,
+    '$gte': operator.ge,
+    '$lt': operator.lt,
+    '$lte': operator.le,
+    '$in': lambda actual, expected: actual in expected,
+    '$nin': lambda actual, expected: actual not in expected,
+}
+
+CHANGE_TTL = 60 * 60  # Processes further behind than this rebuild their index
+MAX_INCREMENTAL_CHANGES = 100
+
+
+@dataclass
+class CompiledTrigger:
+    """One trigger node with its bucket keys and filter predicates"""
+    workflow_id: str
+    node_id: str
+    event_type: str
+    info: Dict[str, Any]
+    keys: List[Tuple[Optional[str], Optional[str]]]    # (scope, watched field)
+    predicates: Tuple[Predicate, ...] = ()
+    order: int = 0
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        return all(predicate(event) for predicate in self.predicates)
+
+
+def _field_filter(name: str, expected: Any) -> Predicate:
+    if isinstance(expected, dict) and expected and all(op in FIELD_OPERATORS for op in expected):
+        checks = [(FIELD_OPERATORS[op], value) for op, value in expected.items()]
+    else:
+        checks = [(operator.eq, expected)]
+
+    def predicate(event: Dict[str, Any]) -> bool:
+        data = _record_values(event)
+        if name not in data:
+            return False
+        try:
+            return all(check(data[name], value) for check, value in checks)
+        except TypeError:
+            return False
+
+    return predicate
+
+
+def _record_values(event: Dict[str, Any]) -> Dict[str, Any]:
+    record_data = event.get('record_data') or {}
+    return record_data.get('data') or {}
+
+
+def _relevant_changes(ignore_fields: Iterable[str]) -> Predicate:
+    ignored = set(ignore_fields)
+
+    def predicate(event: Dict[str, Any]) -> bool:
+        changed = event.get('changed_fields')
+        # Events without change tracking are left to the trigger node
+        return changed is None or bool(set(changed) - ignored)
+
+    return predicate
+
+
+def event_scope(event_type: str, event: Dict[str, Any]) -> Optional[str]:
+    """The bucket scope of an event: its pipeline, or its path for webhooks"""
+    if event_type == 'webhook':
+        return event.get('path')
+    pipeline_id = event.get('pipeline_id')
+    return str(pipeline_id) if pipeline_id is not None else None
+
+
+def compile_trigger_node(workflow, node: Dict[str, Any], order: int = 0) -> Optional[CompiledTrigger]:
+    """Compile a trigger node of an active workflow; None if it cannot fire from events"""
+    node_type = node.get('type', '').lower()
+    event_type = TRIGGER_EVENT_TYPES.get(node_type)
+    if not event_type:
+        return None
+
+    config = node.get('data', {})
+    info = {
+        'workflow_id': str(workflow.id),
+        'workflow_name': workflow.name,
+        'node_id': node.get('id'),
+        'node_config': config,
+        'is_active': True
+    }
+    scopes: List[Optional[str]] = [None]
+    fields: List[Optional[str]] = [None]
+    predicates: List[Predicate] = []
+
+    if event_type == 'form_submitted':
+        pipeline_id = config.get('pipeline_id')
+        if not pipeline_id:
+            return None
+        form_mode = config.get('form_mode')
+        info.update(pipeline_id=pipeline_id, form_mode=form_mode)
+        scopes = [str(pipeline_id)]
+        if form_mode:
+            predicates.append(lambda event: event.get('form_mode') == form_mode)
+
+    elif event_type == 'schedule':
+        if not config.get('schedule'):
+            return None
+        info['schedule'] = config['schedule']
+
+    elif event_type == 'webhook':
+        if not config.get('path'):
+            return None
+        info['path'] = config['path']
+        scopes = [config['path']]
+
+    elif event_type in RECORD_EVENTS:
+        scopes = [str(p) for p in config.get('pipeline_ids') or []] or [None]
+        predicates.extend(_field_filter(name, value) for name, value in (config.get('field_filters') or {}).items())
+        if event_type == 'record_updated':
+            fields = list(config.get('watch_fields') or []) or [None]
+            if config.get('require_actual_changes', True):
+                predicates.append(_relevant_changes(config.get('ignore_fields') or []))
+
+    return CompiledTrigger(
+        workflow_id=str(workflow.id),
+        node_id=node.get('id'),
+        event_type=event_type,
+        info=info,
+        keys=[(scope, name) for scope in scopes for name in fields],
+        predicates=tuple(predicates),
+        order=order
+    )
+
+
+class TriggerIndex:
+    """Trigger nodes of one tenant's active workflows, bucketed for event lookup"""
+
+    def __init__(self, version: int = 0):
+        self.version = version
+        self._buckets: Dict[str, Dict[Optional[str], Dict[Optional[str], List[CompiledTrigger]]]] = {}
+        self._by_workflow: Dict[str, List[CompiledTrigger]] = {}
+        self._order = 0
+
+    def __len__(self):
+        return sum(len(triggers) for triggers in self._by_workflow.values())
+
+    def add_workflow(self, workflow):
+        """(Re)index the trigger nodes of a workflow"""
+        self.remove_workflow(workflow.id)
+        if getattr(workflow, 'status', 'active') != 'active':
+            return
+
+        triggers = []
+        for node in (workflow.workflow_definition or {}).get('nodes', []):
+            self._order += 1
+            trigger = compile_trigger_node(workflow, node, self._order)
+            if not trigger:
+                continue
+            triggers.append(trigger)
+            by_scope = self._buckets.setdefault(trigger.event_type, {})
+            for scope, name in trigger.keys:
+                by_scope.setdefault(scope, {}).setdefault(name, []).append(trigger)
+        if triggers:
+            self._by_workflow[str(workflow.id)] = triggers
+
+    def remove_workflow(self, workflow_id):
+        for trigger in self._by_workflow.pop(str(workflow_id), []):
+            by_scope = self._buckets[trigger.event_type]
+            for scope, name in trigger.keys:
+                by_scope[scope][name].remove(trigger)
+                if not by_scope[scope][name]:
+                    del by_scope[scope][name]
+                if not by_scope[scope]:
+                    del by_scope[scope]
+
+    def match(self, event_type: str, event: Dict[str, Any]) -> List[CompiledTrigger]:
+        """Triggers of `event_type` whose scope, watched fields and filters accept `event`"""
+        by_scope = self._buckets.get(event_type)
+        if not by_scope:
+            return []
+
+        scope = event_scope(event_type, event)
+        changed = event.get('changed_fields')
+        candidates: Dict[int, CompiledTrigger] = {}
+        for key in {scope, None}:
+            by_field = by_scope.get(key)
+            if not by_field:
+                continue
+            if changed is None:
+                buckets = list(by_field.values())
+            else:
+                buckets = [by_field.get(None, [])] + [by_field.get(name, []) for name in changed]
+            for bucket in buckets:
+                for trigger in bucket:
+                    candidates[id(trigger)] = trigger
+
+        return [
+            trigger for trigger in sorted(candidates.values(), key=lambda t: t.order)
+            if trigger.matches(event)
+        ]
+
+
+def _version_key(schema: str) -> str:
+    return f"workflow_trigger_index:{schema}"
+
+
+def _change_key(schema: str, version: int) -> str:
+    return f"workflow_trigger_index:{schema}:{version}"
+
+
+def _current_schema() -> str:
+    from django.db import connection
+    return getattr(connection, 'schema_name', 'public')
+
+
+def invalidate_workflow_triggers(workflow_id, schema: Optional[str] = None):
+    """Reindex a workflow's triggers in every process once the current transaction commits"""
+    schema = schema or _current_schema()
+
+    def bump():
+        try:
+            try:
+                version = cache.incr(_version_key(schema))
+            except ValueError:
+                version = 1 if cache.add(_version_key(schema), 1, None) else cache.incr(_version_key(schema))
+            cache.set(_change_key(schema, version), str(workflow_id), CHANGE_TTL)
+        except Exception as e:
+            logger.error(f"Failed to publish trigger index change for workflow {workflow_id}: {e}")
+
+    transaction.on_commit(bump)
+
+
+def load_active_workflows(schema: str, workflow_ids: Optional[Iterable[str]] = None) -> List:
+    from django_tenants.utils import schema_context
+    from .models import Workflow, WorkflowStatus
+
+    with schema_context(schema):
+        workflows = Workflow.objects.filter(status=WorkflowStatus.ACTIVE).only(
+            'id', 'name', 'status', 'workflow_definition'
+        )
+        if workflow_ids is not None:
+            workflows = workflows.filter(id__in=list(workflow_ids))
+        return list(workflows)
+
+
+class TriggerIndexes:
+    """This process's trigger indexes, one per tenant, kept in step with the shared version"""
+
+    def __init__(self, loader: Callable[..., List] = load_active_workflows):
+        self.loader = loader
+        self._indexes: Dict[str, TriggerIndex] = {}
+        self._lock = threading.Lock()
+
+    def get(self, schema: str) -> TriggerIndex:
+        """The tenant's index, updated to the shared version (may query the database)"""
+        version = int(cache.get(_version_key(schema)) or 0)
+        index = self._indexes.get(schema)
+        if index is not None and index.version == version:
+            return index
+
+        with self._lock:
+            index = self._indexes.get(schema)
+            if index is None or not self._catch_up(schema, index, version):
+                index = self._rebuild(schema, version)
+                self._indexes[schema] = index
+        return index
+
+    def _catch_up(self, schema: str, index: TriggerIndex, version: int) -> bool:
+        if index.version == version:
+            return True
+        missed = range(index.version + 1, version + 1)
+        if not missed or len(missed) > MAX_INCREMENTAL_CHANGES:
+            return False
+
+        changes = cache.get_many([_change_key(schema, v) for v in missed])
+        if len(changes) < len(missed):
+            return False
+
+        workflow_ids = set(changes.values())
+        for workflow_id in workflow_ids:
+            index.remove_workflow(workflow_id)
+        for workflow in self.loader(schema, workflow_ids):
+            index.add_workflow(workflow)
+        index.version = version
+        logger.debug(f"Trigger index of {schema} caught up to version {version} ({len(workflow_ids)} workflows)")
+        return True
+
+    def _rebuild(self, schema: str, version: int) -> TriggerIndex:
+        index = TriggerIndex(version)
+        for workflow in self.loader(schema):
+            index.add_workflow(workflow)
+        logger.debug(f"Built trigger index of {schema} at version {version}: {len(index)} triggers")
+        return index
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+trigger_indexes = TriggerIndexes()
@@ -114,15 +114,16 @@ class TriggerManager:
             """Capture original record values before save"""
             if instance.pk:
                 try:
-                    from pipelines.models import Record
-                    original = Record.objects.get(pk=instance.pk)
-                    self.original_record_values[instance.pk] = {
-                        'data': original.data.copy() if original.data else {},
-                        'status': getattr(original, 'status', None),
-                        'title': original.title,
-                        'pipeline_id': original.pipeline_id,
-                        'updated_at': original.updated_at
-                    }
+                    from pipelines.record_snapshot import get_record_snapshot
+                    original = get_record_snapshot(instance)
+                    if original:
+                        self.original_record_values[instance.pk] = {
+                            'data': original.data.copy(),
+                            'status': original.status,
+                            'title': original.title,
+                            'pipeline_id': original.pipeline_id,
+                            'updated_at': original.updated_at
+                        }
                 except Exception as e:
                     logger.debug(f"Could not capture original values: {e}")
         
@@ -10,6 +10,8 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from asgiref.sync import sync_to_async
+from workflows.event_bus import publish_trigger_event
 from workflows.trigger_registry import trigger_registry
 
 logger = logging.getLogger(__name__)
@@ -39,6 +41,23 @@ class TriggerEventBaseView(APIView):
                 'error': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    async def queue_trigger_event(self, request, trigger_type, trigger_data, key):
+        """Publish an event to the trigger event bus; workers start the matching workflows"""
+        tenant = getattr(request, 'tenant', None)
+        event_id = await sync_to_async(publish_trigger_event)(
+            trigger_type,
+            trigger_data,
+            key=key,
+            schema=tenant.schema_name if tenant else None,
+            on_commit=False
+        )
+
+        return Response({
+            'success': True,
+            'queued': True,
+            'event_id': event_id
+        }, status=status.HTTP_202_ACCEPTED)
+
 
 @method_decorator(csrf_exempt, name='dispatch')
 class FormSubmissionTriggerView(TriggerEventBaseView):
@@ -72,8 +91,8 @@ class FormSubmissionTriggerView(TriggerEventBaseView):
 
             logger.info(f"Form submission received for pipeline {pipeline_id}")
 
-            # Trigger workflows
-            return await self.trigger_workflows('form_submitted', trigger_data)
+            # Queue for the trigger workers
+            return await self.queue_trigger_event(request, 'form_submitted', trigger_data, key=f'pipeline:{pipeline_id}')
 
         except Exception as e:
             logger.error(f"Form submission trigger error: {e}")
@@ -159,8 +178,8 @@ class EmailReceivedTriggerView(TriggerEventBaseView):
 
             logger.info(f"Email received from {email_data['from']}")
 
-            # Trigger workflows
-            return await self.trigger_workflows('email_received', email_data)
+            # Queue for the trigger workers
+            return await self.queue_trigger_event(request, 'email_received', email_data, key=f"sender:{email_data['from']}")
 
         except Exception as e:
             logger.error(f"Email trigger error: {e}")
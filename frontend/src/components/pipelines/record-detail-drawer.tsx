@@ -4,7 +4,7 @@ import { useState, useEffect, useRef, useMemo } from 'react'
 import { Button } from '@/components/ui/button'
 import { pipelinesApi, recordsApi } from '@/lib/api'
 import { useDocumentSubscription } from '@/hooks/use-websocket-subscription'
-import { type RealtimeMessage, type UserPresence } from '@/contexts/websocket-context'
+import { useWebSocket, type RealtimeMessage, type UserPresence } from '@/contexts/websocket-context'
 import { useAuth } from '@/features/auth/context'
 import { evaluateFieldPermissions, evaluateConditionalRules, type FieldWithPermissions, type FieldPermissionResult } from '@/utils/field-permissions'
 import { FieldRenderer, validateFieldValue, getFieldDefaultValue, normalizeFieldValue } from '@/lib/field-system/field-renderer'
@@ -602,6 +602,13 @@ export function RecordDetailDrawer({
   }
 
   // Real-time collaboration
+  // Record version the form data reflects; deltas only apply on top of it
+  const { sendMessage } = useWebSocket()
+  const recordVersionRef = useRef<number | null>(null)
+  useEffect(() => {
+    recordVersionRef.current = null
+  }, [record?.id])
+
   // Subscribe to document updates for collaborative editing
   const { isConnected } = useDocumentSubscription(
     record?.id || '',
@@ -621,9 +628,22 @@ export function RecordDetailDrawer({
           })
 
           // Update form data if provided
-          if (recordData.data) {
+          if (recordData.delta) {
+            const knownVersion = recordVersionRef.current
+            if (knownVersion !== null && recordData.base_version !== knownVersion) {
+              // Missed a version: ask for the full record instead of applying a partial change
+              sendMessage({ type: 'record_snapshot', record_id: recordData.record_id } as any)
+              return
+            }
+            setFormData(prev => ({ ...prev, ...recordData.data }))
+          } else if (recordData.data) {
             setFormData(recordData.data)
+          }
+          if (recordData.version != null) {
+            recordVersionRef.current = recordData.version
+          }
 
+          if (recordData.data) {
             // Log relation field updates specifically
             const relationFields = Object.keys(recordData.data).filter(key => {
               const value = recordData.data[key]
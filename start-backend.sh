@@ -92,6 +92,9 @@ cleanup() {
     
     # Also kill any remaining Celery processes (failsafe)
     pkill -f "celery.*worker" 2>/dev/null || true
+
+    # Stop the realtime outbox worker
+    pkill -f "run_realtime_outbox" 2>/dev/null || true
     
     echo "✅ Backend services stopped."
     exit 0
@@ -141,6 +144,10 @@ sleep 3
 echo "🔍 Verifying tenant workers..."
 python manage.py manage_tenant_workers status
 
+# Start the realtime outbox worker (publishes record events to WebSocket/SSE groups)
+echo "📡 Starting realtime outbox worker..."
+python manage.py run_realtime_outbox &
+
 # Start the Django development server with ASGI support
 echo "🌟 Starting Django ASGI server (daphne) with WebSocket support..."
 echo "📡 Backend will be available at:"
@@ -163,6 +170,7 @@ echo "      • ai - AI processing and field computation"
 echo "      • communications - Messaging and notifications"
 echo "      • analytics - Reports and statistics"
 echo "      • operations - General tasks and maintenance"
+echo "   ✅ Realtime outbox worker (record events to WebSocket/SSE)"
 echo "   ✅ Complete isolation between tenants"
 echo "   ✅ Dynamic worker management based on active tenants"
 echo ""